@@ -0,0 +1,262 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * dbreq_bench.c
+ *
+ *   Microbenchmark for the status updates the LACP protocol thread hands
+ *   to the OVSDB interface thread.  A model OVSDB thread runs passes of
+ *   its loop, most of them short, one in DFLT_LONG_EVERY as long as a
+ *   large reconfiguration or a blocking commit, while a model protocol
+ *   thread sends status updates:
+ *
+ *     - previous scheme: both threads take one mutex, the OVSDB thread for
+ *       each whole pass, the protocol thread for each update;
+ *     - request queue: the protocol thread sends each update on the
+ *       mqueue in src/mqueue.c, and the OVSDB thread applies them at the
+ *       start of its next pass, as src/ovsdb_if.c does.
+ *
+ *   Reports, for each, the histogram of the time each update costs the
+ *   protocol thread, and of the time the OVSDB thread holds the mutex
+ *   (or runs a pass), and the protocol thread's total stall.  Checks
+ *   that every update is applied, in order.  Run it on at least two
+ *   CPUs: on one, the model OVSDB thread preempts the protocol thread
+ *   whatever the scheme, and the largest stalls are time slices.
+ *
+ *   usage: dbreq_bench [updates]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#include <time.h>
+#include <sched.h>
+#include <pthread.h>
+
+#include "mqueue.h"
+#include "lacp_hist.h"
+
+#define DFLT_UPDATES        200000
+#define DFLT_SHORT_PASS_US  20
+#define DFLT_LONG_PASS_US   5000
+#define DFLT_LONG_EVERY     50
+#define DFLT_SLEEP_US       200
+#define DFLT_UPDATE_GAP_US  5
+
+typedef struct bench_req {
+    unsigned long   seq;
+    int             port;
+    unsigned int    state;
+} bench_req_t;
+
+/* Model OVSDB thread data: the last update applied to each port. */
+#define BENCH_PORTS         256
+static unsigned int bench_port_state[BENCH_PORTS];
+static unsigned long bench_applied;
+static unsigned long bench_misordered;
+
+static pthread_mutex_t bench_mutex = PTHREAD_MUTEX_INITIALIZER;
+static mqueue_t bench_queue;
+static int bench_use_queue;
+static volatile int bench_done;
+
+static lacp_hist_t bench_send_ns;
+static lacp_hist_t bench_hold_us;
+
+static unsigned long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000000ULL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static void
+bench_spin_us(unsigned long long us)
+{
+    unsigned long long end = bench_now_ns() + us * 1000;
+
+    while (bench_now_ns() < end) {
+    }
+} /* bench_spin_us */
+
+static void
+bench_sleep_us(unsigned long us)
+{
+    struct timespec ts;
+
+    ts.tv_sec = 0;
+    ts.tv_nsec = us * 1000;
+    nanosleep(&ts, NULL);
+} /* bench_sleep_us */
+
+static void
+bench_apply(unsigned long seq, int port, unsigned int state)
+{
+    if (seq != bench_applied) {
+        bench_misordered++;
+    }
+    bench_port_state[port] = state;
+    bench_applied = seq + 1;
+} /* bench_apply */
+
+/************************************************************************
+ * Model OVSDB interface thread
+ ************************************************************************/
+static void *
+bench_ovsdb_thread(void *arg)
+{
+    unsigned long long start;
+    bench_req_t *req;
+    unsigned long pass;
+
+    for (pass = 0; !bench_done || mqueue_depth(&bench_queue); pass++) {
+        start = bench_now_ns();
+        if (!bench_use_queue) {
+            pthread_mutex_lock(&bench_mutex);
+        }
+
+        while (mqueue_trywait(&bench_queue, (void **)&req) == 0) {
+            bench_apply(req->seq, req->port, req->state);
+            free(req);
+        }
+
+        bench_spin_us((pass % DFLT_LONG_EVERY) ? DFLT_SHORT_PASS_US :
+                      DFLT_LONG_PASS_US);
+
+        if (!bench_use_queue) {
+            pthread_mutex_unlock(&bench_mutex);
+        }
+        lacp_hist_record(&bench_hold_us, (bench_now_ns() - start) / 1000);
+
+        bench_sleep_us(DFLT_SLEEP_US);
+    }
+
+    return arg;
+} /* bench_ovsdb_thread */
+
+/************************************************************************
+ * Model protocol thread
+ ************************************************************************/
+static void
+bench_send(unsigned long seq)
+{
+    unsigned long long start = bench_now_ns();
+    bench_req_t *req;
+
+    if (!bench_use_queue) {
+        pthread_mutex_lock(&bench_mutex);
+        bench_apply(seq, seq % BENCH_PORTS, (unsigned int)seq);
+        pthread_mutex_unlock(&bench_mutex);
+    } else {
+        req = malloc(sizeof(*req));
+        if (req == NULL) {
+            fprintf(stderr, "out of memory\n");
+            exit(1);
+        }
+        req->seq = seq;
+        req->port = seq % BENCH_PORTS;
+        req->state = (unsigned int)seq;
+        while (mqueue_send(&bench_queue, req) == ENOBUFS) {
+            sched_yield();
+        }
+    }
+
+    lacp_hist_record(&bench_send_ns, bench_now_ns() - start);
+} /* bench_send */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static void
+bench_hist_print(const char *title, const lacp_hist_t *hist,
+                 const char *unit)
+{
+    printf("    %-22s: count %8llu  avg %7llu%s  p50 %7llu%s  "
+           "p99 %7llu%s  max %8llu%s  total %10llu%s\n", title,
+           hist->h_count, hist->h_count ? hist->h_sum / hist->h_count : 0,
+           unit, lacp_hist_percentile(hist, 50), unit,
+           lacp_hist_percentile(hist, 99), unit,
+           hist->h_max, unit, hist->h_sum, unit);
+} /* bench_hist_print */
+
+static int
+bench_run(int use_queue, long updates)
+{
+    pthread_t thread;
+    long i;
+
+    bench_use_queue = use_queue;
+    bench_done = 0;
+    bench_applied = 0;
+    bench_misordered = 0;
+    memset(bench_port_state, 0, sizeof(bench_port_state));
+    lacp_hist_init(&bench_send_ns);
+    lacp_hist_init(&bench_hold_us);
+
+    if (pthread_create(&thread, NULL, bench_ovsdb_thread, NULL)) {
+        fprintf(stderr, "pthread_create failed\n");
+        return 0;
+    }
+
+    for (i = 0; i < updates; i++) {
+        bench_send(i);
+        bench_spin_us(DFLT_UPDATE_GAP_US);
+    }
+
+    bench_done = 1;
+    pthread_join(thread, NULL);
+
+    printf("%s:\n", use_queue ? "request queue" : "mutex");
+    bench_hist_print("protocol thread stall", &bench_send_ns, " ns");
+    bench_hist_print(use_queue ? "ovsdb thread pass" : "ovsdb lock hold",
+                     &bench_hold_us, " us");
+
+    return (bench_applied == (unsigned long)updates) &&
+           (bench_misordered == 0);
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    long updates = DFLT_UPDATES;
+
+    if (argc > 1) {
+        updates = atol(argv[1]);
+    }
+    if (updates <= 0) {
+        fprintf(stderr, "usage: %s [updates]\n", argv[0]);
+        return 1;
+    }
+
+    if (mqueue_init(&bench_queue)) {
+        fprintf(stderr, "mqueue_init failed\n");
+        return 1;
+    }
+
+    printf("updates=%ld, pass %d us, one in %d %d us, every %d us\n",
+           updates, DFLT_SHORT_PASS_US, DFLT_LONG_EVERY, DFLT_LONG_PASS_US,
+           DFLT_SLEEP_US);
+
+    if (!bench_run(0, updates) || !bench_run(1, updates)) {
+        fprintf(stderr, "updates lost or applied out of order\n");
+        return 1;
+    }
+
+    return 0;
+} /* main */
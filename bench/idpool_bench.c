@@ -0,0 +1,152 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * idpool_bench.c
+ *
+ *   Microbenchmark for the LAG id and interface index allocator.  With
+ *   the pool nearly full (the worst case for a scan), frees a random id
+ *   and allocates again, through the previous LAG id pool (one in use
+ *   flag per id, scanned from the lowest) and through the two level
+ *   bitmap in src/lacp_idpool.c.  Reports the cost per free and allocate
+ *   for each pool size.  The allocator itself is checked by
+ *   tests/unit/idpool_test.c.
+ *
+ *   usage: idpool_bench [rounds]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#include "lacp_idpool.h"
+
+#define DFLT_ROUNDS     200000
+
+static const unsigned int bench_sizes[] = { 128, 1024, 4096, 65535 };
+
+static long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+/************************************************************************
+ * Previous scheme: an in use flag per id, scanned from the lowest.
+ ************************************************************************/
+static unsigned short *scan_pool;
+static unsigned int scan_max;
+
+static unsigned int
+scan_alloc(void)
+{
+    unsigned int id;
+
+    for (id = 1; id <= scan_max; id++) {
+        if (scan_pool[id] == 0) {
+            scan_pool[id] = 1;
+            return id;
+        }
+    }
+    return 0;
+} /* scan_alloc */
+
+static void
+scan_free(unsigned int id)
+{
+    scan_pool[id] = 0;
+} /* scan_free */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+int
+main(int argc, char *argv[])
+{
+    lacp_idpool_t pool;
+    unsigned int *victims;
+    unsigned int size;
+    unsigned int id;
+    long rounds = DFLT_ROUNDS;
+    long long start;
+    double scan_ns;
+    double pool_ns;
+    unsigned int i;
+    long r;
+
+    if (argc > 1) {
+        rounds = atol(argv[1]);
+    }
+    if (rounds <= 0) {
+        fprintf(stderr, "usage: %s [rounds]\n", argv[0]);
+        return 1;
+    }
+
+    printf("rounds=%ld, pool full but one id\n", rounds);
+
+    victims = malloc(rounds * sizeof(unsigned int));
+    if (victims == NULL) {
+        fprintf(stderr, "out of memory\n");
+        return 1;
+    }
+
+    for (i = 0; i < sizeof(bench_sizes) / sizeof(bench_sizes[0]); i++) {
+        size = bench_sizes[i];
+
+        srandom(1);
+        for (r = 0; r < rounds; r++) {
+            victims[r] = 1 + random() % size;
+        }
+
+        scan_max = size;
+        scan_pool = calloc(size + 1, sizeof(unsigned short));
+        if (scan_pool == NULL || lacp_idpool_init(&pool, 1, size)) {
+            fprintf(stderr, "out of memory\n");
+            return 1;
+        }
+        while (scan_alloc() != 0) {
+        }
+        while (lacp_idpool_alloc(&pool, &id) == 0) {
+        }
+
+        start = bench_now_ns();
+        for (r = 0; r < rounds; r++) {
+            scan_free(victims[r]);
+            scan_alloc();
+        }
+        scan_ns = (double)(bench_now_ns() - start) / (double)rounds;
+
+        start = bench_now_ns();
+        for (r = 0; r < rounds; r++) {
+            lacp_idpool_free(&pool, victims[r]);
+            lacp_idpool_alloc(&pool, &id);
+        }
+        pool_ns = (double)(bench_now_ns() - start) / (double)rounds;
+
+        free(scan_pool);
+        lacp_idpool_destroy(&pool);
+
+        printf("    %5u ids: scan %9.1f ns/round   "
+               "bitmap %6.1f ns/round   speedup %7.1fx\n",
+               size, scan_ns, pool_ns, scan_ns / pool_ns);
+    }
+
+    free(victims);
+    return 0;
+} /* main */
@@ -0,0 +1,220 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * iface_bench.c
+ *
+ *   Microbenchmark for find_iface_data_by_index(), which every LACPDU
+ *   transmit and interface status update goes through.  Compares the
+ *   previous walk of the all_interfaces shash, modelled here as a
+ *   chained hash table of separately allocated nodes iterated bucket by
+ *   bucket like an OVS hmap, with the dense table indexed by interface
+ *   index in src/ovsdb_if.c.  Each lookup is for the next interface
+ *   sending a LACPDU, round robin.  Reports the cost per lookup for each
+ *   interface count.
+ *
+ *   usage: iface_bench [lookups]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#define DFLT_LOOKUPS        2000000
+#define MAX_INTERFACES      256
+
+static const int bench_ifaces[] = { 16, 64, 256 };
+
+typedef struct bench_iface {
+    char    name[16];
+    int     index;
+    int     pdu_sockfd;
+} bench_iface_t;
+
+typedef struct bench_node {
+    struct bench_node  *next;
+    unsigned int        hash;
+    bench_iface_t      *data;
+} bench_node_t;
+
+/* Previous scheme: the interfaces in a hash map keyed by name. */
+static bench_node_t **bench_buckets;
+static unsigned int bench_mask;
+
+/* Dense table indexed by interface index. */
+static bench_iface_t *bench_by_index[MAX_INTERFACES];
+
+static long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static unsigned int
+bench_hash(const char *name)
+{
+    unsigned int hash = 2166136261u;
+
+    while (*name) {
+        hash = (hash ^ (unsigned char)*name++) * 16777619u;
+    }
+    return hash;
+} /* bench_hash */
+
+/************************************************************************
+ * Previous scheme: walk every node until the index matches.
+ ************************************************************************/
+static bench_iface_t *
+walk_find(int index)
+{
+    bench_node_t *node;
+    unsigned int i;
+
+    for (i = 0; i <= bench_mask; i++) {
+        for (node = bench_buckets[i]; node; node = node->next) {
+            if (node->data && node->data->index == index) {
+                return node->data;
+            }
+        }
+    }
+    return NULL;
+} /* walk_find */
+
+/************************************************************************
+ * Dense table.
+ ************************************************************************/
+static bench_iface_t *
+table_find(int index)
+{
+    if (index < 0 || index >= MAX_INTERFACES) {
+        return NULL;
+    }
+    return bench_by_index[index];
+} /* table_find */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static void
+bench_setup(int nifaces)
+{
+    bench_iface_t *idp;
+    bench_node_t *node;
+    int i;
+
+    /* An hmap keeps about one node per bucket. */
+    for (bench_mask = 1; bench_mask < (unsigned int)nifaces; bench_mask <<= 1) {
+    }
+    bench_mask--;
+
+    bench_buckets = calloc(bench_mask + 1, sizeof(bench_node_t *));
+    if (bench_buckets == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+
+    for (i = 0; i < nifaces; i++) {
+        idp = calloc(1, sizeof(*idp));
+        node = calloc(1, sizeof(*node));
+        if (idp == NULL || node == NULL) {
+            fprintf(stderr, "out of memory\n");
+            exit(1);
+        }
+        snprintf(idp->name, sizeof(idp->name), "%d", i + 1);
+        idp->index = i;
+
+        node->hash = bench_hash(idp->name);
+        node->data = idp;
+        node->next = bench_buckets[node->hash & bench_mask];
+        bench_buckets[node->hash & bench_mask] = node;
+
+        bench_by_index[i] = idp;
+    }
+} /* bench_setup */
+
+static void
+bench_teardown(void)
+{
+    bench_node_t *node;
+    bench_node_t *next;
+    unsigned int i;
+
+    for (i = 0; i <= bench_mask; i++) {
+        for (node = bench_buckets[i]; node; node = next) {
+            next = node->next;
+            free(node->data);
+            free(node);
+        }
+    }
+    free(bench_buckets);
+    bench_buckets = NULL;
+
+    for (i = 0; i < MAX_INTERFACES; i++) {
+        bench_by_index[i] = NULL;
+    }
+} /* bench_teardown */
+
+static double
+bench_run(bench_iface_t *(*find)(int), int nifaces, long lookups)
+{
+    volatile int sink = 0;
+    bench_iface_t *idp;
+    long long start;
+    long i;
+
+    start = bench_now_ns();
+    for (i = 0; i < lookups; i++) {
+        idp = find((int)(i % nifaces));
+        sink += idp->pdu_sockfd;
+    }
+
+    return (double)(bench_now_ns() - start) / (double)lookups;
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    long lookups = DFLT_LOOKUPS;
+    double walk_ns;
+    double table_ns;
+    unsigned int i;
+
+    if (argc > 1) {
+        lookups = atol(argv[1]);
+    }
+    if (lookups <= 0) {
+        fprintf(stderr, "usage: %s [lookups]\n", argv[0]);
+        return 1;
+    }
+
+    printf("lookups=%ld\n", lookups);
+
+    for (i = 0; i < sizeof(bench_ifaces) / sizeof(bench_ifaces[0]); i++) {
+        bench_setup(bench_ifaces[i]);
+        walk_ns = bench_run(walk_find, bench_ifaces[i], lookups);
+        table_ns = bench_run(table_find, bench_ifaces[i], lookups);
+        bench_teardown();
+
+        printf("    %3d interfaces: shash walk %8.1f ns/lookup   "
+               "table %6.1f ns/lookup   speedup %6.1fx\n",
+               bench_ifaces[i], walk_ns, table_ns, walk_ns / table_ns);
+    }
+
+    return 0;
+} /* main */
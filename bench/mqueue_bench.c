@@ -0,0 +1,247 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * mqueue_bench.c
+ *
+ *   Microbenchmark for the LACP main receive queue.  Runs the same
+ *   multi-producer/single-consumer workload (one producer per lacpd
+ *   sender thread: rx PDU, timer, OVSDB) through the bounded ring in
+ *   src/mqueue.c and through the previous malloc + mutex + semaphore
+ *   list queue, and reports the cost per message.
+ *
+ *   usage: mqueue_bench [messages per producer] [producers]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <errno.h>
+#include <time.h>
+#include <sched.h>
+#include <pthread.h>
+#include <search.h>
+#include <semaphore.h>
+
+#include "mqueue.h"
+
+#define DFLT_MSGS_PER_PRODUCER  1000000
+#define DFLT_PRODUCERS          3
+#define MAX_PRODUCERS           16
+
+/************************************************************************
+ * Previous list based queue, kept here as the baseline.
+ ************************************************************************/
+typedef struct qelem {
+    struct qelem   *q_forw;
+    struct qelem   *q_back;
+    void           *q_data;
+} qelem_t;
+
+typedef struct list_queue {
+    qelem_t         q_head;
+    qelem_t         q_tail;
+    pthread_mutex_t q_mutex;
+    sem_t           q_avail;
+} list_queue_t;
+
+static int
+list_queue_init(list_queue_t *queue)
+{
+    pthread_mutex_init(&(queue->q_mutex), NULL);
+
+    queue->q_head.q_forw = &(queue->q_tail);
+    queue->q_head.q_back = NULL;
+    queue->q_head.q_data = NULL;
+    queue->q_tail.q_forw = NULL;
+    queue->q_tail.q_back = &(queue->q_head);
+    queue->q_tail.q_data = NULL;
+
+    if (sem_init(&(queue->q_avail), 0, 0) != 0) {
+        return errno;
+    }
+
+    return 0;
+} /* list_queue_init */
+
+static int
+list_queue_send(list_queue_t *queue, void *data)
+{
+    qelem_t *new_elem;
+
+    if ((new_elem = (qelem_t *) malloc(sizeof(qelem_t))) == NULL) {
+        return ENOMEM;
+    }
+
+    new_elem->q_data = data;
+
+    pthread_mutex_lock(&(queue->q_mutex));
+    insque(new_elem, queue->q_tail.q_back);
+    sem_post(&(queue->q_avail));
+    pthread_mutex_unlock(&(queue->q_mutex));
+
+    return 0;
+} /* list_queue_send */
+
+static int
+list_queue_wait(list_queue_t *queue, void **data)
+{
+    qelem_t *new_elem;
+
+    sem_wait(&(queue->q_avail));
+
+    pthread_mutex_lock(&(queue->q_mutex));
+    new_elem = queue->q_head.q_forw;
+    remque(queue->q_head.q_forw);
+    pthread_mutex_unlock(&(queue->q_mutex));
+
+    *data = new_elem->q_data;
+    free(new_elem);
+
+    return 0;
+} /* list_queue_wait */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+enum bench_queue_type {
+    BENCH_RING,
+    BENCH_LIST,
+};
+
+struct bench_ctx {
+    enum bench_queue_type   type;
+    mqueue_t                ring;
+    list_queue_t            list;
+    long                    msgs_per_producer;
+    unsigned long long      retries;
+};
+
+static long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static void *
+bench_producer(void *arg)
+{
+    struct bench_ctx *ctx = arg;
+    unsigned long long retries = 0;
+    long i;
+
+    for (i = 1; i <= ctx->msgs_per_producer; i++) {
+        if (ctx->type == BENCH_RING) {
+            /* Benchmark must not lose messages: back off while full. */
+            while (mqueue_send(&ctx->ring, (void *)i) == ENOBUFS) {
+                retries++;
+                sched_yield();
+            }
+        } else {
+            list_queue_send(&ctx->list, (void *)i);
+        }
+    }
+
+    __atomic_add_fetch(&ctx->retries, retries, __ATOMIC_RELAXED);
+
+    return NULL;
+} /* bench_producer */
+
+static double
+bench_run(enum bench_queue_type type, long msgs, int producers,
+          unsigned long long *retries)
+{
+    struct bench_ctx ctx;
+    pthread_t tids[MAX_PRODUCERS];
+    long long start;
+    long long total = msgs * producers;
+    long long n;
+    void *data;
+    int i;
+
+    ctx.type = type;
+    ctx.msgs_per_producer = msgs;
+    ctx.retries = 0;
+
+    if (type == BENCH_RING) {
+        if (mqueue_init(&ctx.ring) != 0) {
+            fprintf(stderr, "mqueue_init failed\n");
+            exit(1);
+        }
+    } else {
+        list_queue_init(&ctx.list);
+    }
+
+    start = bench_now_ns();
+
+    for (i = 0; i < producers; i++) {
+        pthread_create(&tids[i], NULL, bench_producer, &ctx);
+    }
+
+    for (n = 0; n < total; n++) {
+        if (type == BENCH_RING) {
+            mqueue_wait(&ctx.ring, &data);
+        } else {
+            list_queue_wait(&ctx.list, &data);
+        }
+    }
+
+    for (i = 0; i < producers; i++) {
+        pthread_join(tids[i], NULL);
+    }
+
+    *retries = ctx.retries;
+
+    return (double)(bench_now_ns() - start) / (double)total;
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    long msgs = DFLT_MSGS_PER_PRODUCER;
+    int producers = DFLT_PRODUCERS;
+    unsigned long long retries;
+    double list_ns;
+    double ring_ns;
+
+    if (argc > 1) {
+        msgs = atol(argv[1]);
+    }
+    if (argc > 2) {
+        producers = atoi(argv[2]);
+    }
+    if (msgs <= 0 || producers <= 0 || producers > MAX_PRODUCERS) {
+        fprintf(stderr, "usage: %s [messages per producer] [producers <= %d]\n",
+                argv[0], MAX_PRODUCERS);
+        return 1;
+    }
+
+    printf("producers=%d messages/producer=%ld ring size=%d\n",
+           producers, msgs, MQUEUE_DEFAULT_SIZE);
+
+    list_ns = bench_run(BENCH_LIST, msgs, producers, &retries);
+    printf("    list (malloc+mutex+sem) : %8.1f ns/msg\n", list_ns);
+
+    ring_ns = bench_run(BENCH_RING, msgs, producers, &retries);
+    printf("    ring (mpsc+eventfd)     : %8.1f ns/msg  (full retries %llu)\n",
+           ring_ns, retries);
+
+    printf("    speedup                 : %8.2fx\n", list_ns / ring_ns);
+
+    return 0;
+} /* main */
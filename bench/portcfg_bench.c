@@ -0,0 +1,559 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * portcfg_bench.c
+ *
+ *   Microbenchmark for update_port_cache() and handle_port_config().
+ *   Replays a stream of Port row changes on 1000 LAGs, one change per
+ *   reconfiguration: mostly other_config changes (lacp-time, fallback,
+ *   system priority), some member interface moves and LACP mode
+ *   changes.  Compares the previous scheme, which collects every Port row
+ *   into a name keyed hash map, diffs it against all_ports by name and
+ *   re-evaluates the whole configuration of each modified row, with the
+ *   tracked rows looked up by UUID and dispatched per changed column in
+ *   src/ovsdb_if.c.  Reports the cost per change and how many member
+ *   interfaces had their membership reconciled.
+ *
+ *   Before reporting, checks that both schemes end with the same port
+ *   state, and exits with an error if they do not.
+ *
+ *   usage: portcfg_bench [changes] [lags]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#define DFLT_CHANGES        20000
+#define DFLT_LAGS           1000
+#define MEMBERS_PER_LAG     4
+#define MAX_MEMBERS         8
+
+#define COL_LACP            0x01
+#define COL_INTERFACES      0x02
+#define COL_OTHER_CONFIG    0x04
+#define COL_ALL             0x07
+
+enum { KEY_LACP_TIME, KEY_FALLBACK, KEY_SYS_PRIO, KEY_SYS_ID, N_KEYS };
+
+static const char *bench_keys[N_KEYS] = {
+    "lacp-time", "lacp-fallback-ab", "lacp-system-priority", "lacp-system-id"
+};
+
+static const char *bench_modes[] = { "active", "passive" };
+
+/* A Port row in the IDL. */
+typedef struct bench_row {
+    char            name[16];
+    unsigned int    uuid;
+    const char      *lacp;
+    int             n_interfaces;
+    int             interfaces[MAX_MEMBERS];
+    const char      *keys[N_KEYS];
+    char            values[N_KEYS][24];
+    unsigned int    changed;        /* COL_* since the last run */
+} bench_row_t;
+
+/* lacpd's port_data. */
+typedef struct bench_port {
+    const bench_row_t *cfg;
+    int             lacp_mode;
+    int             timeout;
+    int             fallback;
+    int             sys_prio;
+    char            sys_id[24];
+    int             n_members;
+    int             members[MAX_MEMBERS];
+} bench_port_t;
+
+/* A name keyed hash map with nodes and keys allocated like an shash. */
+typedef struct bench_node {
+    struct bench_node   *next;
+    unsigned int        hash;
+    char                *name;
+    void                *data;
+} bench_node_t;
+
+typedef struct bench_map {
+    bench_node_t    **buckets;
+    unsigned int    mask;
+} bench_map_t;
+
+typedef struct bench_change {
+    int             lag;
+    int             kind;
+    int             value;
+} bench_change_t;
+
+enum { CH_LACP_TIME, CH_FALLBACK, CH_SYS_PRIO, CH_MEMBER, CH_MODE, CH_KINDS };
+
+static int bench_nlags;
+static bench_row_t *bench_rows;
+static bench_port_t *bench_ports;
+static bench_port_t **bench_by_uuid;
+static int *bench_tracked;
+static int bench_ntracked;
+static unsigned long long bench_reconciled;
+
+static long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static unsigned int
+bench_hash(const char *name)
+{
+    unsigned int hash = 2166136261u;
+
+    while (*name) {
+        hash = (hash ^ (unsigned char)*name++) * 16777619u;
+    }
+    return hash;
+} /* bench_hash */
+
+static void
+map_init(bench_map_t *map, int n)
+{
+    for (map->mask = 1; map->mask < (unsigned int)n; map->mask <<= 1) {
+    }
+    map->mask--;
+    map->buckets = calloc(map->mask + 1, sizeof(bench_node_t *));
+    if (map->buckets == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+} /* map_init */
+
+static void
+map_add(bench_map_t *map, const char *name, void *data)
+{
+    bench_node_t *node;
+
+    node = malloc(sizeof(*node));
+    if (node == NULL || (node->name = strdup(name)) == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+    node->hash = bench_hash(name);
+    node->data = data;
+    node->next = map->buckets[node->hash & map->mask];
+    map->buckets[node->hash & map->mask] = node;
+} /* map_add */
+
+static void *
+map_find(const bench_map_t *map, const char *name)
+{
+    unsigned int hash = bench_hash(name);
+    bench_node_t *node;
+
+    for (node = map->buckets[hash & map->mask]; node; node = node->next) {
+        if (node->hash == hash && !strcmp(node->name, name)) {
+            return node->data;
+        }
+    }
+    return NULL;
+} /* map_find */
+
+static void
+map_destroy(bench_map_t *map)
+{
+    bench_node_t *node;
+    bench_node_t *next;
+    unsigned int i;
+
+    for (i = 0; i <= map->mask; i++) {
+        for (node = map->buckets[i]; node; node = next) {
+            next = node->next;
+            free(node->name);
+            free(node);
+        }
+    }
+    free(map->buckets);
+} /* map_destroy */
+
+static const char *
+row_get(const bench_row_t *row, const char *key)
+{
+    int i;
+
+    for (i = 0; i < N_KEYS; i++) {
+        if (row->keys[i] && !strcmp(row->keys[i], key)) {
+            return row->values[i];
+        }
+    }
+    return NULL;
+} /* row_get */
+
+/************************************************************************
+ * Per column handlers, shared by both schemes.
+ ************************************************************************/
+static void
+handle_other_config(bench_port_t *port, const bench_row_t *row)
+{
+    const char *cp;
+
+    cp = row_get(row, bench_keys[KEY_LACP_TIME]);
+    port->timeout = (cp && !strcmp(cp, "fast"));
+
+    cp = row_get(row, bench_keys[KEY_SYS_PRIO]);
+    port->sys_prio = cp ? atoi(cp) : 0;
+
+    cp = row_get(row, bench_keys[KEY_SYS_ID]);
+    if (cp && strcmp(cp, port->sys_id)) {
+        snprintf(port->sys_id, sizeof(port->sys_id), "%s", cp);
+    }
+
+    cp = row_get(row, bench_keys[KEY_FALLBACK]);
+    port->fallback = (cp && !strcmp(cp, "true"));
+} /* handle_other_config */
+
+static void
+handle_lacp(bench_port_t *port, const bench_row_t *row)
+{
+    port->lacp_mode = strcmp(row->lacp, "active") ? 2 : 1;
+} /* handle_lacp */
+
+/* Diffs the members by interface name, then reconciles each member. */
+static void
+handle_interfaces(bench_port_t *port, const bench_row_t *row)
+{
+    bench_map_t members;
+    char name[16];
+    int i;
+
+    map_init(&members, row->n_interfaces);
+    for (i = 0; i < row->n_interfaces; i++) {
+        snprintf(name, sizeof(name), "%d", row->interfaces[i]);
+        map_add(&members, name, (void *)&row->interfaces[i]);
+    }
+
+    port->n_members = 0;
+    for (i = 0; i < row->n_interfaces; i++) {
+        snprintf(name, sizeof(name), "%d", row->interfaces[i]);
+        if (map_find(&members, name)) {
+            port->members[port->n_members++] = row->interfaces[i];
+        }
+    }
+    map_destroy(&members);
+} /* handle_interfaces */
+
+static void
+reconcile_members(bench_port_t *port)
+{
+    bench_reconciled += port->n_members;
+} /* reconcile_members */
+
+/************************************************************************
+ * Previous scheme: name diff of every row, full re-evaluation.
+ ************************************************************************/
+static bench_map_t all_ports;
+
+static void
+full_run(void)
+{
+    bench_map_t idl_ports;
+    bench_port_t *port;
+    bench_node_t *node;
+    unsigned int i;
+    int r;
+
+    map_init(&idl_ports, bench_nlags);
+    for (r = 0; r < bench_nlags; r++) {
+        map_add(&idl_ports, bench_rows[r].name, &bench_rows[r]);
+    }
+
+    /* Deleted ports, then added ports; none in this stream. */
+    for (i = 0; i <= all_ports.mask; i++) {
+        for (node = all_ports.buckets[i]; node; node = node->next) {
+            if (!map_find(&idl_ports, node->name)) {
+                abort();
+            }
+        }
+    }
+    for (i = 0; i <= idl_ports.mask; i++) {
+        for (node = idl_ports.buckets[i]; node; node = node->next) {
+            if (!map_find(&all_ports, node->name)) {
+                abort();
+            }
+        }
+    }
+
+    /* Every modified row is re-evaluated as a whole. */
+    for (i = 0; i <= all_ports.mask; i++) {
+        for (node = all_ports.buckets[i]; node; node = node->next) {
+            const bench_row_t *row = map_find(&idl_ports, node->name);
+
+            if (row->changed == 0) {
+                continue;
+            }
+            port = node->data;
+            handle_other_config(port, row);
+            handle_interfaces(port, row);
+            handle_lacp(port, row);
+            reconcile_members(port);
+        }
+    }
+
+    map_destroy(&idl_ports);
+} /* full_run */
+
+/************************************************************************
+ * Tracked rows, by UUID, dispatched per changed column.
+ ************************************************************************/
+static void
+tracked_run(void)
+{
+    const bench_row_t *row;
+    bench_port_t *port;
+    int t;
+
+    for (t = 0; t < bench_ntracked; t++) {
+        row = &bench_rows[bench_tracked[t]];
+        port = bench_by_uuid[row->uuid % (2 * bench_nlags)];
+
+        if (row->changed & COL_OTHER_CONFIG) {
+            handle_other_config(port, row);
+        }
+        if (row->changed & COL_INTERFACES) {
+            handle_interfaces(port, row);
+        }
+        if (row->changed & COL_LACP) {
+            handle_lacp(port, row);
+        }
+        if (row->changed & (COL_INTERFACES | COL_LACP)) {
+            reconcile_members(port);
+        }
+    }
+} /* tracked_run */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static void
+bench_setup(void)
+{
+    bench_row_t *row;
+    int r;
+    int i;
+
+    memset(bench_ports, 0, bench_nlags * sizeof(bench_port_t));
+    memset(bench_by_uuid, 0, 2 * bench_nlags * sizeof(bench_port_t *));
+
+    for (r = 0; r < bench_nlags; r++) {
+        row = &bench_rows[r];
+        memset(row, 0, sizeof(*row));
+        snprintf(row->name, sizeof(row->name), "lag%d", r + 1);
+        row->uuid = 2 * r + 1;
+        row->lacp = bench_modes[0];
+        row->n_interfaces = MEMBERS_PER_LAG;
+        for (i = 0; i < MEMBERS_PER_LAG; i++) {
+            row->interfaces[i] = r * MAX_MEMBERS + i + 1;
+        }
+        for (i = 0; i < N_KEYS; i++) {
+            row->keys[i] = bench_keys[i];
+        }
+        strcpy(row->values[KEY_LACP_TIME], "slow");
+        strcpy(row->values[KEY_FALLBACK], "false");
+        strcpy(row->values[KEY_SYS_PRIO], "65534");
+        snprintf(row->values[KEY_SYS_ID], sizeof(row->values[KEY_SYS_ID]),
+                 "00:11:22:33:%02x:%02x", (r >> 8) & 0xff, r & 0xff);
+
+        bench_ports[r].cfg = row;
+        bench_by_uuid[row->uuid % (2 * bench_nlags)] = &bench_ports[r];
+        handle_other_config(&bench_ports[r], row);
+        handle_interfaces(&bench_ports[r], row);
+        handle_lacp(&bench_ports[r], row);
+    }
+} /* bench_setup */
+
+static void
+bench_apply(const bench_change_t *change)
+{
+    bench_row_t *row = &bench_rows[change->lag];
+
+    switch (change->kind) {
+    case CH_LACP_TIME:
+        strcpy(row->values[KEY_LACP_TIME], change->value ? "fast" : "slow");
+        row->changed = COL_OTHER_CONFIG;
+        break;
+    case CH_FALLBACK:
+        strcpy(row->values[KEY_FALLBACK], change->value ? "true" : "false");
+        row->changed = COL_OTHER_CONFIG;
+        break;
+    case CH_SYS_PRIO:
+        snprintf(row->values[KEY_SYS_PRIO], sizeof(row->values[KEY_SYS_PRIO]),
+                 "%d", change->value);
+        row->changed = COL_OTHER_CONFIG;
+        break;
+    case CH_MEMBER:
+        /* Swap one member for a spare interface of the same LAG. */
+        row->interfaces[change->value % MEMBERS_PER_LAG] =
+            change->lag * MAX_MEMBERS + MEMBERS_PER_LAG + 1 +
+            change->value % (MAX_MEMBERS - MEMBERS_PER_LAG);
+        row->changed = COL_INTERFACES;
+        break;
+    case CH_MODE:
+        row->lacp = bench_modes[change->value & 1];
+        row->changed = COL_LACP;
+        break;
+    }
+
+    bench_tracked[0] = change->lag;
+    bench_ntracked = 1;
+} /* bench_apply */
+
+static double
+bench_replay(void (*run)(void), const bench_change_t *changes, long nchanges,
+             unsigned long long *reconciled)
+{
+    long long elapsed = 0;
+    long long start;
+    long c;
+
+    bench_setup();
+    bench_reconciled = 0;
+
+    for (c = 0; c < nchanges; c++) {
+        bench_apply(&changes[c]);
+        start = bench_now_ns();
+        run();
+        elapsed += bench_now_ns() - start;
+        bench_rows[changes[c].lag].changed = 0;
+    }
+
+    *reconciled = bench_reconciled;
+    return (double)elapsed / (double)nchanges;
+} /* bench_replay */
+
+static int
+bench_same(const bench_port_t *a, const bench_port_t *b)
+{
+    int r;
+
+    for (r = 0; r < bench_nlags; r++) {
+        if (a[r].lacp_mode != b[r].lacp_mode || a[r].timeout != b[r].timeout ||
+            a[r].fallback != b[r].fallback || a[r].sys_prio != b[r].sys_prio ||
+            strcmp(a[r].sys_id, b[r].sys_id) ||
+            a[r].n_members != b[r].n_members ||
+            memcmp(a[r].members, b[r].members,
+                   a[r].n_members * sizeof(int))) {
+            return 0;
+        }
+    }
+    return 1;
+} /* bench_same */
+
+int
+main(int argc, char *argv[])
+{
+    bench_change_t *changes;
+    bench_port_t *full_state;
+    unsigned long long full_reconciled;
+    unsigned long long tracked_reconciled;
+    long nchanges = DFLT_CHANGES;
+    double full_ns;
+    double tracked_ns;
+    int kinds[CH_KINDS] = { 0 };
+    int roll;
+    long c;
+    int r;
+
+    if (argc > 1) {
+        nchanges = atol(argv[1]);
+    }
+    bench_nlags = DFLT_LAGS;
+    if (argc > 2) {
+        bench_nlags = atoi(argv[2]);
+    }
+    if (nchanges <= 0 || bench_nlags <= 0) {
+        fprintf(stderr, "usage: %s [changes] [lags]\n", argv[0]);
+        return 1;
+    }
+
+    changes = malloc(nchanges * sizeof(*changes));
+    bench_rows = malloc(bench_nlags * sizeof(bench_row_t));
+    bench_ports = malloc(bench_nlags * sizeof(bench_port_t));
+    full_state = malloc(bench_nlags * sizeof(bench_port_t));
+    bench_by_uuid = malloc(2 * bench_nlags * sizeof(bench_port_t *));
+    bench_tracked = malloc(sizeof(int));
+    if (!changes || !bench_rows || !bench_ports || !full_state ||
+        !bench_by_uuid || !bench_tracked) {
+        fprintf(stderr, "out of memory\n");
+        return 1;
+    }
+
+    /* 70% other_config, 15% member moves, 15% LACP mode changes. */
+    srandom(1);
+    for (c = 0; c < nchanges; c++) {
+        changes[c].lag = random() % bench_nlags;
+        roll = random() % 100;
+        if (roll < 30) {
+            changes[c].kind = CH_FALLBACK;
+        } else if (roll < 60) {
+            changes[c].kind = CH_LACP_TIME;
+        } else if (roll < 70) {
+            changes[c].kind = CH_SYS_PRIO;
+        } else if (roll < 85) {
+            changes[c].kind = CH_MEMBER;
+        } else {
+            changes[c].kind = CH_MODE;
+        }
+        changes[c].value = random() % 65535;
+        kinds[changes[c].kind]++;
+    }
+
+    /* The previous scheme's all_ports, keyed by name. */
+    bench_setup();
+    map_init(&all_ports, bench_nlags);
+    for (r = 0; r < bench_nlags; r++) {
+        map_add(&all_ports, bench_rows[r].name, &bench_ports[r]);
+    }
+
+    full_ns = bench_replay(full_run, changes, nchanges, &full_reconciled);
+    memcpy(full_state, bench_ports, bench_nlags * sizeof(bench_port_t));
+    tracked_ns = bench_replay(tracked_run, changes, nchanges,
+                              &tracked_reconciled);
+
+    if (!bench_same(full_state, bench_ports)) {
+        fprintf(stderr, "port state differs between the two schemes\n");
+        return 1;
+    }
+
+    printf("lags=%d, changes=%ld (other_config %d, members %d, lacp %d)\n",
+           bench_nlags, nchanges,
+           kinds[CH_FALLBACK] + kinds[CH_LACP_TIME] + kinds[CH_SYS_PRIO],
+           kinds[CH_MEMBER], kinds[CH_MODE]);
+    printf("    full diff  %9.1f ns/change   %llu members reconciled\n",
+           full_ns, full_reconciled);
+    printf("    tracked    %9.1f ns/change   %llu members reconciled   "
+           "speedup %6.1fx\n",
+           tracked_ns, tracked_reconciled, full_ns / tracked_ns);
+
+    map_destroy(&all_ports);
+    free(bench_tracked);
+    free(bench_by_uuid);
+    free(full_state);
+    free(bench_ports);
+    free(bench_rows);
+    free(changes);
+    return 0;
+} /* main */
@@ -0,0 +1,432 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * rx_bench.c
+ *
+ *   Benchmark for the two LACPDU receive models, on veth pairs.  Creates
+ *   the given number of veth pairs, and a sender thread that transmits
+ *   one LACPDU on the peer end of every pair per round, the way the
+ *   periodic Tx of a partner switch would.  The frames are received on
+ *   the near ends
+ *
+ *     - socket: one filtered raw socket per interface in an epoll set,
+ *       drained with recvmmsg, as lacpd does by default;
+ *     - ring:   one socket for all interfaces with a TPACKET_V3 ring,
+ *       src/mlacp_rx_ring.c, as lacpd --rx-ring does.
+ *
+ *   Reports frames received and lost, receiver system calls and CPU time
+ *   per frame, and the file descriptors each model needs.
+ *
+ *   Needs CAP_NET_ADMIN and CAP_NET_RAW (run as root) and the ip(8)
+ *   command.  The veth pairs are named lacpbN/lacpbNp and removed on
+ *   exit.
+ *
+ *   usage: rx_bench [pairs] [rounds]
+ */
+
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <errno.h>
+#include <time.h>
+#include <pthread.h>
+#include <net/if.h>
+#include <arpa/inet.h>
+#include <sys/epoll.h>
+#include <sys/socket.h>
+#include <linux/if_ether.h>
+#include <linux/if_packet.h>
+#include <linux/filter.h>
+
+#include "mlacp_rx_ring.h"
+
+#define DFLT_PAIRS      64
+#define DFLT_ROUNDS     500
+#define ROUND_GAP_US    1000
+#define PKT_SIZE        124
+#define BATCH           16
+#define MAX_EVENTS      64
+
+/* "ether dst 01:80:c2:00:00:02", the first test of the filter generated
+ * in src/mlacp_main.c */
+static struct sock_filter bench_filter_f[] = {
+    { 0x20, 0, 0, 0x00000002 },
+    { 0x15, 0, 3, 0xc2000002 },
+    { 0x28, 0, 0, 0x00000000 },
+    { 0x15, 0, 1, 0x00000180 },
+    { 0x6, 0, 0, 0x0000ffff },
+    { 0x6, 0, 0, 0x00000000 },
+};
+static struct sock_fprog bench_fprog = {
+    .filter = bench_filter_f,
+    .len = sizeof(bench_filter_f) / sizeof(struct sock_filter)
+};
+
+static int bench_pairs = DFLT_PAIRS;
+static long bench_rounds = DFLT_ROUNDS;
+static int *bench_rx_ifindex;           /* Near ends, receive. */
+static int *bench_tx_ifindex;           /* Peer ends, transmit. */
+static unsigned char *bench_known;      /* ifindex is one of ours. */
+static int bench_max_ifindex;
+
+static volatile int bench_stop;
+
+typedef struct bench_result {
+    unsigned long long frames;
+    unsigned long long syscalls;
+    unsigned long long cpu_ns;
+    int fds;
+} bench_result_t;
+
+static long long
+bench_now_ns(clockid_t clock)
+{
+    struct timespec ts;
+
+    clock_gettime(clock, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static void
+bench_cmd(const char *fmt, int i)
+{
+    char cmd[256];
+
+    snprintf(cmd, sizeof(cmd), fmt, i, i);
+    if (system(cmd) != 0) {
+        fprintf(stderr, "failed: %s\n", cmd);
+        exit(1);
+    }
+} /* bench_cmd */
+
+static void
+bench_cleanup(void)
+{
+    char cmd[128];
+    int i;
+
+    for (i = 0; i < bench_pairs; i++) {
+        snprintf(cmd, sizeof(cmd), "ip link del lacpb%d 2>/dev/null", i);
+        if (system(cmd) != 0) {
+            /* Already gone. */
+        }
+    }
+} /* bench_cleanup */
+
+static void
+bench_setup(void)
+{
+    char name[32];
+    int i;
+
+    bench_rx_ifindex = calloc(bench_pairs, sizeof(int));
+    bench_tx_ifindex = calloc(bench_pairs, sizeof(int));
+    if ((bench_rx_ifindex == NULL) || (bench_tx_ifindex == NULL)) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+
+    atexit(bench_cleanup);
+
+    for (i = 0; i < bench_pairs; i++) {
+        bench_cmd("ip link add lacpb%d type veth peer name lacpb%dp", i);
+        bench_cmd("ip link set lacpb%d up && ip link set lacpb%dp up", i);
+
+        snprintf(name, sizeof(name), "lacpb%d", i);
+        bench_rx_ifindex[i] = if_nametoindex(name);
+        snprintf(name, sizeof(name), "lacpb%dp", i);
+        bench_tx_ifindex[i] = if_nametoindex(name);
+
+        if (bench_rx_ifindex[i] > bench_max_ifindex) {
+            bench_max_ifindex = bench_rx_ifindex[i];
+        }
+    }
+
+    bench_known = calloc(bench_max_ifindex + 1, 1);
+    if (bench_known == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+    for (i = 0; i < bench_pairs; i++) {
+        bench_known[bench_rx_ifindex[i]] = 1;
+    }
+} /* bench_setup */
+
+/************************************************************************
+ * Sender: every peer end sends one LACPDU per round.
+ ************************************************************************/
+static void *
+bench_sender(void *arg)
+{
+    unsigned long long *sent = arg;
+    unsigned char frame[PKT_SIZE];
+    struct sockaddr_ll addr;
+    struct timespec gap = { 0, ROUND_GAP_US * 1000 };
+    long round;
+    int fd;
+    int i;
+
+    fd = socket(PF_PACKET, SOCK_RAW, 0);
+    if (fd < 0) {
+        perror("sender socket");
+        exit(1);
+    }
+
+    memset(frame, 0, sizeof(frame));
+    memcpy(frame, "\x01\x80\xc2\x00\x00\x02\x02\x00\x00\x00\x00\x01", 12);
+    frame[12] = 0x88;
+    frame[13] = 0x09;
+    frame[14] = 0x01;       /* LACP subtype */
+    frame[15] = 0x01;       /* version */
+
+    memset(&addr, 0, sizeof(addr));
+    addr.sll_family = AF_PACKET;
+    addr.sll_halen = ETH_ALEN;
+    memcpy(addr.sll_addr, frame, ETH_ALEN);
+
+    for (round = 0; round < bench_rounds; round++) {
+        for (i = 0; i < bench_pairs; i++) {
+            addr.sll_ifindex = bench_tx_ifindex[i];
+            if (sendto(fd, frame, sizeof(frame), 0,
+                       (struct sockaddr *)&addr, sizeof(addr)) > 0) {
+                (*sent)++;
+            }
+        }
+        nanosleep(&gap, NULL);
+    }
+
+    close(fd);
+    return NULL;
+} /* bench_sender */
+
+/************************************************************************
+ * Socket per interface, drained with recvmmsg.
+ ************************************************************************/
+static void
+socket_model(bench_result_t *res)
+{
+    static unsigned char bufs[BATCH][PKT_SIZE];
+    struct mmsghdr msgs[BATCH];
+    struct iovec iov[BATCH];
+    struct epoll_event events[MAX_EVENTS];
+    struct sockaddr_ll addr;
+    int *fds;
+    int epfd;
+    int nfds;
+    int count;
+    int n;
+    int i;
+
+    fds = calloc(bench_pairs, sizeof(int));
+    epfd = epoll_create1(0);
+    if ((fds == NULL) || (epfd < 0)) {
+        perror("socket model setup");
+        exit(1);
+    }
+
+    for (i = 0; i < bench_pairs; i++) {
+        struct epoll_event ev;
+
+        fds[i] = socket(PF_PACKET, SOCK_RAW, 0);
+        if ((fds[i] < 0) ||
+            (setsockopt(fds[i], SOL_SOCKET, SO_ATTACH_FILTER,
+                        &bench_fprog, sizeof(bench_fprog)) < 0)) {
+            perror("socket model socket");
+            exit(1);
+        }
+
+        memset(&addr, 0, sizeof(addr));
+        addr.sll_family = AF_PACKET;
+        addr.sll_ifindex = bench_rx_ifindex[i];
+        addr.sll_protocol = htons(ETH_P_SLOW);
+        if (bind(fds[i], (struct sockaddr *)&addr, sizeof(addr)) < 0) {
+            perror("socket model bind");
+            exit(1);
+        }
+
+        ev.events = EPOLLIN;
+        ev.data.fd = fds[i];
+        epoll_ctl(epfd, EPOLL_CTL_ADD, fds[i], &ev);
+    }
+    res->fds = bench_pairs + 1;
+
+    for (i = 0; i < BATCH; i++) {
+        iov[i].iov_base = bufs[i];
+        iov[i].iov_len = PKT_SIZE;
+    }
+
+    res->cpu_ns = bench_now_ns(CLOCK_THREAD_CPUTIME_ID);
+
+    while (!bench_stop) {
+        nfds = epoll_wait(epfd, events, MAX_EVENTS, 10);
+        res->syscalls++;
+
+        for (n = 0; n < nfds; n++) {
+            do {
+                memset(msgs, 0, sizeof(msgs));
+                for (i = 0; i < BATCH; i++) {
+                    msgs[i].msg_hdr.msg_iov = &iov[i];
+                    msgs[i].msg_hdr.msg_iovlen = 1;
+                }
+                count = recvmmsg(events[n].data.fd, msgs, BATCH,
+                                 MSG_DONTWAIT, NULL);
+                res->syscalls++;
+                if (count > 0) {
+                    res->frames += count;
+                }
+            } while (count == BATCH);
+        }
+    }
+
+    res->cpu_ns = bench_now_ns(CLOCK_THREAD_CPUTIME_ID) - res->cpu_ns;
+
+    for (i = 0; i < bench_pairs; i++) {
+        close(fds[i]);
+    }
+    close(epfd);
+    free(fds);
+} /* socket_model */
+
+/************************************************************************
+ * One TPACKET_V3 ring for all interfaces.
+ ************************************************************************/
+static void
+ring_frame(void *arg, int ifindex, const unsigned char *frame,
+           unsigned int len)
+{
+    bench_result_t *res = arg;
+    static unsigned char buf[PKT_SIZE];
+
+    /* Demultiplex and copy out, as lacpd does. */
+    if ((ifindex > bench_max_ifindex) || !bench_known[ifindex]) {
+        return;
+    }
+
+    memcpy(buf, frame, len < PKT_SIZE ? len : PKT_SIZE);
+    res->frames++;
+} /* ring_frame */
+
+static void
+ring_model(bench_result_t *res)
+{
+    mlacp_rx_ring_t ring;
+    struct epoll_event ev;
+    struct epoll_event events[MAX_EVENTS];
+    int epfd;
+    int rc;
+    int nfds;
+
+    rc = mlacp_rx_ring_open(&ring, ETH_P_SLOW, &bench_fprog);
+    if (rc) {
+        fprintf(stderr, "ring open: %s\n", strerror(rc));
+        exit(1);
+    }
+
+    epfd = epoll_create1(0);
+    ev.events = EPOLLIN;
+    ev.data.fd = ring.r_fd;
+    epoll_ctl(epfd, EPOLL_CTL_ADD, ring.r_fd, &ev);
+    res->fds = 2;
+
+    res->cpu_ns = bench_now_ns(CLOCK_THREAD_CPUTIME_ID);
+
+    while (!bench_stop) {
+        nfds = epoll_wait(epfd, events, MAX_EVENTS, 10);
+        res->syscalls++;
+        if (nfds > 0) {
+            mlacp_rx_ring_read(&ring, ring_frame, res);
+        }
+    }
+
+    res->cpu_ns = bench_now_ns(CLOCK_THREAD_CPUTIME_ID) - res->cpu_ns;
+
+    close(epfd);
+    mlacp_rx_ring_close(&ring);
+} /* ring_model */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static void *
+bench_receiver(void *arg)
+{
+    void (*model)(bench_result_t *) = ((void **)arg)[0];
+    bench_result_t *res = ((void **)arg)[1];
+
+    model(res);
+    return NULL;
+} /* bench_receiver */
+
+static void
+bench_run(const char *name, void (*model)(bench_result_t *))
+{
+    pthread_t rx;
+    pthread_t tx;
+    bench_result_t res;
+    unsigned long long sent = 0;
+    struct timespec settle = { 0, 200 * 1000000 };
+    void *args[2];
+
+    memset(&res, 0, sizeof(res));
+    args[0] = (void *)model;
+    args[1] = &res;
+
+    bench_stop = 0;
+    pthread_create(&rx, NULL, bench_receiver, args);
+    nanosleep(&settle, NULL);
+
+    pthread_create(&tx, NULL, bench_sender, &sent);
+    pthread_join(tx, NULL);
+
+    nanosleep(&settle, NULL);
+    bench_stop = 1;
+    pthread_join(rx, NULL);
+
+    printf("    %-6s: fds %5d   received %8llu/%-8llu lost %6llu   "
+           "syscalls/frame %6.3f   cpu %7.0f ns/frame\n",
+           name, res.fds, res.frames, sent,
+           sent > res.frames ? sent - res.frames : 0,
+           res.frames ? (double)res.syscalls / res.frames : 0.0,
+           res.frames ? (double)res.cpu_ns / res.frames : 0.0);
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    if (argc > 1) {
+        bench_pairs = atoi(argv[1]);
+    }
+    if (argc > 2) {
+        bench_rounds = atol(argv[2]);
+    }
+    if ((bench_pairs <= 0) || (bench_pairs > 4096) || (bench_rounds <= 0)) {
+        fprintf(stderr, "usage: %s [pairs] [rounds]\n", argv[0]);
+        return 1;
+    }
+
+    bench_setup();
+
+    printf("pairs=%d rounds=%ld round gap=%dus\n",
+           bench_pairs, bench_rounds, ROUND_GAP_US);
+
+    bench_run("socket", socket_model);
+    bench_run("ring", ring_model);
+
+    return 0;
+} /* main */
@@ -0,0 +1,226 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * timer_bench.c
+ *
+ *   Microbenchmark for the one second LACP timer tick.  Runs the same
+ *   steady state (every port in slow periodic Tx, long timeout, partner
+ *   LACPDU restarting current while every 30 seconds, ports out of phase)
+ *   through the previous per port counters, decremented by a walk of
+ *   the port AVL tree on every tick, and through the timing wheel in
+ *   src/lacp_timer.c.  Reports the cost per tick for each port count.
+ *
+ *   usage: timer_bench [seconds simulated]
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+
+#include "avl.h"
+#include "lacp_timer.h"
+
+#define DFLT_TICKS          3000
+#define SLOW_PERIODIC_COUNT 30
+#define LONG_TIMEOUT_COUNT  90
+
+static const int bench_ports[] = { 64, 1024, 8192 };
+
+typedef struct bench_port {
+    lacp_avl_node_t     avlnode;
+    unsigned long long  handle;
+
+    /* Previous scheme: counters decremented on every tick. */
+    int                 periodic_tx_counter;
+    int                 current_while_counter;
+    int                 wait_while_counter;
+
+    /* Timing wheel scheme. */
+    lacp_timer_t        periodic_tx_timer;
+    lacp_timer_t        current_while_timer;
+    lacp_timer_t        wait_while_timer;
+
+    unsigned long long  tx;
+} bench_port_t;
+
+static lacp_avl_tree_t bench_tree;
+static lacp_timer_wheel_t bench_tx_wheel;
+static lacp_timer_wheel_t bench_rx_wheel;
+
+static long long
+bench_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+/************************************************************************
+ * Previous scheme: walk all the ports every tick.
+ ************************************************************************/
+static void
+counter_tick(void)
+{
+    bench_port_t *port;
+
+    for (port = LACP_AVL_FIRST(bench_tree);
+         port;
+         port = LACP_AVL_NEXT(port->avlnode)) {
+        if (port->periodic_tx_counter > 0) {
+            if (--port->periodic_tx_counter == 0) {
+                port->tx++;
+                port->periodic_tx_counter = SLOW_PERIODIC_COUNT;
+                /* Partner's LACPDU restarts current while. */
+                port->current_while_counter = LONG_TIMEOUT_COUNT;
+            }
+        }
+        if (port->wait_while_counter > 0) {
+            port->wait_while_counter--;
+        }
+    }
+
+    for (port = LACP_AVL_FIRST(bench_tree);
+         port;
+         port = LACP_AVL_NEXT(port->avlnode)) {
+        if (port->current_while_counter > 0) {
+            port->current_while_counter--;
+        }
+    }
+} /* counter_tick */
+
+/************************************************************************
+ * Timing wheel: only the due timers are visited.
+ ************************************************************************/
+static void
+wheel_periodic_tx_expiry(void *arg)
+{
+    bench_port_t *port = arg;
+
+    port->tx++;
+    lacp_timer_start(&bench_tx_wheel, &port->periodic_tx_timer,
+                     SLOW_PERIODIC_COUNT);
+    lacp_timer_start(&bench_rx_wheel, &port->current_while_timer,
+                     LONG_TIMEOUT_COUNT);
+} /* wheel_periodic_tx_expiry */
+
+static void
+wheel_nop_expiry(void *arg __attribute__ ((unused)))
+{
+} /* wheel_nop_expiry */
+
+static void
+wheel_tick(void)
+{
+    lacp_timer_wheel_advance(&bench_tx_wheel, 1);
+    lacp_timer_wheel_advance(&bench_rx_wheel, 1);
+} /* wheel_tick */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static bench_port_t *
+bench_setup(int nports)
+{
+    bench_port_t *ports;
+    int phase;
+    int i;
+
+    ports = calloc(nports, sizeof(bench_port_t));
+    if (ports == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+
+    LACP_AVL_INIT_TREE(bench_tree, lacp_compare_port_handle);
+    lacp_timer_wheel_init(&bench_tx_wheel);
+    lacp_timer_wheel_init(&bench_rx_wheel);
+
+    for (i = 0; i < nports; i++) {
+        ports[i].handle = ((unsigned long long)i << 48) | 0x100;
+        LACP_AVL_INIT_NODE(ports[i].avlnode, &ports[i], &ports[i].handle);
+        if (!LACP_AVL_INSERT(bench_tree, ports[i].avlnode)) {
+            fprintf(stderr, "avl insert failed\n");
+            exit(1);
+        }
+
+        phase = 1 + (i % SLOW_PERIODIC_COUNT);
+
+        ports[i].periodic_tx_counter = phase;
+        ports[i].current_while_counter = LONG_TIMEOUT_COUNT;
+
+        lacp_timer_init(&ports[i].periodic_tx_timer,
+                        wheel_periodic_tx_expiry, &ports[i]);
+        lacp_timer_init(&ports[i].current_while_timer,
+                        wheel_nop_expiry, &ports[i]);
+        lacp_timer_init(&ports[i].wait_while_timer,
+                        wheel_nop_expiry, &ports[i]);
+        lacp_timer_start(&bench_tx_wheel, &ports[i].periodic_tx_timer, phase);
+        lacp_timer_start(&bench_rx_wheel, &ports[i].current_while_timer,
+                         LONG_TIMEOUT_COUNT);
+    }
+
+    return ports;
+} /* bench_setup */
+
+static double
+bench_run(void (*tick)(void), long ticks)
+{
+    long long start;
+    long i;
+
+    start = bench_now_ns();
+    for (i = 0; i < ticks; i++) {
+        tick();
+    }
+
+    return (double)(bench_now_ns() - start) / (double)ticks;
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    bench_port_t *ports;
+    long ticks = DFLT_TICKS;
+    double counter_ns;
+    double wheel_ns;
+    unsigned int i;
+
+    if (argc > 1) {
+        ticks = atol(argv[1]);
+    }
+    if (ticks <= 0) {
+        fprintf(stderr, "usage: %s [seconds simulated]\n", argv[0]);
+        return 1;
+    }
+
+    printf("ticks=%ld slow periodic=%ds long timeout=%ds\n",
+           ticks, SLOW_PERIODIC_COUNT, LONG_TIMEOUT_COUNT);
+
+    for (i = 0; i < sizeof(bench_ports) / sizeof(bench_ports[0]); i++) {
+        ports = bench_setup(bench_ports[i]);
+        counter_ns = bench_run(counter_tick, ticks);
+        wheel_ns = bench_run(wheel_tick, ticks);
+        free(ports);
+
+        printf("    %5d ports: avl walk %10.1f ns/tick   "
+               "wheel %8.1f ns/tick   speedup %6.1fx\n",
+               bench_ports[i], counter_ns, wheel_ns, counter_ns / wheel_ns);
+    }
+
+    return 0;
+} /* main */
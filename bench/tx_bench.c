@@ -0,0 +1,469 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * tx_bench.c
+ *
+ *   Benchmark for the three LACPDU transmit paths, on veth pairs.  Each
+ *   round sends the given number of LACPDUs on the near end of every
+ *   pair, the way one protocol thread wakeup would, through
+ *
+ *     - sendto:   one bound raw socket per interface, a sendto() per
+ *       LACPDU, as lacpd does by default;
+ *     - sendmmsg: one unbound socket, the whole round in sendmmsg()
+ *       calls of up to 64 LACPDUs addressed by ifindex, as lacpd
+ *       --rx-ring does;
+ *     - ring:     one bound socket per interface with a PACKET_TX_RING,
+ *       src/mlacp_tx_ring.c, flushed once per interface per round, as
+ *       lacpd --tx-ring does.
+ *
+ *   A receiver thread counts the frames arriving on the peer ends.
+ *   Reports frames sent and lost, and sender system calls and CPU time
+ *   per frame.
+ *
+ *   Needs CAP_NET_ADMIN and CAP_NET_RAW (run as root) and the ip(8)
+ *   command.  The veth pairs are named lacptN/lacptNp and removed on
+ *   exit.
+ *
+ *   usage: tx_bench [pairs] [rounds] [LACPDUs per interface per round]
+ */
+
+#define _GNU_SOURCE
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <errno.h>
+#include <time.h>
+#include <pthread.h>
+#include <net/if.h>
+#include <arpa/inet.h>
+#include <sys/epoll.h>
+#include <sys/socket.h>
+#include <linux/if_ether.h>
+#include <linux/if_packet.h>
+
+#include "mlacp_rx_ring.h"
+#include "mlacp_tx_ring.h"
+
+#define DFLT_PAIRS      64
+#define DFLT_ROUNDS     500
+#define DFLT_PER_ROUND  1
+#define ROUND_GAP_US    1000
+#define PKT_SIZE        124
+#define BATCH           64
+#define MAX_EVENTS      64
+
+static int bench_pairs = DFLT_PAIRS;
+static long bench_rounds = DFLT_ROUNDS;
+static int bench_per_round = DFLT_PER_ROUND;
+static int *bench_tx_ifindex;           /* Near ends, transmit. */
+static unsigned char *bench_peer;       /* ifindex is a peer end. */
+static int bench_max_ifindex;
+static unsigned char bench_frame[PKT_SIZE];
+
+static volatile int bench_stop;
+
+typedef struct bench_result {
+    unsigned long long sent;
+    unsigned long long received;
+    unsigned long long syscalls;
+    unsigned long long cpu_ns;
+} bench_result_t;
+
+static long long
+bench_now_ns(clockid_t clock)
+{
+    struct timespec ts;
+
+    clock_gettime(clock, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+} /* bench_now_ns */
+
+static void
+bench_cmd(const char *fmt, int i)
+{
+    char cmd[256];
+
+    snprintf(cmd, sizeof(cmd), fmt, i, i);
+    if (system(cmd) != 0) {
+        fprintf(stderr, "failed: %s\n", cmd);
+        exit(1);
+    }
+} /* bench_cmd */
+
+static void
+bench_cleanup(void)
+{
+    char cmd[128];
+    int i;
+
+    for (i = 0; i < bench_pairs; i++) {
+        snprintf(cmd, sizeof(cmd), "ip link del lacpt%d 2>/dev/null", i);
+        if (system(cmd) != 0) {
+            /* Already gone. */
+        }
+    }
+} /* bench_cleanup */
+
+static void
+bench_setup(void)
+{
+    char name[32];
+    int *peer_ifindex;
+    int i;
+
+    bench_tx_ifindex = calloc(bench_pairs, sizeof(int));
+    peer_ifindex = calloc(bench_pairs, sizeof(int));
+    if ((bench_tx_ifindex == NULL) || (peer_ifindex == NULL)) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+
+    atexit(bench_cleanup);
+
+    for (i = 0; i < bench_pairs; i++) {
+        bench_cmd("ip link add lacpt%d type veth peer name lacpt%dp", i);
+        bench_cmd("ip link set lacpt%d up && ip link set lacpt%dp up", i);
+
+        snprintf(name, sizeof(name), "lacpt%d", i);
+        bench_tx_ifindex[i] = if_nametoindex(name);
+        snprintf(name, sizeof(name), "lacpt%dp", i);
+        peer_ifindex[i] = if_nametoindex(name);
+
+        if (peer_ifindex[i] > bench_max_ifindex) {
+            bench_max_ifindex = peer_ifindex[i];
+        }
+    }
+
+    bench_peer = calloc(bench_max_ifindex + 1, 1);
+    if (bench_peer == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+    for (i = 0; i < bench_pairs; i++) {
+        bench_peer[peer_ifindex[i]] = 1;
+    }
+    free(peer_ifindex);
+
+    memcpy(bench_frame, "\x01\x80\xc2\x00\x00\x02\x02\x00\x00\x00\x00\x01", 12);
+    bench_frame[12] = 0x88;
+    bench_frame[13] = 0x09;
+    bench_frame[14] = 0x01;     /* LACP subtype */
+    bench_frame[15] = 0x01;     /* version */
+} /* bench_setup */
+
+static int
+bench_bound_socket(int ifindex)
+{
+    struct sockaddr_ll addr;
+    int fd;
+
+    fd = socket(PF_PACKET, SOCK_RAW, 0);
+    if (fd < 0) {
+        perror("socket");
+        exit(1);
+    }
+
+    memset(&addr, 0, sizeof(addr));
+    addr.sll_family = AF_PACKET;
+    addr.sll_ifindex = ifindex;
+    addr.sll_protocol = htons(ETH_P_SLOW);
+    if (bind(fd, (struct sockaddr *)&addr, sizeof(addr)) < 0) {
+        perror("bind");
+        exit(1);
+    }
+
+    return fd;
+} /* bench_bound_socket */
+
+static void
+bench_round_gap(void)
+{
+    struct timespec gap = { 0, ROUND_GAP_US * 1000 };
+
+    nanosleep(&gap, NULL);
+} /* bench_round_gap */
+
+/************************************************************************
+ * Receiver: counts the frames arriving on the peer ends.
+ ************************************************************************/
+static void
+bench_rx_frame(void *arg, int ifindex, const unsigned char *frame,
+               unsigned int len)
+{
+    bench_result_t *res = arg;
+
+    if ((ifindex <= bench_max_ifindex) && bench_peer[ifindex]) {
+        res->received++;
+    }
+} /* bench_rx_frame */
+
+static void *
+bench_receiver(void *arg)
+{
+    mlacp_rx_ring_t ring;
+    struct epoll_event ev;
+    struct epoll_event events[MAX_EVENTS];
+    int epfd;
+    int rc;
+
+    rc = mlacp_rx_ring_open(&ring, ETH_P_SLOW, NULL);
+    if (rc) {
+        fprintf(stderr, "rx ring open: %s\n", strerror(rc));
+        exit(1);
+    }
+
+    epfd = epoll_create1(0);
+    ev.events = EPOLLIN;
+    ev.data.fd = ring.r_fd;
+    epoll_ctl(epfd, EPOLL_CTL_ADD, ring.r_fd, &ev);
+
+    while (!bench_stop) {
+        if (epoll_wait(epfd, events, MAX_EVENTS, 10) > 0) {
+            mlacp_rx_ring_read(&ring, bench_rx_frame, arg);
+        }
+    }
+    mlacp_rx_ring_read(&ring, bench_rx_frame, arg);
+
+    close(epfd);
+    mlacp_rx_ring_close(&ring);
+    return NULL;
+} /* bench_receiver */
+
+/************************************************************************
+ * sendto() per LACPDU on a socket per interface.
+ ************************************************************************/
+static void
+sendto_model(bench_result_t *res)
+{
+    int *fds;
+    long round;
+    int i;
+    int j;
+
+    fds = calloc(bench_pairs, sizeof(int));
+    if (fds == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+    for (i = 0; i < bench_pairs; i++) {
+        fds[i] = bench_bound_socket(bench_tx_ifindex[i]);
+    }
+
+    for (round = 0; round < bench_rounds; round++) {
+        long long start = bench_now_ns(CLOCK_THREAD_CPUTIME_ID);
+
+        for (i = 0; i < bench_pairs; i++) {
+            for (j = 0; j < bench_per_round; j++) {
+                if (sendto(fds[i], bench_frame, PKT_SIZE, 0, NULL, 0) > 0) {
+                    res->sent++;
+                }
+                res->syscalls++;
+            }
+        }
+
+        res->cpu_ns += bench_now_ns(CLOCK_THREAD_CPUTIME_ID) - start;
+        bench_round_gap();
+    }
+
+    for (i = 0; i < bench_pairs; i++) {
+        close(fds[i]);
+    }
+    free(fds);
+} /* sendto_model */
+
+/************************************************************************
+ * sendmmsg() on one unbound socket, addressed by ifindex.
+ ************************************************************************/
+static void
+sendmmsg_model(bench_result_t *res)
+{
+    static unsigned char frames[BATCH][PKT_SIZE];
+    struct mmsghdr msgs[BATCH];
+    struct iovec iov[BATCH];
+    struct sockaddr_ll addr[BATCH];
+    long round;
+    int count;
+    int sent;
+    int rc;
+    int fd;
+    int i;
+    int j;
+
+    fd = socket(PF_PACKET, SOCK_RAW, 0);
+    if (fd < 0) {
+        perror("socket");
+        exit(1);
+    }
+
+    for (round = 0; round < bench_rounds; round++) {
+        long long start = bench_now_ns(CLOCK_THREAD_CPUTIME_ID);
+
+        count = 0;
+        for (i = 0; i < bench_pairs; i++) {
+            for (j = 0; j < bench_per_round; j++) {
+                /* Copy and address each LACPDU, as lacpd does. */
+                memcpy(frames[count], bench_frame, PKT_SIZE);
+                memset(&addr[count], 0, sizeof(addr[count]));
+                addr[count].sll_family = AF_PACKET;
+                addr[count].sll_ifindex = bench_tx_ifindex[i];
+                addr[count].sll_halen = ETH_ALEN;
+                memcpy(addr[count].sll_addr, bench_frame, ETH_ALEN);
+                iov[count].iov_base = frames[count];
+                iov[count].iov_len = PKT_SIZE;
+                memset(&msgs[count], 0, sizeof(msgs[count]));
+                msgs[count].msg_hdr.msg_name = &addr[count];
+                msgs[count].msg_hdr.msg_namelen = sizeof(addr[count]);
+                msgs[count].msg_hdr.msg_iov = &iov[count];
+                msgs[count].msg_hdr.msg_iovlen = 1;
+                count++;
+
+                if ((count == BATCH) ||
+                    ((i == bench_pairs - 1) && (j == bench_per_round - 1))) {
+                    for (sent = 0; sent < count; ) {
+                        rc = sendmmsg(fd, &msgs[sent], count - sent, 0);
+                        res->syscalls++;
+                        sent += (rc > 0) ? rc : 1;
+                        res->sent += (rc > 0) ? rc : 0;
+                    }
+                    count = 0;
+                }
+            }
+        }
+
+        res->cpu_ns += bench_now_ns(CLOCK_THREAD_CPUTIME_ID) - start;
+        bench_round_gap();
+    }
+
+    close(fd);
+} /* sendmmsg_model */
+
+/************************************************************************
+ * PACKET_TX_RING per interface, flushed once per round.
+ ************************************************************************/
+static void
+ring_model(bench_result_t *res)
+{
+    mlacp_tx_ring_t *rings;
+    long round;
+    int rc;
+    int i;
+    int j;
+
+    rings = calloc(bench_pairs, sizeof(mlacp_tx_ring_t));
+    if (rings == NULL) {
+        fprintf(stderr, "out of memory\n");
+        exit(1);
+    }
+    for (i = 0; i < bench_pairs; i++) {
+        rc = mlacp_tx_ring_open(&rings[i],
+                                bench_bound_socket(bench_tx_ifindex[i]));
+        if (rc) {
+            fprintf(stderr, "tx ring open: %s\n", strerror(rc));
+            exit(1);
+        }
+    }
+
+    for (round = 0; round < bench_rounds; round++) {
+        long long start = bench_now_ns(CLOCK_THREAD_CPUTIME_ID);
+
+        for (i = 0; i < bench_pairs; i++) {
+            for (j = 0; j < bench_per_round; j++) {
+                if (mlacp_tx_ring_put(&rings[i], bench_frame, PKT_SIZE) == 0) {
+                    res->sent++;
+                }
+            }
+            mlacp_tx_ring_flush(&rings[i]);
+            res->syscalls++;
+        }
+
+        res->cpu_ns += bench_now_ns(CLOCK_THREAD_CPUTIME_ID) - start;
+        bench_round_gap();
+    }
+
+    for (i = 0; i < bench_pairs; i++) {
+        res->sent -= rings[i].t_stats.discarded;
+        close(rings[i].t_fd);
+        mlacp_tx_ring_close(&rings[i]);
+    }
+    free(rings);
+} /* ring_model */
+
+/************************************************************************
+ * Benchmark driver
+ ************************************************************************/
+static void
+bench_run(const char *name, void (*model)(bench_result_t *))
+{
+    pthread_t rx;
+    bench_result_t res;
+    struct timespec settle = { 0, 200 * 1000000 };
+    unsigned long long frames = (unsigned long long)bench_pairs *
+                                bench_rounds * bench_per_round;
+
+    memset(&res, 0, sizeof(res));
+
+    bench_stop = 0;
+    pthread_create(&rx, NULL, bench_receiver, &res);
+    nanosleep(&settle, NULL);
+
+    model(&res);
+
+    nanosleep(&settle, NULL);
+    bench_stop = 1;
+    pthread_join(rx, NULL);
+
+    printf("    %-8s: sent %8llu/%-8llu received %8llu lost %6llu   "
+           "syscalls/frame %6.3f   cpu %6.0f ns/frame\n",
+           name, res.sent, frames, res.received,
+           frames > res.received ? frames - res.received : 0,
+           res.sent ? (double)res.syscalls / res.sent : 0.0,
+           res.sent ? (double)res.cpu_ns / res.sent : 0.0);
+} /* bench_run */
+
+int
+main(int argc, char *argv[])
+{
+    if (argc > 1) {
+        bench_pairs = atoi(argv[1]);
+    }
+    if (argc > 2) {
+        bench_rounds = atol(argv[2]);
+    }
+    if (argc > 3) {
+        bench_per_round = atoi(argv[3]);
+    }
+    if ((bench_pairs <= 0) || (bench_pairs > 4096) || (bench_rounds <= 0) ||
+        (bench_per_round <= 0) ||
+        (bench_per_round > MLACP_TX_RING_FRAME_NR)) {
+        fprintf(stderr, "usage: %s [pairs] [rounds] "
+                "[LACPDUs per interface per round, at most %d]\n",
+                argv[0], MLACP_TX_RING_FRAME_NR);
+        return 1;
+    }
+
+    bench_setup();
+
+    printf("pairs=%d rounds=%ld LACPDUs per interface per round=%d\n",
+           bench_pairs, bench_rounds, bench_per_round);
+
+    bench_run("sendto", sendto_model);
+    bench_run("sendmmsg", sendmmsg_model);
+    bench_run("ring", ring_model);
+
+    return 0;
+} /* main */
@@ -124,6 +124,8 @@ typedef struct ML_event {
     int replyto;
     int msgnum;         // enum MLm_$protocol
     void *msg;          // struct MLt_$protocol__$type
+    unsigned long long queued_us;   // time queued, for lane wait metrics
+    struct ML_event *next;          // config lane overflow list
 } ML_event;
 
 
@@ -0,0 +1,40 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __LACP_HIST_H__
+#define __LACP_HIST_H__
+
+/* Number of power of two buckets.  Bucket 0 counts zeros, bucket i
+ * counts values from 2^(i-1) to 2^i - 1, and the last bucket counts
+ * everything from 2^(LACP_HIST_BUCKETS-2) up. */
+#define LACP_HIST_BUCKETS   24
+
+/* Log2 histogram.  Single writer; readers may see a sample half
+ * recorded, which is good enough for debug output. */
+typedef struct lacp_hist {
+    unsigned long long  h_count;
+    unsigned long long  h_sum;
+    unsigned long long  h_max;
+    unsigned long long  h_bucket[LACP_HIST_BUCKETS];
+} lacp_hist_t;
+
+extern void lacp_hist_init(lacp_hist_t *hist);
+extern void lacp_hist_record(lacp_hist_t *hist, unsigned long long value);
+extern unsigned long long lacp_hist_bucket_min(int bucket);
+extern unsigned long long lacp_hist_percentile(const lacp_hist_t *hist,
+                                               int percent);
+
+#endif  /*  __LACP_HIST_H__  */
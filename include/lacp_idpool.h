@@ -0,0 +1,39 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __LACP_IDPOOL_H__
+#define __LACP_IDPOOL_H__
+
+/* A pool of integer ids, p_min to p_max.  The lowest free id is always
+ * the one allocated.  In use ids are bits in p_used; a second level
+ * bitmap, p_full, marks the words of p_used that have no free id left,
+ * so allocating looks at one bit per 64 ids, and one word per 4096. */
+typedef struct lacp_idpool {
+    unsigned long  *p_used;
+    unsigned long  *p_full;
+    unsigned int    p_min;
+    unsigned int    p_max;
+    unsigned int    p_count;       /* Ids currently allocated. */
+} lacp_idpool_t;
+
+extern int lacp_idpool_init(lacp_idpool_t *pool,
+                            unsigned int min, unsigned int max);
+extern void lacp_idpool_destroy(lacp_idpool_t *pool);
+extern int lacp_idpool_alloc(lacp_idpool_t *pool, unsigned int *id);
+extern int lacp_idpool_free(lacp_idpool_t *pool, unsigned int id);
+extern int lacp_idpool_in_use(const lacp_idpool_t *pool, unsigned int id);
+
+#endif  /*  __LACP_IDPOOL_H__  */
@@ -63,6 +63,13 @@
  *
  *      Other options:
  *        --unixctl=SOCKET        override default control socket name
+ *        --fast-failover=MSEC    fast periodic LACPDU interval (10 to 1000 ms)
+ *        --rx-ring               receive LACPDUs on one TPACKET_V3 ring for all
+ *                                interfaces instead of a socket per interface
+ *        --tx-ring               send LACPDUs through a PACKET_TX_RING on each
+ *                                interface socket
+ *        --db-flush-delay=MSEC   longest time a status change waits to be
+ *                                written to OVSDB (0 to 1000 ms)
  *        -h, --help              display this help message
  *
  *
@@ -72,7 +79,8 @@
  *      exit
  *      list-commands
  *      version
- *      lacpd/dump [{interface [interface name]} | {port [port name]}]
+ *      lacpd/dump [{interface [interface name]} | {port [port name]} | queue | pool]
+ *      lacpd/perf
  *      vlog/disable-rate-limit [module]...
  *      vlog/enable-rate-limit  [module]...
  *      vlog/list
@@ -112,12 +120,14 @@
 #define __LACP_OPS_IF__H__
 
 #include <dynamic-string.h>
+#include <hmap.h>
 #include <vswitch-idl.h>
 
 #include <pm_cmn.h>
 
 #include "mvlan_lacp.h"
 #include "lacp.h"
+#include "lacp_hist.h"
 
 struct lacp_status_values {
     char *system_id;
@@ -126,6 +136,23 @@ struct lacp_status_values {
     char *state;
 };
 
+/* The LACP variables written to an interface's lacp_status and
+ * lacp_current columns, as they were when the LACP protocol thread
+ * last changed them. */
+struct lacp_status_snapshot {
+    system_variables_t  actor_system;
+    u_short             actor_port_priority;
+    u_short             actor_port_number;
+    u_short             actor_key;
+    state_parameters_t  actor_state;
+    system_variables_t  partner_system;
+    u_short             partner_port_priority;
+    u_short             partner_port_number;
+    u_short             partner_key;
+    state_parameters_t  partner_state;
+    bool                current;
+};
+
 /*************************************************************************//**
  * @ingroup lacpd_ovsdb_if
  * @brief lacpd's internal data strucuture to store per interface data.
@@ -142,6 +169,8 @@ struct iface_data {
 
     /* These members are valid only within lacpd_reconfigure(). */
     const struct ovsrec_interface *cfg;     /*!< pointer to corresponding row in IDL cache */
+    struct uuid         cfg_uuid;           /*!< UUID of the row in IDL cache */
+    struct hmap_node    uuid_node;          /*!< In iface_by_uuid, by cfg_uuid */
 
     int                 index;              /*!< Allocated index for interface */
     int                 hw_port_number;     /*!< Hardware port number */
@@ -159,16 +188,19 @@ struct iface_data {
     int                 port_id;            /*!< port id */
     bool                fallback_enabled;   /*!< Default = false */
 
-    /* LACPDU send/receive related. */
-    int                 pdu_sockfd;         /*!< Socket FD for LACPDU rx/tx */
-    bool                pdu_registered;     /*!< Indicates if port is registered to receive LACPDU */
-
     /* LACP status values formatted */
     struct lacp_status_values actor;        /*!< Currently set lacp status values - actor */
     struct lacp_status_values partner;      /*!< Currently set lacp status values - partner */
     bool                      lacp_current; /*!< Currently set lacp_current value */
     bool                      lacp_current_set; /*!< false=lacp_current is not set, true=lacp_current is set */
     struct state_parameters   local_state;
+
+    /* OVSDB status write-back, OVSDB interface thread only. */
+    unsigned int        wb_dirty;           /*!< DB_WB_* updates waiting to be written */
+    unsigned int        wb_inflight;        /*!< DB_WB_* updates in the transaction in flight */
+    struct lacp_status_snapshot wb_status;  /*!< LACP status to write */
+    bool                wb_rx_enabled;      /*!< hw_bond_config rx_enabled to write */
+    bool                wb_tx_enabled;      /*!< hw_bond_config tx_enabled to write */
 };
 
 /**
@@ -189,6 +221,15 @@ extern void db_add_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t
 extern void db_delete_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t *plpinfo);
 
 extern void db_update_interface(lacp_per_port_variables_t *plpinfo);
+extern void db_req_flush(void);
+extern void db_writeback_dump(struct ds *ds);
+extern void db_monitor_dump(struct ds *ds);
+
+/* Longest time, in ms, a status change waits before it is written to
+ * OVSDB, so that changes made close together are written together. */
+#define DB_FLUSH_DELAY_MS_DEFAULT   20
+#define DB_FLUSH_DELAY_MS_MAX       1000
+extern unsigned int db_flush_delay_ms;
 
 // Utility functions
 extern struct iface_data *find_iface_data_by_index(int index);
@@ -237,6 +278,67 @@ extern void lacpd_run(void);
  *****************************************************************************/
 extern void lacpd_debug_dump(struct ds *ds, int argc, const char *argv[]);
 
+/**************************************************************************//**
+ * Debug function to dump the LACP main receive queue counters.
+ * Called by lacpd's appctl interface.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ *
+ *****************************************************************************/
+extern void lacpd_event_queue_dump(struct ds *ds);
+
+/**************************************************************************//**
+ * Debug function to dump the LACPDU counters of one interface.
+ * Called by lacpd's appctl interface.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ * @param[in] port interface index.
+ *
+ *****************************************************************************/
+extern void lacpd_port_pdu_dump(struct ds *ds, int port);
+
+/**************************************************************************//**
+ * Debug function to dump the LACP event pool occupancy and miss counters.
+ * Called by lacpd's appctl interface.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ *
+ *****************************************************************************/
+extern void lacpd_event_pool_dump(struct ds *ds);
+
+/**************************************************************************//**
+ * Debug function to dump the LACP timer tick lag, duration and ports per
+ * tick histograms.  Called by lacpd's appctl interface.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ *
+ *****************************************************************************/
+extern void lacpd_perf_dump(struct ds *ds);
+
+/**************************************************************************//**
+ * Dumps one histogram in the format of lacpd_perf_dump: count, average,
+ * p50, p99, maximum and the non-empty buckets.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ * @param[in] title name of the histogram.
+ * @param[in] hist the histogram.
+ * @param[in] unit unit of the values, appended to them.
+ *
+ *****************************************************************************/
+extern void lacpd_perf_hist_dump(struct ds *ds, const char *title,
+                                 const lacp_hist_t *hist,
+                                 const char *unit);
+
+/**************************************************************************//**
+ * Debug function to dump the histograms of the OVSDB requests from the
+ * LACP protocol thread and of the OVSDB interface thread passes.
+ * Called by lacpd_perf_dump.
+ *
+ * @param[in,out] ds pointer to struct ds that holds the debug output.
+ *
+ *****************************************************************************/
+extern void db_request_perf_dump(struct ds *ds);
+
 /**************************************************************************//**
  * Debug function to dump the interfaces member of LAGs.
  * Called by lacpd's appctl interface.
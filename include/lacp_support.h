@@ -29,12 +29,37 @@
 #define LONG_TIMEOUT_COUNT              (3 * SLOW_PERIODIC_COUNT)  /* 90 seconds */
 #define AGGREGATE_WAIT_COUNT            2                          /* 2 seconds */
 
+/* Fast periodic Tx interval.  The short timeout is three of these.
+ * lacpd --fast-failover=MSEC lowers it below the IEEE 802.1AX 1 second
+ * for peers that run the same non-standard rate. */
+#define FAST_PERIODIC_MS_DEFAULT        (FAST_PERIODIC_COUNT * 1000)
+#define FAST_PERIODIC_MS_MIN            LACP_TIMER_TICK_MS
+#define FAST_PERIODIC_TICKS             LACP_TIMER_MS(lacp_fast_periodic_ms)
+#define SHORT_TIMEOUT_TICKS             (3 * FAST_PERIODIC_TICKS)
+
+/* Periodic Tx spread statistics.  The fast periodic interval is split
+ * into LACP_TX_SPREAD_BUCKETS equal phases; each bucket counts the
+ * periodic LACPDUs sent in that phase. */
+#define LACP_TX_SPREAD_BUCKETS          10
+
+typedef struct lacp_tx_spread_stats {
+    unsigned long long  transmits;      /* Periodic Tx timer expiries. */
+    unsigned long long  busy_ticks;     /* Ticks with at least one. */
+    unsigned long       max_per_tick;   /* Most in a single tick. */
+    unsigned long       last_bucket[LACP_TX_SPREAD_BUCKETS];  /* Last interval. */
+    unsigned long       cur_bucket[LACP_TX_SPREAD_BUCKETS];   /* Interval so far. */
+} lacp_tx_spread_stats_t;
+
 #define STATE_STRING_SIZE               32
 
 #define STATE_FLAGS_SIZE                9
 
 #define MAX_ASYNC_TX                    3
 
+/* Marker responses sent per port per second; requests beyond this are
+ * dropped to protect the daemon from marker floods. */
+#define MAX_MARKER_RESPONSES            5
+
 /*****************************************************************************
  *      DEFAULT VALUES
  *****************************************************************************/
@@ -88,12 +113,27 @@ extern void LACP_update_port_params(port_handle_t lport_handle,
                                     short data, int hw_collecting);
 extern int port_number_2_link_group_index(int);
 extern void LAG_selection(lacp_per_port_variables_t *);
+extern lacp_lag_ppstruct_t *LAG_member_find(LAG_t *const, port_handle_t);
+extern lacp_lag_ppstruct_t *LAG_member_add(LAG_t *const,
+                                           lacp_per_port_variables_t *);
+extern void LAG_member_remove(LAG_t *const, lacp_lag_ppstruct_t *);
+extern lacp_sport_members_t *LACP_sport_members_find(port_handle_t);
+extern void LACP_set_sport_handle(lacp_per_port_variables_t *, port_handle_t);
+extern void LACP_set_partner_oper_port_priority(lacp_per_port_variables_t *,
+                                                u_short);
+extern int LACP_sport_partner_max_port_priority(lacp_per_port_variables_t *);
 extern void LAG_id_string(char *const, LAG_Id_t *const);
 extern int loop_back_check(lacp_per_port_variables_t *);
 extern void print_lacp_fsm_state(port_handle_t);
 extern void set_actor_admin_parms_2_oper(lacp_per_port_variables_t *, int);
 extern void set_partner_admin_parms_2_oper(lacp_per_port_variables_t *, int);
 extern void start_wait_while_timer(lacp_per_port_variables_t *);
+extern void LACP_init_port_timers(lacp_per_port_variables_t *);
+extern void LACP_stop_port_timers(lacp_per_port_variables_t *);
+extern void LACP_resume_port_timers(lacp_per_port_variables_t *);
+extern void LACP_start_ntt_retry_timer(lacp_per_port_variables_t *);
+extern void LACP_start_periodic_tx_timer(lacp_per_port_variables_t *,
+                                         unsigned int);
 extern void periodic_tx_state_string(int, char *);
 extern void mux_state_string(int, char *);
 extern void rx_state_string(int, char *);
@@ -118,6 +158,11 @@ extern void lacp_support_diag_dump(int port);
 extern unsigned char my_mac_addr[];
 extern uint actor_system_priority;
 extern lacp_avl_tree_t lacp_per_port_vars_tree;
+extern lacp_avl_tree_t lacp_sport_members_tree;
+extern unsigned int lacp_fast_periodic_ms;
+extern lacp_timer_wheel_t lacp_tx_timer_wheel;
+extern lacp_timer_wheel_t lacp_rx_timer_wheel;
+extern lacp_tx_spread_stats_t lacp_tx_spread_stats;
 extern const unsigned char lacp_mcast_addr[];
 extern const unsigned char default_partner_system_mac[];
 extern int lacp_tables_last_changed_time;
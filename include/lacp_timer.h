@@ -0,0 +1,79 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __LACP_TIMER_H__
+#define __LACP_TIMER_H__
+
+/* Timer wheel resolution. */
+#define LACP_TIMER_TICK_MS          10
+#define LACP_TIMER_TICKS_PER_SEC    (1000 / LACP_TIMER_TICK_MS)
+
+/* Converts a duration to wheel ticks, rounding up. */
+#define LACP_TIMER_MS(ms)   (((ms) + LACP_TIMER_TICK_MS - 1) / LACP_TIMER_TICK_MS)
+#define LACP_TIMER_SEC(s)   ((s) * LACP_TIMER_TICKS_PER_SEC)
+
+/* Number of one tick slots in a timer wheel.  Must be a power of two.
+ * One lap (10.24 s) covers the short LACP timers. */
+#define LACP_TIMER_WHEEL_SIZE   1024
+
+/* Number of one lap slots in the second level of a timer wheel, which
+ * holds the timers due after the current lap (slow periodic, long
+ * timeout).  Must be a power of two.  64 laps is about 11 minutes; a
+ * longer timer is put back on the second level until its lap comes. */
+#define LACP_TIMER_WHEEL_LAPS   64
+
+typedef void (*lacp_timer_handler_t)(void *arg);
+
+/* A timer, embedded in the object it times.  t_pprev is NULL while the
+ * timer is not armed.  A held timer is not armed either; it keeps the
+ * ticks it has left until it is resumed. */
+typedef struct lacp_timer {
+    struct lacp_timer    *t_next;
+    struct lacp_timer   **t_pprev;
+    unsigned long long    t_expires;    /* Wheel tick the timer fires on. */
+    unsigned int          t_ticks;      /* Ticks it was last started for. */
+    unsigned int          t_held;       /* Ticks left while held, or 0. */
+    lacp_timer_handler_t  t_handler;
+    void                 *t_arg;
+} lacp_timer_t;
+
+typedef struct lacp_timer_wheel {
+    lacp_timer_t         *w_slot[LACP_TIMER_WHEEL_SIZE];
+    lacp_timer_t         *w_lap[LACP_TIMER_WHEEL_LAPS];
+    unsigned long long    w_now;        /* Ticks elapsed since init. */
+    unsigned long         w_armed;      /* Timers currently armed. */
+    unsigned long long    w_fired;      /* Timers fired since init. */
+} lacp_timer_wheel_t;
+
+extern void lacp_timer_wheel_init(lacp_timer_wheel_t *wheel);
+extern void lacp_timer_wheel_advance(lacp_timer_wheel_t *wheel,
+                                     unsigned int ticks);
+extern void lacp_timer_init(lacp_timer_t *timer,
+                            lacp_timer_handler_t handler, void *arg);
+extern void lacp_timer_start(lacp_timer_wheel_t *wheel, lacp_timer_t *timer,
+                             unsigned int ticks);
+extern void lacp_timer_stop(lacp_timer_wheel_t *wheel, lacp_timer_t *timer);
+extern void lacp_timer_hold(lacp_timer_wheel_t *wheel, lacp_timer_t *timer,
+                            unsigned int ticks);
+extern void lacp_timer_pause(lacp_timer_wheel_t *wheel, lacp_timer_t *timer);
+extern void lacp_timer_resume(lacp_timer_wheel_t *wheel, lacp_timer_t *timer);
+extern int lacp_timer_pending(const lacp_timer_t *timer);
+extern unsigned int lacp_timer_remaining(const lacp_timer_wheel_t *wheel,
+                                         const lacp_timer_t *timer);
+extern int lacp_timer_wheel_next(const lacp_timer_wheel_t *wheel,
+                                 unsigned long long *expires);
+
+#endif  /*  __LACP_TIMER_H__  */
@@ -24,13 +24,26 @@
 //***************************************************************
 extern bool exiting;
 
+//***************************************************************
+// Variables in mlacp_main.c
+//***************************************************************
+extern bool lacpd_rx_ring_enabled;
+extern bool lacpd_tx_ring_enabled;
+
 //***************************************************************
 // Functions in mlacp_main.c
 //***************************************************************
 extern void *mlacp_rx_pdu_thread(void *data  __attribute__ ((unused)));
+extern void mlacp_port_add(int port, const char *name);
+extern void mlacp_port_delete(int port);
+extern void mlacp_port_set_lag(port_handle_t lport_handle, int lag_id);
+extern const char *mlacp_port_name(port_handle_t lport_handle);
+extern int mlacp_port_lag_id(port_handle_t lport_handle);
 extern void register_mcast_addr(port_handle_t lport_handle);
 extern void deregister_mcast_addr(port_handle_t lport_handle);
+extern void mlacp_rx_filter_update(void);
 extern int mlacp_tx_pdu(unsigned char* data, int length, port_handle_t lport_handle);
+extern int mlacp_tx_frame(unsigned char* data, int length, port_handle_t lport_handle);
 extern void *lacpd_protocol_thread(void *arg  __attribute__ ((unused)));
 extern int mlacp_init(u_long);
 
@@ -59,7 +72,6 @@ extern void mlacp_process_rxPdu(port_handle_t sport_handle, unsigned char *data)
 //***************************************************************
 extern void LACP_periodic_tx(void);
 extern void LACP_current_while_expiry(void);
-extern int lacp_lag_port_match(void *v1, void *v2);
 extern void LACP_process_input_pkt(port_handle_t lport_handle, unsigned char * data, int len);
 
 //***************************************************************
@@ -68,7 +80,7 @@ extern void LACP_process_input_pkt(port_handle_t lport_handle, unsigned char * d
 extern void mlacp_process_rx_pdu(struct ML_event *);
 extern void mlacp_process_vlan_msg(struct ML_event *);
 extern void mlacp_process_api_msg(struct ML_event *);
-extern void mlacp_process_timer(void);
+extern void mlacp_process_timer(unsigned long long ticks);
 extern void mlacpVapiLportEvent(struct ML_event *pevent);
 
 //***************************************************************
@@ -20,6 +20,7 @@
 
 enum MLm_drivers_mlacp {
     MLm_drivers_mlacp__rxPdu = 0,   //% MLt_drivers_mlacp__rxPdu
+    MLm_drivers_mlacp__rxPduBatch,  //% MLt_drivers_mlacp__rxPduBatch
 };
 
 struct MLt_drivers_mlacp__rxPdu {
@@ -28,4 +29,14 @@ struct MLt_drivers_mlacp__rxPdu {
     char data[LACP_PKT_SIZE];
 };
 
+/* Max LACPDUs carried by one batch message. */
+#define MLACP_RX_BATCH_MAX  16
+
+/* LACPDUs read by one wakeup of the Rx thread, from any number of
+ * interfaces.  Frames from the same interface are in arrival order. */
+struct MLt_drivers_mlacp__rxPduBatch {
+    int count;
+    struct MLt_drivers_mlacp__rxPdu pdu[MLACP_RX_BATCH_MAX];
+};
+
 #endif  /* __MLACP_RECV_H__ */
@@ -0,0 +1,66 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __MLACP_RX_RING_H__
+#define __MLACP_RX_RING_H__
+
+#include <stddef.h>
+#include <linux/filter.h>
+
+/* Ring geometry.  Blocks are handed to user space whole; a block is
+ * retired early, partly filled, after MLACP_RX_RING_RETIRE_MS so a lone
+ * LACPDU is not held back waiting for the block to fill. */
+#define MLACP_RX_RING_BLOCK_SIZE    (1 << 16)
+#define MLACP_RX_RING_BLOCK_NR      8
+#define MLACP_RX_RING_FRAME_SIZE    (1 << 11)
+#define MLACP_RX_RING_RETIRE_MS     1
+
+/* Ring statistics.  kernel_* come from PACKET_STATISTICS and are
+ * accumulated by mlacp_rx_ring_get_stats(). */
+typedef struct mlacp_rx_ring_stats {
+    unsigned long long  blocks;         /* Blocks read. */
+    unsigned long long  frames;         /* Frames handed to the callback. */
+    unsigned long long  outgoing;       /* Own transmitted frames skipped. */
+    unsigned long long  kernel_packets; /* Frames the kernel saw. */
+    unsigned long long  kernel_drops;   /* Frames lost with the ring full. */
+    unsigned long long  kernel_freezes; /* Times the ring was full. */
+} mlacp_rx_ring_stats_t;
+
+/* One packet socket receiving a protocol on every interface into a
+ * TPACKET_V3 memory mapped ring.  Only the reading thread may call
+ * mlacp_rx_ring_read(). */
+typedef struct mlacp_rx_ring {
+    int                     r_fd;
+    unsigned char          *r_map;
+    size_t                  r_map_len;
+    unsigned int            r_block;    /* Next block to look at. */
+    mlacp_rx_ring_stats_t   r_stats;
+} mlacp_rx_ring_t;
+
+/* Called for each received frame with the interface it arrived on. */
+typedef void (*mlacp_rx_ring_cb_t)(void *arg, int ifindex,
+                                   const unsigned char *frame,
+                                   unsigned int len);
+
+extern int mlacp_rx_ring_open(mlacp_rx_ring_t *ring, unsigned short protocol,
+                              const struct sock_fprog *filter);
+extern void mlacp_rx_ring_close(mlacp_rx_ring_t *ring);
+extern int mlacp_rx_ring_read(mlacp_rx_ring_t *ring,
+                              mlacp_rx_ring_cb_t cb, void *arg);
+extern void mlacp_rx_ring_get_stats(mlacp_rx_ring_t *ring,
+                                    mlacp_rx_ring_stats_t *stats);
+
+#endif  /*  __MLACP_RX_RING_H__  */
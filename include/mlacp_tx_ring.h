@@ -0,0 +1,58 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __MLACP_TX_RING_H__
+#define __MLACP_TX_RING_H__
+
+#include <stddef.h>
+
+/* Ring geometry: one page of frames.  A frame holds the tpacket header
+ * and one LACPDU or marker PDU with room to spare. */
+#define MLACP_TX_RING_BLOCK_SIZE    4096
+#define MLACP_TX_RING_FRAME_SIZE    512
+#define MLACP_TX_RING_FRAME_NR      (MLACP_TX_RING_BLOCK_SIZE / \
+                                     MLACP_TX_RING_FRAME_SIZE)
+
+/* Ring statistics. */
+typedef struct mlacp_tx_ring_stats {
+    unsigned long long  queued;         /* Frames written to the ring. */
+    unsigned long long  flushes;        /* send() calls. */
+    unsigned long long  full;           /* Frames dropped with the ring full. */
+    unsigned long long  discarded;      /* Frames dropped by a failed flush. */
+    unsigned long long  rejected;       /* Frames the kernel refused. */
+    unsigned int        high_water;     /* Most frames in use at once. */
+} mlacp_tx_ring_stats_t;
+
+/* PACKET_TX_RING attached to a bound packet socket.  Frames are copied
+ * into the ring by mlacp_tx_ring_put() and handed to the kernel
+ * together by mlacp_tx_ring_flush().  Not thread safe. */
+typedef struct mlacp_tx_ring {
+    int                     t_fd;
+    unsigned char          *t_map;
+    size_t                  t_map_len;
+    unsigned int            t_head;     /* Next frame to fill. */
+    unsigned int            t_pending;  /* Frames filled since last flush. */
+    mlacp_tx_ring_stats_t   t_stats;
+} mlacp_tx_ring_t;
+
+extern int mlacp_tx_ring_open(mlacp_tx_ring_t *ring, int fd);
+extern void mlacp_tx_ring_close(mlacp_tx_ring_t *ring);
+extern int mlacp_tx_ring_put(mlacp_tx_ring_t *ring,
+                             const unsigned char *data, unsigned int len);
+extern int mlacp_tx_ring_flush(mlacp_tx_ring_t *ring);
+extern unsigned int mlacp_tx_ring_used(mlacp_tx_ring_t *ring);
+
+#endif  /*  __MLACP_TX_RING_H__  */
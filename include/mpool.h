@@ -0,0 +1,74 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+#ifndef __MPOOL_H__
+#define __MPOOL_H__
+
+#include <stddef.h>
+#include <pthread.h>
+
+/* Size classes, in bytes of usable object space.  Every ML_event
+ * based message lacpd sends fits in the largest class; the LACPDU
+ * batches from the Rx thread are the biggest. */
+#define MPOOL_NUM_CLASSES       6
+#define MPOOL_MIN_CLASS_SIZE    128
+
+/* Objects carved per class at init time. */
+#define MPOOL_PREALLOC          64
+
+/* Max free objects kept per class; beyond this frees go to the heap. */
+#define MPOOL_MAX_CACHED        1024
+
+/* Every object is preceded by this header.  It links free objects
+ * and remembers the class to return the object to. */
+typedef struct mpool_hdr {
+    struct mpool_hdr   *next;
+    int                 size_class;
+    int                 from_slab;   /* Carved from the init slab, never freed. */
+} __attribute__ ((aligned(16))) mpool_hdr_t;
+
+/* Per class statistics. */
+typedef struct mpool_stats {
+    size_t              obj_size;
+    unsigned long long  allocs;      /* Objects handed out. */
+    unsigned long long  frees;       /* Objects given back. */
+    unsigned long long  misses;      /* Allocs that found the free list empty. */
+    unsigned long long  releases;    /* Frees returned to the heap (cache full). */
+    unsigned long       in_use;      /* Objects currently handed out. */
+    unsigned long       cached;      /* Objects on the free list. */
+    unsigned long       high_water;  /* Max in_use seen. */
+} mpool_stats_t;
+
+typedef struct mpool_class {
+    pthread_mutex_t     c_mutex;
+    mpool_hdr_t        *c_free;
+    void               *c_slab;
+    mpool_stats_t       c_stats;
+} mpool_class_t;
+
+typedef struct mpool {
+    mpool_class_t       p_class[MPOOL_NUM_CLASSES];
+    pthread_mutex_t     p_mutex;
+    mpool_stats_t       p_oversize;  /* Allocs larger than any class. */
+} mpool_t;
+
+extern int mpool_init(mpool_t *pool);
+extern void *mpool_zalloc(mpool_t *pool, size_t size);
+extern void mpool_free(mpool_t *pool, void *obj);
+extern void mpool_get_stats(mpool_t *pool, int size_class,
+                            mpool_stats_t *stats);
+
+#endif  /*  __MPOOL_H__  */
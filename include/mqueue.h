@@ -17,25 +17,69 @@
 #ifndef __MQUEUE_H__
 #define __MQUEUE_H__
 
-#include <pthread.h>
-#include <search.h>
-#include <semaphore.h>
+/* Number of slots in the queue ring.  Must be a power of two.
+ * Sized well above the worst case burst (every port receiving a
+ * LACPDU and a config change in the same tick) so that overflow
+ * is an exceptional condition. */
+#define MQUEUE_DEFAULT_SIZE     8192
 
-typedef struct qelem {
-    struct qelem   *q_forw;
-    struct qelem   *q_back;
+#define MQUEUE_CACHE_LINE_SIZE  64
+
+/* A ring slot.  q_seq tells producers and the consumer who owns
+ * the slot for a given lap around the ring. */
+typedef struct mqueue_slot {
+    unsigned long   q_seq;
     void           *q_data;
-} qelem_t;
+} mqueue_slot_t;
+
+/* Queue statistics, updated with relaxed atomics. */
+typedef struct mqueue_stats {
+    unsigned long long  sent;          /* Elements accepted into the ring. */
+    unsigned long long  received;      /* Elements handed to the consumer. */
+    unsigned long long  overflow;      /* Sends rejected with ring full. */
+    unsigned long long  wakeups;       /* Consumer wakeups via eventfd. */
+    unsigned long       high_water;    /* Max depth seen by the consumer. */
+} mqueue_stats_t;
+
+/* Consumer wakeup.  The consumer sleeps on the eventfd; producers
+ * only write to it when s_waiting says the consumer is asleep.  Several
+ * queues may share one signal so a consumer can wait on all of them. */
+typedef struct mqueue_signal {
+    int             s_efd;
+    int             s_waiting;
+} mqueue_signal_t;
 
+/* Bounded multi-producer/single-consumer queue.  Producers never
+ * allocate or take a lock. */
 typedef struct mqueue {
-    qelem_t         q_head;
-    qelem_t         q_tail;
-    pthread_mutex_t q_mutex;
-    sem_t           q_avail;
+    mqueue_slot_t   *q_ring;
+    unsigned long    q_mask;
+    mqueue_signal_t *q_signal;
+    mqueue_signal_t  q_own_signal;
+
+    /* Producer side: next position to claim. */
+    unsigned long   q_head __attribute__ ((aligned(MQUEUE_CACHE_LINE_SIZE)));
+
+    /* Consumer side: next position to read. */
+    unsigned long   q_tail __attribute__ ((aligned(MQUEUE_CACHE_LINE_SIZE)));
+
+    mqueue_stats_t  q_stats __attribute__ ((aligned(MQUEUE_CACHE_LINE_SIZE)));
 } mqueue_t;
 
 extern int mqueue_init(mqueue_t *queue);
+extern int mqueue_init_shared(mqueue_t *queue, mqueue_t *signal_owner);
 extern int mqueue_send(mqueue_t *queue, void *data);
 extern int mqueue_wait(mqueue_t *queue, void **data);
+extern int mqueue_trywait(mqueue_t *queue, void **data);
+extern int mqueue_wait_any(mqueue_t *queues[], int count,
+                           void **data, int *index);
+extern int mqueue_wait_any_fd(mqueue_t *queues[], int count, int fd,
+                              void **data, int *index);
+extern int mqueue_trywait_any(mqueue_t *queues[], int count,
+                              void **data, int *index);
+extern int mqueue_poll_fd(mqueue_t *queue);
+extern void mqueue_poll_done(mqueue_t *queue);
+extern unsigned long mqueue_depth(mqueue_t *queue);
+extern void mqueue_get_stats(mqueue_t *queue, mqueue_stats_t *stats);
 
 #endif  /*  __MQUEUE_H__  */
@@ -17,6 +17,7 @@
 #ifndef _MVLAN_LACP_H_
 #define _MVLAN_LACP_H_
 
+#include <net/if.h>
 #include <pm_cmn.h>
 
 /******************************************************************************************/
@@ -55,6 +56,9 @@ struct MLt_lacp_api__set_lport_overrides {
 #define MLm_vpm_api__unset_lacp_sport_params          17
 #define MLm_vpm_api__set_lacp_lport_params_event      18
 #define MLm_vpm_api__set_lport_fallback_status        19
+#define MLm_vpm_api__set_lport_info                   20
+#define MLm_vpm_api__clear_lport_info                 21
+#define MLm_vpm_api__db_req_room                      22
 
 struct MLt_vpm_api__create_sport {
     short type;                       //  The type of super port
@@ -111,6 +115,7 @@ struct MLt_vpm_api__lport_lacp_change {
     int collecting_ready;
     int sys_priority;
     char sys_id[MAC_BYTEADDR_SIZE];
+    int lag_id;                        // Configured LAG id
 };
 
 struct MLt_vpm_api__lport_state_change {
@@ -118,6 +123,7 @@ struct MLt_vpm_api__lport_state_change {
     unsigned long long lport_handle;
     unsigned long      lport_flags;
     int                link_speed;
+    unsigned int       gen;            // Link state coalescing generation
 };
 
 struct MLt_vpm_api__lport_fallback_status {
@@ -125,6 +131,14 @@ struct MLt_vpm_api__lport_fallback_status {
     int status;                        // Fallback new status
 };
 
+// The interface data the protocol thread keeps for an lport.  Set when
+// the interface is added, cleared before it is deleted.
+struct MLt_vpm_api__lport_info {
+    int  port;                         // Interface index, the port of the
+                                       // lport handle
+    char name[IFNAMSIZ];               // Interface name
+};
+
 // The message give by the LACP module to match the
 // given logical port to a corresponding aggregator.
 struct MLt_vpm_api__lacp_match_params {
@@ -202,9 +216,12 @@ extern int mvlan_api_select_aggregator(struct MLt_vpm_api__lacp_match_params *pl
 extern int mvlan_api_attach_lport_to_aggregator(struct MLt_vpm_api__lacp_attach *placp_attach_params);
 extern int mvlan_api_detach_lport_from_aggregator(struct MLt_vpm_api__lacp_attach *placp_detach_params);
 
+extern ML_event* ml_event_alloc(int size);
 extern int ml_send_event(ML_event* event);
 extern ML_event* ml_wait_for_next_event(void);
+extern ML_event* ml_get_next_event(void);
 extern void ml_event_free(ML_event* event);
+extern void ml_link_state_reset(port_handle_t lport_handle);
 
 // LACPDU send function
 extern int mlacp_send(unsigned char* data, int length, port_handle_t portHandle);
@@ -91,6 +91,10 @@ typedef unsigned long long port_handle_t;
 
 #define PM_HANDLE2PORT(handle)   ((int)((handle >> 48) & 0xff)) /* PORT */
 
+/* Ports a physical port handle can address, from its 8 bit port field.
+ * Tables indexed by PM_HANDLE2PORT() are sized with this. */
+#define PM_MAX_PORTS            256
+
 
 /* SPORT Handle (LAG, MLPPP, MPLS)                                           */
 /* +-----------------------------------------------------------------------+ */
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+##########################################################################
+# Name:        test_lacpd_ct_rx_fast_path_members.py
+#
+# Objective:   Verify that a member joining or leaving a LAG is not missed
+#              by the receive fast path of the other members, which keep
+#              receiving the same LACPDU from their partner throughout.
+#
+# Topology:    2 switches (DUT running OpenSwitch) connected by 3 interfaces
+#
+##########################################################################
+
+from time import sleep
+
+from lib_test import (
+    add_intf_to_bond,
+    enable_intf_list,
+    remove_intf_from_bond,
+    set_port_parameter,
+    sw_create_bond,
+    sw_wait_until_all_sm_ready
+)
+
+
+TOPOLOGY = """
+#   +-----+------+
+#   |            |
+#   |    sw1     |
+#   |            |
+#   +----+-+-+---+
+#        | | |
+#        | | | LAG1
+#        | | |
+#   +----+-+-+---+
+#   |            |
+#   |     sw2    |
+#   |            |
+#   +-----+------+
+
+# Nodes
+[type=openswitch name="OpenSwitch 1"] sw1
+[type=openswitch name="OpenSwitch 2"] sw2
+
+# Links
+sw1:1 -- sw2:1
+sw1:2 -- sw2:2
+sw1:3 -- sw2:3
+"""
+
+test_lag = 'lag1'
+
+sm_col_and_dist = '"Activ:1,TmOut:1,Aggr:1,Sync:1,Col:1,Dist:1,Def:0,Exp:0"'
+
+
+def get_fast_path_count(sw, intf):
+    """Number of LACPDUs 'intf' handled on the receive fast path."""
+    output = sw('ovs-appctl -t ops-lacpd lacpd/getlacpcounters ' + test_lag,
+                shell='bash')
+    for block in output.split('Interface: ')[1:]:
+        lines = block.splitlines()
+        if lines[0].strip() != intf:
+            continue
+        for line in lines[1:]:
+            if 'lacp_pdus_fast_path' in line:
+                return int(line.split(':')[1])
+    assert False, ('No fast path counter for %s in:\n%s' % (intf, output))
+
+
+def verify_fast_path_used(sw, intf, max_retries=10):
+    """Wait until 'intf' handles further LACPDUs on the fast path."""
+    start = get_fast_path_count(sw, intf)
+    for retry in range(max_retries):
+        sleep(1)
+        if get_fast_path_count(sw, intf) >= start + 2:
+            return
+    assert False, ('%s did not use the receive fast path' % intf)
+
+
+def test_lacpd_rx_fast_path_members(topology, step):
+    """
+        Interface 1 of each switch receives an identical LACPDU every
+        second for the whole test.  A third member joining the LAG, and
+        then a member leaving it, must still bring the LAG to collecting
+        and distributing on all its members, after which interface 1 goes
+        back to the fast path.
+    """
+    sw1 = topology.get('sw1')
+    sw2 = topology.get('sw2')
+
+    assert sw1 is not None
+    assert sw2 is not None
+
+    sw1_intfs = [sw1.ports['1'], sw1.ports['2'], sw1.ports['3']]
+    sw2_intfs = [sw2.ports['1'], sw2.ports['2'], sw2.ports['3']]
+
+    step('Turn on all interfaces used in this test')
+    enable_intf_list(sw1, sw1_intfs)
+    enable_intf_list(sw2, sw2_intfs)
+
+    step('Create the LAG with two members on both switches')
+    for sw, intfs in [(sw1, sw1_intfs), (sw2, sw2_intfs)]:
+        output = sw_create_bond(sw, test_lag, intfs[0:2], lacp_mode='active')
+        assert output == '', ('Error creating LAG %s returned %s'
+                              % (test_lag, output))
+        set_port_parameter(sw, test_lag, ['other_config:lacp-time=fast'])
+
+    sw_wait_until_all_sm_ready([sw1], sw1_intfs[0:2], sm_col_and_dist)
+    sw_wait_until_all_sm_ready([sw2], sw2_intfs[0:2], sm_col_and_dist)
+
+    step('Verify interface 1 uses the receive fast path')
+    verify_fast_path_used(sw1, sw1_intfs[0])
+    verify_fast_path_used(sw2, sw2_intfs[0])
+
+    step('Add a third member to the LAG on both switches')
+    add_intf_to_bond(sw1, test_lag, sw1_intfs[2])
+    add_intf_to_bond(sw2, test_lag, sw2_intfs[2])
+
+    step('Verify all three members reach collecting and distributing')
+    sw_wait_until_all_sm_ready([sw1], sw1_intfs, sm_col_and_dist)
+    sw_wait_until_all_sm_ready([sw2], sw2_intfs, sm_col_and_dist)
+    verify_fast_path_used(sw1, sw1_intfs[0])
+
+    step('Remove the second member from the LAG on both switches')
+    remove_intf_from_bond(sw1, test_lag, sw1_intfs[1])
+    remove_intf_from_bond(sw2, test_lag, sw2_intfs[1])
+
+    step('Verify the remaining members stay collecting and distributing')
+    sw_wait_until_all_sm_ready([sw1], [sw1_intfs[0], sw1_intfs[2]],
+                               sm_col_and_dist)
+    sw_wait_until_all_sm_ready([sw2], [sw2_intfs[0], sw2_intfs[2]],
+                               sm_col_and_dist)
+    verify_fast_path_used(sw1, sw1_intfs[0])
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+##########################################################################
+# Name:        test_lacpd_ct_rx_filter_override.py
+#
+# Objective:   Verify the LACPDU receive filter stops dropping LACPDUs that
+#              carry the switch's own system MAC once a LAG overrides its
+#              system id, when the override reaches lacpd with the port
+#              configuration of its interfaces.
+#
+# Topology:    2 switches (DUT running OpenSwitch) connected by 2 interfaces
+#
+##########################################################################
+
+from lib_test import (
+    enable_intf_list,
+    set_port_parameter,
+    sw_create_bond,
+    sw_wait_until_all_sm_ready
+)
+
+
+TOPOLOGY = """
+#   +-----+------+
+#   |            |
+#   |    sw1     |
+#   |            |
+#   +-----+-+----+
+#         | |
+#         | | LAG1
+#         | |
+#   +-----+-+----+
+#   |            |
+#   |     sw2    |
+#   |            |
+#   +-----+------+
+
+# Nodes
+[type=openswitch name="OpenSwitch 1"] sw1
+[type=openswitch name="OpenSwitch 2"] sw2
+
+# Links
+sw1:1 -- sw2:1
+sw1:2 -- sw2:2
+"""
+
+test_lag = 'lag1'
+sw1_sys_id = 'aa:bb:cc:dd:ee:01'
+
+sm_col_and_dist = '"Activ:1,TmOut:1,Aggr:1,Sync:1,Col:1,Dist:1,Def:0,Exp:0"'
+
+
+def test_lacpd_rx_filter_lport_override(topology, step):
+    """
+        sw1 overrides the system id of its LAG before LACP is enabled on
+        it, so the override only reaches lacpd in the port configuration
+        of its interfaces.  sw2 uses sw1's system MAC as the system id of
+        its LAG: sw1 has to accept LACPDUs carrying its own system MAC for
+        the LAG to come up.
+    """
+    sw1 = topology.get('sw1')
+    sw2 = topology.get('sw2')
+
+    assert sw1 is not None
+    assert sw2 is not None
+
+    sw1_intfs = [sw1.ports['1'], sw1.ports['2']]
+    sw2_intfs = [sw2.ports['1'], sw2.ports['2']]
+
+    sw1_mac = sw1('get system . system_mac',
+                  shell='vsctl').strip('\r\n"')
+
+    step('Turn on all interfaces used in this test')
+    enable_intf_list(sw1, sw1_intfs)
+    enable_intf_list(sw2, sw2_intfs)
+
+    step('Create the LAG on sw1 with LACP off, then override its '
+         'system id and enable LACP')
+    output = sw_create_bond(sw1, test_lag, sw1_intfs, lacp_mode='off')
+    assert output == '', ('Error creating LAG %s returned %s'
+                          % (test_lag, output))
+    set_port_parameter(sw1, test_lag,
+                       ['other_config:lacp-system-id=' + sw1_sys_id,
+                        'other_config:lacp-time=fast'])
+    set_port_parameter(sw1, test_lag, ['lacp=active'])
+
+    step('Create the LAG on sw2 with sw1 system MAC as its system id')
+    output = sw_create_bond(sw2, test_lag, sw2_intfs, lacp_mode='active')
+    assert output == '', ('Error creating LAG %s returned %s'
+                          % (test_lag, output))
+    set_port_parameter(sw2, test_lag,
+                       ['other_config:lacp-system-id=' + sw1_mac,
+                        'other_config:lacp-time=fast'])
+
+    step('Verify the sw1 filter no longer checks the actor system')
+    output = sw1('ovs-appctl -t ops-lacpd lacpd/dump queue', shell='bash')
+    assert 'filter_loop_check    : off' in output, \
+        'LACPDU filter still drops frames with the system MAC:\n' + output
+
+    step('Verify the LAG comes up on both switches')
+    sw_wait_until_all_sm_ready([sw1], sw1_intfs, sm_col_and_dist)
+    sw_wait_until_all_sm_ready([sw2], sw2_intfs, sm_col_and_dist)
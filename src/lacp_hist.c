@@ -0,0 +1,101 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * lacp_hist.c
+ *
+ *   Log2 histograms for the lacpd performance counters.  Recording a
+ *   sample is a count-leading-zeros and a few adds, cheap enough to
+ *   do on every timer tick or event.
+ *
+ */
+
+#include <string.h>
+
+#include "lacp_hist.h"
+
+static int
+lacp_hist_bucket(unsigned long long value)
+{
+    int bucket;
+
+    if (value == 0) {
+        return 0;
+    }
+
+    bucket = 64 - __builtin_clzll(value);
+    if (bucket >= LACP_HIST_BUCKETS) {
+        bucket = LACP_HIST_BUCKETS - 1;
+    }
+
+    return bucket;
+
+} // lacp_hist_bucket
+
+void
+lacp_hist_init(lacp_hist_t *hist)
+{
+    memset(hist, 0, sizeof(*hist));
+
+} // lacp_hist_init
+
+void
+lacp_hist_record(lacp_hist_t *hist, unsigned long long value)
+{
+    hist->h_count++;
+    hist->h_sum += value;
+    if (value > hist->h_max) {
+        hist->h_max = value;
+    }
+    hist->h_bucket[lacp_hist_bucket(value)]++;
+
+} // lacp_hist_record
+
+// Smallest value counted in a bucket.
+unsigned long long
+lacp_hist_bucket_min(int bucket)
+{
+    return (bucket == 0) ? 0 : (1ULL << (bucket - 1));
+
+} // lacp_hist_bucket_min
+
+// Upper bound of the bucket holding the given percentile, or the
+// maximum seen if that is lower.
+unsigned long long
+lacp_hist_percentile(const lacp_hist_t *hist, int percent)
+{
+    unsigned long long rank;
+    unsigned long long seen = 0;
+    unsigned long long limit;
+    int bucket;
+
+    if (hist->h_count == 0) {
+        return 0;
+    }
+
+    rank = (hist->h_count * percent + 99) / 100;
+
+    for (bucket = 0; bucket < LACP_HIST_BUCKETS - 1; bucket++) {
+        seen += hist->h_bucket[bucket];
+        if (seen >= rank) {
+            limit = (bucket == 0) ? 0 : (1ULL << bucket) - 1;
+            return (limit < hist->h_max) ? limit : hist->h_max;
+        }
+    }
+
+    return hist->h_max;
+
+} // lacp_hist_percentile
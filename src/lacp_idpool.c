@@ -0,0 +1,153 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * lacp_idpool.c
+ *
+ *   Allocator for the LAG ids and interface indexes.
+ *
+ *   Ids are bits in a bitmap, found with a find first zero on a word.
+ *   A second bitmap with one bit per word of the first skips the full
+ *   words, so a pool of a few thousand ids is allocated from without
+ *   scanning it.  Like the previous pools, the lowest free id is the
+ *   one handed out, so ids stay small and freed ones are reused first.
+ *
+ *   Not thread safe; used only by the OVSDB interface thread.
+ *
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+
+#include "lacp_idpool.h"
+
+#define LACP_IDPOOL_BITS        (8 * sizeof(unsigned long))
+#define LACP_IDPOOL_WORDS(n)    (((n) + LACP_IDPOOL_BITS - 1) / LACP_IDPOOL_BITS)
+#define LACP_IDPOOL_BIT(n)      (1UL << ((n) % LACP_IDPOOL_BITS))
+
+int
+lacp_idpool_init(lacp_idpool_t *pool, unsigned int min, unsigned int max)
+{
+    unsigned int size;
+    unsigned int bit;
+
+    memset(pool, 0, sizeof(*pool));
+
+    if (max < min) {
+        return EINVAL;
+    }
+
+    size = max - min + 1;
+    pool->p_used = calloc(LACP_IDPOOL_WORDS(size), sizeof(unsigned long));
+    pool->p_full = calloc(LACP_IDPOOL_WORDS(LACP_IDPOOL_WORDS(size)),
+                          sizeof(unsigned long));
+    if (pool->p_used == NULL || pool->p_full == NULL) {
+        lacp_idpool_destroy(pool);
+        return ENOMEM;
+    }
+    pool->p_min = min;
+    pool->p_max = max;
+
+    // The bits past the last id of the last word are never free.
+    for (bit = size; bit % LACP_IDPOOL_BITS; bit++) {
+        pool->p_used[bit / LACP_IDPOOL_BITS] |= LACP_IDPOOL_BIT(bit);
+    }
+
+    return 0;
+
+} // lacp_idpool_init
+
+void
+lacp_idpool_destroy(lacp_idpool_t *pool)
+{
+    free(pool->p_used);
+    free(pool->p_full);
+    memset(pool, 0, sizeof(*pool));
+
+} // lacp_idpool_destroy
+
+int
+lacp_idpool_alloc(lacp_idpool_t *pool, unsigned int *id)
+{
+    unsigned int nwords;
+    unsigned int full;
+    unsigned int word;
+    unsigned int bit;
+
+    if (pool->p_used == NULL) {
+        return EINVAL;
+    }
+
+    nwords = LACP_IDPOOL_WORDS(pool->p_max - pool->p_min + 1);
+
+    // First word with a free id.
+    for (full = 0; full < LACP_IDPOOL_WORDS(nwords); full++) {
+        if (~pool->p_full[full] != 0) {
+            break;
+        }
+    }
+    if (full == LACP_IDPOOL_WORDS(nwords)) {
+        return ENOSPC;
+    }
+    word = full * LACP_IDPOOL_BITS + __builtin_ctzl(~pool->p_full[full]);
+    if (word >= nwords) {
+        return ENOSPC;
+    }
+
+    bit = __builtin_ctzl(~pool->p_used[word]);
+    pool->p_used[word] |= (1UL << bit);
+    if (~pool->p_used[word] == 0) {
+        pool->p_full[word / LACP_IDPOOL_BITS] |= LACP_IDPOOL_BIT(word);
+    }
+    pool->p_count++;
+
+    *id = pool->p_min + word * LACP_IDPOOL_BITS + bit;
+    return 0;
+
+} // lacp_idpool_alloc
+
+int
+lacp_idpool_free(lacp_idpool_t *pool, unsigned int id)
+{
+    unsigned int word;
+
+    if (!lacp_idpool_in_use(pool, id)) {
+        return (pool->p_used == NULL || id < pool->p_min || id > pool->p_max) ?
+               EINVAL : ENOENT;
+    }
+
+    id -= pool->p_min;
+    word = id / LACP_IDPOOL_BITS;
+    pool->p_used[word] &= ~LACP_IDPOOL_BIT(id);
+    pool->p_full[word / LACP_IDPOOL_BITS] &= ~LACP_IDPOOL_BIT(word);
+    pool->p_count--;
+
+    return 0;
+
+} // lacp_idpool_free
+
+int
+lacp_idpool_in_use(const lacp_idpool_t *pool, unsigned int id)
+{
+    if (pool->p_used == NULL || id < pool->p_min || id > pool->p_max) {
+        return 0;
+    }
+
+    id -= pool->p_min;
+    return ((pool->p_used[id / LACP_IDPOOL_BITS] & LACP_IDPOOL_BIT(id)) != 0);
+
+} // lacp_idpool_in_use
@@ -46,10 +46,14 @@ VLOG_DEFINE_THIS_MODULE(lacpd_support);
  ****************************************************************************/
 unsigned char my_mac_addr[MAC_ADDR_LENGTH] = {0x00, 0x00, 0x00, 0x00, 0x00, 0x00};
 uint actor_system_priority = DEFAULT_SYSTEM_PRIORITY;
+unsigned int lacp_fast_periodic_ms = FAST_PERIODIC_MS_DEFAULT;
 
 /* Global per port variables table */
 lacp_avl_tree_t lacp_per_port_vars_tree;
 
+/* Ports attached to each aggregator, by sport_handle */
+lacp_avl_tree_t lacp_sport_members_tree;
+
 extern struct NList *mlacp_lag_tuple_list;
 
 /*****************************************************************************
@@ -127,15 +131,12 @@ LACP_initialize_port(port_handle_t lport_handle,
     if (plpinfo != NULL) {
         status = mvlan_get_sport(plpinfo->sport_handle , &psport,
                                  MLm_vpm_api__get_sport);
-        if (R_SUCCESS == status) {
-            plpinfo_priority = LACP_AVL_FIRST(lacp_per_port_vars_tree);
-            while (plpinfo_priority) {
-                if (plpinfo_priority->lport_handle != plpinfo->lport_handle &&
-                    plpinfo_priority->sport_handle == psport->handle &&
+        if (R_SUCCESS == status && plpinfo->sport_members != NULL) {
+            SPORT_MEMBER_FOREACH(plpinfo->sport_members, plpinfo_priority) {
+                if (plpinfo_priority != plpinfo &&
                     max_port_priority > plpinfo_priority->actor_admin_port_priority) {
                     max_port_priority = plpinfo_priority->actor_admin_port_priority;
                 }
-                plpinfo_priority = LACP_AVL_NEXT(plpinfo_priority->avlnode);
             }
             placp_sport_params = psport->placp_params;
             placp_sport_params->lacp_params.actor_max_port_priority = max_port_priority;
@@ -158,6 +159,7 @@ LACP_initialize_port(port_handle_t lport_handle,
     }
 
     plpinfo->lport_handle = lport_handle;
+    LACP_init_port_timers(plpinfo);
     LACP_AVL_INIT_NODE(plpinfo->avlnode, plpinfo, &(plpinfo->lport_handle));
 
     if (LACP_AVL_INSERT(lacp_per_port_vars_tree, plpinfo->avlnode) == FALSE) {
@@ -267,6 +269,7 @@ LACP_initialize_port(port_handle_t lport_handle,
 
     plpinfo->selecting_lag = FALSE;
     plpinfo->lacp_up = TRUE;
+    LACP_resume_port_timers(plpinfo);
 
     REXIT();
 
@@ -320,6 +323,7 @@ LACP_update_port_params(port_handle_t lport_handle,
 
         // Inform the transmit state machine about the change.
         plpinfo->lacp_control.ntt = TRUE;
+        LACP_start_ntt_retry_timer(plpinfo);
 
     } else {
         VLOG_ERR("Update LACP param: lport_handle 0x%llx not found",
@@ -488,7 +492,6 @@ LACP_disable_lacp(port_handle_t lport_handle)
 {
 
     LAG_t *lag;
-    struct NList *pdummy;
     lacp_lag_ppstruct_t *plag_port_struct = NULL;
     lacp_per_port_variables_t *plpinfo;
 
@@ -516,21 +519,12 @@ LACP_disable_lacp(port_handle_t lport_handle)
     lag = plpinfo->lag;
 
     if (lag != NULL) {
-        /*
-         * Can be optimized by putting a pointer
-         * to plag_port_struct in the perport variables
-         */
-        pdummy = n_list_find_data(lag->pplist,
-                                  &lacp_lag_port_match,
-                                  &plpinfo->lport_handle);
-        if (pdummy != NULL) {
-            plag_port_struct = pdummy->data;
-            if(plag_port_struct != NULL) {
-                lag->pplist =  n_list_remove_data(lag->pplist, plag_port_struct);
-            }
+        plag_port_struct = LAG_member_find(lag, plpinfo->lport_handle);
+        if (plag_port_struct != NULL) {
+            LAG_member_remove(lag, plag_port_struct);
         }
 
-        if (lag->pplist == NULL) {
+        if (lag->member_count == 0) {
             /*
              * It was the last port in the LAG, remove the whole LAG.
              */
@@ -559,10 +553,233 @@ LACP_disable_lacp(port_handle_t lport_handle)
     //****************************************************************
     deregister_mcast_addr(plpinfo->lport_handle);
 
+    LACP_stop_port_timers(plpinfo);
+    LACP_set_sport_handle(plpinfo, 0);
     free(plpinfo);
 
 } /* LACP_disable_lacp */
 
+/*****************************************************************************
+ *
+ *         Aggregator member index
+ *
+ ****************************************************************************/
+
+/*----------------------------------------------------------------------
+ * Function: LACP_sport_members_find(port_handle_t sport_handle)
+ *
+ * Synopsis: Finds the ports attached to an aggregator.
+ *
+ * Input  :  sport_handle - aggregator handle
+ * Returns:  the aggregator's member set, or NULL if no port is attached
+ *----------------------------------------------------------------------*/
+lacp_sport_members_t *
+LACP_sport_members_find(port_handle_t sport_handle)
+{
+    if (sport_handle == 0) {
+        return NULL;
+    }
+
+    return LACP_AVL_FIND(lacp_sport_members_tree, &sport_handle);
+
+} /* LACP_sport_members_find */
+
+static void
+sport_partner_priority_add(lacp_sport_members_t *group, u_short priority)
+{
+    if (priority == 0) {
+        return;
+    }
+
+    if (group->partner_best_count == 0 ||
+        priority < group->partner_best_priority) {
+        group->partner_best_priority = priority;
+        group->partner_best_count = 1;
+    } else if (priority == group->partner_best_priority) {
+        group->partner_best_count++;
+    }
+
+} /* sport_partner_priority_add */
+
+/* Takes plpinfo's partner priority out of the cache.  When it was the
+ * last member with the best priority, finds the new best among the
+ * other members. */
+static void
+sport_partner_priority_remove(lacp_sport_members_t *group,
+                              lacp_per_port_variables_t *plpinfo)
+{
+    lacp_per_port_variables_t *member;
+
+    if (plpinfo->partner_oper_port_priority == 0 ||
+        group->partner_best_count == 0 ||
+        plpinfo->partner_oper_port_priority != group->partner_best_priority) {
+        return;
+    }
+
+    if (--group->partner_best_count > 0) {
+        return;
+    }
+
+    group->partner_best_priority = 0;
+    SPORT_MEMBER_FOREACH(group, member) {
+        if (member != plpinfo) {
+            sport_partner_priority_add(group,
+                                       member->partner_oper_port_priority);
+        }
+    }
+
+} /* sport_partner_priority_remove */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_set_sport_handle(plpinfo, sport_handle)
+ *
+ * Synopsis: Attaches a port to an aggregator, moving it out of the
+ *           member set of the aggregator it was on.  A sport_handle of
+ *           zero leaves the port on no aggregator.
+ *
+ * Input  :  plpinfo - port
+ *           sport_handle - new aggregator handle, or zero
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_set_sport_handle(lacp_per_port_variables_t *plpinfo,
+                      port_handle_t sport_handle)
+{
+    lacp_sport_members_t *group;
+
+    if (plpinfo->sport_members != NULL &&
+        plpinfo->sport_handle == sport_handle) {
+        return;
+    }
+
+    // The port's own receive fast path does not follow it to another
+    // aggregator, and the ports it leaves or joins see the change in
+    // the aggregator's generation.
+    plpinfo->rx_fast_valid = FALSE;
+
+    group = plpinfo->sport_members;
+    if (group != NULL) {
+        sport_partner_priority_remove(group, plpinfo);
+        group->gen++;
+
+        *plpinfo->sport_pprev = plpinfo->sport_next;
+        if (plpinfo->sport_next != NULL) {
+            plpinfo->sport_next->sport_pprev = plpinfo->sport_pprev;
+        }
+        plpinfo->sport_next = NULL;
+        plpinfo->sport_pprev = NULL;
+        plpinfo->sport_members = NULL;
+
+        if (--group->member_count == 0) {
+            LACP_AVL_DELETE(lacp_sport_members_tree, group->avlnode);
+            free(group);
+        }
+    }
+
+    plpinfo->sport_handle = sport_handle;
+
+    if (sport_handle == 0) {
+        return;
+    }
+
+    group = LACP_AVL_FIND(lacp_sport_members_tree, &sport_handle);
+    if (group == NULL) {
+        group = calloc(1, sizeof(lacp_sport_members_t));
+        if (group == NULL) {
+            VLOG_FATAL("out of memory");
+            exit(-1);
+        }
+        group->sport_handle = sport_handle;
+        LACP_AVL_INIT_NODE(group->avlnode, group, &(group->sport_handle));
+        if (LACP_AVL_INSERT(lacp_sport_members_tree, group->avlnode) == FALSE) {
+            VLOG_FATAL("avl_insert failed for sport handle 0x%llx",
+                       sport_handle);
+            exit(-1);
+        }
+    }
+
+    plpinfo->sport_next = group->members;
+    if (plpinfo->sport_next != NULL) {
+        plpinfo->sport_next->sport_pprev = &plpinfo->sport_next;
+    }
+    plpinfo->sport_pprev = &group->members;
+    group->members = plpinfo;
+    group->member_count++;
+    group->gen++;
+    plpinfo->sport_members = group;
+
+    sport_partner_priority_add(group, plpinfo->partner_oper_port_priority);
+
+} /* LACP_set_sport_handle */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_set_partner_oper_port_priority(plpinfo, priority)
+ *
+ * Synopsis: Sets a port's partner_oper_port_priority, keeping the best
+ *           partner priority of its aggregator up to date.
+ *
+ * Input  :  plpinfo - port
+ *           priority - partner port priority, in network order
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_set_partner_oper_port_priority(lacp_per_port_variables_t *plpinfo,
+                                    u_short priority)
+{
+    if (plpinfo->partner_oper_port_priority == priority) {
+        return;
+    }
+
+    if (plpinfo->sport_members != NULL) {
+        sport_partner_priority_remove(plpinfo->sport_members, plpinfo);
+    }
+
+    plpinfo->partner_oper_port_priority = priority;
+
+    if (plpinfo->sport_members != NULL) {
+        sport_partner_priority_add(plpinfo->sport_members, priority);
+    }
+
+} /* LACP_set_partner_oper_port_priority */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_sport_partner_max_port_priority(plpinfo)
+ *
+ * Synopsis: The highest partner port priority among the other ports on
+ *           plpinfo's aggregator.  Zero priorities are ignored.
+ *
+ * Input  :  plpinfo - port
+ * Returns:  the priority, or MAX_PORT_PRIORITY if there is none
+ *----------------------------------------------------------------------*/
+int
+LACP_sport_partner_max_port_priority(lacp_per_port_variables_t *plpinfo)
+{
+    lacp_sport_members_t *group = plpinfo->sport_members;
+    lacp_per_port_variables_t *member;
+    int max_port_priority = MAX_PORT_PRIORITY;
+
+    if (group == NULL || group->partner_best_count == 0) {
+        return max_port_priority;
+    }
+
+    if (plpinfo->partner_oper_port_priority != group->partner_best_priority ||
+        group->partner_best_count > 1) {
+        return group->partner_best_priority;
+    }
+
+    // plpinfo alone has the best priority; find the next best.
+    SPORT_MEMBER_FOREACH(group, member) {
+        if (member != plpinfo &&
+            member->partner_oper_port_priority != 0 &&
+            max_port_priority > member->partner_oper_port_priority) {
+            max_port_priority = member->partner_oper_port_priority;
+        }
+    }
+
+    return max_port_priority;
+
+} /* LACP_sport_partner_max_port_priority */
+
 
 /*----------------------------------------------------------------------
  * Function: set_actor_admin_parms_2_oper(int port_number)
@@ -651,6 +868,7 @@ set_actor_admin_parms_2_oper(lacp_per_port_variables_t *plpinfo,
      ***************************************************************************/
     if (plpinfo->actor_oper_port_state.aggregation == INDIVIDUAL) {
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -678,8 +896,8 @@ set_partner_admin_parms_2_oper(lacp_per_port_variables_t *plpinfo,
     }
 
     if (params_to_be_set & PORT_PRIORITY_BIT) {
-        plpinfo->partner_oper_port_priority =
-            plpinfo->partner_admin_port_priority;
+        LACP_set_partner_oper_port_priority(plpinfo,
+                                            plpinfo->partner_admin_port_priority);
     }
 
     if (params_to_be_set & PORT_KEY_BIT) {
@@ -693,6 +911,7 @@ set_partner_admin_parms_2_oper(lacp_per_port_variables_t *plpinfo,
         memcpy((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
                (char *)plpinfo->partner_admin_system_variables.system_mac_addr,
                MAC_ADDR_LENGTH);
+        LACP_MEMBER_CHANGED(plpinfo);
     }
 
     if (params_to_be_set & PORT_SYSTEM_PRIORITY_BIT) {
@@ -800,10 +1019,13 @@ print_lacp_fsm_state(port_handle_t lport_handle)
                                          "TRUE" : "FALSE");
     RDBG("      PartnerCollect:      %s\n", lacp_port->partner_oper_port_state.collecting ?
                                          "TRUE" : "FALSE");
-    RDBG("   Timer counters\n");
-    RDBG("      periodic tx timer:   %d\n", lacp_port->periodic_tx_timer_expiry_counter);
-    RDBG("      current while timer:   %d\n", lacp_port->current_while_timer_expiry_counter);
-    RDBG("      wait while timer:   %d\n", lacp_port->wait_while_timer_expiry_counter);
+    RDBG("   Timers (ms left)\n");
+    RDBG("      periodic tx timer:   %u\n", LACP_TIMER_TICK_MS *
+         lacp_timer_remaining(&lacp_tx_timer_wheel, &lacp_port->periodic_tx_timer));
+    RDBG("      current while timer:   %u\n", LACP_TIMER_TICK_MS *
+         lacp_timer_remaining(&lacp_rx_timer_wheel, &lacp_port->current_while_timer));
+    RDBG("      wait while timer:   %u\n", LACP_TIMER_TICK_MS *
+         lacp_timer_remaining(&lacp_tx_timer_wheel, &lacp_port->wait_while_timer));
 
     lacp_unlock(lock);
 
@@ -1055,6 +1277,7 @@ mlacpVapiLinkUp(port_handle_t lport_handle, int speed)
         // to force a change into unselected state, which
         // will result in a reselect.
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -1271,30 +1494,32 @@ void
 mlacpVapiSportParamsChange(int msg __attribute__ ((unused)),
                            struct MLt_vpm_api__lacp_sport_params *pin_lacp_params)
 {
-    lacp_per_port_variables_t *plpinfo, *lacp_port;
+    lacp_sport_members_t *group;
+    lacp_per_port_variables_t *lacp_port, *next;
 
     RDEBUG(DL_INFO, "%s: sport_handle 0x%llx\n", __FUNCTION__,
            pin_lacp_params->sport_handle);
 
-    plpinfo = LACP_AVL_FIRST(lacp_per_port_vars_tree);
+    if (!(pin_lacp_params->flags &
+          (LACP_LAG_PARTNER_SYSPRI_FIELD_PRESENT |
+           LACP_LAG_PARTNER_SYSID_FIELD_PRESENT))) {
+        return;
+    }
 
-    while (plpinfo) {
-        if (plpinfo->sport_handle == pin_lacp_params->sport_handle) {
-            lacp_port = plpinfo;
-
-            if (pin_lacp_params->flags &
-                (LACP_LAG_PARTNER_SYSPRI_FIELD_PRESENT |
-                 LACP_LAG_PARTNER_SYSID_FIELD_PRESENT)) {
-                /*
-                 * Make selected UNSELECTED, and cause approp. event in
-                 * the mux machine.
-                 */
-                lacp_port->lacp_control.selected = UNSELECTED;
-                LACP_mux_fsm(E2, lacp_port->mux_fsm_state, lacp_port);
-                lacp_port->lacp_control.ready_n = FALSE;
-            }
-        }
-        plpinfo = LACP_AVL_NEXT(plpinfo->avlnode);
+    group = LACP_sport_members_find(pin_lacp_params->sport_handle);
+    if (group == NULL) {
+        return;
+    }
+
+    SPORT_MEMBER_FOREACH_SAFE(group, lacp_port, next) {
+        /*
+         * Make selected UNSELECTED, and cause approp. event in
+         * the mux machine.
+         */
+        lacp_port->lacp_control.selected = UNSELECTED;
+        LACP_mux_fsm(E2, lacp_port->mux_fsm_state, lacp_port);
+        lacp_port->lacp_control.ready_n = FALSE;
+        LACP_MEMBER_CHANGED(lacp_port);
     }
 
 } /* mlacpVapiSportParamsChange */
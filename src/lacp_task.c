@@ -51,47 +51,214 @@ const unsigned char default_partner_system_mac[MAC_ADDR_LENGTH] =
 /****************************************************************************
  *   Prototypes for static functions
  ****************************************************************************/
-static void periodic_tx_timer_expiry(lacp_per_port_variables_t *);
-static void current_while_timer_expiry(lacp_per_port_variables_t *);
-static void mux_wait_while_timer_expiry(lacp_per_port_variables_t *);
+static void periodic_tx_timer_expiry(void *);
+static void current_while_timer_expiry(void *);
+static void mux_wait_while_timer_expiry(void *);
+static void ntt_retry_timer_expiry(void *);
 static int LACP_marker_responder(lacp_per_port_variables_t *, void *);
-static marker_pdu_payload_t *LACP_build_marker_response_payload(
-                                           port_handle_t, marker_pdu_payload_t *);
+static void LACP_build_marker_response(port_handle_t, marker_pdu_payload_t *);
 static void LACP_transmit_marker_response(port_handle_t, void *);
 static int is_pkt_from_same_system(lacp_per_port_variables_t *, lacpdu_payload_t *);
-int lacp_lag_port_match(void *, void *);
 
 
+/**************************************************************
+ *       Timer wheels
+ *
+ * The per port timers are kept on two timing wheels, advanced
+ * every LACP_TIMER_TICK_MS by the protocol thread timer engine.
+ * On each tick the Tx wheel (periodic Tx, wait while and NTT
+ * retry timers) is run before the Rx wheel (current while
+ * timers).  Only the timers that expire are visited.
+ *************************************************************/
+lacp_timer_wheel_t lacp_tx_timer_wheel;
+lacp_timer_wheel_t lacp_rx_timer_wheel;
+
+/**************************************************************
+ * Periodic Tx spread
+ *
+ * Each port transmits its periodic LACPDUs on a fixed phase of
+ * the periodic interval, derived from its port handle, so that
+ * ports brought up together (boot, LAG creation, a partner
+ * switching to short timeout) do not all transmit in the same
+ * tick.  Re-aligning only ever shortens the first interval;
+ * consecutive periodic LACPDUs are never further apart than the
+ * periodic time.
+ *************************************************************/
+lacp_tx_spread_stats_t lacp_tx_spread_stats;
+
+static unsigned long periodic_tx_this_tick;
+
+/*----------------------------------------------------------------------
+ * Function: LACP_init_port_timers()
+ * Synopsis: Sets up the timers of a newly allocated port.  None of
+ *           them is armed.
+ * Input  :  lacp_per_port_variables_t - the port
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_init_port_timers(lacp_per_port_variables_t *plpinfo)
+{
+    lacp_timer_init(&plpinfo->periodic_tx_timer,
+                    periodic_tx_timer_expiry, plpinfo);
+    lacp_timer_init(&plpinfo->current_while_timer,
+                    current_while_timer_expiry, plpinfo);
+    lacp_timer_init(&plpinfo->wait_while_timer,
+                    mux_wait_while_timer_expiry, plpinfo);
+    lacp_timer_init(&plpinfo->ntt_retry_timer,
+                    ntt_retry_timer_expiry, plpinfo);
+
+} /* LACP_init_port_timers */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_stop_port_timers()
+ * Synopsis: Disarms all the timers of a port that is going away.
+ * Input  :  lacp_per_port_variables_t - the port
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_stop_port_timers(lacp_per_port_variables_t *plpinfo)
+{
+    lacp_timer_stop(&lacp_tx_timer_wheel, &plpinfo->periodic_tx_timer);
+    lacp_timer_stop(&lacp_rx_timer_wheel, &plpinfo->current_while_timer);
+    lacp_timer_stop(&lacp_tx_timer_wheel, &plpinfo->wait_while_timer);
+    lacp_timer_stop(&lacp_tx_timer_wheel, &plpinfo->ntt_retry_timer);
+
+} /* LACP_stop_port_timers */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_resume_port_timers()
+ * Synopsis: Starts again the timers held while LACP was not up on the
+ *           port.  The wait while timer only if the port is in its LAG;
+ *           otherwise LAG_member_add() resumes it.
+ * Input  :  lacp_per_port_variables_t - the port
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_resume_port_timers(lacp_per_port_variables_t *plpinfo)
+{
+    lacp_timer_resume(&lacp_tx_timer_wheel, &plpinfo->periodic_tx_timer);
+    lacp_timer_resume(&lacp_rx_timer_wheel, &plpinfo->current_while_timer);
+    lacp_timer_resume(&lacp_tx_timer_wheel, &plpinfo->ntt_retry_timer);
+    if (plpinfo->lag != NULL &&
+        LAG_member_find(plpinfo->lag, plpinfo->lport_handle) != NULL) {
+        lacp_timer_resume(&lacp_tx_timer_wheel, &plpinfo->wait_while_timer);
+    }
+
+} /* LACP_resume_port_timers */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_start_ntt_retry_timer()
+ * Synopsis: NTT is set but no LACPDU went out (async Tx rate limit).
+ *           Try again once the rate limit window is over.
+ * Input  :  lacp_per_port_variables_t - the port
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_start_ntt_retry_timer(lacp_per_port_variables_t *plpinfo)
+{
+    unsigned long long elapsed;
+    unsigned int ticks = 1;
+
+    if (lacp_timer_pending(&plpinfo->ntt_retry_timer)) {
+        return;
+    }
+
+    elapsed = lacp_tx_timer_wheel.w_now - plpinfo->async_tx_tick;
+    if (elapsed < FAST_PERIODIC_TICKS) {
+        ticks = FAST_PERIODIC_TICKS - elapsed;
+    }
+
+    lacp_timer_start(&lacp_tx_timer_wheel, &plpinfo->ntt_retry_timer, ticks);
+
+} /* LACP_start_ntt_retry_timer */
+
+/*----------------------------------------------------------------------
+ * Function: periodic_tx_phase()
+ * Synopsis: Returns the port's transmit phase within a periodic
+ *           interval of 'period' ticks.  The port handle is folded and
+ *           scaled by the golden ratio, which spreads consecutive port
+ *           numbers evenly over the interval.
+ * Input  :  lacp_per_port_variables_t - the port
+ *           period - periodic interval, in ticks
+ * Returns:  phase, 0 to period - 1
+ *----------------------------------------------------------------------*/
+static unsigned int
+periodic_tx_phase(lacp_per_port_variables_t *plpinfo, unsigned int period)
+{
+    unsigned long long handle = plpinfo->lport_handle;
+    unsigned int key;
+
+    key = (unsigned int)((handle >> 32) ^ handle) * 2654435769U;
+
+    return (unsigned int)(((unsigned long long)key * period) >> 32);
+
+} /* periodic_tx_phase */
+
+/*----------------------------------------------------------------------
+ * Function: LACP_start_periodic_tx_timer()
+ * Synopsis: (Re)starts the periodic Tx timer to expire on the port's
+ *           next transmit phase, at most 'period' ticks from now.
+ * Input  :  lacp_per_port_variables_t - the port
+ *           period - periodic interval, in ticks
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+void
+LACP_start_periodic_tx_timer(lacp_per_port_variables_t *plpinfo,
+                             unsigned int period)
+{
+    unsigned int now;
+    unsigned int ticks;
+
+    now = (unsigned int)(lacp_tx_timer_wheel.w_now % period);
+    ticks = (periodic_tx_phase(plpinfo, period) + period - now) % period;
+    if (ticks == 0) {
+        ticks = period;
+    }
+
+    lacp_timer_start(&lacp_tx_timer_wheel, &plpinfo->periodic_tx_timer,
+                     ticks);
+
+} /* LACP_start_periodic_tx_timer */
+
 /**************************************************************
  *       Periodic Tx Timer handler routines
  *************************************************************/
 
 /*----------------------------------------------------------------------
  * Function: LACP_periodic_tx()
- * Synopsis: Goes thro' all the ports in all LACP link groups and does
- *           periodic Tx on each one of them depending upon their states.
+ * Synopsis: Advances the Tx timer wheel by one tick, firing the
+ *           periodic Tx, wait while and NTT retry timers that expire.
  * Input  :
  * Returns:  void
  *----------------------------------------------------------------------*/
 void
 LACP_periodic_tx(void)
 {
-    lacp_per_port_variables_t *plpinfo;
+    lacp_tx_spread_stats_t *stats = &lacp_tx_spread_stats;
+    unsigned int period = FAST_PERIODIC_TICKS;
+    unsigned int phase;
 
     RENTRY();
 
-    plpinfo = LACP_AVL_FIRST(lacp_per_port_vars_tree);
+    periodic_tx_this_tick = 0;
+    lacp_timer_wheel_advance(&lacp_tx_timer_wheel, 1);
 
-    while (plpinfo) {
-        if (plpinfo->debug_level & DBG_TX_FSM) {
-            print_lacp_fsm_state(plpinfo->lport_handle);
+    phase = (unsigned int)(lacp_tx_timer_wheel.w_now % period);
+    if (periodic_tx_this_tick) {
+        stats->transmits += periodic_tx_this_tick;
+        stats->busy_ticks++;
+        if (periodic_tx_this_tick > stats->max_per_tick) {
+            stats->max_per_tick = periodic_tx_this_tick;
         }
+        stats->cur_bucket[phase * LACP_TX_SPREAD_BUCKETS / period] +=
+            periodic_tx_this_tick;
+    }
 
-        if (plpinfo->lacp_up == TRUE) { /* LACP port is initialized */
-            periodic_tx_timer_expiry(plpinfo);
-            mux_wait_while_timer_expiry(plpinfo);
-        }
-        plpinfo = LACP_AVL_NEXT(plpinfo->avlnode);
+    // Close the interval on its last tick.
+    if (phase == period - 1) {
+        memcpy(stats->last_bucket, stats->cur_bucket,
+               sizeof(stats->last_bucket));
+        memset(stats->cur_bucket, 0, sizeof(stats->cur_bucket));
     }
 
     REXIT();
@@ -99,17 +266,34 @@ LACP_periodic_tx(void)
 } /* LACP_periodic_tx */
 
 /*----------------------------------------------------------------------
- * Function: periodic_tx_timer_expiry(int)
- * Synopsis: For the given port does periodic Tx if periodic Tx state
- *           of the port is in Fast Periodic or Slow Periodic states.
- * Input  :  int - port number
+ * Function: periodic_tx_timer_expiry()
+ * Synopsis: Periodic Tx timer of the port expired.  Generates the
+ *           periodic Tx timer expired event if the port is in Fast
+ *           Periodic or Slow Periodic states.
+ * Input  :  lacp_per_port_variables_t - the port
  * Returns:  void
  *----------------------------------------------------------------------*/
 static void
-periodic_tx_timer_expiry(lacp_per_port_variables_t *plpinfo)
+periodic_tx_timer_expiry(void *arg)
 {
+    lacp_per_port_variables_t *plpinfo = arg;
+
     RENTRY();
 
+    if (plpinfo->debug_level & DBG_TX_FSM) {
+        print_lacp_fsm_state(plpinfo->lport_handle);
+    }
+
+    /********************************************************************
+     * The timer does not run while LACP is not up on the port; hold it
+     * until LACP_resume_port_timers().
+     ********************************************************************/
+    if (plpinfo->lacp_up != TRUE) {
+        lacp_timer_hold(&lacp_tx_timer_wheel, &plpinfo->periodic_tx_timer,
+                        plpinfo->periodic_tx_timer.t_ticks);
+        goto exit;
+    }
+
     /********************************************************************
      * If the state is no periodic do nothing.
      ********************************************************************/
@@ -119,127 +303,122 @@ periodic_tx_timer_expiry(lacp_per_port_variables_t *plpinfo)
                  __FUNCTION__, plpinfo->lport_handle);
         }
     } else {
-        RDEBUG(DL_TIMERS, "decrement the expiry counter (lport 0x%llx)\n",
-               plpinfo->lport_handle);
-
-        /*********************************************************************
-         * Decrement the expiry counter if greater than 0.
-         *********************************************************************/
-        if (plpinfo->periodic_tx_timer_expiry_counter > 0) {
-
-            plpinfo->periodic_tx_timer_expiry_counter--;
-
-            /*********************************************************************
-             * Since the lowest expiry time is 1 second, we clear the async Tx
-             * counter every 1 second.
-             *********************************************************************/
-            plpinfo->async_tx_count = 0;
-
-            /*********************************************************************
-             * If expiry counter is 0, generate the appropriate event.
-             *********************************************************************/
-            if (plpinfo->periodic_tx_timer_expiry_counter == 0) {
-
-                /* Generate periodic Tx timer expired event (E3) */
-                LACP_periodic_tx_fsm(E3,
-                                     plpinfo->periodic_tx_fsm_state,
-                                     plpinfo);
-
-            } else if (TRUE == plpinfo->lacp_control.ntt) {
-                // OpenSwitch FIX: if "async_tx_count" reached the max while
-                // NTT was true, then LACPDUs would not have been
-                // transmitted.  We need to transmit it now if NTT is
-                // still true and periodic_tx_timer didn't expire in this
-                // round (i.e. long timeout).
-                LACP_async_transmit_lacpdu(plpinfo);
-            }
+        periodic_tx_this_tick++;
 
-        } // if (plpinfo->periodic_tx_timer_expiry_counter > 0)
-    } // else - (FSM state != PERIODIC_TX_FSM_NO_PERIODIC_STATE)
+        /* Generate periodic Tx timer expired event (E3) */
+        LACP_periodic_tx_fsm(E3,
+                             plpinfo->periodic_tx_fsm_state,
+                             plpinfo);
+    }
 
+exit:
     REXIT();
 
 } /* periodic_tx_timer_expiry */
 
 /*----------------------------------------------------------------------
- * Function: mux_wait_while_timer_expiry(int)
- * Synopsis: Decrements the counter, if it reaches 0, causes
- *           an approp. event in the Mux machine.
- * Input  :  physical port number
+ * Function: ntt_retry_timer_expiry()
+ * Synopsis: Transmits a LACPDU that was held back by the async Tx
+ *           rate limit, if NTT is still set.
+ * Input  :  lacp_per_port_variables_t - the port
  * Returns:  void
  *----------------------------------------------------------------------*/
 static void
-mux_wait_while_timer_expiry(lacp_per_port_variables_t *lacp_port)
+ntt_retry_timer_expiry(void *arg)
 {
-    LAG_t *lag;
-    lacp_per_port_variables_t *plp;
+    lacp_per_port_variables_t *plpinfo = arg;
 
     RENTRY();
 
-    RDEBUG(DL_TIMERS, "%s: lport 0x%llx\n", __FUNCTION__, lacp_port->lport_handle);
-
-    lag = lacp_port->lag;
-    if (!lag) {
-        return;
-    }
-
-    if (lag->pplist == NULL) {
-        return;
+    if (plpinfo->lacp_up != TRUE) {
+        lacp_timer_hold(&lacp_tx_timer_wheel, &plpinfo->ntt_retry_timer,
+                        plpinfo->ntt_retry_timer.t_ticks);
+        goto exit;
     }
 
-    if (n_list_find_data(lag->pplist,
-                         &lacp_lag_port_match,
-                         &lacp_port->lport_handle) == NULL) {
-        VLOG_ERR("lport (ox%llx) not set ??", lacp_port->lport_handle);
-        return;
+    // OpenSwitch FIX: if "async_tx_count" reached the max while
+    // NTT was true, then LACPDUs would not have been
+    // transmitted.  We need to transmit it now if NTT is
+    // still true and periodic_tx_timer doesn't expire in this
+    // round (i.e. long timeout).
+    if ((plpinfo->periodic_tx_fsm_state != PERIODIC_TX_FSM_NO_PERIODIC_STATE) &&
+        (lacp_timer_remaining(&lacp_tx_timer_wheel,
+                              &plpinfo->periodic_tx_timer) > 0) &&
+        (TRUE == plpinfo->lacp_control.ntt)) {
+        LACP_async_transmit_lacpdu(plpinfo);
     }
 
-    if (lacp_port->wait_while_timer_expiry_counter > 0) {
+exit:
+    REXIT();
 
-        RDEBUG(DL_TIMERS, "decrement wait_while_timer (lport 0x%llx)\n",
-               lacp_port->lport_handle);
+} /* ntt_retry_timer_expiry */
 
-        lacp_port->wait_while_timer_expiry_counter--;
+/*----------------------------------------------------------------------
+ * Function: mux_wait_while_timer_expiry()
+ * Synopsis: Wait while timer of the port expired.  Causes an approp.
+ *           event in the Mux machine.
+ * Input  :  lacp_per_port_variables_t - the port
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+static void
+mux_wait_while_timer_expiry(void *arg)
+{
+    lacp_per_port_variables_t *lacp_port = arg;
+    LAG_t *lag;
+    lacp_lag_ppstruct_t *member;
 
-        /*
-         * If expiry counter is 0, check for ready and selected variables.
-         * If selected is SELECTED for the port and ready is TRUE for the
-         * link group, then generate event E3 for the port's mux fsm.
-         */
-        if (lacp_port->wait_while_timer_expiry_counter <= 0) {
+    RENTRY();
 
-            lacp_port->lacp_control.ready_n = TRUE;
-            lag->ready = TRUE;      /* assume */
+    RDEBUG(DL_TIMERS, "%s: lport 0x%llx\n", __FUNCTION__, lacp_port->lport_handle);
 
-            for (plp = LACP_AVL_FIRST(lacp_per_port_vars_tree);
-                 plp;
-                 plp = LACP_AVL_NEXT(plp->avlnode)) {
+    /*
+     * The timer does not run while LACP is not up on the port or the
+     * port is not in its LAG; hold it until LACP_resume_port_timers()
+     * or LAG_member_add().  A port leaving its LAG pauses the timer, so
+     * it only gets here if it was started outside the LAG.
+     */
+    lag = lacp_port->lag;
 
-                if (n_list_find_data(lag->pplist,
-                                     &lacp_lag_port_match,
-                                     &plp->lport_handle) == NULL) {
-                    continue;
-                }
+    if ((lacp_port->lacp_up != TRUE) || !lag || (lag->member_count == 0)) {
+        lacp_timer_hold(&lacp_tx_timer_wheel, &lacp_port->wait_while_timer,
+                        lacp_port->wait_while_timer.t_ticks);
+        return;
+    }
 
-                if (plp->lacp_control.ready_n == FALSE) {
-                    lag->ready = FALSE;
-                    break;
-                }
-            }
+    if (LAG_member_find(lag, lacp_port->lport_handle) == NULL) {
+        VLOG_ERR("lport (ox%llx) not set ??", lacp_port->lport_handle);
+        lacp_timer_hold(&lacp_tx_timer_wheel, &lacp_port->wait_while_timer,
+                        lacp_port->wait_while_timer.t_ticks);
+        return;
+    }
 
-            if (lag->ready == TRUE &&
-                lacp_port->lacp_control.selected ==  SELECTED) {
-                LACP_mux_fsm(E3,
-                             lacp_port->mux_fsm_state,
-                             lacp_port);
-            } else {
-                start_wait_while_timer(lacp_port);
-            }
+    /*
+     * Check for ready and selected variables.  If selected is SELECTED
+     * for the port and ready is TRUE for the link group, then generate
+     * event E3 for the port's mux fsm.
+     */
+    lacp_port->lacp_control.ready_n = TRUE;
+    LACP_MEMBER_CHANGED(lacp_port);
+    lag->ready = TRUE;      /* assume */
 
+    LAG_MEMBER_FOREACH(lag, member) {
+        if (member->plpinfo->lacp_control.ready_n == FALSE) {
             lag->ready = FALSE;
+            break;
         }
     }
 
+    if (lag->ready == TRUE &&
+        lacp_port->lacp_control.selected ==  SELECTED) {
+        LACP_mux_fsm(E3,
+                     lacp_port->mux_fsm_state,
+                     lacp_port);
+    } else {
+        start_wait_while_timer(lacp_port);
+    }
+
+    lag->ready = FALSE;
+
     REXIT();
 
 } /* mux_wait_while_timer_expiry */
@@ -251,79 +430,62 @@ mux_wait_while_timer_expiry(lacp_per_port_variables_t *lacp_port)
 
 /*----------------------------------------------------------------------
  * Function: LACP_current_while_expiry()
- * Synopsis: Goes thro' all the ports in all LACP link groups and does
- *           current while expiry action on each one of them depending
- *           upon their states.
+ * Synopsis: Advances the Rx timer wheel by one tick, firing the
+ *           current while timers that expire.
  * Input  :
  * Returns:  void
  *----------------------------------------------------------------------*/
 void
 LACP_current_while_expiry(void)
 {
-    lacp_per_port_variables_t *lacp_port;
-
     RENTRY();
 
-    lacp_port = LACP_AVL_FIRST(lacp_per_port_vars_tree);
-    while (lacp_port) {
-        if (lacp_port->lacp_up == TRUE) { /* LACP port is initialized */
-
-            RDEBUG(DL_TIMERS, "invoke current_while_timer_expiry.  lport=0x%llx\n",
-                   lacp_port->lport_handle);
-
-            current_while_timer_expiry(lacp_port);
-        }
-
-        lacp_port = LACP_AVL_NEXT(lacp_port->avlnode);
-    }
+    lacp_timer_wheel_advance(&lacp_rx_timer_wheel, 1);
 
     REXIT();
 
 } /* LACP_current_while_expiry */
 
 /*----------------------------------------------------------------------
- * Function: current_while_timer_expiry(int port_number)
- * Synopsis: Decrements the expiry counter, if greater than 0.
- *           If counter reaches 0, generates a current_while timer
- *           expired event (E2).
+ * Function: current_while_timer_expiry()
+ * Synopsis: Current while timer of the port expired.  Generates a
+ *           current_while timer expired event (E2).
  *
- * Input  :
+ * Input  :  lacp_per_port_variables_t - the port
  * Returns:  void
  *----------------------------------------------------------------------*/
 static void
-current_while_timer_expiry(lacp_per_port_variables_t *plpinfo)
+current_while_timer_expiry(void *arg)
 {
+    lacp_per_port_variables_t *plpinfo = arg;
+
     RENTRY();
 
     RDEBUG(DL_TIMERS, "%s: lport 0x%llx\n", __FUNCTION__, plpinfo->lport_handle);
 
-    if (plpinfo->current_while_timer_expiry_counter > 0) {
-
-        RDEBUG(DL_TIMERS, "current_while_timer %d lport 0x%llx\n",
-               plpinfo->current_while_timer_expiry_counter,
-               plpinfo->lport_handle);
-
-        /********************************************************************
-         * Decrement the expiry counter and if it has reached 0, generate
-         * Event E2.
-         ********************************************************************/
-        plpinfo->current_while_timer_expiry_counter--;
-
-        if (plpinfo->current_while_timer_expiry_counter == 0) {
-            /*********************************************************************
-             *  Generate current while timer expired event (E2).
-             *********************************************************************/
-            if (plpinfo->debug_level & DBG_RX_FSM) {
-                RDBG("%s : Generate E2 (lport 0x%llx)\n", __FUNCTION__, plpinfo->lport_handle);
-            }
+    /********************************************************************
+     * The timer does not run while LACP is not up on the port; hold it
+     * until LACP_resume_port_timers().
+     ********************************************************************/
+    if (plpinfo->lacp_up != TRUE) {
+        lacp_timer_hold(&lacp_rx_timer_wheel, &plpinfo->current_while_timer,
+                        plpinfo->current_while_timer.t_ticks);
+        goto exit;
+    }
 
-            LACP_receive_fsm(E2,
-                             plpinfo->recv_fsm_state,
-                             NULL,
-                             plpinfo);
-        }
+    /*********************************************************************
+     *  Generate current while timer expired event (E2).
+     *********************************************************************/
+    if (plpinfo->debug_level & DBG_RX_FSM) {
+        RDBG("%s : Generate E2 (lport 0x%llx)\n", __FUNCTION__, plpinfo->lport_handle);
     }
 
+    LACP_receive_fsm(E2,
+                     plpinfo->recv_fsm_state,
+                     NULL,
+                     plpinfo);
+
+exit:
     REXIT();
 
 } /* current_while_timer_expiry */
@@ -442,7 +604,9 @@ LACP_process_input_pkt(port_handle_t lport_handle, unsigned char *data, int len)
 /*----------------------------------------------------------------------
  * Function: LACP_marker_responder(int port_number, void *data)
  * Synopsis: Checks if the recvd PDU is a marker PDU, if so
- *           transmits a marker response PDU.
+ *           transmits a marker response PDU.  The response is built
+ *           in the receive buffer itself, so nothing is allocated.
+ *           At most MAX_MARKER_RESPONSES are sent per port per second.
  *
  * Input  :  int - port number, void * - pointer to recvd PDU Data.
  * Returns:  TRUE if the recvd PDU was indeed a marker PDU.
@@ -453,7 +617,6 @@ LACP_marker_responder(lacp_per_port_variables_t *plpinfo, void *data)
 {
     int status = FALSE;
     marker_pdu_payload_t *marker_payload;
-    marker_pdu_payload_t *marker_response_payload;
 
     RENTRY();
 
@@ -470,16 +633,31 @@ LACP_marker_responder(lacp_per_port_variables_t *plpinfo, void *data)
     plpinfo->marker_pdus_received++;
     status = TRUE;
 
-    if (!(marker_response_payload =
-          LACP_build_marker_response_payload(plpinfo->lport_handle, data))) {
-        /* Report error and exit with status as TRUE */
-        VLOG_ERR("CANT TX MARKER RESPONSE");
+    // Only a Marker Information TLV asks for a response; a Marker
+    // Response TLV is for the marker generator, which lacpd does not run.
+    if (marker_payload->tlv_type_marker != MARKER_REQUEST_TLV_TYPE) {
+        plpinfo->marker_pdus_dropped++;
+        goto exit;
+    }
+
+    // The response counter is cleared every second.
+    if ((lacp_tx_timer_wheel.w_now - plpinfo->marker_tx_tick) >=
+        LACP_TIMER_TICKS_PER_SEC) {
+        plpinfo->marker_tx_tick = lacp_tx_timer_wheel.w_now;
+        plpinfo->marker_tx_count = 0;
+    }
+
+    if (plpinfo->marker_tx_count >= MAX_MARKER_RESPONSES) {
+        plpinfo->marker_pdus_dropped++;
         goto exit;
     }
+    plpinfo->marker_tx_count++;
+
+    LACP_build_marker_response(plpinfo->lport_handle, marker_payload);
 
     LACP_transmit_marker_response(plpinfo->lport_handle,
-                                  (void *)marker_response_payload);
-    free((void *)marker_response_payload);
+                                  (void *)marker_payload);
+    plpinfo->marker_response_pdus_sent++;
 
 exit:
     REXIT();
@@ -489,66 +667,46 @@ exit:
 } /* LACP_marker_responder */
 
 /*----------------------------------------------------------------------
- * Function: LACP_build_lacpdu(int port_number)
- * Synopsis: Function to construct the lacpdu.
+ * Function: LACP_build_marker_response(lport_handle, marker_pdu)
+ * Synopsis: Turns a received marker PDU into the marker response, in
+ *           place.  The requester fields are left as received.
  * Input  :
- *           port_number = port number on which to act upon.
- * Returns:  pointer to the constructed lacpdu payload or NULL in case
- *           of error.
+ *           lport_handle = port the marker PDU was received on.
+ *           marker_pdu = received marker PDU, LACP_PKT_SIZE bytes.
+ * Returns:  void
  *----------------------------------------------------------------------*/
-static marker_pdu_payload_t *
-LACP_build_marker_response_payload(port_handle_t lport_handle,
-                                   marker_pdu_payload_t *marker_pdu)
+static void
+LACP_build_marker_response(port_handle_t lport_handle,
+                           marker_pdu_payload_t *marker_pdu)
 {
-    marker_pdu_payload_t *marker_response_payload;
-
     RENTRY();
 
     // DL4 (not per-port debug) as this is not common.
     RDEBUG(DL_LACPDU, "%s: lport 0x%llx\n", __FUNCTION__, lport_handle);
 
     /***************************************************************************
-     * Allocate memory for the lacpdu.
-     ***************************************************************************/
-    marker_response_payload = (marker_pdu_payload_t *)malloc(sizeof(marker_pdu_payload_t));
-    if (marker_response_payload == NULL) {
-        /* Report error */
-        VLOG_ERR("%s : LACP_E_NOMEMMARKERRESPONSE", __FUNCTION__);
-        goto exit;
-    }
-
-    /***************************************************************************
-     * Zero out the memory.
-     ***************************************************************************/
-    memset(marker_response_payload, 0, sizeof(marker_pdu_payload_t));
-
-    /***************************************************************************
-     * Fill in the general parameters in the marker_response_payload.
+     * Fill in the general parameters in the marker response.  The Ethernet
+     * header is set up by mlacp_tx_pdu().
      ***************************************************************************/
-    marker_response_payload->subtype = MARKER_SUBTYPE;
-    marker_response_payload->version_number = MARKER_VERSION;
+    marker_pdu->subtype = MARKER_SUBTYPE;
+    marker_pdu->version_number = MARKER_VERSION;
 
     /***************************************************************************
-     * Fill in the other parameters in the marker_response_payload.
+     * Fill in the other parameters in the marker response.
      * No ntoh changes here, as we're using the incoming data itself to
-     * form this PDU and turn it around.
+     * form this PDU and turn it around.  The pad and reserved bytes may
+     * hold anything a short frame left in the buffer, so clear them.
      ***************************************************************************/
-    marker_response_payload->tlv_type_marker = MARKER_TLV_TYPE;
-    marker_response_payload->marker_info_length = MARKER_TLV_INFO_LENGTH;
-    marker_response_payload->requester_port = marker_pdu->requester_port;
-    memcpy((char *)marker_response_payload->requester_system,
-           (char *)marker_pdu->requester_system, MAC_ADDR_LENGTH);
-    marker_response_payload->requester_transaction_id =
-                                    marker_pdu->requester_transaction_id;
-    marker_response_payload->tlv_type_terminator = TERMINATOR_TLV_TYPE;
-    marker_response_payload->terminator_length =   TERMINATOR_LENGTH;
+    marker_pdu->tlv_type_marker = MARKER_TLV_TYPE;
+    marker_pdu->marker_info_length = MARKER_TLV_INFO_LENGTH;
+    marker_pdu->pad = 0;
+    marker_pdu->tlv_type_terminator = TERMINATOR_TLV_TYPE;
+    marker_pdu->terminator_length = TERMINATOR_LENGTH;
+    memset(marker_pdu->reserved, 0, sizeof(marker_pdu->reserved));
 
-exit:
     REXIT();
 
-    return (marker_response_payload);
-
-} /* LACP_build_marker_response_payload */
+} /* LACP_build_marker_response */
 
 /*----------------------------------------------------------------------
  * Function: LACP_transmit_marker_response(int pnum, void *data)
@@ -621,17 +779,3 @@ is_pkt_from_same_system(lacp_per_port_variables_t *plpinfo,
     return status;
 
 } /* is_pkt_from_same_system */
-
-int
-lacp_lag_port_match(void *v1, void *v2)
-{
-    lacp_lag_ppstruct_t *ppstruct = v1;
-    port_handle_t lport_handle = *(port_handle_t *)v2;
-
-    if (ppstruct->lport_handle == lport_handle) {
-        return 1;
-    } else {
-        return 0;
-    }
-
-} /* lacp_lag_port_match */
@@ -0,0 +1,282 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * lacp_timer.c
+ *
+ *   Timing wheel for the LACP per port timers.
+ *
+ *   A timer due within a lap of LACP_TIMER_WHEEL_SIZE ticks sits in the
+ *   first level slot for the tick it expires on; a later one sits in the
+ *   second level slot for its lap, and is moved to the first level when
+ *   that lap starts.  Starting and stopping a timer is O(1), a tick only
+ *   visits the timers that expire on it, and a timer is moved between
+ *   levels once.  Ports with no timer armed cost nothing.
+ *   lacp_timer_wheel_next() tells the caller when the next timer is due
+ *   without visiting any timer, so the wheel only needs to be advanced
+ *   when there is work to do.
+ *
+ *   Not thread safe; used only by the LACP protocol thread.
+ *
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+
+#include "lacp_timer.h"
+
+#define LACP_TIMER_WHEEL_MASK   (LACP_TIMER_WHEEL_SIZE - 1)
+#define LACP_TIMER_LAPS_MASK    (LACP_TIMER_WHEEL_LAPS - 1)
+
+/* The lap a tick falls in. */
+#define LACP_TIMER_LAP(tick)    ((tick) / LACP_TIMER_WHEEL_SIZE)
+
+static void
+lacp_timer_link(lacp_timer_t **head, lacp_timer_t *timer)
+{
+    timer->t_next = *head;
+    if (timer->t_next != NULL) {
+        timer->t_next->t_pprev = &(timer->t_next);
+    }
+    timer->t_pprev = head;
+    *head = timer;
+
+} // lacp_timer_link
+
+static void
+lacp_timer_unlink(lacp_timer_t *timer)
+{
+    *(timer->t_pprev) = timer->t_next;
+    if (timer->t_next != NULL) {
+        timer->t_next->t_pprev = timer->t_pprev;
+    }
+    timer->t_next = NULL;
+    timer->t_pprev = NULL;
+
+} // lacp_timer_unlink
+
+// Puts an armed timer in the first level if it is due within a lap,
+// otherwise in the second level.
+static void
+lacp_timer_insert(lacp_timer_wheel_t *wheel, lacp_timer_t *timer)
+{
+    unsigned long long lap;
+
+    if (timer->t_expires - wheel->w_now < LACP_TIMER_WHEEL_SIZE) {
+        lacp_timer_link(&(wheel->w_slot[timer->t_expires &
+                                        LACP_TIMER_WHEEL_MASK]),
+                        timer);
+    } else {
+        lap = LACP_TIMER_LAP(timer->t_expires);
+        lacp_timer_link(&(wheel->w_lap[lap & LACP_TIMER_LAPS_MASK]), timer);
+    }
+
+} // lacp_timer_insert
+
+// Moves the timers of a list to a private one, whose head is *list.
+static void
+lacp_timer_take(lacp_timer_t **slot, lacp_timer_t **list)
+{
+    *list = *slot;
+    *slot = NULL;
+    if (*list != NULL) {
+        (*list)->t_pprev = list;
+    }
+
+} // lacp_timer_take
+
+void
+lacp_timer_wheel_init(lacp_timer_wheel_t *wheel)
+{
+    memset(wheel, 0, sizeof(*wheel));
+
+} // lacp_timer_wheel_init
+
+void
+lacp_timer_init(lacp_timer_t *timer, lacp_timer_handler_t handler, void *arg)
+{
+    memset(timer, 0, sizeof(*timer));
+    timer->t_handler = handler;
+    timer->t_arg = arg;
+
+} // lacp_timer_init
+
+void
+lacp_timer_start(lacp_timer_wheel_t *wheel, lacp_timer_t *timer,
+                 unsigned int ticks)
+{
+    lacp_timer_stop(wheel, timer);
+
+    // A timer started during a tick fires no earlier than the next one.
+    if (ticks == 0) {
+        ticks = 1;
+    }
+
+    timer->t_ticks = ticks;
+    timer->t_expires = wheel->w_now + ticks;
+    lacp_timer_insert(wheel, timer);
+    wheel->w_armed++;
+
+} // lacp_timer_start
+
+void
+lacp_timer_stop(lacp_timer_wheel_t *wheel, lacp_timer_t *timer)
+{
+    if (timer->t_pprev != NULL) {
+        lacp_timer_unlink(timer);
+        wheel->w_armed--;
+    }
+    timer->t_held = 0;
+
+} // lacp_timer_stop
+
+// Stops a timer, keeping 'ticks' for lacp_timer_resume() to start it
+// with.  For a timer whose owner cannot act on it for now.
+void
+lacp_timer_hold(lacp_timer_wheel_t *wheel, lacp_timer_t *timer,
+                unsigned int ticks)
+{
+    lacp_timer_stop(wheel, timer);
+    timer->t_held = (ticks == 0) ? 1 : ticks;
+
+} // lacp_timer_hold
+
+// Holds an armed timer with the ticks it has left.
+void
+lacp_timer_pause(lacp_timer_wheel_t *wheel, lacp_timer_t *timer)
+{
+    if (timer->t_pprev != NULL) {
+        lacp_timer_hold(wheel, timer, lacp_timer_remaining(wheel, timer));
+    }
+
+} // lacp_timer_pause
+
+// Starts a held timer again with the ticks it had left.
+void
+lacp_timer_resume(lacp_timer_wheel_t *wheel, lacp_timer_t *timer)
+{
+    if (timer->t_held != 0) {
+        lacp_timer_start(wheel, timer, timer->t_held);
+    }
+
+} // lacp_timer_resume
+
+int
+lacp_timer_pending(const lacp_timer_t *timer)
+{
+    return (timer->t_pprev != NULL);
+
+} // lacp_timer_pending
+
+unsigned int
+lacp_timer_remaining(const lacp_timer_wheel_t *wheel,
+                     const lacp_timer_t *timer)
+{
+    if ((timer->t_pprev == NULL) || (timer->t_expires <= wheel->w_now)) {
+        return 0;
+    }
+
+    return (unsigned int)(timer->t_expires - wheel->w_now);
+
+} // lacp_timer_remaining
+
+void
+lacp_timer_wheel_advance(lacp_timer_wheel_t *wheel, unsigned int ticks)
+{
+    lacp_timer_t *later;
+    lacp_timer_t *expired;
+    lacp_timer_t *timer;
+    unsigned long long lap;
+
+    while (ticks-- > 0) {
+        wheel->w_now++;
+
+        // A new lap: the second level timers due on it move to the
+        // first level, those for a later lap go back to the second.
+        if ((wheel->w_now & LACP_TIMER_WHEEL_MASK) == 0) {
+            lap = LACP_TIMER_LAP(wheel->w_now);
+            lacp_timer_take(&(wheel->w_lap[lap & LACP_TIMER_LAPS_MASK]),
+                            &later);
+            while ((timer = later) != NULL) {
+                lacp_timer_unlink(timer);
+                lacp_timer_insert(wheel, timer);
+            }
+        }
+
+        // Every timer in the slot is due.  Move them to a private list
+        // first: a handler may start or stop any timer, including
+        // others that are due on this tick; stopping one of those keeps
+        // it from firing.
+        lacp_timer_take(&(wheel->w_slot[wheel->w_now & LACP_TIMER_WHEEL_MASK]),
+                        &expired);
+
+        while ((timer = expired) != NULL) {
+            lacp_timer_unlink(timer);
+            wheel->w_armed--;
+            wheel->w_fired++;
+            timer->t_handler(timer->t_arg);
+        }
+    }
+
+} // lacp_timer_wheel_advance
+
+int
+lacp_timer_wheel_next(const lacp_timer_wheel_t *wheel,
+                      unsigned long long *expires)
+{
+    unsigned long long end = wheel->w_now + LACP_TIMER_WHEEL_SIZE;
+    unsigned long long tick;
+    unsigned long long lap;
+
+    if (wheel->w_armed == 0) {
+        return ENOENT;
+    }
+
+    // A first level slot only holds timers due on its tick in the
+    // coming lap, so the first busy one is the next due.  The start of
+    // a lap with second level timers ends the search too, as they are
+    // only looked at when they move to the first level.
+    for (tick = wheel->w_now + 1; tick < end; tick++) {
+        if (((tick & LACP_TIMER_WHEEL_MASK) == 0) &&
+            (wheel->w_lap[LACP_TIMER_LAP(tick) & LACP_TIMER_LAPS_MASK] != NULL)) {
+            break;
+        }
+        if (wheel->w_slot[tick & LACP_TIMER_WHEEL_MASK] != NULL) {
+            break;
+        }
+    }
+
+    if (tick < end) {
+        *expires = tick;
+        return 0;
+    }
+
+    // Nothing due in the coming lap: wake up at the start of the next
+    // lap that has second level timers.
+    for (lap = LACP_TIMER_LAP(wheel->w_now) + 1;
+         lap <= LACP_TIMER_LAP(wheel->w_now) + LACP_TIMER_WHEEL_LAPS;
+         lap++) {
+        if ((lap * LACP_TIMER_WHEEL_SIZE >= end) &&
+            (wheel->w_lap[lap & LACP_TIMER_LAPS_MASK] != NULL)) {
+            *expires = lap * LACP_TIMER_WHEEL_SIZE;
+            return 0;
+        }
+    }
+
+    return ENOENT;
+
+} // lacp_timer_wheel_next
@@ -38,7 +38,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <pthread.h>
-#include <sys/time.h>
+#include <signal.h>
 
 #include <util.h>
 #include <daemon.h>
@@ -57,6 +57,7 @@
 
 #include "lacp.h"
 #include "mlacp_fproto.h"
+#include "lacp_support.h"
 #include "lacp_ops_if.h"
 
 VLOG_DEFINE_THIS_MODULE(lacpd);
@@ -68,6 +69,7 @@ static unixctl_cb_func lacpd_unixctl_dump;
 static unixctl_cb_func lacpd_unixctl_getlacpinterfaces;
 static unixctl_cb_func lacpd_unixctl_getlacpcounters;
 static unixctl_cb_func lacpd_unixctl_getlacpstate;
+static unixctl_cb_func lacpd_unixctl_perf;
 static unixctl_cb_func ops_lacpd_exit;
 
 extern int lacpd_shutdown;
@@ -164,6 +166,28 @@ lacpd_unixctl_getlacpstate(struct unixctl_conn *conn, int argc,
     ds_destroy(&ds);
 } /* lacpd_unixctl_getlacpstate */
 
+/**
+ * ovs-appctl interface callback function to dump the LACP timer tick
+ * performance histograms: how late each tick was processed, how long it
+ * took, and how many ports it touched.
+ *
+ * @param conn connection to ovs-appctl interface.
+ * @param argc number of arguments.
+ * @param argv array of arguments.
+ * @param OVS_UNUSED aux argument not used.
+ */
+static void
+lacpd_unixctl_perf(struct unixctl_conn *conn, int argc OVS_UNUSED,
+                   const char *argv[] OVS_UNUSED, void *aux OVS_UNUSED)
+{
+    struct ds ds = DS_EMPTY_INITIALIZER;
+
+    lacpd_perf_dump(&ds);
+
+    unixctl_command_reply(conn, ds_cstr(&ds));
+    ds_destroy(&ds);
+} /* lacpd_unixctl_perf */
+
 
 /**
  * callback handler function for diagnostic dump basic
@@ -208,25 +232,6 @@ static void lacpd_diag_dump_basic_cb(const char *feature , char **buf)
 } /* lacpd_diag_dump_basic_cb */
 
 
-/**
- * lacpd daemon's timer handler function.
- */
-static void
-timerHandler(void)
-{
-    ML_event *timerEvent;
-
-    timerEvent = (ML_event *)malloc(sizeof(ML_event));
-    if (NULL == timerEvent) {
-        VLOG_ERR("Out of memory for LACP timer message.");
-        return;
-    }
-    memset(timerEvent, 0, sizeof(ML_event));
-    timerEvent->sender.peer = ml_timer_index;
-
-    ml_send_event(timerEvent);
-} /* timerHandler */
-
 /**
  * lacpd daemon's main initialization function.  Responsible for
  * creating various protocol & OVSDB interface threads.
@@ -271,6 +276,7 @@ lacpd_init(const char *db_path, struct unixctl_server *appctl)
                              lacpd_unixctl_getlacpcounters, NULL);
     unixctl_command_register("lacpd/getlacpstate", "", 0, 1,
                              lacpd_unixctl_getlacpstate, NULL);
+    unixctl_command_register("lacpd/perf", "", 0, 0, lacpd_unixctl_perf, NULL);
 
     /* Spawn off the OVSDB interface thread. */
     rc = pthread_create(&ovs_if_thread,
@@ -315,7 +321,21 @@ usage(void)
     vlog_usage();
     printf("\nOther options:\n"
            "  --unixctl=SOCKET        override default control socket name\n"
-           "  -h, --help              display this help message\n");
+           "  --fast-failover=MSEC    fast periodic LACPDU interval, %d to %d ms\n"
+           "                          (default: %d, short timeout is 3x this).\n"
+           "                          Below %d ms is not IEEE 802.1AX compliant;\n"
+           "                          peers must run the same rate\n"
+           "  --rx-ring               receive LACPDUs for all interfaces on one\n"
+           "                          memory mapped ring instead of a socket each\n"
+           "  --tx-ring               send LACPDUs through a memory mapped ring on\n"
+           "                          each interface socket (no effect with --rx-ring)\n"
+           "  --db-flush-delay=MSEC   longest LACP status changes are held before\n"
+           "                          being written to OVSDB together, 0 to %d ms\n"
+           "                          (default: %d)\n"
+           "  -h, --help              display this help message\n",
+           FAST_PERIODIC_MS_MIN, FAST_PERIODIC_MS_DEFAULT,
+           FAST_PERIODIC_MS_DEFAULT, FAST_PERIODIC_MS_DEFAULT,
+           DB_FLUSH_DELAY_MS_MAX, DB_FLUSH_DELAY_MS_DEFAULT);
     exit(EXIT_SUCCESS);
 } /* usage */
 
@@ -324,12 +344,20 @@ parse_options(int argc, char *argv[], char **unixctl_pathp)
 {
     enum {
         OPT_UNIXCTL = UCHAR_MAX + 1,
+        OPT_FAST_FAILOVER,
+        OPT_RX_RING,
+        OPT_TX_RING,
+        OPT_DB_FLUSH_DELAY,
         VLOG_OPTION_ENUMS,
         DAEMON_OPTION_ENUMS,
     };
     static const struct option long_options[] = {
         {"help",        no_argument, NULL, 'h'},
         {"unixctl",     required_argument, NULL, OPT_UNIXCTL},
+        {"fast-failover", required_argument, NULL, OPT_FAST_FAILOVER},
+        {"rx-ring",     no_argument, NULL, OPT_RX_RING},
+        {"tx-ring",     no_argument, NULL, OPT_TX_RING},
+        {"db-flush-delay", required_argument, NULL, OPT_DB_FLUSH_DELAY},
         DAEMON_LONG_OPTIONS,
         VLOG_LONG_OPTIONS,
         {NULL, 0, NULL, 0},
@@ -352,6 +380,36 @@ parse_options(int argc, char *argv[], char **unixctl_pathp)
             *unixctl_pathp = optarg;
             break;
 
+        case OPT_FAST_FAILOVER:
+            if (!str_to_uint(optarg, 10, &lacp_fast_periodic_ms) ||
+                (lacp_fast_periodic_ms < FAST_PERIODIC_MS_MIN) ||
+                (lacp_fast_periodic_ms > FAST_PERIODIC_MS_DEFAULT)) {
+                VLOG_FATAL("--fast-failover must be between %d and %d ms",
+                           FAST_PERIODIC_MS_MIN, FAST_PERIODIC_MS_DEFAULT);
+            }
+            if (lacp_fast_periodic_ms < FAST_PERIODIC_MS_DEFAULT) {
+                VLOG_WARN("LACP fast periodic interval set to %u ms; "
+                          "not IEEE 802.1AX compliant",
+                          lacp_fast_periodic_ms);
+            }
+            break;
+
+        case OPT_RX_RING:
+            lacpd_rx_ring_enabled = true;
+            break;
+
+        case OPT_TX_RING:
+            lacpd_tx_ring_enabled = true;
+            break;
+
+        case OPT_DB_FLUSH_DELAY:
+            if (!str_to_uint(optarg, 10, &db_flush_delay_ms) ||
+                (db_flush_delay_ms > DB_FLUSH_DELAY_MS_MAX)) {
+                VLOG_FATAL("--db-flush-delay must be between 0 and %d ms",
+                           DB_FLUSH_DELAY_MS_MAX);
+            }
+            break;
+
         VLOG_OPTION_HANDLERS
         DAEMON_OPTION_HANDLERS
 
@@ -408,8 +466,6 @@ ops_lacpd_exit(struct unixctl_conn *conn, int argc OVS_UNUSED,
 int
 main(int argc, char *argv[])
 {
-    int mlacp_tindex;
-    struct itimerval timerVal;
     char *appctl_path = NULL;
     struct unixctl_server *appctl;
     char *ovsdb_sock;
@@ -462,27 +518,14 @@ main(int argc, char *argv[])
 
     VLOG_INFO_ONCE("%s (OpenSwitch Link Aggregation Daemon) started", program_name);
 
-    /* Set up timer to fire off every second. */
-    timerVal.it_interval.tv_sec  = 1;
-    timerVal.it_interval.tv_usec = 0;
-    timerVal.it_value.tv_sec  = 1;
-    timerVal.it_value.tv_usec = 0;
-
-    if ((mlacp_tindex = setitimer(ITIMER_REAL, &timerVal, NULL)) != 0) {
-        VLOG_ERR("lacpd main: Timer start failed!\n");
-    }
-
-    /* Wait for all signals in an infinite loop. */
+    /* LACP timers are run by the protocol thread's timer engine.
+     * Wait for all signals in an infinite loop. */
     sigfillset(&sigset);
     while (!lacpd_shutdown) {
 
         sigwait(&sigset, &signum);
         switch (signum) {
 
-        case SIGALRM:
-            timerHandler();
-            break;
-
         case SIGTERM:
         case SIGINT:
             VLOG_WARN("%s, sig %d caught", __FUNCTION__, signum);
@@ -19,15 +19,20 @@
  *    Description        : Master (mcpu) LACP Manager's main entry point
  ***************************************************************************/
 
+#define _GNU_SOURCE
 #include <unistd.h>
 #include <stdlib.h>
+#include <stddef.h>
 #include <string.h>
 #include <errno.h>
+#include <time.h>
 #include <net/if.h>
 #include <arpa/inet.h>
 #include <sys/epoll.h>
 #include <sys/socket.h>
+#include <sys/timerfd.h>
 #include <sys/types.h>
+#include <sys/uio.h>
 #include <linux/if_ether.h>
 #include <linux/if_packet.h>
 #include <linux/filter.h>
@@ -36,6 +41,10 @@
 #include <openvswitch/vlog.h>
 
 #include <mqueue.h>
+#include <mpool.h>
+#include <lacp_hist.h>
+#include <mlacp_rx_ring.h>
+#include <mlacp_tx_ring.h>
 #include <pm_cmn.h>
 #include <lacp_cmn.h>
 #include <mlacp_debug.h>
@@ -54,8 +63,128 @@ VLOG_DEFINE_THIS_MODULE(mlacp_main);
 static int lacp_init_done = FALSE;
 int lacpd_shutdown = 0;
 
-/* Message Queue for LACPD main protocol thread */
-mqueue_t lacpd_main_rcvq;
+/* Event queue lanes for LACPD main protocol thread.  All lanes share one
+ * wakeup; the protocol thread serves them in priority order so LACPDUs
+ * never wait behind a burst of configuration messages.  LACP timers do
+ * not go through the queue, see the timer engine below. */
+enum lacpd_lane {
+    LACPD_LANE_RX = 0,
+    LACPD_LANE_CONFIG,
+    LACPD_LANE_MAX
+};
+
+static const char *lacpd_lane_names[LACPD_LANE_MAX] = {
+    "rx_pdu",
+    "config",
+};
+
+/* Configuration lane is served first after this many rx events
+ * in a row, so it cannot be starved by a LACPDU flood.
+ * 0 gives strict priority. */
+#define LACPD_CONFIG_LANE_WEIGHT 16
+
+mqueue_t lacpd_main_rcvq[LACPD_LANE_MAX];
+
+/* Per lane wait time counters.  Written only by the protocol thread. */
+static struct {
+    unsigned long long events;
+    unsigned long long total_wait_us;
+    unsigned long long max_wait_us;
+} lacpd_lane_stats[LACPD_LANE_MAX];
+
+/* Rx events served since the configuration lane was last served. */
+static int lacpd_lane_hi_served = 0;
+
+/* Configuration lane overflow.  Configuration and link state messages
+ * must not be lost, and their sender, the OVSDB interface thread, must
+ * not wait for room either, since the protocol thread may be waiting
+ * for it to take status requests.  A message that finds the lane full
+ * is kept on this list, and the protocol thread moves the list into the
+ * lane, in order, as it makes room.  While the list is not empty every
+ * new message goes on it, so the lane stays FIFO.  Received LACPDUs are
+ * still dropped when their lane is full. */
+static struct {
+    pthread_mutex_t mutex;
+    ML_event *head;
+    ML_event *tail;
+    unsigned long count;            /* Also read without the mutex. */
+    unsigned long high_water;
+    unsigned long long queued;      /* Messages that went on the list. */
+} lacpd_config_overflow = {
+    .mutex = PTHREAD_MUTEX_INITIALIZER,
+};
+
+/* LACP timer engine.  The protocol thread sleeps on a timerfd along
+ * with the event queue.  The timerfd is armed for the next LACP timer
+ * due on the timer wheels, so the thread only wakes up when a timer
+ * expires or an event arrives. */
+static int lacpd_timer_fd = -1;
+static unsigned long long lacpd_timer_epoch_us;     /* Wheel tick 0. */
+static unsigned long long lacpd_timer_deadline_us;  /* timerfd target, 0 = idle. */
+
+/* Timer engine counters.  Written only by the protocol thread. */
+static struct {
+    unsigned long long expiries;        /* timerfd deadlines reached. */
+    unsigned long long runs;            /* Wakeups with ticks to run. */
+    unsigned long long ticks;           /* Wheel ticks run. */
+    unsigned long long max_ticks;       /* Most ticks run in one go. */
+    unsigned long long total_late_us;   /* Due time to processing delay. */
+    unsigned long long max_late_us;
+} lacpd_timer_stats;
+
+/* Per tick performance, for lacpd/perf.  Written only by the protocol
+ * thread.  The histograms only take the ticks that fired a timer;
+ * catching up over ticks with nothing due is just counted. */
+static struct {
+    unsigned long long idle_ticks;
+    lacp_hist_t lag_us;         /* Tick due time to start of processing. */
+    lacp_hist_t run_us;         /* Time to run the tick. */
+    lacp_hist_t ports;          /* Timers fired, one port each. */
+} lacpd_tick_perf;
+
+/* Link state coalescing.  At most one link state message per lport is
+ * queued.  Later changes overwrite the lport's slot and the protocol
+ * thread applies whatever state is in the slot when it dequeues the
+ * message.  gen is bumped when an lport goes away so a message still
+ * queued for the old lport cannot pick up state meant for a new one. */
+static struct {
+    pthread_mutex_t mutex;
+    struct {
+        bool queued;
+        unsigned int gen;
+        int msgnum;
+        int link_speed;
+    } port[PM_MAX_PORTS];
+} lacpd_link_state = {
+    .mutex = PTHREAD_MUTEX_INITIALIZER,
+};
+
+/* Coalescing counters. */
+static struct {
+    unsigned long long link_state_sent;
+    unsigned long long link_state_coalesced;
+    unsigned long long link_state_stale;
+} lacpd_coalesce_stats;
+
+/* Object pool for all messages sent to lacpd_main_rcvq. */
+mpool_t lacpd_event_pool;
+
+/* Max number of events the protocol thread dispatches per wakeup
+ * before it runs the deferred per-batch work.  Keeps OVSDB status
+ * from going stale under a sustained event storm. */
+#define LACPD_MAX_BATCH 256
+
+/* Protocol thread batch counters.  Written only by the protocol
+ * thread; read by the appctl dump. */
+static struct {
+    unsigned long long batches;
+    unsigned long long events;
+    unsigned long long max_size;
+    unsigned long long last_size;
+    unsigned long long total_latency_us;
+    unsigned long long max_latency_us;
+    unsigned long long last_latency_us;
+} lacpd_batch_stats;
 
 /* epoll FD for LACPDU RX. */
 int epfd = -1;
@@ -65,102 +194,1224 @@ int epfd = -1;
  * sizing the epoll events data structure. */
 #define MAX_EVENTS 64
 
+/* LACPDU Rx counters.  Written only by the Rx thread. */
+static struct {
+    unsigned long long wakeups;     /* epoll_wait() returns. */
+    unsigned long long syscalls;    /* recvmmsg() calls. */
+    unsigned long long frames;      /* LACPDUs read. */
+    unsigned long long batches;     /* Batch messages sent. */
+    unsigned long long max_batch;   /* Most LACPDUs in one batch. */
+    unsigned long long unknown;     /* Ring frames for no registered port. */
+} lacpd_rx_stats;
+
+/* Shared Rx ring (lacpd --rx-ring).  One packet socket receives the
+ * LACPDUs of all interfaces; frames are matched to their lport by
+ * ifindex.  LACPDUs are sent on one unbound socket, addressed by
+ * ifindex, so no per interface socket is needed at all. */
+bool lacpd_rx_ring_enabled = false;
+static mlacp_rx_ring_t lacpd_rx_ring;
+static int lacpd_tx_sockfd = -1;
+
+/* LACPDU Tx batching.  LACPDUs sent while the protocol thread handles
+ * one wakeup are held and sent together by lacpd_tx_flush() at the end
+ * of it: through one sendmmsg() on the shared Tx socket with the shared
+ * Rx ring, or through each interface's PACKET_TX_RING with lacpd
+ * --tx-ring.  Used only by the protocol thread. */
+bool lacpd_tx_ring_enabled = false;
+
+#define LACPD_TX_BATCH_MAX      64
+#define LACPD_TX_FRAME_MAX      256
+
+/* LACPDU send/receive state of each port, by interface index.  Owned
+ * by the protocol thread, which never looks at the OVSDB interface
+ * thread's struct iface_data: the interface name comes with
+ * MLm_vpm_api__set_lport_info when the interface is added, and the
+ * entry is cleared by MLm_vpm_api__clear_lport_info, which is sent
+ * before the interface data is freed.  Entries are never freed, so the
+ * Rx thread may still look at one it got from epoll after the port
+ * is deregistered. */
+typedef struct lacpd_port {
+    bool                valid;          /* Interface added. */
+    char                name[IFNAMSIZ]; /* Interface name. */
+    int                 lag_id;         /* Configured LAG id. */
+    port_handle_t       lport_handle;   /* lport registered for LACPDUs. */
+    bool                registered;     /* Registered to receive LACPDUs. */
+    int                 sockfd;         /* Socket for LACPDU rx/tx. */
+    int                 ifindex;        /* Kernel ifindex. */
+    mlacp_tx_ring_t     *tx_ring;       /* Tx ring on sockfd, NULL if none. */
+    unsigned long long  tx_frames;      /* LACPDUs accepted for sending. */
+    unsigned long long  tx_drops;       /* LACPDUs that could not be sent. */
+    unsigned int        tx_ring_used;   /* Tx ring frames in use after the
+                                         * last flush. */
+    unsigned int        tx_ring_high;   /* Most Tx ring frames in use at a
+                                         * flush. */
+} lacpd_port_t;
+
+static lacpd_port_t lacpd_ports[PM_MAX_PORTS];
+
+static struct {
+    int count;
+    lacpd_port_t *pp[LACPD_TX_BATCH_MAX];
+    struct mmsghdr msgs[LACPD_TX_BATCH_MAX];
+    struct iovec iov[LACPD_TX_BATCH_MAX];
+    struct sockaddr_ll addr[LACPD_TX_BATCH_MAX];
+    unsigned char frame[LACPD_TX_BATCH_MAX][LACPD_TX_FRAME_MAX];
+} lacpd_tx_batch;
+
+/* Interfaces with frames in their Tx ring waiting for the flush. */
+#define LACPD_TX_PENDING_MAX    PM_MAX_PORTS
+
+static struct {
+    int count;
+    lacpd_port_t *pp[LACPD_TX_PENDING_MAX];
+} lacpd_tx_pending;
+
+/* LACPDU Tx counters.  Written only by the protocol thread. */
+static struct {
+    unsigned long long frames;      /* LACPDUs accepted for sending. */
+    unsigned long long syscalls;    /* sendto(), sendmmsg() and send() calls. */
+    unsigned long long flushes;     /* Flushes with LACPDUs held. */
+    unsigned long long held;        /* LACPDUs held for the next flush. */
+    unsigned long long max_batch;   /* Most LACPDUs in one flush. */
+    unsigned long long drops;       /* LACPDUs that could not be sent. */
+} lacpd_tx_stats;
+
+/* ifindex to lport map for the shared Rx ring.  Open addressing with
+ * linear probing; ifindex 0 marks a free slot.  Updated by the protocol
+ * thread as ports are registered, looked up by the Rx thread. */
+#define LACPD_RX_IFMAP_BITS  9
+#define LACPD_RX_IFMAP_SIZE  (1 << LACPD_RX_IFMAP_BITS)
+#define LACPD_RX_IFMAP_MASK  (LACPD_RX_IFMAP_SIZE - 1)
+
+static struct {
+    pthread_mutex_t mutex;
+    int count;
+    struct {
+        int ifindex;
+        port_handle_t lport_handle;
+    } slot[LACPD_RX_IFMAP_SIZE];
+} lacpd_rx_ifmap = {
+    .mutex = PTHREAD_MUTEX_INITIALIZER,
+};
+
 /* LACP filter
  *
- * BPF filter to receive LACPDU from interfaces.
+ * BPF filter to receive LACPDU from interfaces, generated by
+ * lacpd_rx_filter_build() so that frames the protocol would only
+ * discard never leave the kernel:
  *
- * LACP: "ether proto 0x8809 and ether dst 01:80:c2:00:00:02"
- *       "ether subtype = 0x1" - LACP
- *       "ether subtype = 0x2" - Marker protocol
+ *     ether dst 01:80:c2:00:00:02 and
+ *     (subtype == MARKER_SUBTYPE or
+ *      (subtype == LACP_SUBTYPE and actor_port != 0 and
+ *       actor_system != my_mac_addr))
  *
- * Since LACP protocol 0x8809 is already specified in the socket bind,
- * we just need to filter on the destination MAC address.  For now
- * we're not filtering on the subtype.  Capture all slow-protocol frames.
- *
- *    tcpdump -dd "(ether dst 01:80:c2:00:00:02)"
+ * The slow protocols EtherType 0x8809 is already matched by the socket
+ * bind.  The actor system test mirrors is_pkt_from_same_system(), which
+ * compares against each port's own system id; it is left out while any
+ * port overrides its system id.  The filter is rebuilt and reapplied by
+ * mlacp_rx_filter_update() when the system MAC or an override changes.
  */
-#define LACPD_FILTER_F \
-    { 0x20, 0, 0, 0x00000002 }, \
-    { 0x15, 0, 3, 0xc2000002 }, \
-    { 0x28, 0, 0, 0x00000000 }, \
-    { 0x15, 0, 1, 0x00000180 }, \
-    { 0x6, 0, 0, 0x0000ffff }, \
-    { 0x6, 0, 0, 0x00000000 }
-
-static struct sock_filter lacpd_filter_f[] = { LACPD_FILTER_F };
+#define LACPD_FILTER_MAX            16
+#define LACPD_FILTER_ACCEPT         0x0000ffff
+#define LACPD_FILTER_SUBTYPE        offsetof(lacpdu_payload_t, subtype)
+#define LACPD_FILTER_ACTOR_SYSTEM   offsetof(lacpdu_payload_t, actor_system)
+#define LACPD_FILTER_ACTOR_PORT     offsetof(lacpdu_payload_t, actor_port)
+
+static struct sock_filter lacpd_filter_f[LACPD_FILTER_MAX];
 static struct sock_fprog lacpd_fprog = {
     .filter = lacpd_filter_f,
-    .len = sizeof(lacpd_filter_f) / sizeof(struct sock_filter)
+    .len = 0
 };
 
+/* What the current filter was built for.  Protocol thread only. */
+static struct {
+    unsigned char mac[MAC_ADDR_LENGTH];
+    bool loop_check;
+    unsigned long long rebuilds;
+} lacpd_filter_state;
+
+/* Interface sockets the filter is attached to (socket per interface
+ * mode).  Protocol thread only. */
+static struct {
+    int count;
+    lacpd_port_t *pp[PM_MAX_PORTS];
+} lacpd_pdu_ifaces;
+
+static int lacpd_timer_init(void);
+
 /************************************************************************
  * Event Receiver Functions
  ************************************************************************/
+static unsigned long long
+lacpd_now_us(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000ULL + ts.tv_nsec / 1000;
+} /* lacpd_now_us */
+
+static unsigned int
+lacpd_rx_ifmap_hash(int ifindex)
+{
+    return ((unsigned int)ifindex * 2654435761U) >> (32 - LACPD_RX_IFMAP_BITS);
+} /* lacpd_rx_ifmap_hash */
+
+static bool
+lacpd_rx_ifmap_add(int ifindex, port_handle_t lport_handle)
+{
+    unsigned int i;
+    bool added = false;
+
+    pthread_mutex_lock(&lacpd_rx_ifmap.mutex);
+
+    i = lacpd_rx_ifmap_hash(ifindex);
+    while ((lacpd_rx_ifmap.slot[i].ifindex != 0) &&
+           (lacpd_rx_ifmap.slot[i].ifindex != ifindex)) {
+        i = (i + 1) & LACPD_RX_IFMAP_MASK;
+    }
+
+    if ((lacpd_rx_ifmap.slot[i].ifindex == ifindex) ||
+        (lacpd_rx_ifmap.count < LACPD_RX_IFMAP_SIZE - 1)) {
+        if (lacpd_rx_ifmap.slot[i].ifindex == 0) {
+            lacpd_rx_ifmap.count++;
+        }
+        lacpd_rx_ifmap.slot[i].ifindex = ifindex;
+        lacpd_rx_ifmap.slot[i].lport_handle = lport_handle;
+        added = true;
+    }
+
+    pthread_mutex_unlock(&lacpd_rx_ifmap.mutex);
+
+    return added;
+} /* lacpd_rx_ifmap_add */
+
+static void
+lacpd_rx_ifmap_del(int ifindex)
+{
+    unsigned int i;
+    unsigned int j;
+    unsigned int home;
+
+    pthread_mutex_lock(&lacpd_rx_ifmap.mutex);
+
+    i = lacpd_rx_ifmap_hash(ifindex);
+    while ((lacpd_rx_ifmap.slot[i].ifindex != 0) &&
+           (lacpd_rx_ifmap.slot[i].ifindex != ifindex)) {
+        i = (i + 1) & LACPD_RX_IFMAP_MASK;
+    }
+
+    if (lacpd_rx_ifmap.slot[i].ifindex == ifindex) {
+        /* Shift back the entries of the probe run that follows, so
+         * lookups never have to step over a hole. */
+        j = i;
+        for (;;) {
+            j = (j + 1) & LACPD_RX_IFMAP_MASK;
+            if (lacpd_rx_ifmap.slot[j].ifindex == 0) {
+                break;
+            }
+            home = lacpd_rx_ifmap_hash(lacpd_rx_ifmap.slot[j].ifindex);
+            if (((j - home) & LACPD_RX_IFMAP_MASK) >=
+                ((j - i) & LACPD_RX_IFMAP_MASK)) {
+                lacpd_rx_ifmap.slot[i] = lacpd_rx_ifmap.slot[j];
+                i = j;
+            }
+        }
+        lacpd_rx_ifmap.slot[i].ifindex = 0;
+        lacpd_rx_ifmap.count--;
+    }
+
+    pthread_mutex_unlock(&lacpd_rx_ifmap.mutex);
+} /* lacpd_rx_ifmap_del */
+
+static bool
+lacpd_rx_ifmap_find(int ifindex, port_handle_t *lport_handle)
+{
+    unsigned int i;
+    bool found = false;
+
+    pthread_mutex_lock(&lacpd_rx_ifmap.mutex);
+
+    i = lacpd_rx_ifmap_hash(ifindex);
+    while (lacpd_rx_ifmap.slot[i].ifindex != 0) {
+        if (lacpd_rx_ifmap.slot[i].ifindex == ifindex) {
+            *lport_handle = lacpd_rx_ifmap.slot[i].lport_handle;
+            found = true;
+            break;
+        }
+        i = (i + 1) & LACPD_RX_IFMAP_MASK;
+    }
+
+    pthread_mutex_unlock(&lacpd_rx_ifmap.mutex);
+
+    return found;
+} /* lacpd_rx_ifmap_find */
+
+/* Appends a BPF statement; returns the next instruction index. */
+static int
+lacpd_filter_stmt(int pc, unsigned short code, unsigned int k)
+{
+    lacpd_filter_f[pc].code = code;
+    lacpd_filter_f[pc].jt = 0;
+    lacpd_filter_f[pc].jf = 0;
+    lacpd_filter_f[pc].k = k;
+
+    return pc + 1;
+} /* lacpd_filter_stmt */
+
+/* Appends a BPF jump if equal to k, to instruction jt if so and jf if
+ * not; returns the next instruction index. */
+static int
+lacpd_filter_jeq(int pc, unsigned int k, int jt, int jf)
+{
+    lacpd_filter_f[pc].code = BPF_JMP | BPF_JEQ | BPF_K;
+    lacpd_filter_f[pc].jt = jt - pc - 1;
+    lacpd_filter_f[pc].jf = jf - pc - 1;
+    lacpd_filter_f[pc].k = k;
+
+    return pc + 1;
+} /* lacpd_filter_jeq */
+
+/* Generates the LACP filter for the given system MAC. */
+static void
+lacpd_rx_filter_build(const unsigned char *mac, bool loop_check)
+{
+    int accept = loop_check ? 13 : 9;
+    int drop = accept + 1;
+    int pc = 0;
+
+    /* ether dst 01:80:c2:00:00:02 */
+    pc = lacpd_filter_stmt(pc, BPF_LD | BPF_W | BPF_ABS, 2);
+    pc = lacpd_filter_jeq(pc, 0xc2000002, pc + 1, drop);
+    pc = lacpd_filter_stmt(pc, BPF_LD | BPF_H | BPF_ABS, 0);
+    pc = lacpd_filter_jeq(pc, 0x0180, pc + 1, drop);
+
+    /* Marker PDUs are all answered; LACPDUs go on. */
+    pc = lacpd_filter_stmt(pc, BPF_LD | BPF_B | BPF_ABS,
+                           LACPD_FILTER_SUBTYPE);
+    pc = lacpd_filter_jeq(pc, MARKER_SUBTYPE, accept, pc + 1);
+    pc = lacpd_filter_jeq(pc, LACP_SUBTYPE, pc + 1, drop);
+
+    /* actor_port != 0 */
+    pc = lacpd_filter_stmt(pc, BPF_LD | BPF_H | BPF_ABS,
+                           LACPD_FILTER_ACTOR_PORT);
+    pc = lacpd_filter_jeq(pc, 0, drop, pc + 1);
+
+    /* actor_system != our system MAC */
+    if (loop_check) {
+        pc = lacpd_filter_stmt(pc, BPF_LD | BPF_W | BPF_ABS,
+                               LACPD_FILTER_ACTOR_SYSTEM);
+        pc = lacpd_filter_jeq(pc,
+                              ((unsigned int)mac[0] << 24) |
+                              ((unsigned int)mac[1] << 16) |
+                              ((unsigned int)mac[2] << 8) | mac[3],
+                              pc + 1, accept);
+        pc = lacpd_filter_stmt(pc, BPF_LD | BPF_H | BPF_ABS,
+                               LACPD_FILTER_ACTOR_SYSTEM + 4);
+        pc = lacpd_filter_jeq(pc, ((unsigned int)mac[4] << 8) | mac[5],
+                              drop, accept);
+    }
+
+    pc = lacpd_filter_stmt(pc, BPF_RET | BPF_K, LACPD_FILTER_ACCEPT);
+    pc = lacpd_filter_stmt(pc, BPF_RET | BPF_K, 0);
+
+    lacpd_fprog.len = pc;
+
+    memcpy(lacpd_filter_state.mac, mac, MAC_ADDR_LENGTH);
+    lacpd_filter_state.loop_check = loop_check;
+} /* lacpd_rx_filter_build */
+
+/* Returns false if any port overrides its system id, in which case the
+ * filter can't tell our own LACPDUs from the protocol's point of view. */
+static bool
+lacpd_rx_filter_loop_check(void)
+{
+    lacp_per_port_variables_t *plpinfo;
+
+    for (plpinfo = LACP_AVL_FIRST(lacp_per_port_vars_tree);
+         plpinfo;
+         plpinfo = LACP_AVL_NEXT(plpinfo->avlnode)) {
+        if (plpinfo->actor_sys_id_override) {
+            return false;
+        }
+    }
+
+    return true;
+} /* lacpd_rx_filter_loop_check */
+
+/* Rebuilds the LACP filter if the system MAC or the system id overrides
+ * changed, and reapplies it to the shared Rx ring or to every interface
+ * socket.  Called by the protocol thread. */
+void
+mlacp_rx_filter_update(void)
+{
+    bool loop_check;
+    int i;
+
+    loop_check = lacpd_rx_filter_loop_check();
+    if ((loop_check == lacpd_filter_state.loop_check) &&
+        !memcmp(lacpd_filter_state.mac, my_mac_addr, MAC_ADDR_LENGTH)) {
+        return;
+    }
+
+    lacpd_rx_filter_build(my_mac_addr, loop_check);
+    lacpd_filter_state.rebuilds++;
+
+    if (lacpd_rx_ring_enabled) {
+        if (setsockopt(lacpd_rx_ring.r_fd, SOL_SOCKET, SO_ATTACH_FILTER,
+                       &lacpd_fprog, sizeof(lacpd_fprog)) < 0) {
+            VLOG_ERR("Failed to update LACPDU rx ring filter, rc=%s",
+                     strerror(errno));
+        }
+        return;
+    }
+
+    for (i = 0; i < lacpd_pdu_ifaces.count; i++) {
+        if (setsockopt(lacpd_pdu_ifaces.pp[i]->sockfd, SOL_SOCKET,
+                       SO_ATTACH_FILTER,
+                       &lacpd_fprog, sizeof(lacpd_fprog)) < 0) {
+            VLOG_ERR("Failed to update socket filter for %s, rc=%s",
+                     lacpd_pdu_ifaces.pp[i]->name, strerror(errno));
+        }
+    }
+} /* mlacp_rx_filter_update */
+
+/* Generates the initial LACP filter, and sets up the shared Rx ring and
+ * Tx socket if lacpd --rx-ring asked for them.  Falls back to a socket
+ * per interface if the ring can't be set up. */
+static void
+lacpd_rx_init(void)
+{
+    int rc;
+
+    lacpd_rx_filter_build(my_mac_addr, true);
+
+    if (!lacpd_rx_ring_enabled) {
+        return;
+    }
+
+    rc = mlacp_rx_ring_open(&lacpd_rx_ring, ETH_P_SLOW, &lacpd_fprog);
+    if (rc == 0) {
+        lacpd_tx_sockfd = socket(PF_PACKET, SOCK_RAW | SOCK_CLOEXEC, 0);
+        if (lacpd_tx_sockfd < 0) {
+            rc = errno;
+            mlacp_rx_ring_close(&lacpd_rx_ring);
+        }
+    }
+
+    if (rc) {
+        VLOG_WARN("LACPDU rx ring unavailable (%s), "
+                  "using a socket per interface", strerror(rc));
+        lacpd_rx_ring_enabled = false;
+        return;
+    }
+
+    VLOG_INFO("Receiving LACPDUs on a shared TPACKET_V3 ring");
+} /* lacpd_rx_init */
+
+static int
+ml_event_lane(ML_event *event)
+{
+    switch (event->sender.peer) {
+    case ml_rx_pdu_index:
+        return LACPD_LANE_RX;
+    default:
+        return LACPD_LANE_CONFIG;
+    }
+} /* ml_event_lane */
+
+static bool
+ml_event_is_link_state(ML_event *event)
+{
+    return ((event->sender.peer == ml_lport_index) &&
+            ((event->msgnum == MLm_vpm_api__lport_state_up) ||
+             (event->msgnum == MLm_vpm_api__lport_state_down)));
+} /* ml_event_is_link_state */
+
+/* Records a new link state for the lport.  Returns true if the caller
+ * must queue the message, false if a queued message will deliver it. */
+static bool
+ml_link_state_post(ML_event *event)
+{
+    struct MLt_vpm_api__lport_state_change *msg = (void *)(event+1);
+    int port = PM_HANDLE2PORT(msg->lport_handle);
+    bool queued;
+
+    if ((port < 0) || (port >= PM_MAX_PORTS)) {
+        /* No slot to coalesce in; queue it as it is. */
+        return true;
+    }
+
+    pthread_mutex_lock(&lacpd_link_state.mutex);
+    lacpd_link_state.port[port].msgnum = event->msgnum;
+    lacpd_link_state.port[port].link_speed = msg->link_speed;
+    msg->gen = lacpd_link_state.port[port].gen;
+    queued = lacpd_link_state.port[port].queued;
+    lacpd_link_state.port[port].queued = true;
+    pthread_mutex_unlock(&lacpd_link_state.mutex);
+
+    if (queued) {
+        __atomic_add_fetch(&lacpd_coalesce_stats.link_state_coalesced, 1,
+                           __ATOMIC_RELAXED);
+    } else {
+        __atomic_add_fetch(&lacpd_coalesce_stats.link_state_sent, 1,
+                           __ATOMIC_RELAXED);
+    }
+
+    return !queued;
+} /* ml_link_state_post */
+
+/* Loads the lport's latest link state into a dequeued message.  Returns
+ * false if the message is stale and must be dropped. */
+static bool
+ml_link_state_take(ML_event *event)
+{
+    struct MLt_vpm_api__lport_state_change *msg = event->msg;
+    int port = PM_HANDLE2PORT(msg->lport_handle);
+    bool valid;
+
+    if ((port < 0) || (port >= PM_MAX_PORTS)) {
+        /* Queued without a slot by ml_link_state_post(). */
+        return true;
+    }
+
+    pthread_mutex_lock(&lacpd_link_state.mutex);
+    valid = (lacpd_link_state.port[port].queued &&
+             (lacpd_link_state.port[port].gen == msg->gen));
+    if (valid) {
+        event->msgnum = lacpd_link_state.port[port].msgnum;
+        msg->link_speed = lacpd_link_state.port[port].link_speed;
+        lacpd_link_state.port[port].queued = false;
+    }
+    pthread_mutex_unlock(&lacpd_link_state.mutex);
+
+    if (!valid) {
+        __atomic_add_fetch(&lacpd_coalesce_stats.link_state_stale, 1,
+                           __ATOMIC_RELAXED);
+    }
+
+    return valid;
+} /* ml_link_state_take */
+
+/**
+ * @details
+ * Forgets any link state queued for the lport.  Must be called when the
+ * lport is deleted, so that a message still in the queue is dropped
+ * instead of delivering state to an lport that reuses the same index.
+ */
+void
+ml_link_state_reset(port_handle_t lport_handle)
+{
+    int port = PM_HANDLE2PORT(lport_handle);
+
+    if ((port < 0) || (port >= PM_MAX_PORTS)) {
+        return;
+    }
+
+    pthread_mutex_lock(&lacpd_link_state.mutex);
+    lacpd_link_state.port[port].queued = false;
+    lacpd_link_state.port[port].gen++;
+    pthread_mutex_unlock(&lacpd_link_state.mutex);
+} /* ml_link_state_reset */
+
 int
 ml_init_event_rcvr(void)
 {
     int rc;
+    int lane;
 
-    rc = mqueue_init(&lacpd_main_rcvq);
+    rc = mpool_init(&lacpd_event_pool);
     if (rc) {
-        VLOG_ERR("Failed LACP main receive queue init: %s",
+        VLOG_ERR("Failed LACP event pool init: %s",
                  strerror(rc));
+        return rc;
     }
 
-    return rc;
+    for (lane = 0; lane < LACPD_LANE_MAX; lane++) {
+        if (lane == 0) {
+            rc = mqueue_init(&lacpd_main_rcvq[lane]);
+        } else {
+            rc = mqueue_init_shared(&lacpd_main_rcvq[lane],
+                                    &lacpd_main_rcvq[0]);
+        }
+        if (rc) {
+            VLOG_ERR("Failed LACP main receive queue (%s lane) init: %s",
+                     lacpd_lane_names[lane], strerror(rc));
+            return rc;
+        }
+    }
+
+    rc = lacpd_timer_init();
+    if (rc) {
+        VLOG_ERR("Failed LACP timer engine init: %s", strerror(rc));
+        return rc;
+    }
+
+    lacpd_rx_init();
+
+    return 0;
 } /* ml_init_event_rcvr */
 
+ML_event *
+ml_event_alloc(int size)
+{
+    ML_event *event;
+
+    event = mpool_zalloc(&lacpd_event_pool, size);
+    if (event == NULL) {
+        VLOG_ERR("%s: out of memory for %d byte event", __FUNCTION__, size);
+    }
+
+    return event;
+} /* ml_event_alloc */
+
+/* Queues a message on the configuration lane, or on its overflow list
+ * if the lane is full or the list is not empty. */
+static void
+ml_config_send(ML_event *event)
+{
+    mqueue_t *queue = &lacpd_main_rcvq[LACPD_LANE_CONFIG];
+
+    if ((__atomic_load_n(&lacpd_config_overflow.count,
+                         __ATOMIC_ACQUIRE) == 0) &&
+        (mqueue_send(queue, event) == 0)) {
+        return;
+    }
+
+    pthread_mutex_lock(&lacpd_config_overflow.mutex);
+
+    if ((lacpd_config_overflow.count == 0) &&
+        (mqueue_send(queue, event) == 0)) {
+        pthread_mutex_unlock(&lacpd_config_overflow.mutex);
+        return;
+    }
+
+    /* The protocol thread has messages to serve in the lane and moves
+     * this one in after them, no wakeup is needed. */
+    event->next = NULL;
+    if (lacpd_config_overflow.tail != NULL) {
+        lacpd_config_overflow.tail->next = event;
+    } else {
+        lacpd_config_overflow.head = event;
+    }
+    lacpd_config_overflow.tail = event;
+    lacpd_config_overflow.queued++;
+    __atomic_store_n(&lacpd_config_overflow.count,
+                     lacpd_config_overflow.count + 1, __ATOMIC_RELEASE);
+    if (lacpd_config_overflow.count > lacpd_config_overflow.high_water) {
+        lacpd_config_overflow.high_water = lacpd_config_overflow.count;
+    }
+
+    pthread_mutex_unlock(&lacpd_config_overflow.mutex);
+} /* ml_config_send */
+
+/* Moves what the configuration lane has room for from its overflow list
+ * into the lane.  Called by the protocol thread before it looks for the
+ * next event. */
+static void
+ml_config_refill(void)
+{
+    mqueue_t *queue = &lacpd_main_rcvq[LACPD_LANE_CONFIG];
+    ML_event *event;
+
+    if (__atomic_load_n(&lacpd_config_overflow.count,
+                        __ATOMIC_ACQUIRE) == 0) {
+        return;
+    }
+
+    pthread_mutex_lock(&lacpd_config_overflow.mutex);
+
+    while (((event = lacpd_config_overflow.head) != NULL) &&
+           (mqueue_depth(queue) < MQUEUE_DEFAULT_SIZE) &&
+           (mqueue_send(queue, event) == 0)) {
+        lacpd_config_overflow.head = event->next;
+        if (lacpd_config_overflow.head == NULL) {
+            lacpd_config_overflow.tail = NULL;
+        }
+        __atomic_store_n(&lacpd_config_overflow.count,
+                         lacpd_config_overflow.count - 1, __ATOMIC_RELEASE);
+    }
+
+    pthread_mutex_unlock(&lacpd_config_overflow.mutex);
+} /* ml_config_refill */
+
 int
 ml_send_event(ML_event *event)
 {
     int rc;
 
-    rc = mqueue_send(&lacpd_main_rcvq, event);
-    if (rc) {
-        VLOG_ERR("Failed to send to LACP main receive queue: %s",
-                 strerror(rc));
-    }
+    /* Coalesce with a link state message that is still queued. */
+    if (ml_event_is_link_state(event)) {
+        if (!ml_link_state_post(event)) {
+            ml_event_free(event);
+            return 0;
+        }
+    }
+
+    event->queued_us = lacpd_now_us();
+
+    if (ml_event_lane(event) == LACPD_LANE_CONFIG) {
+        ml_config_send(event);
+        return 0;
+    }
+
+    rc = mqueue_send(&lacpd_main_rcvq[LACPD_LANE_RX], event);
+    if (rc) {
+        static struct vlog_rate_limit rl = VLOG_RATE_LIMIT_INIT(1, 5);
+
+        /* The lane is bounded.  Don't hold up the Rx thread, just
+         * account for the drop and release the event here since the
+         * sender no longer owns it; the partner's next LACPDUs carry
+         * the same state. */
+        VLOG_ERR_RL(&rl, "Failed to send %d from sender 0x%x to LACP main "
+                    "receive queue: %s", event->msgnum, event->sender.peer,
+                    strerror(rc));
+
+        ml_event_free(event);
+    }
+
+    return rc;
+} /* ml_send_event */
+
+static ML_event *
+ml_next_event(bool block)
+{
+    static const int hi_first[LACPD_LANE_MAX] = {
+        LACPD_LANE_RX, LACPD_LANE_CONFIG
+    };
+    static const int cfg_first[LACPD_LANE_MAX] = {
+        LACPD_LANE_CONFIG, LACPD_LANE_RX
+    };
+    mqueue_t *order[LACPD_LANE_MAX];
+    const int *lanes;
+    ML_event *event = NULL;
+    unsigned long long wait_us;
+    int index;
+    int lane;
+    int rc;
+
+    ml_config_refill();
+
+    if ((LACPD_CONFIG_LANE_WEIGHT != 0) &&
+        (lacpd_lane_hi_served >= LACPD_CONFIG_LANE_WEIGHT)) {
+        lanes = cfg_first;
+    } else {
+        lanes = hi_first;
+    }
+
+    for (index = 0; index < LACPD_LANE_MAX; index++) {
+        order[index] = &lacpd_main_rcvq[lanes[index]];
+    }
+
+    if (block) {
+        rc = mqueue_wait_any_fd(order, LACPD_LANE_MAX, lacpd_timer_fd,
+                                (void **)(void *)&event, &index);
+        if (rc) {
+            VLOG_ERR("LACP main receive queue wait error, rc=%s",
+                     strerror(rc));
+            return NULL;
+        }
+        if (index < 0) {
+            /* Woken up by the timer engine. */
+            return NULL;
+        }
+    } else if (mqueue_trywait_any(order, LACPD_LANE_MAX,
+                                  (void **)(void *)&event, &index)) {
+        return NULL;
+    }
+
+    lane = lanes[index];
+    if (lane == LACPD_LANE_CONFIG) {
+        lacpd_lane_hi_served = 0;
+    } else {
+        lacpd_lane_hi_served++;
+    }
+
+    wait_us = lacpd_now_us() - event->queued_us;
+    lacpd_lane_stats[lane].events++;
+    lacpd_lane_stats[lane].total_wait_us += wait_us;
+    if (wait_us > lacpd_lane_stats[lane].max_wait_us) {
+        lacpd_lane_stats[lane].max_wait_us = wait_us;
+    }
+
+    /* Set up event->msg pointer to just after the event
+     * structure itself. This must be done here since the
+     * sender's event->msg pointer points sender's memory
+     * space, and will result in fatal errors if we try to
+     * access it in LACP process space.
+     */
+    event->msg = (void *)(event+1);
+
+    return event;
+} /* ml_next_event */
+
+ML_event *
+ml_wait_for_next_event(void)
+{
+    return ml_next_event(true);
+} /* ml_wait_for_next_event */
+
+ML_event *
+ml_get_next_event(void)
+{
+    return ml_next_event(false);
+} /* ml_get_next_event */
+
+void
+ml_event_free(ML_event *event)
+{
+    if (event != NULL) {
+        mpool_free(&lacpd_event_pool, event);
+    }
+} /* ml_event_free */
+
+/**
+ * @details
+ * Dumps the occupancy, overflow and wait time counters of each lane of the
+ * LACP main receive queue.
+ */
+void
+lacpd_event_queue_dump(struct ds *ds)
+{
+    mqueue_stats_t stats;
+    mlacp_rx_ring_stats_t ring_stats;
+    int lane;
+    int i;
+
+    ds_put_cstr(ds, "================ Event Queue ================\n");
+
+    for (lane = 0; lane < LACPD_LANE_MAX; lane++) {
+        mqueue_get_stats(&lacpd_main_rcvq[lane], &stats);
+
+        ds_put_format(ds, "Lane %s:\n", lacpd_lane_names[lane]);
+        ds_put_format(ds, "    size                 : %d\n",
+                      MQUEUE_DEFAULT_SIZE);
+        ds_put_format(ds, "    depth                : %lu\n",
+                      mqueue_depth(&lacpd_main_rcvq[lane]));
+        ds_put_format(ds, "    high_water           : %lu\n",
+                      stats.high_water);
+        ds_put_format(ds, "    sent                 : %llu\n", stats.sent);
+        ds_put_format(ds, "    received             : %llu\n",
+                      stats.received);
+        ds_put_format(ds, "    overflow             : %llu\n",
+                      stats.overflow);
+        ds_put_format(ds, "    wakeups              : %llu\n",
+                      stats.wakeups);
+        ds_put_format(ds, "    avg_wait             : %llu us\n",
+                      lacpd_lane_stats[lane].events ?
+                      lacpd_lane_stats[lane].total_wait_us /
+                      lacpd_lane_stats[lane].events : 0);
+        ds_put_format(ds, "    max_wait             : %llu us\n",
+                      lacpd_lane_stats[lane].max_wait_us);
+        if (lane == LACPD_LANE_CONFIG) {
+            ds_put_format(ds, "    overflow_depth       : %lu\n",
+                          lacpd_config_overflow.count);
+            ds_put_format(ds, "    overflow_high_water  : %lu\n",
+                          lacpd_config_overflow.high_water);
+            ds_put_format(ds, "    overflow_queued      : %llu\n",
+                          lacpd_config_overflow.queued);
+        }
+    }
+
+    ds_put_cstr(ds, "================ Timer Engine ================\n");
+    ds_put_format(ds, "    tick                 : %d ms\n",
+                  LACP_TIMER_TICK_MS);
+    ds_put_format(ds, "    fast_periodic        : %u ms\n",
+                  lacp_fast_periodic_ms);
+    ds_put_format(ds, "    armed                : %lu\n",
+                  lacp_tx_timer_wheel.w_armed + lacp_rx_timer_wheel.w_armed);
+    ds_put_format(ds, "    fired                : %llu\n",
+                  lacp_tx_timer_wheel.w_fired + lacp_rx_timer_wheel.w_fired);
+    ds_put_format(ds, "    expiries             : %llu\n",
+                  lacpd_timer_stats.expiries);
+    ds_put_format(ds, "    runs                 : %llu\n",
+                  lacpd_timer_stats.runs);
+    ds_put_format(ds, "    ticks                : %llu\n",
+                  lacpd_timer_stats.ticks);
+    ds_put_format(ds, "    max_ticks            : %llu\n",
+                  lacpd_timer_stats.max_ticks);
+    ds_put_format(ds, "    avg_late             : %llu us\n",
+                  lacpd_timer_stats.expiries ?
+                  lacpd_timer_stats.total_late_us /
+                  lacpd_timer_stats.expiries : 0);
+    ds_put_format(ds, "    max_late             : %llu us\n",
+                  lacpd_timer_stats.max_late_us);
+
+    ds_put_cstr(ds, "================ Periodic Tx Spread ================\n");
+    ds_put_format(ds, "    transmits            : %llu\n",
+                  lacp_tx_spread_stats.transmits);
+    ds_put_format(ds, "    busy_ticks           : %llu\n",
+                  lacp_tx_spread_stats.busy_ticks);
+    ds_put_format(ds, "    avg_per_busy_tick    : %llu\n",
+                  lacp_tx_spread_stats.busy_ticks ?
+                  lacp_tx_spread_stats.transmits /
+                  lacp_tx_spread_stats.busy_ticks : 0);
+    ds_put_format(ds, "    max_per_tick         : %lu\n",
+                  lacp_tx_spread_stats.max_per_tick);
+    ds_put_cstr(ds, "    last_interval        :");
+    for (i = 0; i < LACP_TX_SPREAD_BUCKETS; i++) {
+        ds_put_format(ds, " %lu", lacp_tx_spread_stats.last_bucket[i]);
+    }
+    ds_put_cstr(ds, "\n");
+
+    ds_put_cstr(ds, "================ Event Coalescing ================\n");
+    ds_put_format(ds, "    link_state_sent      : %llu\n",
+                  __atomic_load_n(&lacpd_coalesce_stats.link_state_sent,
+                                  __ATOMIC_RELAXED));
+    ds_put_format(ds, "    link_state_coalesced : %llu\n",
+                  __atomic_load_n(&lacpd_coalesce_stats.link_state_coalesced,
+                                  __ATOMIC_RELAXED));
+    ds_put_format(ds, "    link_state_stale     : %llu\n",
+                  __atomic_load_n(&lacpd_coalesce_stats.link_state_stale,
+                                  __ATOMIC_RELAXED));
+
+    ds_put_cstr(ds, "================ Rx Batches ================\n");
+    ds_put_format(ds, "    mode                 : %s\n",
+                  lacpd_rx_ring_enabled ? "ring" : "socket");
+    ds_put_format(ds, "    wakeups              : %llu\n",
+                  lacpd_rx_stats.wakeups);
+    ds_put_format(ds, "    recvmmsg_calls       : %llu\n",
+                  lacpd_rx_stats.syscalls);
+    ds_put_format(ds, "    frames               : %llu\n",
+                  lacpd_rx_stats.frames);
+    ds_put_format(ds, "    batches              : %llu\n",
+                  lacpd_rx_stats.batches);
+    ds_put_format(ds, "    avg_batch            : %llu\n",
+                  lacpd_rx_stats.batches ?
+                  lacpd_rx_stats.frames / lacpd_rx_stats.batches : 0);
+    ds_put_format(ds, "    max_batch            : %llu\n",
+                  lacpd_rx_stats.max_batch);
+    if (lacpd_rx_ring_enabled) {
+        mlacp_rx_ring_get_stats(&lacpd_rx_ring, &ring_stats);
+        ds_put_format(ds, "    ring_blocks          : %llu\n",
+                      ring_stats.blocks);
+        ds_put_format(ds, "    ring_outgoing        : %llu\n",
+                      ring_stats.outgoing);
+        ds_put_format(ds, "    ring_kernel_packets  : %llu\n",
+                      ring_stats.kernel_packets);
+        ds_put_format(ds, "    ring_kernel_drops    : %llu\n",
+                      ring_stats.kernel_drops);
+        ds_put_format(ds, "    ring_full            : %llu\n",
+                      ring_stats.kernel_freezes);
+        ds_put_format(ds, "    unknown_ifindex      : %llu\n",
+                      lacpd_rx_stats.unknown);
+    }
+    ds_put_format(ds, "    filter_insns         : %d\n",
+                  lacpd_fprog.len);
+    ds_put_format(ds, "    filter_loop_check    : %s\n",
+                  lacpd_filter_state.loop_check ? "on" : "off");
+    ds_put_format(ds, "    filter_rebuilds      : %llu\n",
+                  lacpd_filter_state.rebuilds);
+
+    ds_put_cstr(ds, "================ Tx Batches ================\n");
+    ds_put_format(ds, "    mode                 : %s\n",
+                  lacpd_rx_ring_enabled ? "sendmmsg" :
+                  lacpd_tx_ring_enabled ? "ring" : "sendto");
+    ds_put_format(ds, "    frames               : %llu\n",
+                  lacpd_tx_stats.frames);
+    ds_put_format(ds, "    send_calls           : %llu\n",
+                  lacpd_tx_stats.syscalls);
+    ds_put_format(ds, "    flushes              : %llu\n",
+                  lacpd_tx_stats.flushes);
+    ds_put_format(ds, "    max_batch            : %llu\n",
+                  lacpd_tx_stats.max_batch);
+    ds_put_format(ds, "    drops                : %llu\n",
+                  lacpd_tx_stats.drops);
+
+    ds_put_cstr(ds, "================ Event Batches ================\n");
+    ds_put_format(ds, "    batches              : %llu\n",
+                  lacpd_batch_stats.batches);
+    ds_put_format(ds, "    events               : %llu\n",
+                  lacpd_batch_stats.events);
+    ds_put_format(ds, "    avg_size             : %llu\n",
+                  lacpd_batch_stats.batches ?
+                  lacpd_batch_stats.events / lacpd_batch_stats.batches : 0);
+    ds_put_format(ds, "    max_size             : %llu\n",
+                  lacpd_batch_stats.max_size);
+    ds_put_format(ds, "    last_size            : %llu\n",
+                  lacpd_batch_stats.last_size);
+    ds_put_format(ds, "    avg_latency          : %llu us\n",
+                  lacpd_batch_stats.batches ?
+                  lacpd_batch_stats.total_latency_us /
+                  lacpd_batch_stats.batches : 0);
+    ds_put_format(ds, "    max_latency          : %llu us\n",
+                  lacpd_batch_stats.max_latency_us);
+    ds_put_format(ds, "    last_latency         : %llu us\n",
+                  lacpd_batch_stats.last_latency_us);
+
+    db_writeback_dump(ds);
+    db_monitor_dump(ds);
+} /* lacpd_event_queue_dump */
+
+void
+lacpd_port_pdu_dump(struct ds *ds, int port)
+{
+    lacpd_port_t *pp;
+
+    if ((port < 0) || (port >= PM_MAX_PORTS)) {
+        return;
+    }
+
+    pp = &lacpd_ports[port];
+    if (!pp->registered) {
+        return;
+    }
+
+    ds_put_format(ds, "    lacpdu_tx            : %llu\n", pp->tx_frames);
+    ds_put_format(ds, "    lacpdu_tx_drops      : %llu\n", pp->tx_drops);
+    if (pp->tx_ring) {
+        ds_put_format(ds, "    tx_ring_used         : %u/%d\n",
+                      pp->tx_ring_used, MLACP_TX_RING_FRAME_NR);
+        ds_put_format(ds, "    tx_ring_high_water   : %u\n",
+                      pp->tx_ring_high);
+    }
+} /* lacpd_port_pdu_dump */
+
+void
+lacpd_perf_hist_dump(struct ds *ds, const char *title,
+                     const lacp_hist_t *hist, const char *unit)
+{
+    int bucket;
+
+    ds_put_format(ds, "%s:\n", title);
+    ds_put_format(ds, "    count                : %llu\n", hist->h_count);
+    ds_put_format(ds, "    avg                  : %llu%s\n",
+                  hist->h_count ? hist->h_sum / hist->h_count : 0, unit);
+    ds_put_format(ds, "    p50                  : %llu%s\n",
+                  lacp_hist_percentile(hist, 50), unit);
+    ds_put_format(ds, "    p99                  : %llu%s\n",
+                  lacp_hist_percentile(hist, 99), unit);
+    ds_put_format(ds, "    max                  : %llu%s\n",
+                  hist->h_max, unit);
+
+    for (bucket = 0; bucket < LACP_HIST_BUCKETS; bucket++) {
+        if (hist->h_bucket[bucket] == 0) {
+            continue;
+        }
+        if (bucket == LACP_HIST_BUCKETS - 1) {
+            ds_put_format(ds, "    >= %-17llu : %llu\n",
+                          lacp_hist_bucket_min(bucket),
+                          hist->h_bucket[bucket]);
+        } else {
+            ds_put_format(ds, "    < %-18llu : %llu\n",
+                          lacp_hist_bucket_min(bucket + 1),
+                          hist->h_bucket[bucket]);
+        }
+    }
+} /* lacpd_perf_hist_dump */
+
+void
+lacpd_perf_dump(struct ds *ds)
+{
+    ds_put_cstr(ds, "================ Timer Ticks ================\n");
+    ds_put_format(ds, "    tick                 : %d ms\n",
+                  LACP_TIMER_TICK_MS);
+    ds_put_format(ds, "    busy_ticks           : %llu\n",
+                  lacpd_tick_perf.ports.h_count);
+    ds_put_format(ds, "    idle_ticks           : %llu\n",
+                  lacpd_tick_perf.idle_ticks);
+
+    lacpd_perf_hist_dump(ds, "Tick lag", &lacpd_tick_perf.lag_us, " us");
+    lacpd_perf_hist_dump(ds, "Tick duration", &lacpd_tick_perf.run_us, " us");
+    lacpd_perf_hist_dump(ds, "Ports per tick", &lacpd_tick_perf.ports, "");
+
+    db_request_perf_dump(ds);
+} /* lacpd_perf_dump */
+
+/**
+ * @details
+ * Dumps the occupancy and miss counters of each event pool size class.
+ */
+void
+lacpd_event_pool_dump(struct ds *ds)
+{
+    mpool_stats_t stats;
+    int size_class;
+
+    ds_put_cstr(ds, "================ Event Pool ================\n");
+
+    for (size_class = 0; size_class <= MPOOL_NUM_CLASSES; size_class++) {
+        mpool_get_stats(&lacpd_event_pool, size_class, &stats);
+
+        if (size_class < MPOOL_NUM_CLASSES) {
+            ds_put_format(ds, "Class %zu bytes:\n", stats.obj_size);
+        } else {
+            ds_put_cstr(ds, "Oversize (heap):\n");
+        }
+        ds_put_format(ds, "    in_use               : %lu\n", stats.in_use);
+        ds_put_format(ds, "    cached               : %lu\n", stats.cached);
+        ds_put_format(ds, "    high_water           : %lu\n",
+                      stats.high_water);
+        ds_put_format(ds, "    allocs               : %llu\n", stats.allocs);
+        ds_put_format(ds, "    frees                : %llu\n", stats.frees);
+        ds_put_format(ds, "    misses               : %llu\n", stats.misses);
+        ds_put_format(ds, "    releases             : %llu\n",
+                      stats.releases);
+    }
+} /* lacpd_event_pool_dump */
+
+/************************************************************************
+ * LACPDU Send and Receive Functions
+ ************************************************************************/
+/* Allocates an empty LACPDU batch message. */
+static ML_event *
+mlacp_rx_batch_alloc(void)
+{
+    ML_event *event;
+
+    event = ml_event_alloc(sizeof(ML_event) +
+                           sizeof(struct MLt_drivers_mlacp__rxPduBatch));
+    if (event == NULL) {
+        return NULL;
+    }
+
+    event->sender.peer = ml_rx_pdu_index;
+    event->msgnum = MLm_drivers_mlacp__rxPduBatch;
+
+    return event;
+} /* mlacp_rx_batch_alloc */
+
+/* Hands the batch being filled to the protocol thread, unless it is
+ * empty, in which case it is kept for the next wakeup. */
+static void
+mlacp_rx_batch_flush(ML_event **pevent)
+{
+    struct MLt_drivers_mlacp__rxPduBatch *batch;
+
+    if (*pevent == NULL) {
+        return;
+    }
+
+    batch = (struct MLt_drivers_mlacp__rxPduBatch *)(*pevent + 1);
+    if (batch->count == 0) {
+        return;
+    }
+
+    lacpd_rx_stats.batches++;
+    if (batch->count > lacpd_rx_stats.max_batch) {
+        lacpd_rx_stats.max_batch = batch->count;
+    }
+
+    ml_send_event(*pevent);
+    *pevent = NULL;
+} /* mlacp_rx_batch_flush */
+
+/* Copies one LACPDU taken off the shared Rx ring into the batch. */
+static void
+mlacp_rx_ring_frame(void *arg, int ifindex, const unsigned char *frame,
+                    unsigned int len)
+{
+    ML_event **pevent = arg;
+    struct MLt_drivers_mlacp__rxPduBatch *batch;
+    struct MLt_drivers_mlacp__rxPdu *pdu;
+    port_handle_t lport_handle;
+
+    if (!lacpd_rx_ifmap_find(ifindex, &lport_handle)) {
+        /* Not an LACP port, or not registered yet. */
+        lacpd_rx_stats.unknown++;
+        return;
+    }
+
+    if ((*pevent == NULL) &&
+        ((*pevent = mlacp_rx_batch_alloc()) == NULL)) {
+        return;
+    }
+
+    if (len > LACP_PKT_SIZE) {
+        len = LACP_PKT_SIZE;
+    }
+
+    batch = (struct MLt_drivers_mlacp__rxPduBatch *)(*pevent + 1);
+    pdu = &batch->pdu[batch->count++];
+    pdu->lport_handle = lport_handle;
+    pdu->pktLen = len;
+    memcpy(pdu->data, frame, len);
+
+    lacpd_rx_stats.frames++;
+
+    if (batch->count == MLACP_RX_BATCH_MAX) {
+        mlacp_rx_batch_flush(pevent);
+    }
+} /* mlacp_rx_ring_frame */
+
+/* Reads the LACPDUs queued on one interface socket straight into the
+ * batch, flushing it whenever it fills up.  At most MLACP_RX_BATCH_MAX
+ * frames are taken per wakeup so one busy interface cannot hold up the
+ * others; epoll reports it again if more are left. */
+static void
+mlacp_rx_drain(lacpd_port_t *pp, ML_event **pevent)
+{
+    struct mmsghdr msgs[MLACP_RX_BATCH_MAX];
+    struct iovec iov[MLACP_RX_BATCH_MAX];
+    struct MLt_drivers_mlacp__rxPduBatch *batch;
+    struct MLt_drivers_mlacp__rxPdu *pdu;
+    unsigned long long lport_handle;
+    int budget = MLACP_RX_BATCH_MAX;
+    int room;
+    int count;
+    int i;
+
+    lport_handle = pp->lport_handle;
+
+    while (budget > 0) {
+        if ((*pevent == NULL) &&
+            ((*pevent = mlacp_rx_batch_alloc()) == NULL)) {
+            return;
+        }
+
+        batch = (struct MLt_drivers_mlacp__rxPduBatch *)(*pevent + 1);
+        room = MLACP_RX_BATCH_MAX - batch->count;
+        if (room > budget) {
+            room = budget;
+        }
+
+        memset(msgs, 0, room * sizeof(msgs[0]));
+        for (i = 0; i < room; i++) {
+            iov[i].iov_base = batch->pdu[batch->count + i].data;
+            iov[i].iov_len = LACP_PKT_SIZE;
+            msgs[i].msg_hdr.msg_iov = &iov[i];
+            msgs[i].msg_hdr.msg_iovlen = 1;
+        }
+
+        count = recvmmsg(pp->sockfd, msgs, room, MSG_DONTWAIT, NULL);
+        lacpd_rx_stats.syscalls++;
 
-    return rc;
-} /* ml_send_event */
+        if (count < 0) {
+            if ((errno != EAGAIN) && (errno != EWOULDBLOCK) &&
+                (errno != EINTR)) {
+                /* General socket error. */
+                VLOG_ERR("Read failed, fd=%d: errno=%d",
+                         pp->sockfd, errno);
+            }
+            return;
+        }
 
-ML_event *
-ml_wait_for_next_event(void)
-{
-    int rc;
-    ML_event *event = NULL;
+        for (i = 0; i < count; i++) {
+            /* Longer frames are truncated to LACP_PKT_SIZE, as before. */
+            pdu = &batch->pdu[batch->count++];
+            pdu->lport_handle = lport_handle;
+            pdu->pktLen = msgs[i].msg_len;
+        }
 
-    rc = mqueue_wait(&lacpd_main_rcvq, (void **)(void *)&event);
-    if (!rc) {
-        /* Set up event->msg pointer to just after the event
-         * structure itself. This must be done here since the
-         * sender's event->msg pointer points sender's memory
-         * space, and will result in fatal errors if we try to
-         * access it in LACP process space.
-         */
-        event->msg = (void *)(event+1);
-    } else {
-        VLOG_ERR("LACP main receive queue wait error, rc=%s",
-                 strerror(rc));
-    }
+        lacpd_rx_stats.frames += count;
+        budget -= count;
 
-    return event;
-} /* ml_wait_for_next_event */
+        if (batch->count == MLACP_RX_BATCH_MAX) {
+            mlacp_rx_batch_flush(pevent);
+        }
 
-void
-ml_event_free(ML_event *event)
-{
-    if (event != NULL) {
-        free(event);
+        if (count < room) {
+            /* Nothing more queued on the socket. */
+            return;
+        }
     }
-} /* ml_event_free */
+} /* mlacp_rx_drain */
 
-/************************************************************************
- * LACPDU Send and Receive Functions
- ************************************************************************/
 void *
 mlacp_rx_pdu_thread(void *data  __attribute__ ((unused)))
 {
+    ML_event *event = NULL;
+
     /* Detach thread to avoid memory leak upon exit. */
     pthread_detach(pthread_self());
 
@@ -170,90 +1421,312 @@ mlacp_rx_pdu_thread(void *data  __attribute__ ((unused)))
         return NULL;
     }
 
+    if (lacpd_rx_ring_enabled) {
+        struct epoll_event ring_event;
+
+        ring_event.events = EPOLLIN;
+        ring_event.data.ptr = (void *)&lacpd_rx_ring;
+        if (epoll_ctl(epfd, EPOLL_CTL_ADD, lacpd_rx_ring.r_fd,
+                      &ring_event) < 0) {
+            VLOG_ERR("Failed to add LACPDU rx ring to epoll loop.  err=%s",
+                     strerror(errno));
+        }
+    }
+
     for (;;) {
         int n;
         int nfds;
         struct epoll_event events[MAX_EVENTS];
+        lacpd_port_t *pp = NULL;
 
         /* Wait infinite time (-1) for events on epfd */
         nfds = epoll_wait(epfd, events, MAX_EVENTS, -1);
 
         if (nfds < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
             VLOG_ERR("epoll_wait returned error %s", strerror(errno));
             break;
         } else {
             VLOG_DBG("epoll_wait returned, nfds=%d", nfds);
         }
 
+        lacpd_rx_stats.wakeups++;
+
+        /* Everything read in this wakeup, from all the ready sockets,
+         * goes to the protocol thread in as few messages as possible. */
         for (n = 0; n < nfds; n++) {
-            int count;
-            int clientlen;
-            struct sockaddr_ll clientaddr;
-            ML_event *event;
-            int total_msg_size;
-            struct MLt_drivers_mlacp__rxPdu *pkt_event;
-            struct iface_data *idp = NULL;
-
-            idp = (struct iface_data *)events[n].data.ptr;
-            if (idp == NULL) {
+            if (events[n].data.ptr == (void *)&lacpd_rx_ring) {
+                mlacp_rx_ring_read(&lacpd_rx_ring, mlacp_rx_ring_frame,
+                                   &event);
+                continue;
+            }
+
+            pp = (lacpd_port_t *)events[n].data.ptr;
+            if (pp == NULL) {
                 VLOG_ERR("Interface data missing for epoll event!");
                 continue;
             } else {
                 VLOG_DBG("epoll event #%d: events flags=0x%x, port=%d, sock=%d",
-                         n, events[n].events, idp->index, idp->pdu_sockfd);
+                         n, events[n].events, (int)(pp - lacpd_ports),
+                         pp->sockfd);
             }
 
-            if (idp->pdu_registered == false) {
+            if (pp->registered == false) {
                 /* Most likely just a race condition. */
                 continue;
             }
 
-            /* LACPDU size hard-coded to 124 max.
-             * See MLt_drivers_mlacp__rxPdu in mlacp_recv.h
-             */
-            total_msg_size = sizeof(ML_event) + sizeof(struct MLt_drivers_mlacp__rxPdu);
-
-            event = xzalloc(total_msg_size);
-            event->sender.peer = ml_rx_pdu_index;
-
-            /* Set up pkt_event pointer to just after the event
-             * structure itself. This must be done here since the
-             * sender's event->msg pointer points sender's memory
-             * space, and will result in fatal errors if we try to
-             * access it in LACP process space.
-             */
-            pkt_event = (struct MLt_drivers_mlacp__rxPdu *)(event+1);
-
-            clientlen = sizeof(clientaddr);
-            count = recvfrom(idp->pdu_sockfd, (void *)pkt_event->data,
-                              LACP_PKT_SIZE, 0,
-                             (struct sockaddr *)&clientaddr,
-                             (unsigned int *)&clientlen);
-            if (count < 0) {
-                /* General socket error. */
-                VLOG_ERR("Read failed, fd=%d: errno=%d",
-                         idp->pdu_sockfd, errno);
-                free(event);
-                continue;
-
-            } else if (!count) {
-                /* Socket is closed.  Get out. */
-                VLOG_ERR("socket=%d closed", idp->pdu_sockfd);
-                free(event);
-                continue;
-
-            } else if (count <= LACP_PKT_SIZE) {
-                pkt_event->lport_handle = PM_SMPT2HANDLE(0, 0, idp->index,
-                                                         idp->cycl_port_type);
-                pkt_event->pktLen = count;
-                ml_send_event(event);
-            }
+            mlacp_rx_drain(pp, &event);
         } /* for nfds */
+
+        mlacp_rx_batch_flush(&event);
     } /* for(;;) */
 
     return NULL;
 } /* mlacp_rx_pdu_thread */
 
+/* Sends the LACPDUs held for the shared Tx socket.  A message the
+ * kernel refuses is dropped and the ones after it are still sent. */
+static void
+mlacp_tx_batch_send(void)
+{
+    lacpd_port_t *pp;
+    int sent = 0;
+    int rc;
+
+    while (sent < lacpd_tx_batch.count) {
+        rc = sendmmsg(lacpd_tx_sockfd, &lacpd_tx_batch.msgs[sent],
+                      lacpd_tx_batch.count - sent, MSG_DONTWAIT);
+        lacpd_tx_stats.syscalls++;
+
+        if (rc > 0) {
+            sent += rc;
+            continue;
+        }
+
+        pp = lacpd_tx_batch.pp[sent];
+        VLOG_ERR("Failed to send LACPDU for interface=%s, rc=%d",
+                 pp->name, errno);
+        pp->tx_drops++;
+        lacpd_tx_stats.drops++;
+        sent++;
+    }
+
+    lacpd_tx_batch.count = 0;
+} /* mlacp_tx_batch_send */
+
+/* Flushes the Tx ring of every interface with frames waiting. */
+static void
+mlacp_tx_ring_flush_pending(void)
+{
+    lacpd_port_t *pp;
+    mlacp_tx_ring_t *ring;
+    unsigned long long discarded;
+    int rc;
+    int i;
+
+    for (i = 0; i < lacpd_tx_pending.count; i++) {
+        pp = lacpd_tx_pending.pp[i];
+        ring = pp->tx_ring;
+        discarded = ring->t_stats.discarded;
+
+        rc = mlacp_tx_ring_flush(ring);
+        lacpd_tx_stats.syscalls++;
+
+        if (rc) {
+            VLOG_ERR("Failed to send LACPDU for interface=%s, rc=%d",
+                     pp->name, rc);
+            pp->tx_drops += ring->t_stats.discarded - discarded;
+            lacpd_tx_stats.drops += ring->t_stats.discarded - discarded;
+        }
+
+        pp->tx_ring_used = mlacp_tx_ring_used(ring);
+        pp->tx_ring_high = ring->t_stats.high_water;
+    }
+
+    lacpd_tx_pending.count = 0;
+} /* mlacp_tx_ring_flush_pending */
+
+/* Sends every LACPDU held since the last flush.  Called by the protocol
+ * thread at the end of each wakeup, and before an interface stops
+ * sending. */
+static void
+lacpd_tx_flush(void)
+{
+    if (lacpd_tx_stats.held == 0) {
+        return;
+    }
+
+    lacpd_tx_stats.flushes++;
+    if (lacpd_tx_stats.held > lacpd_tx_stats.max_batch) {
+        lacpd_tx_stats.max_batch = lacpd_tx_stats.held;
+    }
+    lacpd_tx_stats.held = 0;
+
+    if (lacpd_tx_batch.count > 0) {
+        mlacp_tx_batch_send();
+    }
+
+    if (lacpd_tx_pending.count > 0) {
+        mlacp_tx_ring_flush_pending();
+    }
+} /* lacpd_tx_flush */
+
+/* Holds a LACPDU for the shared Tx socket, addressed by ifindex. */
+static int
+mlacp_tx_batch_add(lacpd_port_t *pp, unsigned char *data, int length)
+{
+    int i;
+
+    if (length > LACPD_TX_FRAME_MAX) {
+        VLOG_ERR("LACPDU too long for interface=%s, len=%d",
+                 pp->name, length);
+        return 1;
+    }
+
+    if (lacpd_tx_batch.count == LACPD_TX_BATCH_MAX) {
+        mlacp_tx_batch_send();
+    }
+
+    i = lacpd_tx_batch.count++;
+    memcpy(lacpd_tx_batch.frame[i], data, length);
+    lacpd_tx_batch.pp[i] = pp;
+
+    memset(&lacpd_tx_batch.addr[i], 0, sizeof(lacpd_tx_batch.addr[i]));
+    lacpd_tx_batch.addr[i].sll_family = AF_PACKET;
+    lacpd_tx_batch.addr[i].sll_ifindex = pp->ifindex;
+    lacpd_tx_batch.addr[i].sll_halen = MAC_ADDR_LENGTH;
+    memcpy(lacpd_tx_batch.addr[i].sll_addr, lacp_mcast_addr, MAC_ADDR_LENGTH);
+
+    lacpd_tx_batch.iov[i].iov_base = lacpd_tx_batch.frame[i];
+    lacpd_tx_batch.iov[i].iov_len = length;
+
+    memset(&lacpd_tx_batch.msgs[i], 0, sizeof(lacpd_tx_batch.msgs[i]));
+    lacpd_tx_batch.msgs[i].msg_hdr.msg_name = &lacpd_tx_batch.addr[i];
+    lacpd_tx_batch.msgs[i].msg_hdr.msg_namelen = sizeof(struct sockaddr_ll);
+    lacpd_tx_batch.msgs[i].msg_hdr.msg_iov = &lacpd_tx_batch.iov[i];
+    lacpd_tx_batch.msgs[i].msg_hdr.msg_iovlen = 1;
+
+    lacpd_tx_stats.held++;
+
+    return 0;
+} /* mlacp_tx_batch_add */
+
+/* Copies a LACPDU into the interface's Tx ring. */
+static int
+mlacp_tx_ring_add(lacpd_port_t *pp, unsigned char *data, int length)
+{
+    static struct vlog_rate_limit rl = VLOG_RATE_LIMIT_INIT(1, 5);
+    mlacp_tx_ring_t *ring = pp->tx_ring;
+    int rc;
+
+    if ((ring->t_pending == 0) &&
+        (lacpd_tx_pending.count == LACPD_TX_PENDING_MAX)) {
+        mlacp_tx_ring_flush_pending();
+    }
+
+    rc = mlacp_tx_ring_put(ring, data, length);
+    if (rc) {
+        VLOG_ERR_RL(&rl, "Failed to queue LACPDU for interface=%s, rc=%s",
+                    pp->name, strerror(rc));
+        return 1;
+    }
+
+    if (ring->t_pending == 1) {
+        lacpd_tx_pending.pp[lacpd_tx_pending.count++] = pp;
+    }
+
+    lacpd_tx_stats.held++;
+
+    return 0;
+} /* mlacp_tx_ring_add */
+
+static lacpd_port_t *
+lacpd_port_find(port_handle_t lport_handle)
+{
+    int port = PM_HANDLE2PORT(lport_handle);
+
+    if ((port < 0) || (port >= PM_MAX_PORTS) || !lacpd_ports[port].valid) {
+        return NULL;
+    }
+
+    return &lacpd_ports[port];
+} /* lacpd_port_find */
+
+/* Records the interface behind the port with the given index, from
+ * MLm_vpm_api__set_lport_info. */
+void
+mlacp_port_add(int port, const char *name)
+{
+    lacpd_port_t *pp;
+
+    if ((port < 0) || (port >= PM_MAX_PORTS)) {
+        VLOG_ERR("Invalid interface index %d for %s", port, name);
+        return;
+    }
+
+    pp = &lacpd_ports[port];
+    if (pp->valid) {
+        /* The previous interface was not cleared first. */
+        mlacp_port_delete(port);
+    }
+
+    memset(pp, 0, sizeof(*pp));
+    strncpy(pp->name, name, sizeof(pp->name) - 1);
+    pp->valid = true;
+} /* mlacp_port_add */
+
+/* Forgets the interface behind the port with the given index, from
+ * MLm_vpm_api__clear_lport_info, deregistering it first if needed. */
+void
+mlacp_port_delete(int port)
+{
+    lacpd_port_t *pp;
+
+    if ((port < 0) || (port >= PM_MAX_PORTS) || !lacpd_ports[port].valid) {
+        return;
+    }
+
+    pp = &lacpd_ports[port];
+    if (pp->registered) {
+        deregister_mcast_addr(pp->lport_handle);
+    }
+
+    pp->valid = false;
+} /* mlacp_port_delete */
+
+/* Records the LAG the port is configured in, for the event log. */
+void
+mlacp_port_set_lag(port_handle_t lport_handle, int lag_id)
+{
+    lacpd_port_t *pp = lacpd_port_find(lport_handle);
+
+    if (pp != NULL) {
+        pp->lag_id = lag_id;
+    }
+} /* mlacp_port_set_lag */
+
+/* Returns the name of the interface behind the lport, or NULL if it is
+ * not known (any more). */
+const char *
+mlacp_port_name(port_handle_t lport_handle)
+{
+    lacpd_port_t *pp = lacpd_port_find(lport_handle);
+
+    return pp ? pp->name : NULL;
+} /* mlacp_port_name */
+
+/* Returns the LAG the lport is configured in, 0 if not known. */
+int
+mlacp_port_lag_id(port_handle_t lport_handle)
+{
+    lacpd_port_t *pp = lacpd_port_find(lport_handle);
+
+    return pp ? pp->lag_id : 0;
+} /* mlacp_port_lag_id */
+
 void
 register_mcast_addr(port_handle_t lport_handle)
 {
@@ -261,39 +1734,54 @@ register_mcast_addr(port_handle_t lport_handle)
     int port;
     int sockfd;
     int if_idx = 0;
-    struct iface_data *idp = NULL;
+    lacpd_port_t *pp = NULL;
     struct sockaddr_ll addr;
     struct epoll_event event;
 
     /* Find the interface data first. */
     port = PM_HANDLE2PORT(lport_handle);
-    idp = find_iface_data_by_index(port);
+    pp = lacpd_port_find(lport_handle);
 
-    if (idp == NULL) {
+    if (pp == NULL) {
         VLOG_ERR("Failed to find interface data for register mcast addr! "
                  "lport=0x%llx", lport_handle);
         return;
     }
 
-    if (idp->pdu_registered == true) {
-        VLOG_ERR("Duplicated registration for mcast addr? port=%s", idp->name);
+    if (pp->registered == true) {
+        VLOG_ERR("Duplicated registration for mcast addr? port=%s", pp->name);
         return;
     }
 
     /* Create raw socket on interface to receive LACPDUs. */
-    if_idx = if_nametoindex(idp->name);
+    if_idx = if_nametoindex(pp->name);
     if (if_idx == 0) {
         VLOG_ERR("Error getting ifindex for port %d (if_name=%s)!",
-                 port, idp->name);
+                 port, pp->name);
         return;
     }
 
-    VLOG_DBG("%s: port %s, ifindex=%d\n", __FUNCTION__, idp->name, if_idx);
+    VLOG_DBG("%s: port %s, ifindex=%d\n", __FUNCTION__, pp->name, if_idx);
+
+    pp->lport_handle = lport_handle;
+
+    if (lacpd_rx_ring_enabled) {
+        /* The shared ring already receives on every interface; just
+         * let the Rx thread know which lport the ifindex belongs to. */
+        if (!lacpd_rx_ifmap_add(if_idx, lport_handle)) {
+            VLOG_ERR("LACPDU rx ring interface map full, port=%s",
+                     pp->name);
+            return;
+        }
+        pp->ifindex = if_idx;
+        pp->registered = true;
+        return;
+    }
 
     if ((sockfd = socket(PF_PACKET, SOCK_RAW, 0)) < 0) {
         rc = errno;
         VLOG_ERR("Failed to open datagram socket for %s, rc=%s",
-                 idp->name, strerror(rc));
+                 pp->name, strerror(rc));
         return;
     }
 
@@ -301,7 +1789,7 @@ register_mcast_addr(port_handle_t lport_handle)
                     &lacpd_fprog, sizeof(lacpd_fprog));
     if (rc < 0) {
         VLOG_ERR("Failed to attach socket filter for %s, rc=%s",
-                 idp->name, strerror(rc));
+                 pp->name, strerror(rc));
         close(sockfd);
         return;
     }
@@ -314,30 +1802,41 @@ register_mcast_addr(port_handle_t lport_handle)
     rc = bind(sockfd, (struct sockaddr *)&addr, sizeof(addr));
     if (rc < 0) {
         VLOG_ERR("Failed to bind socket to addr for %s, rc=%s",
-                 idp->name, strerror(rc));
+                 pp->name, strerror(rc));
         close(sockfd);
         return;
     }
 
-    /* Save sockfd information in interface data. */
-    idp->pdu_sockfd = sockfd;
-    idp->pdu_registered = true;
+    if (lacpd_tx_ring_enabled) {
+        pp->tx_ring = xzalloc(sizeof(*pp->tx_ring));
+        rc = mlacp_tx_ring_open(pp->tx_ring, sockfd);
+        if (rc) {
+            VLOG_WARN("LACPDU tx ring unavailable for %s (%s), "
+                      "sending directly", pp->name, strerror(rc));
+            free(pp->tx_ring);
+            pp->tx_ring = NULL;
+        }
+    }
+
+    /* Save sockfd information in the port data. */
+    pp->sockfd = sockfd;
+    pp->ifindex = if_idx;
+    pp->registered = true;
+
+    lacpd_pdu_ifaces.pp[lacpd_pdu_ifaces.count++] = pp;
 
-    /* Add new FD to epoll.  Save interface data pointer.
-     * NOTE: assumption is that interfaces are not deleted in h/w switch! */
-    /* OPS_TODO: OVSDB allows interface to be deleted.  Maybe it's better
-     * to save port index & find data?  Or in OVSDB interface delete code,
-     * modify the epoll event data to remove the pointer. */
+    /* Add new FD to epoll.  Save the port data pointer; port data is
+     * never freed, so the Rx thread can't be left with a dangling one. */
     event.events = EPOLLIN;
-    event.data.ptr = (void *)idp;
+    event.data.ptr = (void *)pp;
 
     rc = epoll_ctl(epfd, EPOLL_CTL_ADD, sockfd, &event);
     if (rc == 0) {
         VLOG_DBG("Registered sockfd %d for interface %s with epoll loop.",
-                 sockfd, idp->name);
+                 sockfd, pp->name);
     } else {
         VLOG_ERR("Failed to register sockfd for interface %s with epoll "
-                 "loop.  err=%s", idp->name, strerror(errno));
+                 "loop.  err=%s", pp->name, strerror(errno));
     }
 } /* register_mcast_addr */
 
@@ -345,92 +1844,306 @@ void
 deregister_mcast_addr(port_handle_t lport_handle)
 {
     int rc;
-    int port;
-    struct iface_data *idp = NULL;
+    int i;
+    lacpd_port_t *pp = NULL;
 
     /* Find the interface data first. */
-    port = PM_HANDLE2PORT(lport_handle);
-    idp = find_iface_data_by_index(port);
+    pp = lacpd_port_find(lport_handle);
 
-    if (idp == NULL) {
+    if (pp == NULL) {
         VLOG_ERR("Failed to find interface data for deregister mcast addr! "
                  "lport=0x%llx", lport_handle);
         return;
     }
 
-    if (idp->pdu_registered != true) {
+    if (pp->registered != true) {
         VLOG_ERR("Deregistering for mcast addr when not registered? "
-                 "port=%s", idp->name);
+                 "port=%s", pp->name);
+        return;
+    }
+
+    /* Nothing held for sending may refer to the interface after this. */
+    lacpd_tx_flush();
+
+    if (lacpd_rx_ring_enabled) {
+        lacpd_rx_ifmap_del(pp->ifindex);
+        pp->ifindex = 0;
+        pp->registered = false;
         return;
     }
 
-    rc = epoll_ctl(epfd, EPOLL_CTL_DEL, idp->pdu_sockfd, NULL);
+    rc = epoll_ctl(epfd, EPOLL_CTL_DEL, pp->sockfd, NULL);
     if (rc == 0) {
         VLOG_DBG("Deregistered sockfd %d for interface %s with epoll loop.",
-                 idp->pdu_sockfd, idp->name);
+                 pp->sockfd, pp->name);
     } else {
         VLOG_ERR("Failed to deregister sockfd for interface %s with epoll "
-                 "loop.  err=%s", idp->name, strerror(errno));
+                 "loop.  err=%s", pp->name, strerror(errno));
     }
 
-    close(idp->pdu_sockfd);
-    idp->pdu_sockfd = 0;
-    idp->pdu_registered = false;
+    for (i = 0; i < lacpd_pdu_ifaces.count; i++) {
+        if (lacpd_pdu_ifaces.pp[i] == pp) {
+            lacpd_pdu_ifaces.pp[i] =
+                lacpd_pdu_ifaces.pp[--lacpd_pdu_ifaces.count];
+            break;
+        }
+    }
+
+    if (pp->tx_ring != NULL) {
+        mlacp_tx_ring_close(pp->tx_ring);
+        free(pp->tx_ring);
+        pp->tx_ring = NULL;
+    }
+
+    pp->registered = false;
+    close(pp->sockfd);
+    pp->sockfd = 0;
+    pp->ifindex = 0;
 
 } /* deregister_mcast_addr */
 
 int
 mlacp_tx_pdu(unsigned char* data, int length, port_handle_t lport_handle)
+{
+    /* Set up LACPDU header dest/src MAC addresses. */
+    memcpy(data, lacp_mcast_addr, MAC_ADDR_LENGTH);
+    memcpy(&data[MAC_ADDR_LENGTH], my_mac_addr, MAC_ADDR_LENGTH);
+
+    /* Add Ethernet Type to the header. According to standard
+     * IEEE802.1AX Slow Protocols EtherType is 88-09 hexadecimal*/
+    data[12] = SLOW_PROTOCOLS_ETHERTYPE_PART1;
+    data[13] = SLOW_PROTOCOLS_ETHERTYPE_PART2;
+
+    return mlacp_tx_frame(data, length, lport_handle);
+} /* mlacp_tx_pdu */
+
+/* Sends a slow protocols frame whose Ethernet header is already set up,
+ * such as a port's LACPDU template.  data is not modified. */
+int
+mlacp_tx_frame(unsigned char* data, int length, port_handle_t lport_handle)
 {
     int rc;
-    int port;
-    struct iface_data *idp = NULL;
+    lacpd_port_t *pp = NULL;
 
     /* Find the interface data first. */
-    port = PM_HANDLE2PORT(lport_handle);
-    idp = find_iface_data_by_index(port);
+    pp = lacpd_port_find(lport_handle);
 
-    if (idp == NULL) {
+    if (pp == NULL) {
         VLOG_ERR("Failed to find interface data for LACPDU TX! "
                  "lport=0x%llx", lport_handle);
         return 1;
     }
 
-    if (idp->pdu_registered != true) {
+    if (pp->registered != true) {
         VLOG_ERR("Trying to send LACPDU before registering, "
-                 "port=%s", idp->name);
+                 "port=%s", pp->name);
         return 1;
     }
 
     VLOG_DBG("%s: lport 0x%llx, port=%s, data=%p, len=%d",
-             __FUNCTION__, lport_handle, idp->name, data, length);
-
-    /* Set up LACPDU header dest/src MAC addresses. */
-    memcpy(data, lacp_mcast_addr, MAC_ADDR_LENGTH);
-    memcpy(&data[MAC_ADDR_LENGTH], my_mac_addr, MAC_ADDR_LENGTH);
+             __FUNCTION__, lport_handle, pp->name, data, length);
 
-    /* Add Ethernet Type to the header. According to standard
-     * IEEE802.1AX Slow Protocols EtherType is 88-09 hexadecimal*/
-    data[12] = SLOW_PROTOCOLS_ETHERTYPE_PART1;
-    data[13] = SLOW_PROTOCOLS_ETHERTYPE_PART2;
+    /* Held LACPDUs go out at the end of the protocol thread wakeup. */
+    if (lacpd_rx_ring_enabled) {
+        rc = mlacp_tx_batch_add(pp, data, length);
+    } else if (pp->tx_ring != NULL) {
+        rc = mlacp_tx_ring_add(pp, data, length);
+    } else {
+        rc = 0;
+        lacpd_tx_stats.syscalls++;
+        if (sendto(pp->sockfd, data, length, 0, NULL, 0) == -1) {
+            VLOG_ERR("Failed to send LACPDU for interface=%s, rc=%d",
+                     pp->name, errno);
+            rc = 1;
+        }
+    }
 
-    rc = sendto(idp->pdu_sockfd, data, length, 0, NULL, 0);
-    if (rc == -1) {
-        VLOG_ERR("Failed to send LACPDU for interface=%s, rc=%d",
-                 idp->name, errno);
+    if (rc) {
+        pp->tx_drops++;
+        lacpd_tx_stats.drops++;
         return 1;
     }
 
+    pp->tx_frames++;
+    lacpd_tx_stats.frames++;
+
     return 0;
-} /* mlacp_tx_pdu */
+} /* mlacp_tx_frame */
+
+/************************************************************************
+ * LACP Timer Engine
+ ************************************************************************/
+static int
+lacpd_timer_init(void)
+{
+    lacpd_timer_fd = timerfd_create(CLOCK_MONOTONIC,
+                                    TFD_NONBLOCK | TFD_CLOEXEC);
+    if (lacpd_timer_fd < 0) {
+        return errno;
+    }
+
+    lacp_timer_wheel_init(&lacp_tx_timer_wheel);
+    lacp_timer_wheel_init(&lacp_rx_timer_wheel);
+    lacpd_timer_epoch_us = lacpd_now_us();
+    lacpd_timer_deadline_us = 0;
+
+    return 0;
+} /* lacpd_timer_init */
+
+/* Brings the timer wheels up to the current time, running every LACP
+ * timer that has expired.  Ticks missed while the thread was busy are
+ * all run here, in order. */
+static void
+lacpd_timer_run(void)
+{
+    unsigned long long now_us;
+    unsigned long long target;
+    unsigned long long ticks;
+    unsigned long long late_us;
+    unsigned long long due_us;
+    unsigned long long start_us;
+    unsigned long long fired;
+    uint64_t expirations;
+
+    now_us = lacpd_now_us();
+
+    if (lacpd_timer_deadline_us && (now_us >= lacpd_timer_deadline_us)) {
+        /* Clear the timerfd.  The wheel position comes from the clock,
+         * not from the expiration count. */
+        if ((read(lacpd_timer_fd, &expirations, sizeof(expirations)) < 0) &&
+            (errno != EAGAIN)) {
+            VLOG_ERR("LACP timer read error: %s", strerror(errno));
+        }
+
+        late_us = now_us - lacpd_timer_deadline_us;
+        lacpd_timer_stats.expiries++;
+        lacpd_timer_stats.total_late_us += late_us;
+        if (late_us > lacpd_timer_stats.max_late_us) {
+            lacpd_timer_stats.max_late_us = late_us;
+        }
+        lacpd_timer_deadline_us = 0;
+    }
+
+    target = (now_us - lacpd_timer_epoch_us) / (LACP_TIMER_TICK_MS * 1000);
+    if (target <= lacp_tx_timer_wheel.w_now) {
+        return;
+    }
+
+    ticks = target - lacp_tx_timer_wheel.w_now;
+
+    while (lacp_tx_timer_wheel.w_now < target) {
+        due_us = lacpd_timer_epoch_us +
+                 ((lacp_tx_timer_wheel.w_now + 1) * LACP_TIMER_TICK_MS * 1000);
+        fired = lacp_tx_timer_wheel.w_fired + lacp_rx_timer_wheel.w_fired;
+        start_us = lacpd_now_us();
+
+        mlacp_process_timer(1);
+
+        fired = lacp_tx_timer_wheel.w_fired + lacp_rx_timer_wheel.w_fired -
+                fired;
+        if (fired == 0) {
+            lacpd_tick_perf.idle_ticks++;
+            continue;
+        }
+
+        lacp_hist_record(&lacpd_tick_perf.lag_us, start_us - due_us);
+        lacp_hist_record(&lacpd_tick_perf.run_us, lacpd_now_us() - start_us);
+        lacp_hist_record(&lacpd_tick_perf.ports, fired);
+    }
+
+    lacpd_timer_stats.runs++;
+    lacpd_timer_stats.ticks += ticks;
+    if (ticks > lacpd_timer_stats.max_ticks) {
+        lacpd_timer_stats.max_ticks = ticks;
+    }
+} /* lacpd_timer_run */
+
+/* Arms the timerfd for the next LACP timer due on either wheel, or
+ * disarms it if no timer is running. */
+static void
+lacpd_timer_arm(void)
+{
+    struct itimerspec its;
+    unsigned long long next;
+    unsigned long long next_rx;
+    unsigned long long deadline_us = 0;
+    bool armed;
+
+    armed = (lacp_timer_wheel_next(&lacp_tx_timer_wheel, &next) == 0);
+    if ((lacp_timer_wheel_next(&lacp_rx_timer_wheel, &next_rx) == 0) &&
+        (!armed || (next_rx < next))) {
+        next = next_rx;
+        armed = true;
+    }
+
+    if (armed) {
+        deadline_us = lacpd_timer_epoch_us +
+                      (next * LACP_TIMER_TICK_MS * 1000);
+    }
+
+    if (deadline_us == lacpd_timer_deadline_us) {
+        return;
+    }
+
+    memset(&its, 0, sizeof(its));
+    its.it_value.tv_sec = deadline_us / 1000000;
+    its.it_value.tv_nsec = (deadline_us % 1000000) * 1000;
+
+    if (timerfd_settime(lacpd_timer_fd, TFD_TIMER_ABSTIME, &its, NULL) < 0) {
+        VLOG_ERR("LACP timer arm error: %s", strerror(errno));
+        return;
+    }
+
+    lacpd_timer_deadline_us = deadline_us;
+} /* lacpd_timer_arm */
 
 /************************************************************************
  * LACP Protocol Thread
  ************************************************************************/
+static void
+lacpd_dispatch_event(ML_event *pevent)
+{
+    if (pevent->sender.peer == ml_lport_index) {
+        /***********************************************************
+         * Msg from OVSDB interface for lports.  Link state messages
+         * carry the latest state of the lport, or are dropped if a
+         * newer message superseded them.
+         ***********************************************************/
+        if (!ml_event_is_link_state(pevent) || ml_link_state_take(pevent)) {
+            mlacp_process_vlan_msg(pevent);
+        }
+
+    } else if (pevent->sender.peer == ml_cfgMgr_index) {
+        /***********************************************************
+         * Msg from Cfg Manager.
+         ***********************************************************/
+        mlacp_process_api_msg(pevent);
+
+    } else if (pevent->sender.peer == ml_rx_pdu_index) {
+        /***********************************************************
+         * Packet has arrived through interface socket.
+         ************************************************************/
+        VLOG_DBG("%s : LACPDU Packet (%d) arrived from interface socket",
+               __FUNCTION__, pevent->msgnum);
+
+        mlacp_process_rx_pdu(pevent);
+
+    } else {
+        /***********************************************************
+         * Unknown/unregistered sender.
+         ************************************************************/
+        VLOG_ERR("%s : message %d from unknown sender %d",
+                 __FUNCTION__, pevent->msgnum, pevent->sender.peer);
+    }
+} /* lacpd_dispatch_event */
+
 void *
 lacpd_protocol_thread(void *arg  __attribute__ ((unused)))
 {
     ML_event *pevent;
+    unsigned long long start;
+    unsigned long long latency;
+    unsigned long long count;
 
     /* Detach thread to avoid memory leak upon exit. */
     pthread_detach(pthread_self());
@@ -448,47 +2161,51 @@ lacpd_protocol_thread(void *arg  __attribute__ ((unused)))
             break;
         }
 
-        if (!pevent) {
-            VLOG_ERR("LACPD protocol: Received NULL event!");
-            continue;
-        }
+        /***************************************************************
+         * Run the LACP timers that are due, then drain everything
+         * already queued in this wakeup (pevent is NULL if only the
+         * timer engine woke us up).  OVSDB status changes are only
+         * marked here; the OVSDB interface thread writes them.
+         ***************************************************************/
+        start = lacpd_now_us();
+        count = 0;
 
-        if (pevent->sender.peer == ml_lport_index) {
-            /***********************************************************
-             * Msg from OVSDB interface for lports.
-             ***********************************************************/
-            mlacp_process_vlan_msg(pevent);
+        lacpd_timer_run();
 
-        } else if (pevent->sender.peer == ml_cfgMgr_index) {
-            /***********************************************************
-             * Msg from Cfg Manager.
-             ***********************************************************/
-            mlacp_process_api_msg(pevent);
+        while (pevent != NULL) {
+            lacpd_dispatch_event(pevent);
+            ml_event_free(pevent);
+            count++;
 
-        } else if (pevent->sender.peer == ml_timer_index) {
-            /***********************************************************
-             * Msg from LACP timers.
-             ***********************************************************/
-            mlacp_process_timer();
+            if (count >= LACPD_MAX_BATCH) {
+                break;
+            }
+            pevent = ml_get_next_event();
+        }
 
-        } else if (pevent->sender.peer == ml_rx_pdu_index) {
-            /***********************************************************
-             * Packet has arrived through interface socket.
-             ************************************************************/
-            VLOG_DBG("%s : LACPDU Packet (%d) arrived from interface socket",
-                   __FUNCTION__, pevent->msgnum);
+        /* Send the LACPDUs this wakeup produced together. */
+        lacpd_tx_flush();
 
-            mlacp_process_rx_pdu(pevent);
+        /* Events may have started or stopped timers. */
+        lacpd_timer_arm();
 
-        } else {
-            /***********************************************************
-             * Unknown/unregistered sender.
-             ************************************************************/
-            VLOG_ERR("%s : message %d from unknown sender %d",
-                     __FUNCTION__, pevent->msgnum, pevent->sender.peer);
+        if (count == 0) {
+            continue;
         }
 
-        ml_event_free(pevent);
+        latency = lacpd_now_us() - start;
+
+        lacpd_batch_stats.batches++;
+        lacpd_batch_stats.events += count;
+        lacpd_batch_stats.last_size = count;
+        if (count > lacpd_batch_stats.max_size) {
+            lacpd_batch_stats.max_size = count;
+        }
+        lacpd_batch_stats.total_latency_us += latency;
+        lacpd_batch_stats.last_latency_us = latency;
+        if (latency > lacpd_batch_stats.max_latency_us) {
+            lacpd_batch_stats.max_latency_us = latency;
+        }
 
     } /* while loop */
 
@@ -520,6 +2237,7 @@ mlacp_init(u_long  first_time)
 
     /* Initialize LACP data structures. */
     LACP_AVL_INIT_TREE(lacp_per_port_vars_tree, lacp_compare_port_handle);
+    LACP_AVL_INIT_TREE(lacp_sport_members_tree, lacp_compare_port_handle);
 
     /* Initialize LACP main task event receiver queue. */
     if (ml_init_event_rcvr()) {
@@ -58,27 +58,48 @@ VLOG_DEFINE_THIS_MODULE(mlacp_recv);
 
 //*****************************************************************
 // Function : mlacp_process_rx_pdu
+// Runs a single received LACPDU, or each LACPDU of a batch in
+// order, through the protocol.
 //*****************************************************************
 void
 mlacp_process_rx_pdu(struct ML_event *pevent)
 {
-    struct MLt_drivers_mlacp__rxPdu *pRxPduMsg = pevent->msg;
-    unsigned char *data = (unsigned char *)pRxPduMsg->data;
+    struct MLt_drivers_mlacp__rxPduBatch *pBatch;
+    struct MLt_drivers_mlacp__rxPdu *pRxPduMsg;
+    int i;
+
+    if (pevent->msgnum == MLm_drivers_mlacp__rxPduBatch) {
+        pBatch = pevent->msg;
+        for (i = 0; i < pBatch->count; i++) {
+            pRxPduMsg = &pBatch->pdu[i];
+            LACP_process_input_pkt(pRxPduMsg->lport_handle,
+                                   (unsigned char *)pRxPduMsg->data,
+                                   pRxPduMsg->pktLen);
+        }
+        return;
+    }
 
-    LACP_process_input_pkt(pRxPduMsg->lport_handle, data, pRxPduMsg->pktLen);
+    pRxPduMsg = pevent->msg;
+    LACP_process_input_pkt(pRxPduMsg->lport_handle,
+                           (unsigned char *)pRxPduMsg->data,
+                           pRxPduMsg->pktLen);
 
 } // mlacp_process_rx_pdu
 
 //*****************************************************************
 // Function : mlacp_process_timer
+// Advances the LACP timers by the given number of timer wheel
+// ticks.  Each tick is run in turn so every expiry fires in order.
 //*****************************************************************
 void
-mlacp_process_timer(void)
+mlacp_process_timer(unsigned long long ticks)
 {
     RENTRY();
 
-    LACP_periodic_tx();
-    LACP_current_while_expiry();
+    while (ticks-- > 0) {
+        LACP_periodic_tx();
+        LACP_current_while_expiry();
+    }
 
     REXIT();
 
@@ -138,6 +159,27 @@ mlacp_process_vlan_msg(ML_event *pevent)
         }
         break;
 
+        case MLm_vpm_api__set_lport_info:
+        {
+            struct MLt_vpm_api__lport_info *pMsg = pevent->msg;
+            mlacp_port_add(pMsg->port, pMsg->name);
+        }
+        break;
+
+        case MLm_vpm_api__clear_lport_info:
+        {
+            struct MLt_vpm_api__lport_info *pMsg = pevent->msg;
+            mlacp_port_delete(pMsg->port);
+        }
+        break;
+
+        case MLm_vpm_api__db_req_room:
+        {
+            // OVSDB requests were applied, send the ones that waited.
+            db_req_flush();
+        }
+        break;
+
         case MLm_vpm_api__set_lport_fallback_status:
         {
             struct MLt_vpm_api__lport_fallback_status *pMsg = pevent->msg;
@@ -190,6 +232,7 @@ mlacp_process_api_msg(ML_event *pevent)
 
             memcpy(my_mac_addr, mac_addr, MAC_ADDR_LENGTH);
             set_all_port_system_mac_addr();
+            mlacp_rx_filter_update();
 
             RDEBUG(DL_LACP_RCV, "Set sys mac addr: %02x:%02x:%02x:%02x:%02x:%02x\n",
                    my_mac_addr[0], my_mac_addr[1], my_mac_addr[2],
@@ -202,6 +245,7 @@ mlacp_process_api_msg(ML_event *pevent)
             struct MLt_lacp_api__set_lport_overrides *pMsg = pevent->msg;
 
             set_lport_overrides(pMsg->lport_handle, pMsg->priority, pMsg->actor_sys_mac);
+            mlacp_rx_filter_update();
 
             RDEBUG(SL_LACP_RCV, "Set interface %lld port overrides: %d, %02x:%02x:%02x:%02x:%02x:%02x\n",
                     pMsg->lport_handle,
@@ -326,6 +370,7 @@ mlacpVapiLportEvent(struct ML_event *pevent)
                                     (short) placp_msg->lacp_timeout,
                                     (short) placp_msg->collecting_ready);
         } else {
+            mlacp_port_set_lag(placp_msg->lport_handle, placp_msg->lag_id);
             LACP_initialize_port(placp_msg->lport_handle,
                                  (unsigned short) placp_msg->port_id,
                                  placp_msg->flags,
@@ -354,4 +399,7 @@ mlacpVapiLportEvent(struct ML_event *pevent)
         LACP_disable_lacp(placp_msg->lport_handle);
     }
 
+    // The port may have gained or lost a system id override.
+    mlacp_rx_filter_update();
+
 } // mlacpVapiLportEvent
@@ -0,0 +1,212 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * mlacp_rx_ring.c
+ *
+ *   LACPDU receive through a single TPACKET_V3 ring.
+ *
+ *   Instead of a raw socket per interface, one PF_PACKET socket is
+ *   bound to the slow protocols EtherType on all interfaces, with the
+ *   LACP BPF filter attached and a PACKET_RX_RING mapped into the
+ *   process.  The kernel fills whole blocks of frames; user space walks
+ *   a block without any system call and hands it back by flipping its
+ *   status.  Each frame carries the ifindex it arrived on, which the
+ *   caller uses to find the interface.
+ *
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <errno.h>
+#include <arpa/inet.h>
+#include <sys/mman.h>
+#include <sys/socket.h>
+#include <linux/if_ether.h>
+#include <linux/if_packet.h>
+
+#include "mlacp_rx_ring.h"
+
+int
+mlacp_rx_ring_open(mlacp_rx_ring_t *ring, unsigned short protocol,
+                   const struct sock_fprog *filter)
+{
+    struct tpacket_req3 req;
+    struct sockaddr_ll addr;
+    int version = TPACKET_V3;
+    int rc;
+
+    memset(ring, 0, sizeof(*ring));
+    ring->r_fd = -1;
+
+    // Protocol 0 until bound: nothing is queued before the filter and
+    // the ring are in place.
+    ring->r_fd = socket(PF_PACKET, SOCK_RAW | SOCK_CLOEXEC, 0);
+    if (ring->r_fd < 0) {
+        return errno;
+    }
+
+    if (setsockopt(ring->r_fd, SOL_PACKET, PACKET_VERSION,
+                   &version, sizeof(version)) < 0) {
+        goto error;
+    }
+
+#ifdef PACKET_IGNORE_OUTGOING
+    {
+        int one = 1;
+
+        // Best effort; frames we send are also skipped in the read loop.
+        (void)setsockopt(ring->r_fd, SOL_PACKET, PACKET_IGNORE_OUTGOING,
+                         &one, sizeof(one));
+    }
+#endif
+
+    if (filter &&
+        (setsockopt(ring->r_fd, SOL_SOCKET, SO_ATTACH_FILTER,
+                    filter, sizeof(*filter)) < 0)) {
+        goto error;
+    }
+
+    memset(&req, 0, sizeof(req));
+    req.tp_block_size = MLACP_RX_RING_BLOCK_SIZE;
+    req.tp_block_nr = MLACP_RX_RING_BLOCK_NR;
+    req.tp_frame_size = MLACP_RX_RING_FRAME_SIZE;
+    req.tp_frame_nr = (MLACP_RX_RING_BLOCK_SIZE / MLACP_RX_RING_FRAME_SIZE) *
+                      MLACP_RX_RING_BLOCK_NR;
+    req.tp_retire_blk_tov = MLACP_RX_RING_RETIRE_MS;
+
+    if (setsockopt(ring->r_fd, SOL_PACKET, PACKET_RX_RING,
+                   &req, sizeof(req)) < 0) {
+        goto error;
+    }
+
+    ring->r_map_len = (size_t)MLACP_RX_RING_BLOCK_SIZE * MLACP_RX_RING_BLOCK_NR;
+    ring->r_map = mmap(NULL, ring->r_map_len, PROT_READ | PROT_WRITE,
+                       MAP_SHARED, ring->r_fd, 0);
+    if (ring->r_map == MAP_FAILED) {
+        ring->r_map = NULL;
+        goto error;
+    }
+
+    memset(&addr, 0, sizeof(addr));
+    addr.sll_family = AF_PACKET;
+    addr.sll_protocol = htons(protocol);
+    addr.sll_ifindex = 0;       // All interfaces.
+
+    if (bind(ring->r_fd, (struct sockaddr *)&addr, sizeof(addr)) < 0) {
+        goto error;
+    }
+
+    return 0;
+
+error:
+    rc = errno;
+    mlacp_rx_ring_close(ring);
+    return rc;
+
+} // mlacp_rx_ring_open
+
+void
+mlacp_rx_ring_close(mlacp_rx_ring_t *ring)
+{
+    if (ring->r_map != NULL) {
+        munmap(ring->r_map, ring->r_map_len);
+        ring->r_map = NULL;
+    }
+
+    if (ring->r_fd >= 0) {
+        close(ring->r_fd);
+        ring->r_fd = -1;
+    }
+
+} // mlacp_rx_ring_close
+
+// Walks every block the kernel has handed over, passing each frame to
+// cb, and returns the blocks to the kernel.  Returns the number of
+// frames passed to cb.
+int
+mlacp_rx_ring_read(mlacp_rx_ring_t *ring, mlacp_rx_ring_cb_t cb, void *arg)
+{
+    struct tpacket_block_desc *block;
+    struct tpacket3_hdr *hdr;
+    struct sockaddr_ll *sll;
+    unsigned int num;
+    unsigned int i;
+    int frames = 0;
+
+    for (;;) {
+        block = (struct tpacket_block_desc *)
+                (ring->r_map + (size_t)ring->r_block * MLACP_RX_RING_BLOCK_SIZE);
+
+        if (!(__atomic_load_n(&block->hdr.bh1.block_status,
+                              __ATOMIC_ACQUIRE) & TP_STATUS_USER)) {
+            break;
+        }
+
+        num = block->hdr.bh1.num_pkts;
+        hdr = (struct tpacket3_hdr *)
+              ((unsigned char *)block + block->hdr.bh1.offset_to_first_pkt);
+
+        for (i = 0; i < num; i++) {
+            sll = (struct sockaddr_ll *)
+                  ((unsigned char *)hdr +
+                   TPACKET_ALIGN(sizeof(struct tpacket3_hdr)));
+
+            if (sll->sll_pkttype == PACKET_OUTGOING) {
+                ring->r_stats.outgoing++;
+            } else {
+                cb(arg, sll->sll_ifindex,
+                   (unsigned char *)hdr + hdr->tp_mac, hdr->tp_snaplen);
+                frames++;
+            }
+
+            hdr = (struct tpacket3_hdr *)
+                  ((unsigned char *)hdr + hdr->tp_next_offset);
+        }
+
+        __atomic_store_n(&block->hdr.bh1.block_status, TP_STATUS_KERNEL,
+                         __ATOMIC_RELEASE);
+
+        ring->r_stats.blocks++;
+        ring->r_block = (ring->r_block + 1) % MLACP_RX_RING_BLOCK_NR;
+    }
+
+    ring->r_stats.frames += frames;
+
+    return frames;
+
+} // mlacp_rx_ring_read
+
+void
+mlacp_rx_ring_get_stats(mlacp_rx_ring_t *ring, mlacp_rx_ring_stats_t *stats)
+{
+    struct tpacket_stats_v3 kstats;
+    socklen_t len = sizeof(kstats);
+
+    // Reading PACKET_STATISTICS clears the kernel counters, so they
+    // are accumulated here.
+    if ((ring->r_fd >= 0) &&
+        (getsockopt(ring->r_fd, SOL_PACKET, PACKET_STATISTICS,
+                    &kstats, &len) == 0)) {
+        ring->r_stats.kernel_packets += kstats.tp_packets;
+        ring->r_stats.kernel_drops += kstats.tp_drops;
+        ring->r_stats.kernel_freezes += kstats.tp_freeze_q_cnt;
+    }
+
+    *stats = ring->r_stats;
+
+} // mlacp_rx_ring_get_stats
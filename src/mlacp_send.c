@@ -108,7 +108,7 @@ mlacp_blocking_send_select_aggregator(LAG_t *const lag,
     status = mvlan_api_select_aggregator(&match_params);
 
     if (R_SUCCESS == status) {
-        lacp_port->sport_handle = match_params.sport_handle;
+        LACP_set_sport_handle(lacp_port, match_params.sport_handle);
 
         if (lacp_port->debug_level & DBG_LACP_SEND) {
             RDBG("%s : Got matching aggr from MVPM "
@@ -0,0 +1,214 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * mlacp_tx_ring.c
+ *
+ *   LACPDU transmit through a PACKET_TX_RING.
+ *
+ *   The ring is attached to an interface's bound packet socket.  Frames
+ *   sent during one pass of the protocol thread are copied into ring
+ *   slots and marked for sending; a single send() then has the kernel
+ *   transmit all of them.  The kernel hands each slot back once the
+ *   frame has left, so the number of slots not yet handed back is the
+ *   ring occupancy.
+ *
+ *   Once a socket has a tx ring, every frame sent on it must go
+ *   through the ring.
+ *
+ */
+
+#include <string.h>
+#include <errno.h>
+#include <sys/mman.h>
+#include <sys/socket.h>
+#include <linux/if_packet.h>
+
+#include "mlacp_tx_ring.h"
+
+// Frame data starts right after the (aligned) tpacket2 header.
+#define MLACP_TX_RING_DATA_OFFSET   TPACKET_ALIGN(sizeof(struct tpacket2_hdr))
+
+static struct tpacket2_hdr *
+mlacp_tx_ring_frame(mlacp_tx_ring_t *ring, unsigned int frame)
+{
+    return (struct tpacket2_hdr *)
+           (ring->t_map + (size_t)frame * MLACP_TX_RING_FRAME_SIZE);
+
+} // mlacp_tx_ring_frame
+
+int
+mlacp_tx_ring_open(mlacp_tx_ring_t *ring, int fd)
+{
+    struct tpacket_req req;
+    int version = TPACKET_V2;
+    int rc;
+
+    memset(ring, 0, sizeof(*ring));
+    ring->t_fd = fd;
+
+    if (setsockopt(fd, SOL_PACKET, PACKET_VERSION,
+                   &version, sizeof(version)) < 0) {
+        return errno;
+    }
+
+    memset(&req, 0, sizeof(req));
+    req.tp_block_size = MLACP_TX_RING_BLOCK_SIZE;
+    req.tp_block_nr = 1;
+    req.tp_frame_size = MLACP_TX_RING_FRAME_SIZE;
+    req.tp_frame_nr = MLACP_TX_RING_FRAME_NR;
+
+    if (setsockopt(fd, SOL_PACKET, PACKET_TX_RING, &req, sizeof(req)) < 0) {
+        return errno;
+    }
+
+    ring->t_map_len = MLACP_TX_RING_BLOCK_SIZE;
+    ring->t_map = mmap(NULL, ring->t_map_len, PROT_READ | PROT_WRITE,
+                       MAP_SHARED, fd, 0);
+    if (ring->t_map == MAP_FAILED) {
+        rc = errno;
+        ring->t_map = NULL;
+
+        // A socket with a tx ring only sends from the ring; take it
+        // away again so the caller can fall back to sendto().
+        memset(&req, 0, sizeof(req));
+        (void)setsockopt(fd, SOL_PACKET, PACKET_TX_RING, &req, sizeof(req));
+        return rc;
+    }
+
+    return 0;
+
+} // mlacp_tx_ring_open
+
+void
+mlacp_tx_ring_close(mlacp_tx_ring_t *ring)
+{
+    // The socket belongs to the caller.
+    if (ring->t_map != NULL) {
+        munmap(ring->t_map, ring->t_map_len);
+        ring->t_map = NULL;
+    }
+    ring->t_fd = -1;
+
+} // mlacp_tx_ring_close
+
+// Copies a frame into the next free slot.  Returns ENOBUFS if the
+// kernel has not yet handed that slot back.
+int
+mlacp_tx_ring_put(mlacp_tx_ring_t *ring, const unsigned char *data,
+                  unsigned int len)
+{
+    struct tpacket2_hdr *hdr;
+    unsigned int status;
+
+    if (len > MLACP_TX_RING_FRAME_SIZE - MLACP_TX_RING_DATA_OFFSET) {
+        return EMSGSIZE;
+    }
+
+    hdr = mlacp_tx_ring_frame(ring, ring->t_head);
+    status = __atomic_load_n(&hdr->tp_status, __ATOMIC_ACQUIRE);
+
+    if (status == TP_STATUS_WRONG_FORMAT) {
+        // Left behind by a frame the kernel refused; reuse the slot.
+        ring->t_stats.rejected++;
+    } else if (status != TP_STATUS_AVAILABLE) {
+        ring->t_stats.full++;
+        return ENOBUFS;
+    }
+
+    memcpy((unsigned char *)hdr + MLACP_TX_RING_DATA_OFFSET, data, len);
+    hdr->tp_len = len;
+    __atomic_store_n(&hdr->tp_status, TP_STATUS_SEND_REQUEST,
+                     __ATOMIC_RELEASE);
+
+    ring->t_head = (ring->t_head + 1) % MLACP_TX_RING_FRAME_NR;
+    ring->t_pending++;
+    ring->t_stats.queued++;
+
+    return 0;
+
+} // mlacp_tx_ring_put
+
+// Has the kernel send every frame put since the last flush.  If it
+// fails, the frames still waiting are dropped rather than sent late:
+// the next LACPDU carries the current state anyway.
+int
+mlacp_tx_ring_flush(mlacp_tx_ring_t *ring)
+{
+    struct tpacket2_hdr *hdr;
+    unsigned int used;
+    unsigned int i;
+    int rc;
+
+    if (ring->t_pending == 0) {
+        return 0;
+    }
+
+    used = mlacp_tx_ring_used(ring);
+    if (used > ring->t_stats.high_water) {
+        ring->t_stats.high_water = used;
+    }
+
+    ring->t_stats.flushes++;
+    ring->t_pending = 0;
+
+    if (send(ring->t_fd, NULL, 0, MSG_DONTWAIT) >= 0) {
+        return 0;
+    }
+
+    rc = errno;
+
+    // The kernel is done with the ring once send() returns; frames it
+    // did not pick up are still ours to take back.
+    for (i = 0; i < MLACP_TX_RING_FRAME_NR; i++) {
+        hdr = mlacp_tx_ring_frame(ring, i);
+        if (__atomic_load_n(&hdr->tp_status, __ATOMIC_ACQUIRE) ==
+            TP_STATUS_SEND_REQUEST) {
+            __atomic_store_n(&hdr->tp_status, TP_STATUS_AVAILABLE,
+                             __ATOMIC_RELEASE);
+            ring->t_stats.discarded++;
+        }
+    }
+
+    return rc;
+
+} // mlacp_tx_ring_flush
+
+// Returns the number of slots the kernel has not handed back yet.
+unsigned int
+mlacp_tx_ring_used(mlacp_tx_ring_t *ring)
+{
+    struct tpacket2_hdr *hdr;
+    unsigned int status;
+    unsigned int used = 0;
+    unsigned int i;
+
+    if (ring->t_map == NULL) {
+        return 0;
+    }
+
+    for (i = 0; i < MLACP_TX_RING_FRAME_NR; i++) {
+        hdr = mlacp_tx_ring_frame(ring, i);
+        status = __atomic_load_n(&hdr->tp_status, __ATOMIC_ACQUIRE);
+        if ((status != TP_STATUS_AVAILABLE) &&
+            (status != TP_STATUS_WRONG_FORMAT)) {
+            used++;
+        }
+    }
+
+    return used;
+
+} // mlacp_tx_ring_used
@@ -0,0 +1,230 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * mpool.c
+ *
+ *   Fixed-size object pool for MsgLib events.
+ *
+ *   Objects are grouped in power-of-two size classes.  Each class keeps
+ *   a free list that is refilled by frees, so once the pool has grown to
+ *   the working set, allocation and release never touch the heap.  A
+ *   class that runs dry falls back to malloc; that object joins the
+ *   class when it is freed (up to MPOOL_MAX_CACHED).
+ *
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+
+#include "mpool.h"
+
+#define MPOOL_OVERSIZE_CLASS    (-1)
+
+static size_t
+mpool_class_size(int size_class)
+{
+    return (size_t)MPOOL_MIN_CLASS_SIZE << size_class;
+
+} // mpool_class_size
+
+static int
+mpool_size_to_class(size_t size)
+{
+    int size_class;
+
+    for (size_class = 0; size_class < MPOOL_NUM_CLASSES; size_class++) {
+        if (size <= mpool_class_size(size_class)) {
+            return size_class;
+        }
+    }
+
+    return MPOOL_OVERSIZE_CLASS;
+
+} // mpool_size_to_class
+
+int
+mpool_init(mpool_t *pool)
+{
+    mpool_class_t *pclass;
+    mpool_hdr_t *hdr;
+    size_t stride;
+    int size_class;
+    int i;
+
+    if (NULL == pool) {
+        return EINVAL;
+    }
+
+    memset(pool, 0, sizeof(*pool));
+    pthread_mutex_init(&(pool->p_mutex), NULL);
+
+    for (size_class = 0; size_class < MPOOL_NUM_CLASSES; size_class++) {
+        pclass = &(pool->p_class[size_class]);
+
+        pthread_mutex_init(&(pclass->c_mutex), NULL);
+        pclass->c_stats.obj_size = mpool_class_size(size_class);
+
+        // Carve the initial objects out of one slab.
+        stride = sizeof(mpool_hdr_t) + mpool_class_size(size_class);
+        pclass->c_slab = malloc(stride * MPOOL_PREALLOC);
+        if (NULL == pclass->c_slab) {
+            return ENOMEM;
+        }
+
+        for (i = MPOOL_PREALLOC - 1; i >= 0; i--) {
+            hdr = (mpool_hdr_t *)((char *)pclass->c_slab + (stride * i));
+            hdr->size_class = size_class;
+            hdr->from_slab = 1;
+            hdr->next = pclass->c_free;
+            pclass->c_free = hdr;
+        }
+        pclass->c_stats.cached = MPOOL_PREALLOC;
+    }
+
+    return 0;
+
+} // mpool_init
+
+void *
+mpool_zalloc(mpool_t *pool, size_t size)
+{
+    mpool_class_t *pclass;
+    mpool_hdr_t *hdr;
+    int size_class;
+
+    size_class = mpool_size_to_class(size);
+
+    if (MPOOL_OVERSIZE_CLASS == size_class) {
+        hdr = malloc(sizeof(mpool_hdr_t) + size);
+        if (NULL == hdr) {
+            return NULL;
+        }
+        hdr->size_class = MPOOL_OVERSIZE_CLASS;
+        hdr->from_slab = 0;
+
+        pthread_mutex_lock(&(pool->p_mutex));
+        pool->p_oversize.allocs++;
+        pool->p_oversize.misses++;
+        pool->p_oversize.in_use++;
+        if (pool->p_oversize.in_use > pool->p_oversize.high_water) {
+            pool->p_oversize.high_water = pool->p_oversize.in_use;
+        }
+        pthread_mutex_unlock(&(pool->p_mutex));
+
+        memset(hdr + 1, 0, size);
+        return hdr + 1;
+    }
+
+    pclass = &(pool->p_class[size_class]);
+
+    pthread_mutex_lock(&(pclass->c_mutex));
+    hdr = pclass->c_free;
+    if (hdr != NULL) {
+        pclass->c_free = hdr->next;
+        pclass->c_stats.cached--;
+    } else {
+        pclass->c_stats.misses++;
+    }
+    pclass->c_stats.allocs++;
+    pclass->c_stats.in_use++;
+    if (pclass->c_stats.in_use > pclass->c_stats.high_water) {
+        pclass->c_stats.high_water = pclass->c_stats.in_use;
+    }
+    pthread_mutex_unlock(&(pclass->c_mutex));
+
+    if (NULL == hdr) {
+        // Free list is dry.  Grow the class by one heap object; it
+        // will be kept on the free list when released.
+        hdr = malloc(sizeof(mpool_hdr_t) + mpool_class_size(size_class));
+        if (NULL == hdr) {
+            pthread_mutex_lock(&(pclass->c_mutex));
+            pclass->c_stats.allocs--;
+            pclass->c_stats.in_use--;
+            pthread_mutex_unlock(&(pclass->c_mutex));
+            return NULL;
+        }
+        hdr->size_class = size_class;
+        hdr->from_slab = 0;
+    }
+
+    hdr->next = NULL;
+    memset(hdr + 1, 0, size);
+
+    return hdr + 1;
+
+} // mpool_zalloc
+
+void
+mpool_free(mpool_t *pool, void *obj)
+{
+    mpool_class_t *pclass;
+    mpool_hdr_t *hdr;
+
+    if (NULL == obj) {
+        return;
+    }
+
+    hdr = (mpool_hdr_t *)obj - 1;
+
+    if (MPOOL_OVERSIZE_CLASS == hdr->size_class) {
+        pthread_mutex_lock(&(pool->p_mutex));
+        pool->p_oversize.frees++;
+        pool->p_oversize.releases++;
+        pool->p_oversize.in_use--;
+        pthread_mutex_unlock(&(pool->p_mutex));
+
+        free(hdr);
+        return;
+    }
+
+    pclass = &(pool->p_class[hdr->size_class]);
+
+    pthread_mutex_lock(&(pclass->c_mutex));
+    pclass->c_stats.frees++;
+    pclass->c_stats.in_use--;
+    if (hdr->from_slab || (pclass->c_stats.cached < MPOOL_MAX_CACHED)) {
+        hdr->next = pclass->c_free;
+        pclass->c_free = hdr;
+        pclass->c_stats.cached++;
+        hdr = NULL;
+    } else {
+        pclass->c_stats.releases++;
+    }
+    pthread_mutex_unlock(&(pclass->c_mutex));
+
+    if (hdr != NULL) {
+        free(hdr);
+    }
+
+} // mpool_free
+
+void
+mpool_get_stats(mpool_t *pool, int size_class, mpool_stats_t *stats)
+{
+    if ((size_class < 0) || (size_class >= MPOOL_NUM_CLASSES)) {
+        pthread_mutex_lock(&(pool->p_mutex));
+        *stats = pool->p_oversize;
+        pthread_mutex_unlock(&(pool->p_mutex));
+        return;
+    }
+
+    pthread_mutex_lock(&(pool->p_class[size_class].c_mutex));
+    *stats = pool->p_class[size_class].c_stats;
+    pthread_mutex_unlock(&(pool->p_class[size_class].c_mutex));
+
+} // mpool_get_stats
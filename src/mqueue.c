@@ -20,83 +20,394 @@
  *   This is the main file for MsgLib Adaptation
  *   (for intra-process thread communication).
  *
+ *   The queue is a preallocated, bounded ring shared by several
+ *   producer threads (rx PDU, timer, OVSDB) and a single consumer
+ *   (the LACP protocol thread).  Each slot carries a sequence number
+ *   so producers can claim slots with a single compare-and-swap and
+ *   the consumer can detect a published slot without a lock.
+ *
+ *   Several queues may share one wakeup signal, letting the consumer
+ *   sleep on all of them at once and pick the next element by priority
+ *   (see mqueue_wait_any).  mqueue_wait_any_fd also wakes the consumer
+ *   when another descriptor (e.g. a timerfd) becomes readable.
+ *
+ *   A consumer that sleeps in a poll loop of its own (the OVSDB
+ *   interface thread) polls the descriptor from mqueue_poll_fd instead,
+ *   and calls mqueue_poll_done once awake, before reading the queue.
+ *
  */
 
 #include <stdlib.h>
+#include <stdint.h>
+#include <unistd.h>
 #include <errno.h>
+#include <poll.h>
+#include <sys/eventfd.h>
 
 #include "mqueue.h"
 
+static int
+mqueue_init_ring(mqueue_t *queue)
+{
+    unsigned long i;
+
+    queue->q_ring = (mqueue_slot_t *) calloc(MQUEUE_DEFAULT_SIZE,
+                                             sizeof(mqueue_slot_t));
+    if (NULL == queue->q_ring) {
+        return ENOMEM;
+    }
+
+    for (i = 0; i < MQUEUE_DEFAULT_SIZE; i++) {
+        queue->q_ring[i].q_seq = i;
+        queue->q_ring[i].q_data = NULL;
+    }
+
+    queue->q_mask = MQUEUE_DEFAULT_SIZE - 1;
+    queue->q_head = 0;
+    queue->q_tail = 0;
+
+    queue->q_stats.sent = 0;
+    queue->q_stats.received = 0;
+    queue->q_stats.overflow = 0;
+    queue->q_stats.wakeups = 0;
+    queue->q_stats.high_water = 0;
+
+    return 0;
+
+} // mqueue_init_ring
+
 int
 mqueue_init(mqueue_t *queue)
 {
-    pthread_mutex_init(&(queue->q_mutex), NULL);
+    int rc;
+
+    if (NULL == queue) {
+        return EINVAL;
+    }
+
+    if ((rc = mqueue_init_ring(queue)) != 0) {
+        return rc;
+    }
 
-    queue->q_head.q_forw = &(queue->q_tail);
-    queue->q_head.q_back = NULL;
-    queue->q_head.q_data = NULL;
-    queue->q_tail.q_forw = NULL;
-    queue->q_tail.q_back = &(queue->q_head);
-    queue->q_tail.q_data = NULL;
+    queue->q_own_signal.s_waiting = 0;
+    queue->q_own_signal.s_efd = eventfd(0, EFD_CLOEXEC);
+    if (queue->q_own_signal.s_efd < 0) {
+        rc = errno;
 
-    /* Initialize semaphore to value zero and PSHARED zero. */
-    if (sem_init(&(queue->q_avail), 0, 0) != 0) {
-        return errno;
+        free(queue->q_ring);
+        queue->q_ring = NULL;
+        return rc;
     }
+    queue->q_signal = &(queue->q_own_signal);
 
     return 0;
 
 } // mqueue_init
 
+int
+mqueue_init_shared(mqueue_t *queue, mqueue_t *signal_owner)
+{
+    int rc;
+
+    if ((NULL == queue) || (NULL == signal_owner) ||
+        (NULL == signal_owner->q_signal)) {
+        return EINVAL;
+    }
+
+    if ((rc = mqueue_init_ring(queue)) != 0) {
+        return rc;
+    }
+
+    // Wake the same consumer as signal_owner.
+    queue->q_own_signal.s_efd = -1;
+    queue->q_own_signal.s_waiting = 0;
+    queue->q_signal = signal_owner->q_signal;
+
+    return 0;
+
+} // mqueue_init_shared
+
 int
 mqueue_send(mqueue_t *queue, void* data)
 {
-    qelem_t *new_elem;
+    mqueue_signal_t *signal;
+    mqueue_slot_t *slot;
+    unsigned long pos;
+    unsigned long seq;
+    long dif;
 
     if ((NULL == queue) || (NULL == data)) {
         return EINVAL;
     }
 
-    if ((new_elem = (qelem_t *) malloc(sizeof(qelem_t))) == NULL) {
-        return ENOMEM;
+    pos = __atomic_load_n(&(queue->q_head), __ATOMIC_RELAXED);
+
+    for (;;) {
+        slot = &(queue->q_ring[pos & queue->q_mask]);
+        seq = __atomic_load_n(&(slot->q_seq), __ATOMIC_ACQUIRE);
+        dif = (long)seq - (long)pos;
+
+        if (dif == 0) {
+            // Slot is free for this lap, try to claim it.
+            if (__atomic_compare_exchange_n(&(queue->q_head), &pos, pos + 1,
+                                            1, __ATOMIC_RELAXED,
+                                            __ATOMIC_RELAXED)) {
+                break;
+            }
+        } else if (dif < 0) {
+            // Consumer has not released this slot yet: ring is full.
+            __atomic_add_fetch(&(queue->q_stats.overflow), 1,
+                               __ATOMIC_RELAXED);
+            return ENOBUFS;
+        } else {
+            // Another producer got here first.
+            pos = __atomic_load_n(&(queue->q_head), __ATOMIC_RELAXED);
+        }
     }
 
-    new_elem->q_data = data;
+    slot->q_data = data;
+    __atomic_store_n(&(slot->q_seq), pos + 1, __ATOMIC_RELEASE);
+    __atomic_add_fetch(&(queue->q_stats.sent), 1, __ATOMIC_RELAXED);
+
+    // Pairs with the fence in mqueue_wait_any: either the consumer sees
+    // the new slot, or we see that it is about to sleep.
+    __atomic_thread_fence(__ATOMIC_SEQ_CST);
 
-    pthread_mutex_lock(&(queue->q_mutex));
-    insque(new_elem, queue->q_tail.q_back);
+    signal = queue->q_signal;
+    if (__atomic_load_n(&(signal->s_waiting), __ATOMIC_RELAXED) &&
+        __atomic_exchange_n(&(signal->s_waiting), 0, __ATOMIC_SEQ_CST)) {
+        uint64_t one = 1;
 
-    if (sem_post(&(queue->q_avail)) != 0) {
-        pthread_mutex_unlock(&(queue->q_mutex));
-        return errno;
+        __atomic_add_fetch(&(queue->q_stats.wakeups), 1, __ATOMIC_RELAXED);
+        if (write(signal->s_efd, &one, sizeof(one)) != sizeof(one)) {
+            return errno;
+        }
     }
-    pthread_mutex_unlock(&(queue->q_mutex));
 
     return 0;
 
 } // mqueue_send
 
 int
-mqueue_wait(mqueue_t *queue, void **data)
+mqueue_trywait(mqueue_t *queue, void **data)
 {
-    qelem_t *new_elem;
+    mqueue_slot_t *slot;
+    unsigned long pos;
+    unsigned long depth;
 
     if ((NULL == queue) || (NULL == data)) {
         return EINVAL;
     }
 
-    // Block until a new event is available.
-    sem_wait(&(queue->q_avail));
+    pos = queue->q_tail;
+    slot = &(queue->q_ring[pos & queue->q_mask]);
 
-    pthread_mutex_lock(&(queue->q_mutex));
-    new_elem = queue->q_head.q_forw;
-    remque(queue->q_head.q_forw);
-    pthread_mutex_unlock(&(queue->q_mutex));
+    if (__atomic_load_n(&(slot->q_seq), __ATOMIC_ACQUIRE) != pos + 1) {
+        return EAGAIN;
+    }
 
-    *data = new_elem->q_data;
+    *data = slot->q_data;
+    slot->q_data = NULL;
 
-    free(new_elem);
+    // Hand the slot back to producers for the next lap.
+    __atomic_store_n(&(slot->q_seq), pos + queue->q_mask + 1,
+                     __ATOMIC_RELEASE);
+    __atomic_store_n(&(queue->q_tail), pos + 1, __ATOMIC_RELAXED);
+
+    depth = __atomic_load_n(&(queue->q_head), __ATOMIC_RELAXED) - pos;
+    if (depth > queue->q_stats.high_water) {
+        __atomic_store_n(&(queue->q_stats.high_water), depth,
+                         __ATOMIC_RELAXED);
+    }
+    __atomic_add_fetch(&(queue->q_stats.received), 1, __ATOMIC_RELAXED);
 
     return 0;
 
+} // mqueue_trywait
+
+int
+mqueue_trywait_any(mqueue_t *queues[], int count, void **data, int *index)
+{
+    int i;
+
+    if ((NULL == queues) || (NULL == data) || (NULL == index)) {
+        return EINVAL;
+    }
+
+    // Queues are tried in the order given, so the caller decides
+    // their priority on every call.
+    for (i = 0; i < count; i++) {
+        if (mqueue_trywait(queues[i], data) == 0) {
+            *index = i;
+            return 0;
+        }
+    }
+
+    return EAGAIN;
+
+} // mqueue_trywait_any
+
+int
+mqueue_wait_any(mqueue_t *queues[], int count, void **data, int *index)
+{
+    return mqueue_wait_any_fd(queues, count, -1, data, index);
+
+} // mqueue_wait_any
+
+int
+mqueue_wait_any_fd(mqueue_t *queues[], int count, int fd,
+                   void **data, int *index)
+{
+    mqueue_signal_t *signal;
+    struct pollfd pfd[2];
+    uint64_t value;
+    int rc;
+
+    if ((NULL == queues) || (count <= 0) || (NULL == index)) {
+        return EINVAL;
+    }
+
+    // All queues must share the signal of the first one.
+    signal = queues[0]->q_signal;
+
+    for (;;) {
+        rc = mqueue_trywait_any(queues, count, data, index);
+        if (rc != EAGAIN) {
+            return rc;
+        }
+
+        // Announce that we are going to sleep, then look again so
+        // that a send racing with us is never missed.
+        __atomic_store_n(&(signal->s_waiting), 1, __ATOMIC_SEQ_CST);
+        __atomic_thread_fence(__ATOMIC_SEQ_CST);
+
+        if (mqueue_trywait_any(queues, count, data, index) == 0) {
+            __atomic_store_n(&(signal->s_waiting), 0, __ATOMIC_RELAXED);
+            return 0;
+        }
+
+        if (fd < 0) {
+            // Block until a producer signals a new event.
+            if (read(signal->s_efd, &value, sizeof(value)) < 0) {
+                if (errno != EINTR) {
+                    return errno;
+                }
+            }
+            continue;
+        }
+
+        // Block until a producer signals a new event or fd is readable.
+        pfd[0].fd = signal->s_efd;
+        pfd[0].events = POLLIN;
+        pfd[1].fd = fd;
+        pfd[1].events = POLLIN;
+
+        if (poll(pfd, 2, -1) < 0) {
+            if (errno != EINTR) {
+                __atomic_store_n(&(signal->s_waiting), 0, __ATOMIC_RELAXED);
+                return errno;
+            }
+            continue;
+        }
+
+        if (pfd[0].revents & POLLIN) {
+            if (read(signal->s_efd, &value, sizeof(value)) < 0) {
+                if ((errno != EINTR) && (errno != EAGAIN)) {
+                    return errno;
+                }
+            }
+        }
+
+        if (pfd[1].revents & (POLLIN | POLLERR | POLLHUP)) {
+            // Queued elements still take precedence; the caller
+            // learns about fd once the queues are empty.
+            __atomic_store_n(&(signal->s_waiting), 0, __ATOMIC_RELAXED);
+            if (mqueue_trywait_any(queues, count, data, index) == 0) {
+                return 0;
+            }
+            *index = -1;
+            return 0;
+        }
+    }
+
+} // mqueue_wait_any_fd
+
+int
+mqueue_wait(mqueue_t *queue, void **data)
+{
+    int index;
+
+    if ((NULL == queue) || (NULL == data)) {
+        return EINVAL;
+    }
+
+    return mqueue_wait_any(&queue, 1, data, &index);
+
 } // mqueue_wait
+
+int
+mqueue_poll_fd(mqueue_t *queue)
+{
+    mqueue_signal_t *signal = queue->q_signal;
+    mqueue_slot_t *slot;
+
+    // Same handshake as mqueue_wait_any_fd: announce that we are going
+    // to sleep, then look again so that a racing send is never missed.
+    __atomic_store_n(&(signal->s_waiting), 1, __ATOMIC_SEQ_CST);
+    __atomic_thread_fence(__ATOMIC_SEQ_CST);
+
+    slot = &(queue->q_ring[queue->q_tail & queue->q_mask]);
+    if (__atomic_load_n(&(slot->q_seq), __ATOMIC_ACQUIRE) ==
+        queue->q_tail + 1) {
+        __atomic_store_n(&(signal->s_waiting), 0, __ATOMIC_RELAXED);
+        return -1;
+    }
+
+    return signal->s_efd;
+
+} // mqueue_poll_fd
+
+void
+mqueue_poll_done(mqueue_t *queue)
+{
+    mqueue_signal_t *signal = queue->q_signal;
+    struct pollfd pfd;
+    uint64_t value;
+
+    __atomic_store_n(&(signal->s_waiting), 0, __ATOMIC_SEQ_CST);
+
+    // A producer that saw s_waiting may still be about to write, so the
+    // eventfd is drained whether or not we were woken up through it; a
+    // late write only costs one more pass.
+    pfd.fd = signal->s_efd;
+    pfd.events = POLLIN;
+    if ((poll(&pfd, 1, 0) > 0) && (pfd.revents & POLLIN)) {
+        if (read(signal->s_efd, &value, sizeof(value)) < 0) {
+            // Nothing to do; the next pass drains it.
+        }
+    }
+
+} // mqueue_poll_done
+
+unsigned long
+mqueue_depth(mqueue_t *queue)
+{
+    return __atomic_load_n(&(queue->q_head), __ATOMIC_RELAXED) -
+           __atomic_load_n(&(queue->q_tail), __ATOMIC_RELAXED);
+
+} // mqueue_depth
+
+void
+mqueue_get_stats(mqueue_t *queue, mqueue_stats_t *stats)
+{
+    stats->sent = __atomic_load_n(&(queue->q_stats.sent), __ATOMIC_RELAXED);
+    stats->received = __atomic_load_n(&(queue->q_stats.received),
+                                      __ATOMIC_RELAXED);
+    stats->overflow = __atomic_load_n(&(queue->q_stats.overflow),
+                                      __ATOMIC_RELAXED);
+    stats->wakeups = __atomic_load_n(&(queue->q_stats.wakeups),
+                                     __ATOMIC_RELAXED);
+    stats->high_water = __atomic_load_n(&(queue->q_stats.high_water),
+                                        __ATOMIC_RELAXED);
+
+} // mqueue_get_stats
@@ -503,7 +503,15 @@ collecting_distributing_state_action(lacp_per_port_variables_t *plpinfo)
 void
 start_wait_while_timer(lacp_per_port_variables_t *plpinfo)
 {
-    plpinfo->wait_while_timer_expiry_counter = AGGREGATE_WAIT_COUNT;
+    // wait_while only runs while LACP is up and the port is in its LAG.
+    if (plpinfo->lacp_up == TRUE && plpinfo->lag != NULL &&
+        LAG_member_find(plpinfo->lag, plpinfo->lport_handle) != NULL) {
+        lacp_timer_start(&lacp_tx_timer_wheel, &plpinfo->wait_while_timer,
+                         LACP_TIMER_SEC(AGGREGATE_WAIT_COUNT));
+    } else {
+        lacp_timer_hold(&lacp_tx_timer_wheel, &plpinfo->wait_while_timer,
+                        LACP_TIMER_SEC(AGGREGATE_WAIT_COUNT));
+    }
 }
 
 //******************************************************************
@@ -605,7 +613,7 @@ detach_mux_from_aggregator(lacp_per_port_variables_t *plpinfo)
 
     status = mlacp_blocking_send_detach_aggregator(plpinfo);
     if(status == R_SUCCESS) {
-        plpinfo->sport_handle = 0;
+        LACP_set_sport_handle(plpinfo, 0);
     }
 
 end:
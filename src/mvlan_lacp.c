@@ -977,7 +977,8 @@ mvlan_api_clear_sport_params(unsigned long long sport_handle)
     int                       status = R_SUCCESS;
     super_port_t              *psport;
     lacp_int_sport_params_t   *sport_lacp_params = NULL;
-    lacp_per_port_variables_t *plpinfo;
+    lacp_sport_members_t      *group;
+    lacp_per_port_variables_t *plpinfo, *next;
 
     RDEBUG(DL_VPM, "%s: Entry\n", __FUNCTION__);
 
@@ -1002,10 +1003,10 @@ mvlan_api_clear_sport_params(unsigned long long sport_handle)
 
     RDEBUG(DL_VPM, "Detaching all lports");
 
-    plpinfo = LACP_AVL_FIRST(lacp_per_port_vars_tree);
+    group = LACP_sport_members_find(sport_handle);
 
-    while (plpinfo) {
-        if (plpinfo->sport_handle == sport_handle) {
+    if (group != NULL) {
+        SPORT_MEMBER_FOREACH_SAFE(group, plpinfo, next) {
             /*
              * Make selected UNSELECTED, and cause approp. event in
              * the mux machine.
@@ -1013,8 +1014,8 @@ mvlan_api_clear_sport_params(unsigned long long sport_handle)
             plpinfo->lacp_control.selected = UNSELECTED;
             LACP_mux_fsm(E2, plpinfo->mux_fsm_state, plpinfo);
             plpinfo->lacp_control.ready_n = FALSE;
+            LACP_MEMBER_CHANGED(plpinfo);
         }
-        plpinfo = LACP_AVL_NEXT(plpinfo->avlnode);
     }
     // All logical ports have been detached from this aggregator (sport).
     // Clean up partner information so that we can reuse this sport
@@ -38,6 +38,9 @@
 #include <stdlib.h>
 #include <string.h>
 #include <unistd.h>
+#include <errno.h>
+#include <poll.h>
+#include <time.h>
 #include <pthread.h>
 #include <semaphore.h>
 #include <netinet/ether.h>
@@ -45,6 +48,8 @@
 #include <lacp_cmn.h>
 #include <mlacp_debug.h>
 #include <lacp_fsm.h>
+#include <lacp_hist.h>
+#include <mqueue.h>
 
 #include <ops-utils.h>
 #include <eventlog.h>
@@ -54,6 +59,7 @@
 #include "lacp_support.h"
 #include "mlacp_fproto.h"
 #include "mvlan_sport.h"
+#include "lacp_idpool.h"
 
 #include <unixctl.h>
 #include <dynamic-string.h>
@@ -61,6 +67,7 @@
 #include <openswitch-dflt.h>
 #include <openvswitch/vlog.h>
 #include <poll-loop.h>
+#include <timeval.h>
 #include <hash.h>
 #include <shash.h>
 
@@ -76,22 +83,11 @@ VLOG_DEFINE_THIS_MODULE(lacpd_ovsdb_if);
  * Pool definitions
  *
  *********************************/
-#define BITS_PER_BYTE           8
-#define MAX_ENTRIES_IN_POOL     256
-/* Wait up to 3 seconds when calling poll_block. */
-#define LACP_POLL_INTERVAL      3000
+#define MAX_ENTRIES_IN_POOL     PM_MAX_PORTS
 
-#define IS_AVAILABLE(a, idx)  ((a[idx/BITS_PER_BYTE] & (1 << (idx % BITS_PER_BYTE))) == 0)
-
-#define CLEAR(a, idx)   a[idx/BITS_PER_BYTE] &= ~(1 << (idx % BITS_PER_BYTE))
-#define SET(a, idx)     a[idx/BITS_PER_BYTE] |= (1 << (idx % BITS_PER_BYTE))
-
-#define POOL(name, size)     unsigned char name[size/BITS_PER_BYTE+1]
-
-int allocate_next(unsigned char *pool, int size);
-static void free_index(unsigned char *pool, int idx);
-
-POOL(port_index, MAX_ENTRIES_IN_POOL);
+/* Interface indexes, 0 to MAX_ENTRIES_IN_POOL - 1.  The index is the
+ * port number in the LACP port handle, which has 8 bits for it. */
+static lacp_idpool_t port_index;
 
 /*********************************************************/
 
@@ -122,12 +118,93 @@ static char system_id[OPS_MAC_STR_SIZE] = {0};
 static int system_priority = DFLT_SYSTEM_LACP_CONFIG_SYSTEM_PRIORITY;
 static int prev_sys_prio = DFLT_SYSTEM_LACP_CONFIG_SYSTEM_PRIORITY;
 
+/* OVSDB status write-back.
+ *
+ * The LACP protocol thread does not write to OVSDB.  What it changes
+ * is recorded in the interface (iface_data) or LAG (port_data), which is
+ * marked dirty, when its request is applied (see db_req_run()), and the
+ * OVSDB interface thread writes all the dirty interfaces and LAGs in one
+ * transaction, without waiting for it to complete.  An interface or LAG
+ * marked again before it is written is written once.
+ *
+ * The wb_dirty bits of an interface or LAG say what is to be written;
+ * its wb_inflight bits what the transaction in flight is writing.  If
+ * that transaction fails, the bits go back to wb_dirty, the values
+ * lacpd believes are in OVSDB are forgotten, and it is retried.
+ */
+#define DB_WB_LACP_STATUS   0x01    /* Interface lacp_status, lacp_current */
+#define DB_WB_HW_RX         0x02    /* Interface hw_bond_config rx_enabled */
+#define DB_WB_HW_TX         0x04    /* Interface hw_bond_config tx_enabled */
+#define DB_WB_CLEAR         0x08    /* Clear the interface's LACP status */
+#define DB_WB_PORT_STATUS   0x10    /* LAG lacp_status bond status, speed */
+#define DB_WB_PORT_SPEED    0x20    /* LAG lacp_status bond speed */
+#define DB_WB_BOND_STATUS   0x40    /* LAG and members bond_status */
+#define DB_WB_PORT_CLEAR    0x80    /* Clear the LAG's lacp_status */
+
+/* Wait at least this long before retrying a failed write-back. */
+#define DB_WB_RETRY_MS      100
+
+/* Interface indexes or LAG IDs. */
+struct db_wb_list {
+    int     *ids;
+    size_t  n;
+    size_t  allocated;
+};
+
+static struct {
+    struct db_wb_list dirty_ifaces;
+    struct db_wb_list dirty_ports;
+    struct db_wb_list inflight_ifaces;
+    struct db_wb_list inflight_ports;
+    bool pending;                   /* Something is dirty. */
+    long long int first_dirty_ms;   /* When it was first marked. */
+    long long int flush_ms;         /* When to write it. */
+    struct ovsdb_idl_txn *txn;      /* Transaction in flight. */
+    long long int txn_dirty_ms;     /* first_dirty_ms of what it writes. */
+
+    unsigned long long marks;       /* Interfaces and LAGs marked dirty */
+    unsigned long long coalesced;   /* ... that already were */
+    unsigned long long flushes;     /* Transactions started */
+    unsigned long long ifaces;      /* Interfaces written */
+    unsigned long long ports;       /* LAGs written */
+    unsigned long long commits;     /* Transactions that succeeded */
+    unsigned long long retries;     /* ... that must be tried again */
+    unsigned long long errors;      /* ... that failed otherwise */
+    long long int max_latency_ms;   /* Longest from marked to committed */
+    long long int last_latency_ms;
+} db_wb;
+
+unsigned int db_flush_delay_ms = DB_FLUSH_DELAY_MS_DEFAULT;
+
+/* OVSDB monitor counters.  What lacpd receives from ovsdb-server is
+ * only seen through the IDL, as wakeups and tracked row changes. */
+static struct {
+    unsigned long long wakeups;     /* Passes through lacpd_run() */
+    unsigned long long changes;     /* ... that found the IDL changed */
+    unsigned long long iface_rows;  /* Tracked Interface rows handled */
+    unsigned long long port_rows;   /* Tracked Port rows handled */
+} db_mon;
+
 /**
  * A hash map of daemon's internal data for all the interfaces maintained by
  * lacpd.
  */
 static struct shash all_interfaces = SHASH_INITIALIZER(&all_interfaces);
 
+/**
+ * The entries of all_interfaces indexed by their interface index, which
+ * is allocated from port_index, so that the LACPDU transmit and status
+ * update paths find an interface without walking all_interfaces.
+ */
+static struct iface_data *iface_by_index[MAX_ENTRIES_IN_POOL];
+
+/**
+ * The entries of all_interfaces hashed by the UUID of their IDL row, so
+ * that an Interface row reported by IDL change tracking, deleted rows
+ * included, is matched to its interface without using the row's data.
+ */
+static struct hmap iface_by_uuid = HMAP_INITIALIZER(&iface_by_uuid);
+
 /**
  * A hash map of daemon's internal data for the interfaces recently added to some port.
  * The idea of this hash is to prevent completely deleting an interface that was previously
@@ -141,6 +218,25 @@ static struct shash interfaces_recently_added = SHASH_INITIALIZER(&interfaces_re
  */
 static struct shash all_ports = SHASH_INITIALIZER(&all_ports);
 
+/**
+ * The entries of all_ports that have a LAG ID, indexed by it, so that the
+ * LACP status updates find the port of a LAG without walking all_ports.
+ */
+static struct port_data **port_by_lag_id = NULL;
+
+/**
+ * The entries of all_ports hashed by the UUID of their IDL row, so that
+ * a Port row reported by IDL change tracking is matched to its port.
+ */
+static struct hmap port_by_uuid = HMAP_INITIALIZER(&port_by_uuid);
+
+/* Port columns whose changes handle_port_config() acts on. */
+#define PORT_COL_LACP           0x01
+#define PORT_COL_INTERFACES     0x02
+#define PORT_COL_OTHER_CONFIG   0x04
+#define PORT_COL_ALL            (PORT_COL_LACP | PORT_COL_INTERFACES | \
+                                 PORT_COL_OTHER_CONFIG)
+
 /*************************************************************************//**
  * @ingroup lacpd_ovsdb_if
  * @brief lacpd's internal data structure to store per port data.
@@ -161,6 +257,12 @@ struct port_data {
     int                 sys_prio;           /*!< Port override for system priority */
     char                *sys_id;            /*!< Port override for system mac */
     bool                fallback_enabled ;  /*!< Default = false*/
+
+    unsigned int        wb_dirty;           /*!< DB_WB_* updates waiting to be written */
+    unsigned int        wb_inflight;        /*!< DB_WB_* updates in the transaction in flight */
+
+    struct uuid         cfg_uuid;           /*!< UUID of the row in IDL cache */
+    struct hmap_node    uuid_node;          /*!< In port_by_uuid, by cfg_uuid */
 };
 
 /* current_status values */
@@ -172,33 +274,115 @@ struct port_data {
 
 /* NOTE: These LAG IDs are only used for LACP state machine.
  *       They are not necessarily the same as h/w LAG ID. */
-#define LAG_ID_IN_USE   1
 #define VALID_LAG_ID(x) ((x)>=min_lag_id && (x)<=max_lag_id)
 
 const uint16_t min_lag_id = 1;
 uint16_t max_lag_id = 0; // This will be set in init_lag_id_pool
-uint16_t *lag_id_pool = NULL;
-
-/* To serialize updates to OVSDB.  Both LACP and OVS
- * interface threads calls to update OVSDB states. */
-pthread_mutex_t ovsdb_mutex = PTHREAD_MUTEX_INITIALIZER;
-
-/* Macros to lock and unlock mutexes in a verbose manner. */
-#define OVSDB_LOCK { \
-                VLOG_DBG("%s(%d): OVSDB_LOCK: taking lock...", __FUNCTION__, __LINE__); \
-                if (!(pthread_mutex_lock(&ovsdb_mutex))) { \
-                    VLOG_WARN("%s(%d): failed to  take OVSDB_LOCK lock...",\
-                              __FUNCTION__, __LINE__); \
-                } \
-}
+lacp_idpool_t lag_id_pool;
 
-#define OVSDB_UNLOCK { \
-                VLOG_DBG("%s(%d): OVSDB_UNLOCK: releasing lock...", __FUNCTION__, __LINE__); \
-                if (!(pthread_mutex_unlock(&ovsdb_mutex))) { \
-                    VLOG_WARN("%s(%d): failed to  release OVSDB_LOCK lock...",\
-                              __FUNCTION__, __LINE__); \
-                } \
-}
+/* Requests from the LACP protocol thread.
+ *
+ * The IDL and the interface and LAG data below belong to the OVSDB
+ * interface thread.  The LACP protocol thread does not touch them; its
+ * status updates (db_update_interface(), ops_attach_port_in_hw() and
+ * the like) are sent as typed requests on db_req_queue, and applied by
+ * the OVSDB interface thread at the start of each pass of its loop, in
+ * the order they were sent.  Neither thread ever waits for the other.
+ *
+ * Requests come from a pool allocated once, at startup.  Applied ones go
+ * back to the protocol thread on db_req_returned, a stack the OVSDB
+ * interface thread pushes to and the protocol thread takes whole.  At
+ * most DB_REQ_QUEUE_MAX requests are out with the OVSDB interface thread;
+ * past that, the protocol thread keeps new requests on its overflow list,
+ * in order, and moves them to the queue as requests come back.  A request
+ * on the overflow list replaces the one for the same interface or LAG it
+ * supersedes (the interface status, its hardware bond config, its LAG
+ * add, a LAG's clear or update), so the list, and the pool with it, are
+ * bounded.  The OVSDB interface thread sends the protocol thread a
+ * MLm_vpm_api__db_req_room message when it hands requests back while the
+ * protocol thread has some waiting.
+ */
+enum db_req_type {
+    DB_REQ_IFACE_STATUS,        /* db_update_interface() */
+    DB_REQ_HW_ATTACH,           /* ops_attach_port_in_hw() */
+    DB_REQ_HW_DETACH,           /* ops_detach_port_in_hw() */
+    DB_REQ_HW_EGR_ENABLE,       /* ops_trunk_port_egr_enable() */
+    DB_REQ_LAG_ADD_PORT,        /* db_add_lag_port() */
+    DB_REQ_LAG_DEL_PORT,        /* db_delete_lag_port() */
+    DB_REQ_LAG_CLEAR,           /* db_clear_lag_partner_info() */
+    DB_REQ_LAG_UPDATE,          /* db_update_lag_partner_info() */
+};
+
+struct db_req {
+    enum db_req_type    type;
+    uint16_t            lag_id;
+    int                 port;               /* Interface index */
+    bool                has_speed;          /* lag_member_speed is set */
+    unsigned int        lag_member_speed;
+    state_parameters_t  local_state;        /* ADD_PORT, IFACE_STATUS */
+    struct lacp_status_snapshot status;     /* IFACE_STATUS */
+    bool                update_rx;          /* HW_* */
+    bool                rx_enabled;
+    bool                update_tx;
+    bool                tx_enabled;
+    unsigned long long  sent_ns;
+    struct db_req       *next;              /* Free, overflow or returned */
+    struct db_req       *prev;              /* Overflow list */
+    struct db_req       **slot;             /* Overflow slot pointing here */
+};
+
+/* Requests out with the OVSDB interface thread at most. */
+#define DB_REQ_QUEUE_MAX        1024
+#if DB_REQ_QUEUE_MAX > MQUEUE_DEFAULT_SIZE
+#error "db_req_queue can't hold DB_REQ_QUEUE_MAX requests"
+#endif
+
+/* Requests on the overflow list at most: per interface, a status, a
+ * hardware bond config, a LAG add and a LAG delete (LAG adds and deletes
+ * of an interface alternate, and a delete cancels the add before it), and
+ * per LAG, a clear and an update. */
+#define DB_REQ_OVERFLOW_MAX(lags)   (4 * PM_MAX_PORTS + 2 * ((lags) + 1))
+
+static mqueue_t db_req_queue;
+
+/* Every request, allocated by lacpd_ovsdb_if_init(). */
+static struct db_req *db_req_pool;
+static unsigned int db_req_pool_size;
+
+/* Applied requests, pushed by the OVSDB interface thread. */
+static struct db_req *db_req_returned;
+
+/* Set by the protocol thread when requests wait on its overflow list,
+ * cleared by the OVSDB interface thread when it sends the wakeup. */
+static bool db_req_overflowing;
+
+/* Protocol thread only, but for the counters read by the dump. */
+static struct {
+    struct db_req *free;            /* Pool requests not in use */
+    unsigned int inflight;          /* Sent and not yet taken back */
+    struct db_req *head;            /* Overflow list */
+    struct db_req *tail;
+    unsigned long count;
+    unsigned long high_water;
+    unsigned long long coalesced;   /* Superseded on the overflow list */
+    struct db_req *status[PM_MAX_PORTS];
+    struct db_req *hw[PM_MAX_PORTS];
+    struct db_req *lag_add[PM_MAX_PORTS];
+    struct db_req **lag_clear;      /* By LAG ID, 0 to max_lag_id */
+    struct db_req **lag_update;
+} db_req_overflow;
+
+/* Lock hold time, before and after.  The OVSDB interface thread used to
+ * hold the OVSDB lock for each pass of its loop, and the protocol thread
+ * for each status update; pass_us is the former, send_ns what a status
+ * update costs the protocol thread now. */
+static struct {
+    lacp_hist_t send_ns;            /* Protocol thread: build and send */
+    lacp_hist_t delay_us;           /* Sent to applied */
+    lacp_hist_t batch;              /* Requests applied per pass */
+    lacp_hist_t pass_us;            /* OVSDB interface thread pass */
+    unsigned long long full;        /* Sends that started an overflow */
+} db_req_perf;
 
 static int update_interface_lag_eligibility(struct iface_data *idp);
 static int update_interface_hw_bond_config_map_entry(struct iface_data *idp,
@@ -210,6 +394,12 @@ static void update_port_bond_status_map_entry(struct port_data *portp);
 static char *lacp_mode_str(enum ovsrec_port_lacp_e mode);
 static void db_clear_interface(struct iface_data *idp);
 static void db_update_port_status(struct port_data *portp);
+static void db_update_port_speed(struct port_data *portp);
+static void db_writeback_run(void);
+static void db_req_run(void);
+static void db_req_wait(void);
+static void send_db_req_room_msg(void);
+static void db_req_pool_init(void);
 void db_clear_lag_partner_info_port(struct port_data *portp);
 
 /**********************************************************************/
@@ -218,52 +408,50 @@ void db_clear_lag_partner_info_port(struct port_data *portp);
 static void
 init_lag_id_pool(uint16_t count)
 {
-    if (lag_id_pool == NULL) {
+    if (port_by_lag_id == NULL) {
         /* Track how many we're allocating. */
         max_lag_id = count;
 
-        /* Allocate an extra one to skip LAG ID 0. */
-        lag_id_pool = (uint16_t *)xcalloc(count+1, sizeof(uint16_t));
+        /* LAG ID 0 means no LAG ID. */
+        if (lacp_idpool_init(&lag_id_pool, min_lag_id, max_lag_id)) {
+            VLOG_FATAL("lacpd: failed to allocate %d LAG IDs", count);
+        }
+        port_by_lag_id = xcalloc(count + 1, sizeof(struct port_data *));
         VLOG_DBG("lacpd: allocated %d LAG IDs", count);
     }
 } /* init_lag_id_pool */
 
 static uint16_t
-alloc_lag_id(void)
+alloc_lag_id(struct port_data *portp)
 {
-    if (lag_id_pool != NULL) {
-        uint16_t id;
-
-        for (id=min_lag_id; id<=max_lag_id; id++) {
-
-            if (lag_id_pool[id] == LAG_ID_IN_USE) {
-                continue;
-            }
+    unsigned int id;
 
-            /* Found an available LAG_ID. */
-            lag_id_pool[id] = LAG_ID_IN_USE;
-            return id;
-        }
-    } else {
+    if (port_by_lag_id == NULL) {
         VLOG_ERR("LAG ID pool not initialized!");
+        return 0;
     }
 
-    /* No free LAG ID available if we get here. */
-    return 0;
+    if (lacp_idpool_alloc(&lag_id_pool, &id)) {
+        /* No free LAG ID available. */
+        return 0;
+    }
+
+    port_by_lag_id[id] = portp;
+    return id;
 
 } /* alloc_lag_id */
 
 static void
 free_lag_id(uint16_t id)
 {
-    if ((lag_id_pool != NULL) && VALID_LAG_ID(id)) {
-        if (lag_id_pool[id] == LAG_ID_IN_USE) {
-            lag_id_pool[id] = 0;
+    if ((port_by_lag_id != NULL) && VALID_LAG_ID(id)) {
+        if (lacp_idpool_free(&lag_id_pool, id) == 0) {
+            port_by_lag_id[id] = NULL;
         } else {
             VLOG_ERR("Trying to free an unused LAGID (%d)!", id);
         }
     } else {
-        if (lag_id_pool == NULL) {
+        if (port_by_lag_id == NULL) {
             VLOG_ERR("Attempt to free LAG ID when"
                      "pool is not initialized!");
         } else {
@@ -276,18 +464,11 @@ free_lag_id(uint16_t id)
 struct port_data *
 find_port_data_by_lag_id(int lag_id)
 {
-    struct port_data *pdp;
-    struct shash_node *sh_node;
-    SHASH_FOR_EACH(sh_node, &all_ports) {
-        pdp = sh_node->data;
-        if (pdp) {
-            if (pdp->lag_id == lag_id) {
-                return pdp;
-            }
-        }
+    if ((port_by_lag_id == NULL) || !VALID_LAG_ID(lag_id)) {
+        return NULL;
     }
 
-    return NULL;
+    return port_by_lag_id[lag_id];
 } /* find_port_data_by_lag_id */
 
 static int
@@ -308,19 +489,11 @@ valid_lacp_timeout(const char *cp)
 struct iface_data *
 find_iface_data_by_index(int index)
 {
-    struct iface_data *idp;
-    struct shash_node *sh_node;
-
-    SHASH_FOR_EACH(sh_node, &all_interfaces) {
-        idp = sh_node->data;
-        if (idp) {
-            if (idp->index == index) {
-                return idp;
-            }
-        }
+    if (index < 0 || index >= MAX_ENTRIES_IN_POOL) {
+        return NULL;
     }
 
-    return NULL;
+    return iface_by_index[index];
 } /* find_iface_data_by_index */
 
 
@@ -332,7 +505,7 @@ alloc_msg(int size)
 {
     void *msg;
 
-    msg = xzalloc(size);
+    msg = ml_event_alloc(size);
 
     if (msg == NULL) {
         VLOG_ERR("%s: malloc failed.",__FUNCTION__);
@@ -650,6 +823,7 @@ send_config_lport_msg(struct iface_data *info_ptr)
          */
         msg->port_id          = (info_ptr->port_id == 0) ?
                                     info_ptr->index+1 : info_ptr->port_id;
+        msg->lag_id           = info_ptr->cfg_lag_id;
         msg->port_key         = info_ptr->actor_key;
         msg->port_priority    = info_ptr->actor_priority;
         msg->lacp_state       = info_ptr->lacp_state;
@@ -818,6 +992,56 @@ send_fallback_status_msg(struct iface_data *info_ptr, bool fallback_status)
     }
 } /* send_fallback_status_msg */
 
+static void
+send_lport_info_msg(struct iface_data *info_ptr, bool add)
+{
+    ML_event *event;
+    struct MLt_vpm_api__lport_info *msg;
+    int msgSize;
+
+    VLOG_DBG("%s: interface=%s, index=%d, add=%d", __FUNCTION__,
+             info_ptr->name, info_ptr->index, add);
+
+    msgSize = sizeof(ML_event) + sizeof(struct MLt_vpm_api__lport_info);
+
+    event = (ML_event *)alloc_msg(msgSize);
+
+    if (event != NULL) {
+        /*** From LPORT peer. ***/
+        event->sender.peer = ml_lport_index;
+        event->msgnum = (add ? MLm_vpm_api__set_lport_info :
+                         MLm_vpm_api__clear_lport_info);
+
+        /* Set up msg pointer to just after the event
+         * structure itself. This must be done here since the
+         * sender's event->msg pointer points sender's memory
+         * space, and will result in fatal errors if we try to
+         * access it in LACP process space.
+         */
+        msg = (struct MLt_vpm_api__lport_info *)(event+1);
+        msg->port = info_ptr->index;
+        strncpy(msg->name, info_ptr->name, sizeof(msg->name) - 1);
+
+        ml_send_event(event);
+    }
+} /* send_lport_info_msg */
+
+/* Tells the LACP protocol thread that requests it sent were applied, so
+ * that it moves those waiting on its overflow list to db_req_queue. */
+static void
+send_db_req_room_msg(void)
+{
+    ML_event *event;
+
+    event = (ML_event *)alloc_msg(sizeof(ML_event));
+
+    if (event != NULL) {
+        event->sender.peer = ml_lport_index;
+        event->msgnum = MLm_vpm_api__db_req_room;
+        ml_send_event(event);
+    }
+} /* send_db_req_room_msg */
+
 static void
 configure_lacp_on_interface(struct port_data *portp, struct iface_data *idp)
 {
@@ -851,12 +1075,21 @@ configure_lacp_on_interface(struct port_data *portp, struct iface_data *idp)
 
 /**
  * @details
- * Establishes an IDL session with OVSDB server. Registers the following
- * tables/columns for caching and change notification:
+ * Establishes an IDL session with OVSDB server.  Only the columns lacpd
+ * reads or writes are replicated, and only the ones whose changes lacpd
+ * acts on wake it up:
+ *
+ *     System:    cur_cfg, system_mac, lacp_config.
+ *     Port:      name, lacp, interfaces, other_config.
+ *                lacp_status and bond_status are written by lacpd.
+ *     Interface: name, duplex, link_state, link_speed, other_config.
+ *                type and hw_intf_info are only read when the
+ *                interface is added.  hw_bond_config, lacp_current,
+ *                lacp_status and bond_status are written by lacpd.
  *
- *     System:cur_cfg
- *     Port:name, lacp, and interfaces columns.
- *     Interface:name, link_state, link_speed, hw_bond_config columns.
+ * lacpd has to replicate the columns it writes, since the IDL only
+ * writes to replicated columns of existing rows, but their changes,
+ * mostly lacpd's own writes, do not wake it up.
  */
 void
 lacpd_ovsdb_if_init(const char *db_path)
@@ -873,50 +1106,87 @@ lacpd_ovsdb_if_init(const char *db_path)
     ovsdb_idl_add_column(idl, &ovsrec_system_col_system_mac);
     ovsdb_idl_add_column(idl, &ovsrec_system_col_lacp_config);
 
-    /* Cache Subsystem table. */
-    ovsdb_idl_add_table(idl, &ovsrec_table_subsystem);
-    ovsdb_idl_add_column(idl, &ovsrec_subsystem_col_other_info);
-
     /* Cache Port table and columns. */
     ovsdb_idl_add_table(idl, &ovsrec_table_port);
     ovsdb_idl_add_column(idl, &ovsrec_port_col_name);
     ovsdb_idl_add_column(idl, &ovsrec_port_col_lacp);
     ovsdb_idl_add_column(idl, &ovsrec_port_col_interfaces);
+    ovsdb_idl_add_column(idl, &ovsrec_port_col_other_config);
     ovsdb_idl_add_column(idl, &ovsrec_port_col_lacp_status);
     ovsdb_idl_omit_alert(idl, &ovsrec_port_col_lacp_status);
-    ovsdb_idl_add_column(idl, &ovsrec_port_col_other_config);
     ovsdb_idl_add_column(idl, &ovsrec_port_col_bond_status);
     ovsdb_idl_omit_alert(idl, &ovsrec_port_col_bond_status);
 
+    /* Track the changes to the Port columns lacpd reads, so that
+     * update_port_cache() only visits the rows that changed, and
+     * handle_port_config() only the columns that did. */
+    ovsdb_idl_track_add_column(idl, &ovsrec_port_col_name);
+    ovsdb_idl_track_add_column(idl, &ovsrec_port_col_lacp);
+    ovsdb_idl_track_add_column(idl, &ovsrec_port_col_interfaces);
+    ovsdb_idl_track_add_column(idl, &ovsrec_port_col_other_config);
+
     /* Cache Interface table and columns. */
     ovsdb_idl_add_table(idl, &ovsrec_table_interface);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_name);
-    ovsdb_idl_add_column(idl, &ovsrec_interface_col_type);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_duplex);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_link_state);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_link_speed);
+    ovsdb_idl_add_column(idl, &ovsrec_interface_col_other_config);
+    ovsdb_idl_add_column(idl, &ovsrec_interface_col_type);
+    ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_type);
+    ovsdb_idl_add_column(idl, &ovsrec_interface_col_hw_intf_info);
+    ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_hw_intf_info);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_hw_bond_config);
     ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_hw_bond_config);
-    ovsdb_idl_add_column(idl, &ovsrec_interface_col_hw_intf_info);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_lacp_current);
     ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_lacp_current);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_lacp_status);
     ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_lacp_status);
-    ovsdb_idl_add_column(idl, &ovsrec_interface_col_other_config);
     ovsdb_idl_add_column(idl, &ovsrec_interface_col_bond_status);
     ovsdb_idl_omit_alert(idl, &ovsrec_interface_col_bond_status);
 
+    /* Track the changes to the Interface columns lacpd reads, so that
+     * update_interface_cache() only visits the rows that changed. */
+    ovsdb_idl_track_add_column(idl, &ovsrec_interface_col_name);
+    ovsdb_idl_track_add_column(idl, &ovsrec_interface_col_duplex);
+    ovsdb_idl_track_add_column(idl, &ovsrec_interface_col_link_state);
+    ovsdb_idl_track_add_column(idl, &ovsrec_interface_col_link_speed);
+    ovsdb_idl_track_add_column(idl, &ovsrec_interface_col_other_config);
+
     /* Initialize LAG ID pool. */
     /* OPS_TODO: read # of LAGs from somewhere? */
     init_lag_id_pool(128);
 
+    /* Initialize interface index pool. */
+    if (lacp_idpool_init(&port_index, 0, MAX_ENTRIES_IN_POOL - 1)) {
+        VLOG_FATAL("lacpd: failed to allocate interface indexes");
+    }
+
+    if (mqueue_init(&db_req_queue)) {
+        VLOG_FATAL("lacpd: failed to create the OVSDB request queue");
+    }
+    db_req_pool_init();
+
 } /* lacpd_ovsdb_if_init */
 
 void
 lacpd_ovsdb_if_exit(void)
 {
+    if (db_wb.txn != NULL) {
+        ovsdb_idl_txn_destroy(db_wb.txn);
+        db_wb.txn = NULL;
+    }
+    free(db_wb.dirty_ifaces.ids);
+    free(db_wb.dirty_ports.ids);
+    free(db_wb.inflight_ifaces.ids);
+    free(db_wb.inflight_ports.ids);
+    hmap_destroy(&port_by_uuid);
+    hmap_init(&port_by_uuid);
     shash_destroy_free_data(&all_ports);
+    hmap_destroy(&iface_by_uuid);
+    hmap_init(&iface_by_uuid);
     shash_destroy_free_data(&all_interfaces);
+    memset(iface_by_index, 0, sizeof(iface_by_index));
     shash_destroy_free_data(&interfaces_recently_added);
     ovsdb_idl_destroy(idl);
 } /* lacpd_ovsdb_if_exit */
@@ -927,8 +1197,19 @@ del_old_interface(struct shash_node *sh_node)
 {
     if (sh_node) {
         struct iface_data *idp = sh_node->data;
+        ml_link_state_reset(PM_SMPT2HANDLE(0, 0, idp->index,
+                                           idp->cycl_port_type));
+        if (idp->index >= 0) {
+            /* The protocol thread drops its copy of the interface data
+             * before the index can be given to another interface. */
+            send_lport_info_msg(idp, false);
+        }
         free(idp->name);
-        free_index(port_index, idp->index);
+        if (idp->index >= 0) {
+            iface_by_index[idp->index] = NULL;
+            lacp_idpool_free(&port_index, idp->index);
+        }
+        hmap_remove(&iface_by_uuid, &idp->uuid_node);
         free(idp);
         shash_delete(&all_interfaces, sh_node);
     }
@@ -957,6 +1238,7 @@ add_new_interface(const struct ovsrec_interface *ifrow)
         free(idp);
     } else {
         int port_priority = 0;
+        unsigned int index;
 
         /* Save the interface name. */
         idp->name = xstrdup(ifrow->name);
@@ -964,13 +1246,20 @@ add_new_interface(const struct ovsrec_interface *ifrow)
         /* Allocate interface index. */
         /* -- use hw_intf_info:switch_intf_id for now.
          * -- may be overridden with OVS's other_config:lacp-port-id. */
-        idp->index = allocate_next(port_index, MAX_ENTRIES_IN_POOL);
-        if (idp->index < 0) {
+        if (lacp_idpool_alloc(&port_index, &index) == 0) {
+            idp->index = index;
+            iface_by_index[idp->index] = idp;
+            send_lport_info_msg(idp, true);
+        } else {
+            idp->index = -1;
             VLOG_ERR("Invalid interface index=%d", idp->index);
         }
 
         /* Save the reference to IDL row. */
         idp->cfg = ifrow;
+        idp->cfg_uuid = ifrow->header_.uuid;
+        hmap_insert(&iface_by_uuid, &idp->uuid_node,
+                    uuid_hash(&idp->cfg_uuid));
 
         idp->lag_eligible = false;
         idp->lacp_current = false;
@@ -1044,56 +1333,88 @@ add_new_interface(const struct ovsrec_interface *ifrow)
     }
 } /* add_new_interface */
 
+static struct iface_data *
+find_iface_data_by_uuid(const struct uuid *uuid)
+{
+    struct iface_data *idp;
+
+    HMAP_FOR_EACH_WITH_HASH (idp, uuid_node, uuid_hash(uuid),
+                             &iface_by_uuid) {
+        if (uuid_equals(&idp->cfg_uuid, uuid)) {
+            return idp;
+        }
+    }
+
+    return NULL;
+} /* find_iface_data_by_uuid */
+
 /**
  * Update daemon's internal interface data structures based on the latest
  * data from OVSDB.
  * Takes necessary actions to propagate database changes.
  *
+ * Only the Interface rows IDL change tracking reports as inserted,
+ * modified or deleted since the last call are looked at.
+ *
  * @return positive integer if an ovsdb write is required 0 otherwise.
  */
 static int
 update_interface_cache(void)
 {
-    struct shash sh_idl_interfaces;
     const struct ovsrec_interface *ifrow;
-    struct shash_node *sh_node, *sh_next;
+    const struct ovsrec_interface *new_row;
+    struct iface_data *idp;
     int rc = 0;
 
-    /* Collect all the interfaces in the DB. */
-    shash_init(&sh_idl_interfaces);
-    OVSREC_INTERFACE_FOR_EACH(ifrow, idl) {
-        if (!shash_add_once(&sh_idl_interfaces, ifrow->name, ifrow)) {
-            VLOG_WARN("interface %s specified twice", ifrow->name);
+    /* Delete old interfaces.  When the IDL reconnects it deletes every
+     * row and inserts it again; an interface whose row is back keeps its
+     * state and only moves to the new row. */
+    OVSREC_INTERFACE_FOR_EACH_TRACKED(ifrow, idl) {
+        db_mon.iface_rows++;
+        if (ovsrec_interface_row_get_seqno(ifrow,
+                                           OVSDB_IDL_CHANGE_DELETE) == 0) {
+            continue;
+        }
+        idp = find_iface_data_by_uuid(&ifrow->header_.uuid);
+        if (idp == NULL || idp->cfg != ifrow) {
+            continue;
+        }
+        new_row = ovsrec_interface_get_for_uuid(idl, &ifrow->header_.uuid);
+        if (new_row != NULL) {
+            idp->cfg = new_row;
+        } else {
+            VLOG_DBG("Found a deleted interface %s", idp->name);
+            del_old_interface(shash_find(&all_interfaces, idp->name));
         }
     }
 
-    /* Delete old interfaces. */
-    SHASH_FOR_EACH_SAFE(sh_node, sh_next, &all_interfaces) {
-        struct iface_data *idp =
-            shash_find_data(&sh_idl_interfaces, sh_node->name);
-        if (!idp) {
-            VLOG_DBG("Found a deleted interface %s", sh_node->name);
-            del_old_interface(sh_node);
+    /* Add new interfaces and check for changes in the others. */
+    OVSREC_INTERFACE_FOR_EACH_TRACKED(ifrow, idl) {
+        unsigned int flag = 0;
+        int val;
+        int key = 0;
+        const char* key_str = NULL;
+        unsigned int new_speed;
+        enum ovsrec_interface_duplex_e new_duplex;
+        enum ovsrec_interface_link_state_e new_link_state;
+        int new_port_id;
+
+        if (ovsrec_interface_row_get_seqno(ifrow,
+                                           OVSDB_IDL_CHANGE_DELETE) > 0) {
+            continue;
         }
-    }
 
-    /* Add new interfaces. */
-    SHASH_FOR_EACH(sh_node, &sh_idl_interfaces) {
-        struct iface_data *idp =
-            shash_find_data(&all_interfaces, sh_node->name);
-        if (!idp) {
-            VLOG_DBG("Found an added interface %s", sh_node->name);
-            add_new_interface(sh_node->data);
+        idp = find_iface_data_by_uuid(&ifrow->header_.uuid);
+        if (idp == NULL) {
+            VLOG_DBG("Found an added interface %s", ifrow->name);
+            add_new_interface(ifrow);
+            idp = find_iface_data_by_uuid(&ifrow->header_.uuid);
+            if (idp == NULL) {
+                continue;
+            }
             rc++;
         }
-    }
-
-    /* Check for changes in the interface row entries. */
-    SHASH_FOR_EACH(sh_node, &all_interfaces) {
-        struct iface_data *idp = sh_node->data;
-        const struct ovsrec_interface *ifrow =
-            shash_find_data(&sh_idl_interfaces, sh_node->name);
-        unsigned int flag = 0;
+        idp->cfg = ifrow;
 
         /* Internal interfaces doesn't participate in LAGs. */
         if (idp->intf_type == INTERFACE_TYPE_INTERNAL) {
@@ -1101,141 +1422,125 @@ update_interface_cache(void)
             continue;
         }
 
-        /* Check for changes to row. */
-        if (OVSREC_IDL_IS_ROW_INSERTED(ifrow, idl_seqno) ||
-            OVSREC_IDL_IS_ROW_MODIFIED(ifrow, idl_seqno)) {
+        /* Update actor_priority */
+        val = smap_get_int(&(ifrow->other_config),
+                           INTERFACE_OTHER_CONFIG_MAP_LACP_PORT_PRIORITY, 1);
+        if (!IS_VALID_ACTOR_PRI(val)) {
+            val = DEFAULT_PORT_PRIORITY;
+        }
 
-            int val;
-            int key = 0;
-            const char* key_str = NULL;
-            unsigned int new_speed;
-            enum ovsrec_interface_duplex_e new_duplex;
-            enum ovsrec_interface_link_state_e new_link_state;
-            int new_port_id;
+        if (val != idp->actor_priority) {
+            idp->actor_priority = val;
+            flag = 1;
+        }
 
-            /* Update actor_priority */
-            val = smap_get_int(&(ifrow->other_config),
-                               INTERFACE_OTHER_CONFIG_MAP_LACP_PORT_PRIORITY, 1);
-            if (!IS_VALID_ACTOR_PRI(val)) {
-                val = DEFAULT_PORT_PRIORITY;
+        new_link_state = INTERFACE_LINK_STATE_DOWN;
+        if (ifrow->link_state) {
+            if (!strcmp(ifrow->link_state, OVSREC_INTERFACE_LINK_STATE_UP)) {
+                new_link_state = INTERFACE_LINK_STATE_UP;
             }
+        }
 
-            if (val != idp->actor_priority) {
-                idp->actor_priority = val;
-                flag = 1;
-            }
+        /* Although speed & duplex should only change if link state
+           has changed, the IDL change notices may not all come at
+           the same time! */
+        new_speed = 0;
+        if (ifrow->n_link_speed > 0) {
+            /* There should only be one speed. */
+            new_speed = INTF_TO_LACP_LINK_SPEED(ifrow->link_speed[0]);
+        }
 
-            new_link_state = INTERFACE_LINK_STATE_DOWN;
-            if (ifrow->link_state) {
-                if (!strcmp(ifrow->link_state, OVSREC_INTERFACE_LINK_STATE_UP)) {
-                    new_link_state = INTERFACE_LINK_STATE_UP;
-                }
+        new_duplex = INTERFACE_DUPLEX_HALF;
+        if (ifrow->duplex) {
+            if (!strcmp(ifrow->duplex, OVSREC_INTERFACE_DUPLEX_FULL)) {
+                new_duplex = INTERFACE_DUPLEX_FULL;
             }
+        }
+        /* Update Port Id*/
+        new_port_id = smap_get_int(&(ifrow->other_config),
+                                    INTERFACE_OTHER_CONFIG_MAP_LACP_PORT_ID,
+                                    0);
 
-            /* Although speed & duplex should only change if link state
-               has changed, the IDL change notices may not all come at
-               the same time! */
-            new_speed = 0;
-            if (ifrow->n_link_speed > 0) {
-                /* There should only be one speed. */
-                new_speed = INTF_TO_LACP_LINK_SPEED(ifrow->link_speed[0]);
-            }
+        if (!IS_VALID_PORT_ID(new_port_id)) {
+            new_port_id = 0;
+        }
 
-            new_duplex = INTERFACE_DUPLEX_HALF;
-            if (ifrow->duplex) {
-                if (!strcmp(ifrow->duplex, OVSREC_INTERFACE_DUPLEX_FULL)) {
-                    new_duplex = INTERFACE_DUPLEX_FULL;
-                }
-            }
-            /* Update Port Id*/
-            new_port_id = smap_get_int(&(ifrow->other_config),
-                                        INTERFACE_OTHER_CONFIG_MAP_LACP_PORT_ID,
-                                        0);
+        if (new_port_id != idp->port_id) {
+            VLOG_DBG("Interface %s port_id changed in DB: "
+                     "new port_id=%d",
+                     ifrow->name, new_port_id);
+            idp->port_id = new_port_id;
+            flag = 1;
+        }
 
-            if (!IS_VALID_PORT_ID(new_port_id)) {
-                new_port_id = 0;
+        /* Update Aggregation Key */
+        key_str = smap_get(&(ifrow->other_config),
+                  INTERFACE_OTHER_CONFIG_MAP_LACP_AGGREGATION_KEY);
+        if(key_str)
+        {
+            key = atoi(key_str);
+
+            if (!IS_VALID_AGGR_KEY(key)) {
+                key = -1;
             }
 
-            if (new_port_id != idp->port_id) {
-                VLOG_DBG("Interface %s port_id changed in DB: "
-                         "new port_id=%d",
-                         ifrow->name, new_port_id);
-                idp->port_id = new_port_id;
+            if (key != idp->actor_key) {
+                VLOG_DBG("Interface %s actor_key change in DB: "
+                        "new actor_key=%d",
+                        ifrow->name, key);
+                idp->actor_key = key;
                 flag = 1;
             }
+        }
 
-            /* Update Aggregation Key */
-            key_str = smap_get(&(ifrow->other_config),
-                      INTERFACE_OTHER_CONFIG_MAP_LACP_AGGREGATION_KEY);
-            if(key_str)
-            {
-                key = atoi(key_str);
-
-                if (!IS_VALID_AGGR_KEY(key)) {
-                    key = -1;
-                }
+        if (flag) {
+            send_config_lport_msg(idp);
+        }
 
-                if (key != idp->actor_key) {
-                    VLOG_DBG("Interface %s actor_key change in DB: "
-                            "new actor_key=%d",
-                            ifrow->name, key);
-                    idp->actor_key = key;
-                    flag = 1;
-                }
-            }
+        if ((new_link_state != idp->link_state) ||
+            (new_speed != idp->link_speed) ||
+            (new_duplex != idp->duplex)) {
 
-            if (flag) {
-                send_config_lport_msg(idp);
+            idp->link_state = new_link_state;
+            idp->link_speed = new_speed;
+            idp->duplex = new_duplex;
+            if (idp->port_datap != NULL) {
+                update_member_interface_bond_status(idp->port_datap);
+                rc++;
             }
 
-            if ((new_link_state != idp->link_state) ||
-                (new_speed != idp->link_speed) ||
-                (new_duplex != idp->duplex)) {
-
-                idp->link_state = new_link_state;
-                idp->link_speed = new_speed;
-                idp->duplex = new_duplex;
-                if (idp->port_datap != NULL) {
-                    update_member_interface_bond_status(idp->port_datap);
-                    rc++;
-                }
-
-                VLOG_DBG("Interface %s link state changed in DB: "
-                         "new_speed=%d, new_link=%s, new_duplex=%s, ",
-                         ifrow->name, idp->link_speed,
-                         (idp->link_state == INTERFACE_LINK_STATE_UP ? "up" : "down"),
-                         (idp->duplex == INTERFACE_DUPLEX_FULL ? "full" : "half"));
+            VLOG_DBG("Interface %s link state changed in DB: "
+                     "new_speed=%d, new_link=%s, new_duplex=%s, ",
+                     ifrow->name, idp->link_speed,
+                     (idp->link_state == INTERFACE_LINK_STATE_UP ? "up" : "down"),
+                     (idp->duplex == INTERFACE_DUPLEX_FULL ? "full" : "half"));
 
-                if (update_interface_lag_eligibility(idp)) {
-                    rc++;
-                } else {
-                    /* If no change to eligibility, but this interface is
-                     * part of a dynamic LAG, then we need to send link
-                     * change notification message to the state machine. */
-                    if (idp->lag_eligible && idp->port_datap &&
-                        LACP_ENABLED_ON_PORT(idp->port_datap->lacp_mode)) {
-
-                        send_link_state_change_msg(idp);
-
-                        /* OPS_TODO: need to trigger the LACP state machine
-                         * to advance to collecting/distributing state.  In the
-                         * past, this was triggered by stpd when it set the port
-                         * to forwarding.  In OpenSwitch environment, this really
-                         * needs to be done only after the interface has been
-                         * attached to the h/w LAG, thus collecting-ready.
-                         * For now, force this trigger here. */
-
-                        send_lport_lacp_change_msg(idp, (LACP_LPORT_TIMEOUT_FIELD_PRESENT |
-                                                         LACP_LPORT_HW_COLL_STATUS_PRESENT));
-                    }
+            if (update_interface_lag_eligibility(idp)) {
+                rc++;
+            } else {
+                /* If no change to eligibility, but this interface is
+                 * part of a dynamic LAG, then we need to send link
+                 * change notification message to the state machine. */
+                if (idp->lag_eligible && idp->port_datap &&
+                    LACP_ENABLED_ON_PORT(idp->port_datap->lacp_mode)) {
+
+                    send_link_state_change_msg(idp);
+
+                    /* OPS_TODO: need to trigger the LACP state machine
+                     * to advance to collecting/distributing state.  In the
+                     * past, this was triggered by stpd when it set the port
+                     * to forwarding.  In OpenSwitch environment, this really
+                     * needs to be done only after the interface has been
+                     * attached to the h/w LAG, thus collecting-ready.
+                     * For now, force this trigger here. */
+
+                    send_lport_lacp_change_msg(idp, (LACP_LPORT_TIMEOUT_FIELD_PRESENT |
+                                                     LACP_LPORT_HW_COLL_STATUS_PRESENT));
                 }
             }
         }
     }
 
-    /* Destroy the shash of the IDL interfaces. */
-    shash_destroy(&sh_idl_interfaces);
-
     return rc;
 } /* update_interface_cache */
 
@@ -1243,7 +1548,7 @@ update_interface_cache(void)
  * Update hw_bond_config map column of interface row with entry_key and
  * entry_value pair.
  *
- * NOTE: ovsdb_mutex must be taken prior to calling this function.
+ * NOTE: must be called from the OVSDB interface thread.
  *
  * @param idp  iface_data pointer to the interface entry.
  * @param entry_key name of the key.
@@ -1320,7 +1625,7 @@ update_port_fallback_flag(const struct ovsrec_port *row,
  * Update bond_status configuration for the configured member interfaces
  * of one LAG.
  *
- * NOTE: ovsdb_mutex must be taken prior to calling this function.
+ * NOTE: must be called from the OVSDB interface thread.
  *
  * @param portp port_data pointer to the port entry.
  */
@@ -1343,7 +1648,7 @@ update_member_interface_bond_status(struct port_data *portp)
 /**
  * Update bond_status configuration for a given interface
  *
- * NOTE: ovsdb_mutex must be taken prior to calling this function.
+ * NOTE: must be called from the OVSDB interface thread.
  *
  * @param idp  iface_data pointer to the interface entry.
  */
@@ -1406,7 +1711,7 @@ update_interface_bond_status_map_entry(struct iface_data *idp)
  * Remove bond_status configuration for a given interface that is
  * not part of any LAG.
  *
- * NOTE: ovsdb_mutex must be taken prior to calling this function.
+ * NOTE: must be called from the OVSDB interface thread.
  *
  * @param idp  iface_data pointer to the interface entry.
  */
@@ -1664,13 +1969,19 @@ update_interface_lag_eligibility(struct iface_data *idp)
 /**
  * Handles Port related configuration changes for a given port table entry.
  *
+ * Only the parts of the configuration in the changed columns are looked
+ * at, and interface membership and eligibility are only reconciled when
+ * the interfaces or the LACP mode changed.
+ *
  * @param row pointer to port row in IDL.
  * @param portp pointer to daemon's internal port data struct.
+ * @param columns PORT_COL_* columns of the row that changed.
  *
  * @return
  */
 static int
-handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
+handle_port_config(const struct ovsrec_port *row, struct port_data *portp,
+                   unsigned int columns)
 {
     enum ovsrec_port_lacp_e lacp_mode;
     struct ovsrec_interface *intf;
@@ -1684,78 +1995,89 @@ handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
     const char *cp;
     char agg_key[AGG_KEY_MAX_LENGTH];
     bool lacp_changed = false;
+    bool members_changed = false;
 
-    VLOG_DBG("%s: port %s, n_interfaces=%d",
-             __FUNCTION__, row->name, (int)row->n_interfaces);
+    VLOG_DBG("%s: port %s, n_interfaces=%d, columns=0x%x",
+             __FUNCTION__, row->name, (int)row->n_interfaces, columns);
 
     if (portp == NULL) {
         VLOG_WARN("Function: handle_port_config parameter portp is NULL");
         return rc;
     }
 
-    /* Set timeout-mode */
-    cp = smap_get(&(row->other_config), PORT_OTHER_CONFIG_MAP_LACP_TIME);
-    timeout = valid_lacp_timeout(cp);
-    if ((timeout != -1) && (timeout != portp->timeout_mode)) {
-        portp->timeout_mode = timeout;
-        timeout_changed = true;
+    shash_init(&sh_idl_port_intfs);
 
-        if (log_event("LACP_RATE_SET",
-                      EV_KV("lag_id", "%s",
-                            portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
-                      EV_KV("lacp_rate", "%s", cp)) < 0) {
-            VLOG_ERR("Could not log event LACP_RATE_SET");
-        }
-    }
+    if (columns & PORT_COL_OTHER_CONFIG) {
+        /* Set timeout-mode */
+        cp = smap_get(&(row->other_config), PORT_OTHER_CONFIG_MAP_LACP_TIME);
+        timeout = valid_lacp_timeout(cp);
+        if ((timeout != -1) && (timeout != portp->timeout_mode)) {
+            portp->timeout_mode = timeout;
+            timeout_changed = true;
 
-    /* Build a new map for this port's interfaces in idl. */
-    shash_init(&sh_idl_port_intfs);
-    for (i = 0; i < row->n_interfaces; i++) {
-        intf = row->interfaces[i];
-        if (!shash_add_once(&sh_idl_port_intfs, intf->name, intf)) {
-            VLOG_WARN("interface %s specified twice", intf->name);
+            if (log_event("LACP_RATE_SET",
+                          EV_KV("lag_id", "%s",
+                                portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
+                          EV_KV("lacp_rate", "%s", cp)) < 0) {
+                VLOG_ERR("Could not log event LACP_RATE_SET");
+            }
         }
     }
 
-    /* Process deleted interfaces first. */
-    SHASH_FOR_EACH_SAFE(node, next, &portp->cfg_member_ifs) {
-        struct ovsrec_interface *ifrow =
-            shash_find_data(&sh_idl_port_intfs, node->name);
-        if (!ifrow) {
-            struct iface_data *idp =
-                shash_find_data(&all_interfaces, node->name);
-            if (idp) {
-                VLOG_DBG("Found a deleted interface %s", node->name);
+    if (columns & PORT_COL_INTERFACES) {
+        members_changed = true;
 
-                set_interface_lag_eligibility(portp, idp, false);
-                /* If this interface was added to another port in this same cycle
-                 * of SHASH_FOR_EACH(sh_node, &all_ports), then we don't have to
-                 * delete it.*/
-                if (shash_find_data(&interfaces_recently_added, node->name) == NULL) {
-                    db_clear_interface(idp);
-                    idp->port_datap = NULL;
-                    clear_port_overrides(idp);
-                    rc++;
-                }
+        /* Build a new map for this port's interfaces in idl. */
+        for (i = 0; i < row->n_interfaces; i++) {
+            intf = row->interfaces[i];
+            if (!shash_add_once(&sh_idl_port_intfs, intf->name, intf)) {
+                VLOG_WARN("interface %s specified twice", intf->name);
+            }
+        }
 
-                if (log_event("LAG_INTERFACE_REMOVE",
-                              EV_KV("lag_id", "%s",
-                                    portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
-                              EV_KV("intf_id", "%s", node->name)) < 0) {
-                    VLOG_ERR("Could not log event LAG_INTERFACE_REMOVE");
+        /* Process deleted interfaces first. */
+        SHASH_FOR_EACH_SAFE(node, next, &portp->cfg_member_ifs) {
+            struct ovsrec_interface *ifrow =
+                shash_find_data(&sh_idl_port_intfs, node->name);
+            if (!ifrow) {
+                struct iface_data *idp =
+                    shash_find_data(&all_interfaces, node->name);
+                if (idp) {
+                    VLOG_DBG("Found a deleted interface %s", node->name);
+
+                    set_interface_lag_eligibility(portp, idp, false);
+                    /* If this interface was added to another port in this same cycle
+                     * of SHASH_FOR_EACH(sh_node, &all_ports), then we don't have to
+                     * delete it.*/
+                    if (shash_find_data(&interfaces_recently_added, node->name) == NULL) {
+                        db_clear_interface(idp);
+                        idp->port_datap = NULL;
+                        clear_port_overrides(idp);
+                        rc++;
+                    }
+
+                    if (log_event("LAG_INTERFACE_REMOVE",
+                                  EV_KV("lag_id", "%s",
+                                        portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
+                                  EV_KV("intf_id", "%s", node->name)) < 0) {
+                        VLOG_ERR("Could not log event LAG_INTERFACE_REMOVE");
+                    }
+                    shash_delete(&portp->cfg_member_ifs, node);
                 }
-                shash_delete(&portp->cfg_member_ifs, node);
             }
         }
     }
 
     /* Update LACP mode for existing interfaces. */
-    lacp_mode = PORT_LACP_OFF;
-    if (row->lacp) {
-        if (strcmp(OVSREC_PORT_LACP_ACTIVE, row->lacp) == 0) {
-            lacp_mode = PORT_LACP_ACTIVE;
-        } else if (strcmp(OVSREC_PORT_LACP_PASSIVE, row->lacp) == 0) {
-            lacp_mode = PORT_LACP_PASSIVE;
+    lacp_mode = portp->lacp_mode;
+    if (columns & PORT_COL_LACP) {
+        lacp_mode = PORT_LACP_OFF;
+        if (row->lacp) {
+            if (strcmp(OVSREC_PORT_LACP_ACTIVE, row->lacp) == 0) {
+                lacp_mode = PORT_LACP_ACTIVE;
+            } else if (strcmp(OVSREC_PORT_LACP_PASSIVE, row->lacp) == 0) {
+                lacp_mode = PORT_LACP_PASSIVE;
+            }
         }
     }
 
@@ -1795,7 +2117,7 @@ handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
 
             /* Create super port in LACP state machine. */
             if (!portp->lag_id) {
-                portp->lag_id = alloc_lag_id();
+                portp->lag_id = alloc_lag_id(portp);
             }
 
             if (portp->lag_id) {
@@ -1837,17 +2159,14 @@ handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
                 /* clear port lacp_status */
                 db_clear_lag_partner_info_port(portp);
 
-                /* clear interface lacp_status */
+                /* clear interface lacp_status.  The members deleted from
+                 * the row are already gone from cfg_member_ifs. */
                 SHASH_FOR_EACH_SAFE(node, next, &portp->cfg_member_ifs) {
-                    struct ovsrec_interface *ifrow =
-                        shash_find_data(&sh_idl_port_intfs, node->name);
-                    if (ifrow) {
-                        struct iface_data *idp =
-                            shash_find_data(&all_interfaces, node->name);
-                        if (idp) {
-                            db_clear_interface(idp);
-                            clear_port_overrides(idp);
-                        }
+                    struct iface_data *idp =
+                        shash_find_data(&all_interfaces, node->name);
+                    if (idp) {
+                        db_clear_interface(idp);
+                        clear_port_overrides(idp);
                     }
                 }
 
@@ -1872,61 +2191,68 @@ handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
         portp->lacp_mode = lacp_mode;
     }
 
-    /* Look for newly added interfaces. */
-    SHASH_FOR_EACH(node, &sh_idl_port_intfs) {
-        struct ovsrec_interface *ifrow =
-            shash_find_data(&portp->cfg_member_ifs, node->name);
-        if (!ifrow) {
-            VLOG_DBG("Found an added interface %s", node->name);
-            struct iface_data *idp =
-                shash_find_data(&all_interfaces, node->name);
-            if (!idp) {
-                VLOG_ERR("Error adding interface to port %s. "
-                         "Interface %s not found.",
-                         portp->name, node->name);
-                continue;
-            }
-            shash_add(&portp->cfg_member_ifs, node->name, (void *)idp);
-            /* Add interface to recently added list */
-            shash_add(&interfaces_recently_added, node->name, (void *)idp);
-            idp->port_datap = portp;
-            set_port_overrides(portp, idp);
-            if (log_event("LAG_INTERFACE_ADD",
-                          EV_KV("lag_id", "%s",
-                                portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
-                          EV_KV("intf_id", "%s", node->name)) < 0) {
-                VLOG_ERR("Could not log event LAG_INTERFACE_ADD");
+    if (columns & PORT_COL_INTERFACES) {
+        /* Look for newly added interfaces. */
+        SHASH_FOR_EACH(node, &sh_idl_port_intfs) {
+            struct ovsrec_interface *ifrow =
+                shash_find_data(&portp->cfg_member_ifs, node->name);
+            if (!ifrow) {
+                VLOG_DBG("Found an added interface %s", node->name);
+                struct iface_data *idp =
+                    shash_find_data(&all_interfaces, node->name);
+                if (!idp) {
+                    VLOG_ERR("Error adding interface to port %s. "
+                             "Interface %s not found.",
+                             portp->name, node->name);
+                    continue;
+                }
+                shash_add(&portp->cfg_member_ifs, node->name, (void *)idp);
+                /* Add interface to recently added list */
+                shash_add(&interfaces_recently_added, node->name, (void *)idp);
+                idp->port_datap = portp;
+                set_port_overrides(portp, idp);
+                if (log_event("LAG_INTERFACE_ADD",
+                              EV_KV("lag_id", "%s",
+                                    portp->name + LAG_PORT_NAME_PREFIX_LENGTH),
+                              EV_KV("intf_id", "%s", node->name)) < 0) {
+                    VLOG_ERR("Could not log event LAG_INTERFACE_ADD");
+                }
+                update_member_interface_bond_status(portp);
+                rc++;
             }
-            update_member_interface_bond_status(portp);
-            rc++;
         }
     }
 
-    /* Update LAG member eligibility for configured member interfaces. */
-    SHASH_FOR_EACH_SAFE(node, next, &portp->cfg_member_ifs) {
-        struct iface_data *idp = shash_find_data(&all_interfaces, node->name);
-        if (idp) {
-            if (lacp_mode_switched) {
+    /* Update LAG member eligibility for configured member interfaces.
+     * It only depends on the members and the LACP mode. */
+    if (members_changed || lacp_changed || timeout_changed) {
+        SHASH_FOR_EACH_SAFE(node, next, &portp->cfg_member_ifs) {
+            struct iface_data *idp = shash_find_data(&all_interfaces, node->name);
+            if (idp) {
+                if (lacp_mode_switched) {
 
-                /* If mode switched reconfigure the port */
-                send_config_lport_msg(idp);
+                    /* If mode switched reconfigure the port */
+                    send_config_lport_msg(idp);
 
-            } else if (timeout_changed) {
+                } else if (timeout_changed) {
 
-                /* Else, just update the port if any dynamic fields changed */
+                    /* Else, just update the port if any dynamic fields changed */
 
-                /* If user changed timeout mode, send update */
-                idp->timeout_mode = portp->timeout_mode;
-                send_lport_lacp_change_msg(idp, (LACP_LPORT_DYNAMIC_FIELDS_PRESENT |
-                                                 LACP_LPORT_TIMEOUT_FIELD_PRESENT));
-            }
-            if (update_interface_lag_eligibility(idp)) {
-                rc++;
+                    /* If user changed timeout mode, send update */
+                    idp->timeout_mode = portp->timeout_mode;
+                    send_lport_lacp_change_msg(idp, (LACP_LPORT_DYNAMIC_FIELDS_PRESENT |
+                                                     LACP_LPORT_TIMEOUT_FIELD_PRESENT));
+                }
+                if ((members_changed || lacp_changed) &&
+                    update_interface_lag_eligibility(idp)) {
+                    rc++;
+                }
             }
         }
     }
 
-    if (lacp_mode != PORT_LACP_OFF) {
+    if (lacp_mode != PORT_LACP_OFF &&
+        ((columns & PORT_COL_OTHER_CONFIG) || lacp_changed)) {
         /* other_config:lacp-system-id and other_config:lacp-system-priority
          * only make sense if lacp is enabled.
          */
@@ -1984,7 +2310,9 @@ handle_port_config(const struct ovsrec_port *row, struct port_data *portp)
         update_port_fallback_flag(row, portp, lacp_changed);
     }
 
-    update_port_bond_status_map_entry(portp);
+    if (members_changed || lacp_changed) {
+        update_port_bond_status_map_entry(portp);
+    }
 
     /* Destroy the shash of the IDL interfaces. */
     shash_destroy(&sh_idl_port_intfs);
@@ -2019,6 +2347,7 @@ del_old_port(struct shash_node *sh_node)
             send_lag_delete_msg(portp->lag_id);
             free_lag_id(portp->lag_id);
         }
+        hmap_remove(&port_by_uuid, &portp->uuid_node);
         free(portp->name);
         free(portp);
         shash_delete(&all_ports, sh_node);
@@ -2043,12 +2372,16 @@ add_new_port(const struct ovsrec_port *port_row)
         size_t i;
 
         portp->cfg = port_row;
+        portp->cfg_uuid = port_row->header_.uuid;
+        hmap_insert(&port_by_uuid, &portp->uuid_node,
+                    uuid_hash(&portp->cfg_uuid));
         if ((portp->name = xstrdup(port_row->name)) == NULL) {
             free(portp);
             VLOG_FATAL("%s : out of memory", __FUNCTION__);
             return;
         }
         portp->lacp_mode = PORT_LACP_OFF;
+        portp->timeout_mode = LACP_PORT_TIMEOUT_DEFAULT;
 
         shash_init(&portp->cfg_member_ifs);
         shash_init(&portp->eligible_member_ifs);
@@ -2081,65 +2414,119 @@ add_new_port(const struct ovsrec_port *port_row)
     }
 } /* add_new_port */
 
+static struct port_data *
+find_port_data_by_uuid(const struct uuid *uuid)
+{
+    struct port_data *portp;
+
+    HMAP_FOR_EACH_WITH_HASH (portp, uuid_node, uuid_hash(uuid),
+                             &port_by_uuid) {
+        if (uuid_equals(&portp->cfg_uuid, uuid)) {
+            return portp;
+        }
+    }
+
+    return NULL;
+} /* find_port_data_by_uuid */
+
+/* Returns the PORT_COL_* columns of a tracked Port row that changed.  A
+ * row inserted since the last reconfiguration is new to lacpd, or came
+ * back after the IDL reconnected, so all of it is looked at. */
+static unsigned int
+port_row_changed_columns(const struct ovsrec_port *row)
+{
+    unsigned int columns = 0;
+
+    if (OVSREC_IDL_IS_ROW_INSERTED(row, idl_seqno)) {
+        return PORT_COL_ALL;
+    }
+
+    if (ovsdb_idl_track_is_updated(&row->header_, &ovsrec_port_col_lacp)) {
+        columns |= PORT_COL_LACP;
+    }
+    if (ovsdb_idl_track_is_updated(&row->header_,
+                                   &ovsrec_port_col_interfaces)) {
+        columns |= PORT_COL_INTERFACES;
+    }
+    if (ovsdb_idl_track_is_updated(&row->header_,
+                                   &ovsrec_port_col_other_config)) {
+        columns |= PORT_COL_OTHER_CONFIG;
+    }
+
+    return columns;
+} /* port_row_changed_columns */
+
 /**
  * Update daemon's internal port data structures based on the latest
  * data from OVSDB.
  * Takes necessary actions to propagate database changes.
  *
+ * Only the Port rows IDL change tracking reports as inserted, modified
+ * or deleted since the last call are looked at.
+ *
  * @return positive integer if an ovsdb write is required 0 otherwise.
  */
 static int
 update_port_cache(void)
 {
-    struct shash sh_idl_ports;
     const struct ovsrec_port *row;
+    const struct ovsrec_port *new_row;
+    struct port_data *portp;
     struct shash_node *sh_node, *sh_next;
+    unsigned int columns;
     int rc = 0;
 
-    /* Collect all the ports in the DB. */
-    shash_init(&sh_idl_ports);
-    OVSREC_PORT_FOR_EACH(row, idl) {
-        if (!shash_add_once(&sh_idl_ports, row->name, row)) {
-            VLOG_WARN("port %s specified twice", row->name);
+    /* Delete old ports.  A port whose row is back, after the IDL
+     * reconnected, only moves to the new row. */
+    OVSREC_PORT_FOR_EACH_TRACKED(row, idl) {
+        db_mon.port_rows++;
+        if (ovsrec_port_row_get_seqno(row, OVSDB_IDL_CHANGE_DELETE) == 0) {
+            continue;
         }
-    }
-
-    /* Delete old ports. */
-    SHASH_FOR_EACH_SAFE(sh_node, sh_next, &all_ports) {
-        struct port_data *portp = shash_find_data(&sh_idl_ports, sh_node->name);
-        if (!portp) {
-            VLOG_DBG("Found a deleted port %s", sh_node->name);
-            del_old_port(sh_node);
+        portp = find_port_data_by_uuid(&row->header_.uuid);
+        if (portp == NULL || portp->cfg != row) {
+            continue;
+        }
+        new_row = ovsrec_port_get_for_uuid(idl, &row->header_.uuid);
+        if (new_row != NULL) {
+            portp->cfg = new_row;
+        } else {
+            VLOG_DBG("Found a deleted port %s", portp->name);
+            del_old_port(shash_find(&all_ports, portp->name));
             rc++;
         }
     }
 
     /* Add new ports. */
-    SHASH_FOR_EACH(sh_node, &sh_idl_ports) {
-        struct port_data *portp = shash_find_data(&all_ports, sh_node->name);
-        if (!portp) {
-            VLOG_DBG("Found an added port %s", sh_node->name);
-            add_new_port(sh_node->data);
+    OVSREC_PORT_FOR_EACH_TRACKED(row, idl) {
+        if (ovsrec_port_row_get_seqno(row, OVSDB_IDL_CHANGE_DELETE) > 0) {
+            continue;
+        }
+        if (find_port_data_by_uuid(&row->header_.uuid) == NULL) {
+            VLOG_DBG("Found an added port %s", row->name);
+            add_new_port(row);
         }
     }
 
     /* Check for changes in the port row entries. */
-    SHASH_FOR_EACH(sh_node, &all_ports) {
-        const struct ovsrec_port *row = shash_find_data(&sh_idl_ports,
-                                                        sh_node->name);
-        /* Check for changes to row. */
-        if (OVSREC_IDL_IS_ROW_INSERTED(row, idl_seqno) ||
-            OVSREC_IDL_IS_ROW_MODIFIED(row, idl_seqno)) {
-            struct port_data *portp = sh_node->data;
-
-            if (OVSREC_IDL_IS_ROW_INSERTED(row, idl_seqno)) {
-                portp->timeout_mode = LACP_PORT_TIMEOUT_DEFAULT;
-            }
+    OVSREC_PORT_FOR_EACH_TRACKED(row, idl) {
+        if (ovsrec_port_row_get_seqno(row, OVSDB_IDL_CHANGE_DELETE) > 0) {
+            continue;
+        }
+        portp = find_port_data_by_uuid(&row->header_.uuid);
+        if (portp == NULL) {
+            continue;
+        }
+        portp->cfg = row;
 
-            /* Handle Port config update. */
-            if (handle_port_config(row, portp)) {
-                rc++;
-            }
+        columns = port_row_changed_columns(row);
+        if (columns == 0) {
+            continue;
+        }
+
+        /* Handle Port config update. */
+        if (handle_port_config(row, portp, columns)) {
+            rc++;
         }
     }
 
@@ -2148,9 +2535,6 @@ update_port_cache(void)
         shash_delete(&interfaces_recently_added, sh_node);
     }
 
-    /* Destroy the shash of the IDL ports. */
-    shash_destroy(&sh_idl_ports);
-
     return rc;
 } /* update_port_cache */
 
@@ -2236,6 +2620,7 @@ lacpd_reconfigure(void)
         /* There was no change in the DB. */
         return 0;
     }
+    db_mon.changes++;
 
     /* Update system priority and system id */
     sys = ovsrec_system_first(idl);
@@ -2251,6 +2636,9 @@ lacpd_reconfigure(void)
         rc++;
     }
 
+    /* Forget the tracked changes, and the deleted rows, just handled. */
+    ovsdb_idl_track_clear(idl);
+
     /* Update IDL sequence # after we've handled everything. */
     idl_seqno = new_idl_seqno;
 
@@ -2354,7 +2742,7 @@ db_clear_interface(struct iface_data *idp)
 
     /*
      * Note that this can only be called in the context of
-     * the idl loop, so we are already holding the OVSDB_LOCK.
+     * the idl loop, in the OVSDB interface thread.
      * More specifically, we've scheduled a txn, so we don't
      * need to call ovsdb_idl_txn_create(), either.
      */
@@ -2390,48 +2778,43 @@ db_clear_interface(struct iface_data *idp)
     free(idp->partner.state);
     idp->partner.state = NULL;
 
+    /* A status not yet written, or in flight, is now stale. */
+    idp->wb_dirty &= ~DB_WB_LACP_STATUS;
+    idp->wb_inflight &= ~DB_WB_LACP_STATUS;
+
     smap_destroy(&smap);
 }
 
-void
-db_update_interface(lacp_per_port_variables_t *plpinfo)
+/**
+ * Writes the lacp_status and lacp_current columns of an interface from
+ * the LACP status last recorded by db_update_interface(), where they
+ * differ from what was last written.  Must be called with a transaction
+ * open.
+ *
+ * @param idp interface to write.
+ */
+static void
+db_update_interface_status(struct iface_data *idp)
 {
-    struct iface_data *idp = NULL;
-    int port = PM_HANDLE2PORT(plpinfo->lport_handle);
+    struct lacp_status_snapshot *status = &idp->wb_status;
     const struct ovsrec_interface *ifrow;
     bool lacp_current;
-    struct ovsdb_idl_txn *txn = NULL;
-    bool changes = false;
     bool smap_changes = false;
     char *system_id, *port_id, *key, *state;
     struct smap smap;
     struct port_data *portp;
 
-    OVSDB_LOCK;
-
-    /* get interface data */
-    idp = find_iface_data_by_index(port);
-
-    if (idp == NULL) {
-        VLOG_WARN("Unable to find interface for hardware index %d", port);
-        goto end;
-    }
-
     portp = idp->port_datap;
 
-    idp->local_state = plpinfo->actor_oper_port_state;
-
     ifrow = idp->cfg;
 
-    txn = ovsdb_idl_txn_create(idl);
-
     smap_clone(&smap, &ifrow->lacp_status);
 
     /* actor data */
-    system_id = format_system_id(&plpinfo->actor_oper_system_variables);
-    port_id = format_port_id(plpinfo->actor_oper_port_priority, plpinfo->actor_oper_port_number);
-    key = format_key(plpinfo->actor_oper_port_key);
-    state = format_state(plpinfo->actor_oper_port_state);
+    system_id = format_system_id(&status->actor_system);
+    port_id = format_port_id(status->actor_port_priority, status->actor_port_number);
+    key = format_key(status->actor_key);
+    state = format_state(status->actor_state);
 
     if (idp->actor.system_id == NULL ||
         strcmp(idp->actor.system_id, system_id) != 0) {
@@ -2482,14 +2865,15 @@ db_update_interface(lacp_per_port_variables_t *plpinfo)
     }
 
     /* partner data */
-    system_id = format_system_id(&plpinfo->partner_oper_system_variables);
-    port_id = format_port_id(plpinfo->partner_oper_port_priority, plpinfo->partner_oper_port_number);
-    key = format_key(plpinfo->partner_oper_key);
-    state = format_state(plpinfo->partner_oper_port_state);
+    system_id = format_system_id(&status->partner_system);
+    port_id = format_port_id(status->partner_port_priority, status->partner_port_number);
+    key = format_key(status->partner_key);
+    state = format_state(status->partner_state);
 
     if (idp->partner.system_id == NULL ||
         strcmp(idp->partner.system_id, system_id) != 0) {
-        if (strncmp(system_id, NO_SYSTEM_ID, strlen(NO_SYSTEM_ID))) {
+        if (portp != NULL &&
+            strncmp(system_id, NO_SYSTEM_ID, strlen(NO_SYSTEM_ID))) {
             if (log_event("LACP_PARTNER_DETECTED",
                           EV_KV("intf_id", "%s", idp->name),
                           EV_KV("lag_id", "%s",
@@ -2548,74 +2932,705 @@ db_update_interface(lacp_per_port_variables_t *plpinfo)
 
     if (smap_changes) {
         ovsrec_interface_set_lacp_status(ifrow, &smap);
-        changes = true;
     }
 
     smap_destroy(&smap);
 
     /* lacp_current data */
-    lacp_current = (plpinfo->recv_fsm_state == RECV_FSM_CURRENT_STATE);
+    lacp_current = status->current;
 
     if (idp->lacp_current_set == false || idp->lacp_current != lacp_current) {
         ovsrec_interface_set_lacp_current(ifrow, &lacp_current, 1);
         VLOG_DBG("updating interface %s (lacp_current = %s)", idp->name,
             lacp_current ? "true" : "false");
-        changes = true;
         idp->lacp_current = lacp_current;
         idp->lacp_current_set = true;
     }
+} /* db_update_interface_status */
 
-    if (changes) {
-        ovsdb_idl_txn_commit_block(txn);
+static void
+db_wb_list_add(struct db_wb_list *list, int id)
+{
+    if (list->n == list->allocated) {
+        list->ids = x2nrealloc(list->ids, &list->allocated, sizeof(int));
+    }
+    list->ids[list->n++] = id;
+} /* db_wb_list_add */
+
+/* Combines an interface's or LAG's pending DB_WB_* updates, older, with
+ * newer ones.  A clear and a status update cancel each other, so only
+ * the most recent of the two is kept; clearing and then updating a
+ * LAG's status does both, in that order. */
+static unsigned int
+db_wb_merge(unsigned int older, unsigned int newer)
+{
+    if (newer & DB_WB_LACP_STATUS) {
+        older &= ~DB_WB_CLEAR;
+    }
+    if (newer & DB_WB_CLEAR) {
+        older &= ~DB_WB_LACP_STATUS;
+    }
+    if (newer & DB_WB_PORT_CLEAR) {
+        older &= ~(DB_WB_PORT_STATUS | DB_WB_PORT_SPEED);
+    }
+
+    return older | newer;
+} /* db_wb_merge */
+
+/* Something was marked dirty; have the OVSDB interface thread write it
+ * within db_flush_delay_ms. */
+static void
+db_wb_pending(void)
+{
+    if (!db_wb.pending) {
+        db_wb.pending = true;
+        db_wb.first_dirty_ms = time_msec();
+        db_wb.flush_ms = db_wb.first_dirty_ms + db_flush_delay_ms;
+    }
+} /* db_wb_pending */
+
+/* Marks DB_WB_* updates of an interface to be written to OVSDB. */
+static void
+db_wb_mark_iface(struct iface_data *idp, unsigned int what)
+{
+    db_wb.marks++;
+    if (idp->wb_dirty == 0) {
+        db_wb_list_add(&db_wb.dirty_ifaces, idp->index);
     } else {
-        ovsdb_idl_txn_abort(txn);
+        db_wb.coalesced++;
     }
-    ovsdb_idl_txn_destroy(txn);
+    idp->wb_dirty = db_wb_merge(idp->wb_dirty, what);
 
-    if (plpinfo->lag != NULL) {
-        portp->lag_member_speed = lport_type_to_speed(ntohs(plpinfo->lag->port_type));
+    db_wb_pending();
+} /* db_wb_mark_iface */
+
+/* Marks DB_WB_* updates of a LAG to be written to OVSDB. */
+static void
+db_wb_mark_port(struct port_data *portp, unsigned int what)
+{
+    if (portp->lag_id == 0) {
+        return;
+    }
+
+    db_wb.marks++;
+    if (portp->wb_dirty == 0) {
+        db_wb_list_add(&db_wb.dirty_ports, portp->lag_id);
+    } else {
+        db_wb.coalesced++;
     }
+    portp->wb_dirty = db_wb_merge(portp->wb_dirty, what);
 
-    db_update_port_status(portp);
+    db_wb_pending();
+} /* db_wb_mark_port */
 
-end:
-    OVSDB_UNLOCK;
+static unsigned long long
+db_req_now_ns(void)
+{
+    struct timespec ts;
+
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (unsigned long long)ts.tv_sec * 1000000000ULL + ts.tv_nsec;
+} /* db_req_now_ns */
+
+/* Allocates the request pool, sized so that it can't run out: at most
+ * DB_REQ_QUEUE_MAX requests are out with the OVSDB interface thread, and
+ * at most DB_REQ_OVERFLOW_MAX() are on the overflow list. */
+static void
+db_req_pool_init(void)
+{
+    unsigned int i;
+
+    db_req_pool_size = DB_REQ_QUEUE_MAX + DB_REQ_OVERFLOW_MAX(max_lag_id) + 1;
+    db_req_pool = xcalloc(db_req_pool_size, sizeof *db_req_pool);
+    for (i = 0; i < db_req_pool_size; i++) {
+        db_req_pool[i].next = db_req_overflow.free;
+        db_req_overflow.free = &db_req_pool[i];
+    }
+
+    db_req_overflow.lag_clear = xcalloc(max_lag_id + 1,
+                                        sizeof(struct db_req *));
+    db_req_overflow.lag_update = xcalloc(max_lag_id + 1,
+                                         sizeof(struct db_req *));
+} /* db_req_pool_init */
+
+/* Called by the LACP protocol thread: takes back the requests the OVSDB
+ * interface thread has applied. */
+static void
+db_req_collect(void)
+{
+    struct db_req *req;
+    struct db_req *next;
+
+    if (__atomic_load_n(&db_req_returned, __ATOMIC_RELAXED) == NULL) {
+        return;
+    }
+
+    req = __atomic_exchange_n(&db_req_returned, NULL, __ATOMIC_SEQ_CST);
+    for (; req != NULL; req = next) {
+        next = req->next;
+        req->next = db_req_overflow.free;
+        db_req_overflow.free = req;
+        db_req_overflow.inflight--;
+    }
+} /* db_req_collect */
+
+/* Called by the LACP protocol thread: returns a cleared request of the
+ * given type from the pool. */
+static struct db_req *
+db_req_alloc(enum db_req_type type)
+{
+    unsigned long long now = db_req_now_ns();
+    struct db_req *req;
+
+    if (db_req_overflow.free == NULL) {
+        db_req_collect();
+    }
+    req = db_req_overflow.free;
+    if (req == NULL) {
+        VLOG_FATAL("lacpd: OVSDB request pool exhausted");
+    }
+    db_req_overflow.free = req->next;
+
+    memset(req, 0, sizeof *req);
+    req->type = type;
+    req->sent_ns = now;
+
+    return req;
+} /* db_req_alloc */
+
+static void
+db_req_release(struct db_req *req)
+{
+    req->next = db_req_overflow.free;
+    db_req_overflow.free = req;
+} /* db_req_release */
+
+/* The overflow slot of the request that req supersedes, if any. */
+static struct db_req **
+db_req_overflow_slot(const struct db_req *req)
+{
+    bool port_ok = (req->port >= 0) && (req->port < PM_MAX_PORTS);
+    bool lag_ok = (req->lag_id <= max_lag_id);
+
+    switch (req->type) {
+    case DB_REQ_IFACE_STATUS:
+        return port_ok ? &db_req_overflow.status[req->port] : NULL;
+    case DB_REQ_HW_ATTACH:
+    case DB_REQ_HW_DETACH:
+    case DB_REQ_HW_EGR_ENABLE:
+        return port_ok ? &db_req_overflow.hw[req->port] : NULL;
+    case DB_REQ_LAG_ADD_PORT:
+        return port_ok ? &db_req_overflow.lag_add[req->port] : NULL;
+    case DB_REQ_LAG_CLEAR:
+        return lag_ok ? &db_req_overflow.lag_clear[req->lag_id] : NULL;
+    case DB_REQ_LAG_UPDATE:
+        return lag_ok ? &db_req_overflow.lag_update[req->lag_id] : NULL;
+    case DB_REQ_LAG_DEL_PORT:
+    default:
+        return NULL;
+    }
+} /* db_req_overflow_slot */
+
+static void
+db_req_overflow_unlink(struct db_req *req)
+{
+    if (req->prev != NULL) {
+        req->prev->next = req->next;
+    } else {
+        db_req_overflow.head = req->next;
+    }
+    if (req->next != NULL) {
+        req->next->prev = req->prev;
+    } else {
+        db_req_overflow.tail = req->prev;
+    }
+    if (req->slot != NULL) {
+        *req->slot = NULL;
+    }
+    req->next = NULL;
+    req->prev = NULL;
+    req->slot = NULL;
+    db_req_overflow.count--;
+} /* db_req_overflow_unlink */
+
+/* Called by the LACP protocol thread: queues req at the end of the
+ * overflow list, in place of the request it supersedes. */
+static void
+db_req_overflow_add(struct db_req *req)
+{
+    struct db_req **slot;
+    struct db_req *old;
+
+    /* The LAG add this delete undoes never reached the OVSDB interface
+     * thread: drop both. */
+    if (req->type == DB_REQ_LAG_DEL_PORT &&
+        req->port >= 0 && req->port < PM_MAX_PORTS) {
+        old = db_req_overflow.lag_add[req->port];
+        if (old != NULL && old->lag_id == req->lag_id) {
+            db_req_overflow_unlink(old);
+            db_req_release(old);
+            db_req_release(req);
+            db_req_overflow.coalesced += 2;
+            return;
+        }
+    }
+
+    slot = db_req_overflow_slot(req);
+    if (slot != NULL && *slot != NULL) {
+        old = *slot;
+
+        /* Hardware bond config: keep what the older request set that
+         * this one leaves alone. */
+        if (!req->update_rx && old->update_rx) {
+            req->update_rx = true;
+            req->rx_enabled = old->rx_enabled;
+        }
+        if (!req->update_tx && old->update_tx) {
+            req->update_tx = true;
+            req->tx_enabled = old->tx_enabled;
+        }
+
+        db_req_overflow_unlink(old);
+        db_req_release(old);
+        db_req_overflow.coalesced++;
+    }
+
+    req->prev = db_req_overflow.tail;
+    req->next = NULL;
+    if (db_req_overflow.tail != NULL) {
+        db_req_overflow.tail->next = req;
+    } else {
+        db_req_overflow.head = req;
+    }
+    db_req_overflow.tail = req;
+    if (slot != NULL) {
+        *slot = req;
+        req->slot = slot;
+    }
+
+    db_req_overflow.count++;
+    if (db_req_overflow.count > db_req_overflow.high_water) {
+        db_req_overflow.high_water = db_req_overflow.count;
+    }
+} /* db_req_overflow_add */
+
+/* Called by the LACP protocol thread: whether the OVSDB interface thread
+ * can take another request. */
+static bool
+db_req_room(void)
+{
+    if (db_req_overflow.inflight >= DB_REQ_QUEUE_MAX) {
+        db_req_collect();
+    }
+    return (db_req_overflow.inflight < DB_REQ_QUEUE_MAX);
+} /* db_req_room */
+
+static void
+db_req_post(struct db_req *req)
+{
+    /* Can't fail: the queue never holds more than DB_REQ_QUEUE_MAX. */
+    mqueue_send(&db_req_queue, req);
+    db_req_overflow.inflight++;
+} /* db_req_post */
+
+/**
+ * @details
+ * Called by the LACP protocol thread: moves the requests on its overflow
+ * list to the OVSDB interface thread, as far as it has room for them.
+ * If some are left, the OVSDB interface thread sends a
+ * MLm_vpm_api__db_req_room message once it hands requests back.
+ */
+void
+db_req_flush(void)
+{
+    struct db_req *req;
+    bool flagged = false;
+
+    while (db_req_overflow.head != NULL) {
+        if (!db_req_room()) {
+            if (flagged) {
+                return;
+            }
+
+            /* Ask for a wakeup, then look again for requests that came
+             * back before the OVSDB interface thread saw the flag. */
+            __atomic_store_n(&db_req_overflowing, true, __ATOMIC_SEQ_CST);
+            flagged = true;
+            continue;
+        }
+
+        req = db_req_overflow.head;
+        db_req_overflow_unlink(req);
+        db_req_post(req);
+    }
+} /* db_req_flush */
+
+/* Called by the LACP protocol thread: hands req to the OVSDB interface
+ * thread.  Never waits: if that thread is behind, req waits on the
+ * overflow list. */
+static void
+db_req_send(struct db_req *req)
+{
+    unsigned long long start = req->sent_ns;
+
+    req->sent_ns = db_req_now_ns();
+    if ((db_req_overflow.head == NULL) && db_req_room()) {
+        db_req_post(req);
+    } else {
+        if (db_req_overflow.head == NULL) {
+            __atomic_add_fetch(&db_req_perf.full, 1, __ATOMIC_RELAXED);
+        }
+        db_req_overflow_add(req);
+        db_req_flush();
+    }
+    lacp_hist_record(&db_req_perf.send_ns, db_req_now_ns() - start);
+} /* db_req_send */
+
+static void
+db_req_iface_status(struct db_req *req)
+{
+    struct iface_data *idp;
+    struct port_data *portp;
+
+    /* get interface data */
+    idp = find_iface_data_by_index(req->port);
+
+    if (idp == NULL) {
+        VLOG_WARN("Unable to find interface for hardware index %d",
+                  req->port);
+        return;
+    }
+
+    /* Only record the status here; it is written by db_writeback_run(). */
+    idp->wb_status = req->status;
+    idp->local_state = req->local_state;
+
+    db_wb_mark_iface(idp, DB_WB_LACP_STATUS);
+
+    portp = idp->port_datap;
+    if (portp != NULL) {
+        if (req->has_speed) {
+            portp->lag_member_speed = req->lag_member_speed;
+        }
+        db_wb_mark_port(portp, DB_WB_PORT_STATUS);
+    }
+} /* db_req_iface_status */
+
+void
+db_update_interface(lacp_per_port_variables_t *plpinfo)
+{
+    struct lacp_status_snapshot *status;
+    struct db_req *req;
+
+    req = db_req_alloc(DB_REQ_IFACE_STATUS);
+    req->port = PM_HANDLE2PORT(plpinfo->lport_handle);
+
+    status = &req->status;
+    status->actor_system = plpinfo->actor_oper_system_variables;
+    status->actor_port_priority = plpinfo->actor_oper_port_priority;
+    status->actor_port_number = plpinfo->actor_oper_port_number;
+    status->actor_key = plpinfo->actor_oper_port_key;
+    status->actor_state = plpinfo->actor_oper_port_state;
+    status->partner_system = plpinfo->partner_oper_system_variables;
+    status->partner_port_priority = plpinfo->partner_oper_port_priority;
+    status->partner_port_number = plpinfo->partner_oper_port_number;
+    status->partner_key = plpinfo->partner_oper_key;
+    status->partner_state = plpinfo->partner_oper_port_state;
+    status->current = (plpinfo->recv_fsm_state == RECV_FSM_CURRENT_STATE);
+
+    req->local_state = plpinfo->actor_oper_port_state;
+
+    if (plpinfo->lag != NULL) {
+        req->has_speed = true;
+        req->lag_member_speed = lport_type_to_speed(ntohs(plpinfo->lag->port_type));
+    }
+
+    db_req_send(req);
 } /* db_update_interface */
 
-/**********************************************************************
- * Pool implementation: this is diferrent from the LAG pool manager.
- * This is currently only used for allocating interface indexes.
- **********************************************************************/
-int
-allocate_next(unsigned char *pool, int size)
+/* Writes what is dirty about an interface in the open transaction. */
+static void
+db_wb_write_iface(struct iface_data *idp, unsigned int what)
 {
-    int idx = 0;
+    if (what & DB_WB_CLEAR) {
+        db_clear_interface(idp);
+    }
 
-    while (pool[idx] == 0xff && (idx * BITS_PER_BYTE) < size) {
-        idx++;
+    if (what & DB_WB_LACP_STATUS) {
+        db_update_interface_status(idp);
     }
 
-    if ((idx * BITS_PER_BYTE) < size) {
-        idx *= BITS_PER_BYTE;
+    /* The interface may have left LACP since; its hw_bond_config is then
+     * lacpd_reconfigure()'s. */
+    if (idp->lacp_state != LACP_STATE_ENABLED) {
+        return;
+    }
 
-        while (idx < size && !IS_AVAILABLE(pool, idx)) {
-            idx++;
+    if (what & DB_WB_HW_RX) {
+        update_interface_hw_bond_config_map_entry(
+            idp,
+            INTERFACE_HW_BOND_CONFIG_MAP_RX_ENABLED,
+            (idp->wb_rx_enabled ?
+             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_TRUE :
+             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_FALSE));
+    }
+
+    if (what & DB_WB_HW_TX) {
+        update_interface_hw_bond_config_map_entry(
+            idp,
+            INTERFACE_HW_BOND_CONFIG_MAP_TX_ENABLED,
+            (idp->wb_tx_enabled ?
+             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_TRUE :
+             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_FALSE));
+    }
+} /* db_wb_write_iface */
+
+/* Writes what is dirty about a LAG in the open transaction. */
+static void
+db_wb_write_port(struct port_data *portp, unsigned int what)
+{
+    if (what & DB_WB_PORT_CLEAR) {
+        db_clear_lag_partner_info_port(portp);
+    }
+
+    /* After the interfaces, so their hw_bond_config is the new one. */
+    if (what & DB_WB_BOND_STATUS) {
+        update_member_interface_bond_status(portp);
+        update_port_bond_status_map_entry(portp);
+    }
+
+    if (what & DB_WB_PORT_STATUS) {
+        db_update_port_status(portp);
+    } else if (what & DB_WB_PORT_SPEED) {
+        db_update_port_speed(portp);
+    }
+} /* db_wb_write_port */
+
+/* The transaction in flight completed with status.  If it did not
+ * succeed, what it wrote is marked dirty again, and what lacpd believes
+ * is in OVSDB is forgotten so that all of it is written. */
+static void
+db_wb_complete(enum ovsdb_idl_txn_status status)
+{
+    static struct vlog_rate_limit rl = VLOG_RATE_LIMIT_INIT(1, 5);
+    struct iface_data *idp;
+    struct port_data *portp;
+    bool failed;
+    long long int now;
+    size_t i;
+
+    now = time_msec();
+
+    switch (status) {
+    case TXN_SUCCESS:
+    case TXN_UNCHANGED:
+        db_wb.commits++;
+        db_wb.last_latency_ms = now - db_wb.txn_dirty_ms;
+        if (db_wb.last_latency_ms > db_wb.max_latency_ms) {
+            db_wb.max_latency_ms = db_wb.last_latency_ms;
+        }
+        failed = false;
+        break;
+
+    case TXN_TRY_AGAIN:
+        db_wb.retries++;
+        failed = true;
+        break;
+
+    default:
+        db_wb.errors++;
+        VLOG_WARN_RL(&rl, "OVSDB status write-back failed (%s), retrying",
+                     ovsdb_idl_txn_status_to_string(status));
+        failed = true;
+        break;
+    }
+
+    for (i = 0; i < db_wb.inflight_ifaces.n; i++) {
+        idp = find_iface_data_by_index(db_wb.inflight_ifaces.ids[i]);
+        if (idp == NULL || idp->wb_inflight == 0) {
+            continue;
+        }
+        if (failed) {
+            if (idp->wb_inflight & DB_WB_LACP_STATUS) {
+                free(idp->actor.system_id);
+                free(idp->actor.port_id);
+                free(idp->actor.key);
+                free(idp->actor.state);
+                free(idp->partner.system_id);
+                free(idp->partner.port_id);
+                free(idp->partner.key);
+                free(idp->partner.state);
+                memset(&idp->actor, 0, sizeof(idp->actor));
+                memset(&idp->partner, 0, sizeof(idp->partner));
+                idp->lacp_current_set = false;
+            }
+            if (idp->wb_dirty == 0) {
+                db_wb_list_add(&db_wb.dirty_ifaces, idp->index);
+            }
+            idp->wb_dirty = db_wb_merge(idp->wb_inflight, idp->wb_dirty);
+        }
+        idp->wb_inflight = 0;
+    }
+
+    for (i = 0; i < db_wb.inflight_ports.n; i++) {
+        portp = find_port_data_by_lag_id(db_wb.inflight_ports.ids[i]);
+        if (portp == NULL || portp->wb_inflight == 0) {
+            continue;
+        }
+        if (failed) {
+            free(portp->speed_str);
+            portp->speed_str = NULL;
+            portp->current_status = STATUS_UNINITIALIZED;
+            if (portp->wb_dirty == 0) {
+                db_wb_list_add(&db_wb.dirty_ports, portp->lag_id);
+            }
+            portp->wb_dirty = db_wb_merge(portp->wb_inflight, portp->wb_dirty);
         }
+        portp->wb_inflight = 0;
+    }
 
-        if (idx < size && IS_AVAILABLE(pool, idx)) {
-            SET(pool, idx);
-            return idx;
+    db_wb.inflight_ifaces.n = 0;
+    db_wb.inflight_ports.n = 0;
+
+    if (failed) {
+        if (!db_wb.pending) {
+            db_wb.pending = true;
+            db_wb.first_dirty_ms = db_wb.txn_dirty_ms;
         }
+        db_wb.flush_ms = now + MAX(db_flush_delay_ms, DB_WB_RETRY_MS);
     }
 
-    return -1;
-} /* allocate_next */
+    ovsdb_idl_txn_destroy(db_wb.txn);
+    db_wb.txn = NULL;
+} /* db_wb_complete */
 
+/**
+ * @details
+ * Called by the OVSDB interface thread on each pass of its loop.
+ * Collects the outcome of the write-back transaction in flight, if any.
+ * Otherwise, once the oldest dirty change has waited db_flush_delay_ms,
+ * writes everything dirty in a new transaction and leaves it to complete
+ * in the background.
+ */
 static void
-free_index(unsigned char *pool, int idx)
+db_writeback_run(void)
 {
-    CLEAR(pool, idx);
-} /* free_index */
+    enum ovsdb_idl_txn_status status;
+    struct iface_data *idp;
+    struct port_data *portp;
+    size_t i;
+
+    if (db_wb.txn != NULL) {
+        status = ovsdb_idl_txn_commit(db_wb.txn);
+        if (status == TXN_INCOMPLETE) {
+            return;
+        }
+        db_wb_complete(status);
+        /* A retry waits for the next pass, after ovsdb_idl_run(). */
+        return;
+    }
+
+    if (!db_wb.pending || time_msec() < db_wb.flush_ms) {
+        return;
+    }
+
+    db_wb.txn = ovsdb_idl_txn_create(idl);
+    db_wb.txn_dirty_ms = db_wb.first_dirty_ms;
+    db_wb.pending = false;
+    db_wb.flushes++;
+
+    /* Interfaces first: the LAG bond_status is computed from them. */
+    for (i = 0; i < db_wb.dirty_ifaces.n; i++) {
+        idp = find_iface_data_by_index(db_wb.dirty_ifaces.ids[i]);
+        if (idp == NULL || idp->wb_dirty == 0) {
+            continue;
+        }
+        db_wb_write_iface(idp, idp->wb_dirty);
+        idp->wb_inflight = idp->wb_dirty;
+        idp->wb_dirty = 0;
+        db_wb_list_add(&db_wb.inflight_ifaces, idp->index);
+        db_wb.ifaces++;
+    }
+
+    for (i = 0; i < db_wb.dirty_ports.n; i++) {
+        portp = find_port_data_by_lag_id(db_wb.dirty_ports.ids[i]);
+        if (portp == NULL || portp->wb_dirty == 0) {
+            continue;
+        }
+        db_wb_write_port(portp, portp->wb_dirty);
+        portp->wb_inflight = portp->wb_dirty;
+        portp->wb_dirty = 0;
+        db_wb_list_add(&db_wb.inflight_ports, portp->lag_id);
+        db_wb.ports++;
+    }
+
+    db_wb.dirty_ifaces.n = 0;
+    db_wb.dirty_ports.n = 0;
+
+    status = ovsdb_idl_txn_commit(db_wb.txn);
+    if (status != TXN_INCOMPLETE) {
+        db_wb_complete(status);
+    }
+} /* db_writeback_run */
+
+static void
+db_writeback_wait(void)
+{
+    if (db_wb.txn != NULL) {
+        ovsdb_idl_txn_wait(db_wb.txn);
+    } else if (db_wb.pending) {
+        poll_timer_wait_until(db_wb.flush_ms);
+    }
+} /* db_writeback_wait */
+
+/**
+ * @details
+ * Dumps the OVSDB status write-back counters.
+ */
+void
+db_writeback_dump(struct ds *ds)
+{
+    ds_put_cstr(ds, "================ OVSDB Write-back ================\n");
+    ds_put_format(ds, "    flush_delay          : %u ms\n",
+                  db_flush_delay_ms);
+    ds_put_format(ds, "    dirty_interfaces     : %lu\n",
+                  (unsigned long)db_wb.dirty_ifaces.n);
+    ds_put_format(ds, "    dirty_lags           : %lu\n",
+                  (unsigned long)db_wb.dirty_ports.n);
+    ds_put_format(ds, "    in_flight            : %s\n",
+                  db_wb.txn != NULL ? "yes" : "no");
+    ds_put_format(ds, "    marks                : %llu\n", db_wb.marks);
+    ds_put_format(ds, "    coalesced            : %llu\n", db_wb.coalesced);
+    ds_put_format(ds, "    transactions         : %llu\n", db_wb.flushes);
+    ds_put_format(ds, "    interfaces_written   : %llu\n", db_wb.ifaces);
+    ds_put_format(ds, "    lags_written         : %llu\n", db_wb.ports);
+    ds_put_format(ds, "    commits              : %llu\n", db_wb.commits);
+    ds_put_format(ds, "    retries              : %llu\n", db_wb.retries);
+    ds_put_format(ds, "    errors               : %llu\n", db_wb.errors);
+    ds_put_format(ds, "    last_latency         : %lld ms\n",
+                  db_wb.last_latency_ms);
+    ds_put_format(ds, "    max_latency          : %lld ms\n",
+                  db_wb.max_latency_ms);
+} /* db_writeback_dump */
+
+/**
+ * @details
+ * Dumps the OVSDB monitor counters.
+ */
+void
+db_monitor_dump(struct ds *ds)
+{
+    ds_put_cstr(ds, "================ OVSDB Monitor ================\n");
+    ds_put_format(ds, "    wakeups              : %llu\n", db_mon.wakeups);
+    ds_put_format(ds, "    changes              : %llu\n", db_mon.changes);
+    ds_put_format(ds, "    interface_rows       : %llu\n",
+                  db_mon.iface_rows);
+    ds_put_format(ds, "    port_rows            : %llu\n", db_mon.port_rows);
+    ds_put_format(ds, "    interfaces           : %lu\n",
+                  (unsigned long)shash_count(&all_interfaces));
+    ds_put_format(ds, "    ports                : %lu\n",
+                  (unsigned long)shash_count(&all_ports));
+} /* db_monitor_dump */
 
 /**@} end of lacpd_ovsdb_if group */
 
@@ -2627,21 +3642,22 @@ void
 lacpd_run(void)
 {
     struct ovsdb_idl_txn *txn;
+    unsigned long long start = db_req_now_ns();
 
-    OVSDB_LOCK;
+    /* Apply the status changes from the LACP protocol thread. */
+    db_req_run();
 
     /* Process a batch of messages from OVSDB. */
     ovsdb_idl_run(idl);
+    db_mon.wakeups++;
 
     if (ovsdb_idl_is_lock_contended(idl)) {
         static struct vlog_rate_limit rl = VLOG_RATE_LIMIT_INIT(1, 1);
         VLOG_ERR_RL(&rl, "Another lacpd process is running, "
                     "disabling this process until it goes away");
-        OVSDB_UNLOCK;
-        return;
+        goto end;
     } else if (!ovsdb_idl_has_lock(idl)) {
-        OVSDB_UNLOCK;
-        return;
+        goto end;
     }
 
     /* Update the local configuration and push any changes to the DB. */
@@ -2654,10 +3670,14 @@ lacpd_run(void)
             ovsdb_idl_txn_commit_block(txn);
         }
         ovsdb_idl_txn_destroy(txn);
-    }
 
-    OVSDB_UNLOCK;
+        /* Write what the LACP state machines changed. */
+        db_writeback_run();
+    }
 
+end:
+    lacp_hist_record(&db_req_perf.pass_us,
+                     (db_req_now_ns() - start) / 1000);
     return;
 } /* lacpd_run */
 
@@ -2665,66 +3685,54 @@ void
 lacpd_wait(void)
 {
     ovsdb_idl_wait(idl);
-    poll_timer_wait(LACP_POLL_INTERVAL);
+    db_writeback_wait();
+    db_req_wait();
 } /* lacpd_wait */
 
 /**********************************************************************/
 /* Interface attach/detach functions called from LACP state machine.  */
+/* They run in the LACP protocol thread and only send a request; the  */
+/* db_req_hw_* functions apply it in the OVSDB interface thread.      */
 /**********************************************************************/
 static void
-lacpd_thread_intf_update_hw_bond_config(struct iface_data *idp,
-                                        bool update_rx, bool rx_enabled,
-                                        bool update_tx, bool tx_enabled)
+db_req_update_hw_bond_config(struct iface_data *idp,
+                             bool update_rx, bool rx_enabled,
+                             bool update_tx, bool tx_enabled)
 {
-    struct ovsdb_idl_txn *txn;
+    unsigned int what = 0;
 
-    OVSDB_LOCK;
-    txn = ovsdb_idl_txn_create(idl);
     if (update_rx) {
-        update_interface_hw_bond_config_map_entry(
-            idp,
-            INTERFACE_HW_BOND_CONFIG_MAP_RX_ENABLED,
-            (rx_enabled ?
-             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_TRUE :
-             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_FALSE));
-
-        update_member_interface_bond_status(idp->port_datap);
-        update_port_bond_status_map_entry(idp->port_datap);
+        idp->wb_rx_enabled = rx_enabled;
+        what |= DB_WB_HW_RX;
     }
     if (update_tx) {
-        update_interface_hw_bond_config_map_entry(
-            idp,
-            INTERFACE_HW_BOND_CONFIG_MAP_TX_ENABLED,
-            (tx_enabled ?
-             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_TRUE :
-             INTERFACE_HW_BOND_CONFIG_MAP_ENABLED_FALSE));
-
-        update_member_interface_bond_status(idp->port_datap);
-        update_port_bond_status_map_entry(idp->port_datap);
+        idp->wb_tx_enabled = tx_enabled;
+        what |= DB_WB_HW_TX;
     }
 
-    ovsdb_idl_txn_commit_block(txn);
-    ovsdb_idl_txn_destroy(txn);
-    OVSDB_UNLOCK;
+    if (what != 0) {
+        db_wb_mark_iface(idp, what);
+        if (idp->port_datap != NULL) {
+            db_wb_mark_port(idp->port_datap, DB_WB_BOND_STATUS);
+        }
+    }
 
-} /* ops_intf_update_hw_bond_config */
+} /* db_req_update_hw_bond_config */
 
-void
-ops_attach_port_in_hw(uint16_t lag_id, int port)
+static void
+db_req_hw_attach(struct db_req *req)
 {
     struct iface_data *idp = NULL;
-
-    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+    int port = req->port;
 
     idp = find_iface_data_by_index(port);
     if (idp) {
         if (idp->lacp_state == LACP_STATE_ENABLED) {
-            /* Attaching port means just RX. */
-            lacpd_thread_intf_update_hw_bond_config(idp,
-                                                    true,   /* update_rx */
-                                                    true,   /* rx_enabled */
-                                                    false,  /* update_tx */
-                                                    false); /* tx_enabled */
+            /* Attaching port means just RX, unless the request also
+             * carries hardware updates it superseded. */
+            db_req_update_hw_bond_config(idp,
+                                         req->update_rx, req->rx_enabled,
+                                         req->update_tx, req->tx_enabled);
         } else {
             VLOG_ERR("LACP state machine trying to attach port %d "
                      "when LACP is not enabled!", port);
@@ -2733,24 +3741,21 @@ ops_attach_port_in_hw(uint16_t lag_id, int port)
         VLOG_ERR("Failed to find interface data for attaching port in hw. "
                  "port index=%d", port);
     }
-} /* ops_attach_port_in_hw */
+} /* db_req_hw_attach */
 
-void
-ops_detach_port_in_hw(uint16_t lag_id, int port)
+static void
+db_req_hw_detach(struct db_req *req)
 {
     struct iface_data *idp = NULL;
-
-    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+    int port = req->port;
 
     idp = find_iface_data_by_index(port);
     if (idp) {
         if (idp->lacp_state == LACP_STATE_ENABLED) {
             /* Detaching port means both RX/TX are disabled. */
-            lacpd_thread_intf_update_hw_bond_config(idp,
-                                                    true,   /* update_rx */
-                                                    false,  /* rx_enabled */
-                                                    true,   /* update_tx */
-                                                    false); /* tx_enabled */
+            db_req_update_hw_bond_config(idp,
+                                         req->update_rx, req->rx_enabled,
+                                         req->update_tx, req->tx_enabled);
         } else {
             /* Probably just a race condition between static <-> dynamic
              * LAG conversion.  Ignore the request. */
@@ -2762,24 +3767,22 @@ ops_detach_port_in_hw(uint16_t lag_id, int port)
                  "port index=%d", port);
     }
 
-} /* ops_detach_port_in_hw */
+} /* db_req_hw_detach */
 
-void
-ops_trunk_port_egr_enable(uint16_t lag_id, int port)
+static void
+db_req_hw_egr_enable(struct db_req *req)
 {
     struct iface_data *idp = NULL;
-
-    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+    int port = req->port;
 
     idp = find_iface_data_by_index(port);
     if (idp) {
         if (idp->lacp_state == LACP_STATE_ENABLED) {
-            /* Egress enable means TX. */
-            lacpd_thread_intf_update_hw_bond_config(idp,
-                                                    false, /* update_rx */
-                                                    false, /* rx_enabled */
-                                                    true,  /* update_tx */
-                                                    true); /* tx_enabled */
+            /* Egress enable means TX, unless the request also carries
+             * hardware updates it superseded. */
+            db_req_update_hw_bond_config(idp,
+                                         req->update_rx, req->rx_enabled,
+                                         req->update_tx, req->tx_enabled);
         } else {
             VLOG_ERR("LACP state machine trying to enable egress on "
                      "port %d when LACP is not enabled!", port);
@@ -2788,16 +3791,110 @@ ops_trunk_port_egr_enable(uint16_t lag_id, int port)
         VLOG_ERR("Failed to find interface data for egress enable. "
                  "port index=%d", port);
     }
+} /* db_req_hw_egr_enable */
+
+/* Called by the LACP protocol thread: sends a hardware bond config
+ * request for an interface. */
+static void
+db_req_send_hw(enum db_req_type type, uint16_t lag_id, int port)
+{
+    struct db_req *req;
+
+    req = db_req_alloc(type);
+    req->lag_id = lag_id;
+    req->port = port;
+
+    switch (type) {
+    case DB_REQ_HW_ATTACH:
+        /* Attaching port means just RX. */
+        req->update_rx = true;
+        req->rx_enabled = true;
+        break;
+    case DB_REQ_HW_DETACH:
+        /* Detaching port means both RX/TX are disabled. */
+        req->update_rx = true;
+        req->rx_enabled = false;
+        req->update_tx = true;
+        req->tx_enabled = false;
+        break;
+    case DB_REQ_HW_EGR_ENABLE:
+        /* Egress enable means TX. */
+        req->update_tx = true;
+        req->tx_enabled = true;
+        break;
+    default:
+        break;
+    }
+
+    db_req_send(req);
+} /* db_req_send_hw */
+
+void
+ops_attach_port_in_hw(uint16_t lag_id, int port)
+{
+    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+
+    db_req_send_hw(DB_REQ_HW_ATTACH, lag_id, port);
+} /* ops_attach_port_in_hw */
+
+void
+ops_detach_port_in_hw(uint16_t lag_id, int port)
+{
+    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+
+    db_req_send_hw(DB_REQ_HW_DETACH, lag_id, port);
+} /* ops_detach_port_in_hw */
+
+void
+ops_trunk_port_egr_enable(uint16_t lag_id, int port)
+{
+    VLOG_DBG("%s: lag_id=%d, port=%d", __FUNCTION__, lag_id, port);
+
+    db_req_send_hw(DB_REQ_HW_EGR_ENABLE, lag_id, port);
 } /* ops_trunk_port_egr_enable */
 
+/* Records the LAG speed in smap, if it is not the one last written. */
+static bool
+db_update_port_speed_smap(struct port_data *portp, struct smap *smap)
+{
+    char *speed_str;
+
+    asprintf(&speed_str, "%d", portp->lag_member_speed);
+    if (portp->speed_str == NULL || strcmp(speed_str, portp->speed_str) != 0) {
+        free(portp->speed_str);
+        portp->speed_str = speed_str;
+        smap_replace(smap, PORT_LACP_STATUS_MAP_BOND_SPEED, speed_str);
+        return true;
+    }
+
+    free(speed_str);
+    return false;
+} /* db_update_port_speed_smap */
+
+static void
+db_update_port_speed(struct port_data *portp)
+{
+    const struct ovsrec_port *prow;
+    struct smap smap;
+
+    prow = portp->cfg;
+
+    smap_clone(&smap, &prow->lacp_status);
+
+    if (db_update_port_speed_smap(portp, &smap)) {
+        ovsrec_port_set_lacp_status(prow, &smap);
+    }
+
+    smap_destroy(&smap);
+} /* db_update_port_speed */
+
+/* Stages the LAG's lacp_status in the write-back transaction. */
 static void
 db_update_port_status(struct port_data *portp)
 {
     const struct ovsrec_port *prow;
     struct smap smap;
-    struct ovsdb_idl_txn *txn;
     bool changed = false;
-    char *speed_str;
 
     prow = portp->cfg;
 
@@ -2885,122 +3982,129 @@ db_update_port_status(struct port_data *portp)
         }
     }
 
-    /* update speed */
-    asprintf(&speed_str, "%d", portp->lag_member_speed);
-    if (portp->speed_str == NULL || strcmp(speed_str, portp->speed_str) != 0) {
-        free(portp->speed_str);
-        portp->speed_str = speed_str;
-        smap_replace(&smap, PORT_LACP_STATUS_MAP_BOND_SPEED, speed_str);
+    if (db_update_port_speed_smap(portp, &smap)) {
         changed = true;
-    } else {
-        free(speed_str);
     }
 
     if (changed) {
-        txn = ovsdb_idl_txn_create(idl);
-
         ovsrec_port_set_lacp_status(prow, &smap);
-
-        ovsdb_idl_txn_commit_block(txn);
-        ovsdb_idl_txn_destroy(txn);
     }
 
     smap_destroy(&smap);
 } /* db_update_port_status */
 
-void
-db_add_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t *plpinfo)
+static void
+db_req_lag_add_port(struct db_req *req)
 {
     struct port_data *portp;
     struct iface_data *idp;
-    int index;
-
-    OVSDB_LOCK;
 
     /* get port data */
-    portp = find_port_data_by_lag_id(lag_id);
+    portp = find_port_data_by_lag_id(req->lag_id);
 
     if (portp == NULL) {
-        VLOG_WARN("Port not configured for LACP! lag_id = %d", lag_id);
-        goto end;
+        VLOG_WARN("Port not configured for LACP! lag_id = %d", req->lag_id);
+        return;
     }
 
-    index = PM_HANDLE2PORT(plpinfo->lport_handle);
-    idp = find_iface_data_by_index(index);
+    idp = find_iface_data_by_index(req->port);
 
     if (idp == NULL) {
         VLOG_WARN("Interface not configured in LAG. lag_id = %d, port = %d",
-                  lag_id, port);
-        goto end;
+                  req->lag_id, req->port);
+        return;
     }
 
-    idp->local_state = plpinfo->actor_oper_port_state;
+    idp->local_state = req->local_state;
 
     shash_add_once(&portp->participant_ifs, idp->name, idp);
 
-    VLOG_DBG("Added interface (%d) to lag (%d): %d participants", port, lag_id, (int)shash_count(&portp->participant_ifs));
+    VLOG_DBG("Added interface (%d) to lag (%d): %d participants", req->port, req->lag_id, (int)shash_count(&portp->participant_ifs));
 
-    if (plpinfo->lag != NULL) {
-        portp->lag_member_speed = lport_type_to_speed(ntohs(plpinfo->lag->port_type));
+    if (req->has_speed) {
+        portp->lag_member_speed = req->lag_member_speed;
         VLOG_DBG("setting speed: %d\n", portp->lag_member_speed);
     }
 
-    db_update_port_status(portp);
-end:
-    OVSDB_UNLOCK;
+    db_wb_mark_port(portp, DB_WB_PORT_STATUS);
 
-} /* db_add_lag_port */
+} /* db_req_lag_add_port */
 
-void
-db_delete_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t *plpinfo)
+static void
+db_req_lag_del_port(struct db_req *req)
 {
     struct port_data *portp;
     struct iface_data *idp;
     struct shash_node *node;
-    int index;
-    struct ovsdb_idl_txn *txn = NULL;
 
-    OVSDB_LOCK;
-
-    index = PM_HANDLE2PORT(plpinfo->lport_handle);
-    idp = find_iface_data_by_index(index);
+    idp = find_iface_data_by_index(req->port);
 
     if (idp == NULL) {
         VLOG_WARN("Interface not configured in LAG. lag_id = %d, port = %d",
-                  lag_id, port);
-        goto end;
+                  req->lag_id, req->port);
+        return;
     }
 
     /* get port data */
-    portp = find_port_data_by_lag_id(lag_id);
+    portp = find_port_data_by_lag_id(req->lag_id);
 
     if (portp == NULL) {
-        VLOG_WARN("Port not configured for LACP! lag_id = %d", lag_id);
-        txn = ovsdb_idl_txn_create(idl);
+        VLOG_WARN("Port not configured for LACP! lag_id = %d", req->lag_id);
 
-        db_clear_interface(idp);
-
-        ovsdb_idl_txn_commit_block(txn);
-        ovsdb_idl_txn_destroy(txn);
+        db_wb_mark_iface(idp, DB_WB_CLEAR);
 
-        goto end;
+        return;
     }
 
     node = shash_find(&portp->participant_ifs, idp->name);
     shash_delete(&portp->participant_ifs, node);
 
     VLOG_DBG("Removed interface (%d) from lag (%d): %d participants",
-             port, lag_id, (int)shash_count(&portp->participant_ifs));
+             req->port, req->lag_id, (int)shash_count(&portp->participant_ifs));
 
-    if (plpinfo->lag != NULL) {
-        portp->lag_member_speed = lport_type_to_speed(plpinfo->lag->port_type);
+    if (req->has_speed) {
+        portp->lag_member_speed = req->lag_member_speed;
         VLOG_DBG("setting speed: %d\n", portp->lag_member_speed);
     }
 
-    db_update_port_status(portp);
+    db_wb_mark_port(portp, DB_WB_PORT_STATUS);
 
-end:
-    OVSDB_UNLOCK;
+} /* db_req_lag_del_port */
+
+void
+db_add_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t *plpinfo)
+{
+    struct db_req *req;
+
+    req = db_req_alloc(DB_REQ_LAG_ADD_PORT);
+    req->lag_id = lag_id;
+    req->port = PM_HANDLE2PORT(plpinfo->lport_handle);
+    req->local_state = plpinfo->actor_oper_port_state;
+
+    if (plpinfo->lag != NULL) {
+        req->has_speed = true;
+        req->lag_member_speed = lport_type_to_speed(ntohs(plpinfo->lag->port_type));
+    }
+
+    db_req_send(req);
+
+} /* db_add_lag_port */
+
+void
+db_delete_lag_port(uint16_t lag_id, int port, lacp_per_port_variables_t *plpinfo)
+{
+    struct db_req *req;
+
+    req = db_req_alloc(DB_REQ_LAG_DEL_PORT);
+    req->lag_id = lag_id;
+    req->port = PM_HANDLE2PORT(plpinfo->lport_handle);
+
+    if (plpinfo->lag != NULL) {
+        req->has_speed = true;
+        req->lag_member_speed = lport_type_to_speed(plpinfo->lag->port_type);
+    }
+
+    db_req_send(req);
 
 } /* db_delete_lag_port */
 
@@ -3024,87 +4128,156 @@ db_clear_lag_partner_info_port(struct port_data *portp)
     portp->current_status = STATUS_UNINITIALIZED;
 }
 
-void
-db_clear_lag_partner_info(uint16_t lag_id)
+static void
+db_req_lag_status(struct db_req *req, unsigned int what)
 {
     struct port_data *portp;
-    struct ovsdb_idl_txn *txn = NULL;
-
-    /* acquire lock */
-    OVSDB_LOCK;
 
     /* get port */
-    portp = find_port_data_by_lag_id(lag_id);
+    portp = find_port_data_by_lag_id(req->lag_id);
 
     if (portp == NULL) {
-        VLOG_WARN("Updating port not configured for LACP! lag_id = %d", lag_id);
-        goto end;
+        VLOG_WARN("Updating port not configured for LACP! lag_id = %d",
+                  req->lag_id);
+        return;
     }
 
-    txn = ovsdb_idl_txn_create(idl);
+    db_wb_mark_port(portp, what);
+} /* db_req_lag_status */
 
-    db_clear_lag_partner_info_port(portp);
-
-    ovsdb_idl_txn_commit_block(txn);
-    ovsdb_idl_txn_destroy(txn);
+void
+db_clear_lag_partner_info(uint16_t lag_id)
+{
+    struct db_req *req;
 
-end:
-    OVSDB_UNLOCK;
+    req = db_req_alloc(DB_REQ_LAG_CLEAR);
+    req->lag_id = lag_id;
+    db_req_send(req);
 } /* db_clear_lag_partner_info */
 
 void
 db_update_lag_partner_info(uint16_t lag_id)
 {
-    const struct ovsrec_port *prow;
-    struct port_data *portp;
-    struct smap smap;
-    struct ovsdb_idl_txn *txn = NULL;
-    bool changes = false;
-    char *speed_str;
+    struct db_req *req;
 
-    /* acquire lock */
-    OVSDB_LOCK;
+    req = db_req_alloc(DB_REQ_LAG_UPDATE);
+    req->lag_id = lag_id;
+    db_req_send(req);
 
-    /* get port */
-    portp = find_port_data_by_lag_id(lag_id);
+} /* db_update_lag_partner_info */
 
-    if (portp == NULL) {
-        VLOG_WARN("Updating port not configured for LACP! lag_id = %d", lag_id);
-        goto end;
-    }
+/* Applies the requests sent by the LACP protocol thread since the last
+ * pass, in order, and hands them back to it. */
+static void
+db_req_run(void)
+{
+    unsigned long long now;
+    unsigned long long n = 0;
+    struct db_req *req;
+    struct db_req *first = NULL;
+    struct db_req *last = NULL;
+    struct db_req *top;
+
+    mqueue_poll_done(&db_req_queue);
+
+    while (mqueue_trywait(&db_req_queue, (void **)&req) == 0) {
+        switch (req->type) {
+        case DB_REQ_IFACE_STATUS:
+            db_req_iface_status(req);
+            break;
+        case DB_REQ_HW_ATTACH:
+            db_req_hw_attach(req);
+            break;
+        case DB_REQ_HW_DETACH:
+            db_req_hw_detach(req);
+            break;
+        case DB_REQ_HW_EGR_ENABLE:
+            db_req_hw_egr_enable(req);
+            break;
+        case DB_REQ_LAG_ADD_PORT:
+            db_req_lag_add_port(req);
+            break;
+        case DB_REQ_LAG_DEL_PORT:
+            db_req_lag_del_port(req);
+            break;
+        case DB_REQ_LAG_CLEAR:
+            db_req_lag_status(req, DB_WB_PORT_CLEAR);
+            break;
+        case DB_REQ_LAG_UPDATE:
+            db_req_lag_status(req, DB_WB_PORT_SPEED);
+            break;
+        }
 
-    prow = portp->cfg;
+        now = db_req_now_ns();
+        lacp_hist_record(&db_req_perf.delay_us, (now - req->sent_ns) / 1000);
+        n++;
 
-    smap_clone(&smap, &prow->lacp_status);
+        req->next = first;
+        first = req;
+        if (last == NULL) {
+            last = req;
+        }
+    }
 
-    txn = ovsdb_idl_txn_create(idl);
+    if (n > 0) {
+        lacp_hist_record(&db_req_perf.batch, n);
 
-    /* update speed */
-    asprintf(&speed_str, "%d", portp->lag_member_speed);
-    if (portp->speed_str == NULL || strcmp(speed_str, portp->speed_str) != 0) {
-        free(portp->speed_str);
-        portp->speed_str = speed_str;
-        smap_replace(&smap, PORT_LACP_STATUS_MAP_BOND_SPEED, speed_str);
-        changes = true;
-    } else {
-        free(speed_str);
+        /* Hand the applied requests back to the protocol thread. */
+        top = __atomic_load_n(&db_req_returned, __ATOMIC_RELAXED);
+        do {
+            last->next = top;
+        } while (!__atomic_compare_exchange_n(&db_req_returned, &top, first,
+                                              false, __ATOMIC_SEQ_CST,
+                                              __ATOMIC_RELAXED));
     }
 
-    if (changes) {
-        ovsrec_port_set_lacp_status(prow, &smap);
-        ovsdb_idl_txn_commit_block(txn);
-    } else {
-        ovsdb_idl_txn_abort(txn);
+    /* The protocol thread has requests waiting for room. */
+    if (__atomic_load_n(&db_req_overflowing, __ATOMIC_SEQ_CST) &&
+        __atomic_exchange_n(&db_req_overflowing, false, __ATOMIC_SEQ_CST)) {
+        send_db_req_room_msg();
     }
+} /* db_req_run */
 
-    ovsdb_idl_txn_destroy(txn);
-
-    smap_destroy(&smap);
+static void
+db_req_wait(void)
+{
+    int fd;
 
-end:
-    OVSDB_UNLOCK;
+    fd = mqueue_poll_fd(&db_req_queue);
+    if (fd < 0) {
+        poll_immediate_wake();
+    } else {
+        poll_fd_wait(fd, POLLIN);
+    }
+} /* db_req_wait */
 
-} /* db_update_lag_partner_info */
+/**
+ * @details
+ * Dumps the histograms of the OVSDB requests from the LACP protocol
+ * thread, and of the OVSDB interface thread passes.
+ */
+void
+db_request_perf_dump(struct ds *ds)
+{
+    ds_put_cstr(ds, "================ OVSDB Requests ================\n");
+    ds_put_format(ds, "    queue_full           : %llu\n",
+                  __atomic_load_n(&db_req_perf.full, __ATOMIC_RELAXED));
+    ds_put_format(ds, "    pool_size            : %u\n", db_req_pool_size);
+    ds_put_format(ds, "    inflight             : %u\n",
+                  db_req_overflow.inflight);
+    ds_put_format(ds, "    overflow_depth       : %lu\n",
+                  db_req_overflow.count);
+    ds_put_format(ds, "    overflow_high_water  : %lu\n",
+                  db_req_overflow.high_water);
+    ds_put_format(ds, "    overflow_coalesced   : %llu\n",
+                  db_req_overflow.coalesced);
+
+    lacpd_perf_hist_dump(ds, "Request send", &db_req_perf.send_ns, " ns");
+    lacpd_perf_hist_dump(ds, "Request delay", &db_req_perf.delay_us, " us");
+    lacpd_perf_hist_dump(ds, "Requests per pass", &db_req_perf.batch, "");
+    lacpd_perf_hist_dump(ds, "OVSDB thread pass", &db_req_perf.pass_us,
+                         " us");
+} /* db_request_perf_dump */
 
 /**********************************************************************/
 /*                               DEBUG                                */
@@ -3140,6 +4313,7 @@ lacpd_interface_dump(struct ds *ds, struct iface_data *idp)
         ds_put_format(ds, "    LAG eligible         : %s\n",
                       idp->lag_eligible ? "true" : "false");
     }
+    lacpd_port_pdu_dump(ds, idp->index);
 } /* lacpd_interface_dump */
 
 static void
@@ -3256,6 +4430,10 @@ lacpd_debug_dump(struct ds *ds, int argc, const char *argv[])
             lacpd_interfaces_dump(ds, argc, argv);
         } else if (!strcmp(table_name, "port")) {
             lacpd_ports_dump(ds, argc, argv);
+        } else if (!strcmp(table_name, "queue")) {
+            lacpd_event_queue_dump(ds);
+        } else if (!strcmp(table_name, "pool")) {
+            lacpd_event_pool_dump(ds);
         }
     } else {
         lacpd_interfaces_dump(ds, 0, NULL);
@@ -3341,12 +4519,18 @@ void lacpd_dump_pdus_per_interface(struct ds *ds, struct port_data *portp)
                     ds_put_format(ds, "  Interface: %s\n", idp->name);
                     ds_put_format(ds, "    lacp_pdus_sent: %d\n",
                                   lacp_port_variable->lacp_pdus_sent);
+                    ds_put_format(ds, "    lacp_pdus_rebuilt: %d\n",
+                                  lacp_port_variable->lacp_pdus_rebuilt);
                     ds_put_format(ds, "    marker_response_pdus_sent: %d\n",
                                   lacp_port_variable->marker_response_pdus_sent);
                     ds_put_format(ds, "    lacp_pdus_received: %d\n",
                                   lacp_port_variable->lacp_pdus_received);
+                    ds_put_format(ds, "    lacp_pdus_fast_path: %d\n",
+                                  lacp_port_variable->lacp_pdus_fast_path);
                     ds_put_format(ds, "    marker_pdus_received: %d\n",
                                   lacp_port_variable->marker_pdus_received);
+                    ds_put_format(ds, "    marker_pdus_dropped: %d\n",
+                                  lacp_port_variable->marker_pdus_dropped);
                     break;
                 }
                 lacp_port_variable = LACP_AVL_NEXT(lacp_port_variable->avlnode);
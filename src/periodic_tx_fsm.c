@@ -125,7 +125,7 @@ static void LACP_no_periodic_state_action(lacp_per_port_variables_t *);
 static void LACP_fast_periodic_state_action(lacp_per_port_variables_t *);
 static void LACP_slow_periodic_state_action(lacp_per_port_variables_t *);
 static void LACP_periodic_tx_state_action(lacp_per_port_variables_t *);
-static lacpdu_payload_t *LACP_build_lacpdu_payload(lacp_per_port_variables_t *);
+static int LACP_update_lacpdu_template(lacp_per_port_variables_t *);
 
 /*----------------------------------------------------------------------
  * Function: LACP_periodic_tx_fsm(event, current_state, port_number)
@@ -239,8 +239,8 @@ LACP_no_periodic_state_action(lacp_per_port_variables_t *plpinfo)
     // Put the port in NO PERIODIC state.
     plpinfo->periodic_tx_fsm_state = PERIODIC_TX_FSM_NO_PERIODIC_STATE;
 
-    // Reset the expiry counter.
-    plpinfo->periodic_tx_timer_expiry_counter = 0;
+    // Stop the periodic Tx timer.
+    lacp_timer_stop(&lacp_tx_timer_wheel, &plpinfo->periodic_tx_timer);
 
     if ((plpinfo->lacp_control.port_enabled == FALSE) ||
         ((plpinfo->actor_oper_port_state.lacp_activity == LACP_PASSIVE_MODE) &&
@@ -275,8 +275,8 @@ LACP_fast_periodic_state_action(lacp_per_port_variables_t *plpinfo)
     // Put the port in FAST_PERIODIC state.
     plpinfo->periodic_tx_fsm_state = PERIODIC_TX_FSM_FAST_PERIODIC_STATE;
 
-    // Reinitialize the expiry counter.
-    plpinfo->periodic_tx_timer_expiry_counter = FAST_PERIODIC_COUNT;
+    // Restart the periodic Tx timer.
+    LACP_start_periodic_tx_timer(plpinfo, FAST_PERIODIC_TICKS);
 
     // Go to SLOW_PERIODIC state if approp. conditions prevail.
     if (plpinfo->partner_oper_port_state.lacp_timeout == LONG_TIMEOUT) {
@@ -306,8 +306,8 @@ LACP_slow_periodic_state_action(lacp_per_port_variables_t *plpinfo)
     // Put the port in SLOW_PERIODIC state.
     plpinfo->periodic_tx_fsm_state = PERIODIC_TX_FSM_SLOW_PERIODIC_STATE;
 
-    // Reinitialize the expiry counter.
-    plpinfo->periodic_tx_timer_expiry_counter = SLOW_PERIODIC_COUNT;
+    // Restart the periodic Tx timer.
+    LACP_start_periodic_tx_timer(plpinfo, LACP_TIMER_SEC(SLOW_PERIODIC_COUNT));
 
     // Go to PERIODIC_TX state if approp. conditions prevail.
     if (plpinfo->partner_oper_port_state.lacp_timeout == SHORT_TIMEOUT) {
@@ -373,9 +373,6 @@ LACP_periodic_tx_state_action(lacp_per_port_variables_t *plpinfo)
 void
 LACP_transmit_lacpdu(lacp_per_port_variables_t *plpinfo)
 {
-    lacpdu_payload_t *lacpdu_payload;
-    int datasize = sizeof(lacpdu_payload_t);
-
     RENTRY();
 
     if (plpinfo->debug_level & DBG_TX_FSM) {
@@ -390,23 +387,17 @@ LACP_transmit_lacpdu(lacp_per_port_variables_t *plpinfo)
         goto exit;
     }
 
-    // Form the LACPDU.
-    if (!(lacpdu_payload = LACP_build_lacpdu_payload(plpinfo))) {
-
-        // Report error and exit
-        VLOG_ERR("Failed to build LACPDU payload");
-        goto exit;
+    // Bring the port's LACPDU frame up to date.
+    if (LACP_update_lacpdu_template(plpinfo)) {
+        plpinfo->lacp_pdus_rebuilt++;
     }
 
     // OpenSwitch
-    mlacp_tx_pdu((unsigned char *)lacpdu_payload,
-                 datasize, plpinfo->lport_handle);
+    mlacp_tx_frame((unsigned char *)&plpinfo->tx_lacpdu,
+                   sizeof(lacpdu_payload_t), plpinfo->lport_handle);
 
     plpinfo->lacp_pdus_sent++;
 
-    // Free LACPDU memory.
-    free(lacpdu_payload);
-
  exit:
 
     if (plpinfo->debug_level & DBG_TX_FSM) {
@@ -415,115 +406,122 @@ LACP_transmit_lacpdu(lacp_per_port_variables_t *plpinfo)
 } // LACP_transmit_lacpdu
 
 /*----------------------------------------------------------------------
- * Function: LACP_build_lacpdu(int port_number)
- * Synopsis: Function to construct the lacpdu.
+ * Function: LACP_update_lacpdu_template(plpinfo)
+ * Synopsis: Keeps a complete LACPDU frame, Ethernet header included,
+ *           for the port.  The frame is built on the first transmit;
+ *           after that only the header and TLVs whose source variables
+ *           have changed since the last transmit are rewritten.  The
+ *           template itself holds the values it was last built from, so
+ *           no writer of the oper variables has to mark it dirty.
  * Input  :
- *           port_number = port number on which to act upon.
- * Returns:  pointer to the constructed lacpdu payload or NULL in case
- *           of error.
+ *           plpinfo = pointer to lport data
+ * Returns:  TRUE if the frame had to be changed.
  *----------------------------------------------------------------------*/
-static lacpdu_payload_t *
-LACP_build_lacpdu_payload(lacp_per_port_variables_t *plpinfo)
+static int
+LACP_update_lacpdu_template(lacp_per_port_variables_t *plpinfo)
 {
-    lacpdu_payload_t *lacpdu_payload;
-
-    RENTRY();
+    lacpdu_payload_t *lacpdu_payload = &plpinfo->tx_lacpdu;
+    int rebuild = FALSE;
+    int changed = FALSE;
+
+    if (plpinfo->tx_lacpdu_valid == FALSE) {
+        // Zero out the frame, reserved fields included.
+        memset(lacpdu_payload, 0, sizeof(lacpdu_payload_t));
+
+        // Ethernet header; the source MAC is checked below.
+        memcpy(lacpdu_payload->headroom, lacp_mcast_addr, MAC_ADDR_LENGTH);
+        lacpdu_payload->headroom[12] = SLOW_PROTOCOLS_ETHERTYPE_PART1;
+        lacpdu_payload->headroom[13] = SLOW_PROTOCOLS_ETHERTYPE_PART2;
+
+        // Fill in the general parameters in the lacpdu_payload.
+        lacpdu_payload->subtype = LACP_SUBTYPE;
+        lacpdu_payload->version_number = LACP_VERSION;
+        lacpdu_payload->tlv_type_actor = LACP_TLV_ACTOR_INFO;
+        lacpdu_payload->actor_info_length = LACP_TLV_INFO_LENGTH;
+        lacpdu_payload->tlv_type_partner = LACP_TLV_PARTNER_INFO;
+        lacpdu_payload->partner_info_length = LACP_TLV_INFO_LENGTH;
+        lacpdu_payload->tlv_type_collector = LACP_TLV_COLLECTOR_INFO;
+        lacpdu_payload->collector_info_length = LACP_TLV_COLLECTOR_INFO_LENGTH;
+        lacpdu_payload->tlv_type_terminator = LACP_TLV_TERMINATOR_INFO;
+        lacpdu_payload->terminator_length = LACP_TLV_TERMINATOR_INFO_LENGTH;
+
+        plpinfo->tx_lacpdu_valid = TRUE;
+        rebuild = TRUE;
+        changed = TRUE;
+    }
 
-    if (plpinfo->debug_level & DBG_TX_FSM) {
-        RDBG("%s : lport_handle 0x%llx\n",
-             __FUNCTION__, plpinfo->lport_handle);
+    if (memcmp(&lacpdu_payload->headroom[MAC_ADDR_LENGTH],
+               my_mac_addr, MAC_ADDR_LENGTH) != 0) {
+        memcpy(&lacpdu_payload->headroom[MAC_ADDR_LENGTH],
+               my_mac_addr, MAC_ADDR_LENGTH);
+        changed = TRUE;
     }
 
-    // Allocate memory for the lacpdu
-    lacpdu_payload = (lacpdu_payload_t *)malloc(sizeof(lacpdu_payload_t));
-    if (lacpdu_payload == NULL) {
-        VLOG_FATAL("out of memory");
-        goto exit;
+    // Actor's (local port) parameters.
+    if (rebuild ||
+        lacpdu_payload->actor_system_priority !=
+            (u_short)plpinfo->actor_oper_system_variables.system_priority ||
+        memcmp(lacpdu_payload->actor_system,
+               plpinfo->actor_oper_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH) != 0 ||
+        lacpdu_payload->actor_key != plpinfo->actor_oper_port_key ||
+        lacpdu_payload->actor_port_priority !=
+            plpinfo->actor_oper_port_priority ||
+        lacpdu_payload->actor_port != plpinfo->actor_oper_port_number ||
+        memcmp(&lacpdu_payload->actor_state,
+               &plpinfo->actor_oper_port_state,
+               sizeof(state_parameters_t)) != 0) {
+
+        lacpdu_payload->actor_system_priority =
+            plpinfo->actor_oper_system_variables.system_priority;
+        memcpy((char *)lacpdu_payload->actor_system,
+               (char *)plpinfo->actor_oper_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH);
+        lacpdu_payload->actor_key = plpinfo->actor_oper_port_key;
+        lacpdu_payload->actor_port_priority =
+            plpinfo->actor_oper_port_priority;
+        lacpdu_payload->actor_port = plpinfo->actor_oper_port_number;
+        lacpdu_payload->actor_state = plpinfo->actor_oper_port_state;
+        changed = TRUE;
     }
 
-    // Zero out the memory.
-    memset(lacpdu_payload, 0, sizeof(lacpdu_payload_t));
-
-    // Fill in the general parameters in the lacpdu_payload.
-    lacpdu_payload->subtype = LACP_SUBTYPE;
-    lacpdu_payload->version_number = LACP_VERSION;
-
-    // Fill in the actor's (local port) parameters in the lacpdu_payload.
-    lacpdu_payload->tlv_type_actor = LACP_TLV_ACTOR_INFO;
-    lacpdu_payload->actor_info_length = LACP_TLV_INFO_LENGTH;
-    lacpdu_payload->actor_system_priority =
-        plpinfo->actor_oper_system_variables.system_priority;
-
-    memcpy((char *)lacpdu_payload->actor_system,
-           (char *)plpinfo->actor_oper_system_variables.system_mac_addr,
-           MAC_ADDR_LENGTH);
-
-    lacpdu_payload->actor_key = plpinfo->actor_oper_port_key;
-    lacpdu_payload->actor_port_priority = plpinfo->actor_oper_port_priority;
-    lacpdu_payload->actor_port = plpinfo->actor_oper_port_number;
-    lacpdu_payload->actor_state.lacp_activity =
-        plpinfo->actor_oper_port_state.lacp_activity;
-    lacpdu_payload->actor_state.lacp_timeout =
-        plpinfo->actor_oper_port_state.lacp_timeout;
-    lacpdu_payload->actor_state.aggregation =
-        plpinfo->actor_oper_port_state.aggregation;
-    lacpdu_payload->actor_state.synchronization =
-        plpinfo->actor_oper_port_state.synchronization;
-    lacpdu_payload->actor_state.collecting =
-        plpinfo->actor_oper_port_state.collecting;
-    lacpdu_payload->actor_state.distributing =
-        plpinfo->actor_oper_port_state.distributing;
-    lacpdu_payload->actor_state.defaulted =
-        plpinfo->actor_oper_port_state.defaulted;
-    lacpdu_payload->actor_state.expired =
-        plpinfo->actor_oper_port_state.expired;
-
-    // Fill in the partner's (local port) parameters in the lacpdu_payload.
-    lacpdu_payload->tlv_type_partner = LACP_TLV_PARTNER_INFO;
-    lacpdu_payload->partner_info_length = LACP_TLV_INFO_LENGTH;
-
-    lacpdu_payload->partner_system_priority =
-        plpinfo->partner_oper_system_variables.system_priority;
-    memcpy((char *)lacpdu_payload->partner_system,
-           (char *)plpinfo->partner_oper_system_variables.system_mac_addr,
-           MAC_ADDR_LENGTH);
-
-    lacpdu_payload->partner_key = plpinfo->partner_oper_key;
-    lacpdu_payload->partner_port_priority =
-        plpinfo->partner_oper_port_priority;
-    lacpdu_payload->partner_port =
-        plpinfo->partner_oper_port_number;
-
-    // State parameters.
-    lacpdu_payload->partner_state.lacp_activity =
-        plpinfo->partner_oper_port_state.lacp_activity;
-    lacpdu_payload->partner_state.lacp_timeout =
-        plpinfo->partner_oper_port_state.lacp_timeout;
-    lacpdu_payload->partner_state.aggregation =
-        plpinfo->partner_oper_port_state.aggregation;
-    lacpdu_payload->partner_state.synchronization =
-        plpinfo->partner_oper_port_state.synchronization;
-    lacpdu_payload->partner_state.collecting =
-        plpinfo->partner_oper_port_state.collecting;
-    lacpdu_payload->partner_state.distributing =
-        plpinfo->partner_oper_port_state.distributing;
-    lacpdu_payload->partner_state.defaulted =
-        plpinfo->partner_oper_port_state.defaulted;
-    lacpdu_payload->partner_state.expired =
-        plpinfo->partner_oper_port_state.expired;
-
-    lacpdu_payload->tlv_type_collector = LACP_TLV_COLLECTOR_INFO;
-    lacpdu_payload->collector_info_length = LACP_TLV_COLLECTOR_INFO_LENGTH;
-    lacpdu_payload->collector_max_delay = plpinfo->collector_max_delay;
-    lacpdu_payload->tlv_type_terminator = LACP_TLV_TERMINATOR_INFO;
-    lacpdu_payload->terminator_length = LACP_TLV_TERMINATOR_INFO_LENGTH;
+    // Partner's parameters, as known to the local port.
+    if (rebuild ||
+        lacpdu_payload->partner_system_priority !=
+            (u_short)plpinfo->partner_oper_system_variables.system_priority ||
+        memcmp(lacpdu_payload->partner_system,
+               plpinfo->partner_oper_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH) != 0 ||
+        lacpdu_payload->partner_key != plpinfo->partner_oper_key ||
+        lacpdu_payload->partner_port_priority !=
+            plpinfo->partner_oper_port_priority ||
+        lacpdu_payload->partner_port != plpinfo->partner_oper_port_number ||
+        memcmp(&lacpdu_payload->partner_state,
+               &plpinfo->partner_oper_port_state,
+               sizeof(state_parameters_t)) != 0) {
+
+        lacpdu_payload->partner_system_priority =
+            plpinfo->partner_oper_system_variables.system_priority;
+        memcpy((char *)lacpdu_payload->partner_system,
+               (char *)plpinfo->partner_oper_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH);
+        lacpdu_payload->partner_key = plpinfo->partner_oper_key;
+        lacpdu_payload->partner_port_priority =
+            plpinfo->partner_oper_port_priority;
+        lacpdu_payload->partner_port = plpinfo->partner_oper_port_number;
+        lacpdu_payload->partner_state = plpinfo->partner_oper_port_state;
+        changed = TRUE;
+    }
 
-exit:
+    if (rebuild ||
+        lacpdu_payload->collector_max_delay != plpinfo->collector_max_delay) {
+        lacpdu_payload->collector_max_delay = plpinfo->collector_max_delay;
+        changed = TRUE;
+    }
 
-  REXIT();
-  return (lacpdu_payload);
+    return changed;
 
-} // LACP_build_lacpdu_payload
+} // LACP_update_lacpdu_template
 
 /****************************************************************************
  *       Transmit machine
@@ -575,9 +573,19 @@ LACP_async_transmit_lacpdu(lacp_per_port_variables_t *plpinfo)
              __FUNCTION__, plpinfo->lport_handle);
     }
 
+    // The async Tx counter is cleared every fast periodic interval,
+    // the lowest expiry time.
+    if ((lacp_tx_timer_wheel.w_now - plpinfo->async_tx_tick) >=
+        FAST_PERIODIC_TICKS) {
+        plpinfo->async_tx_tick = lacp_tx_timer_wheel.w_now;
+        plpinfo->async_tx_count = 0;
+    }
+
     if (plpinfo->async_tx_count < MAX_ASYNC_TX) {
         plpinfo->async_tx_count++;
         LACP_sync_transmit_lacpdu(plpinfo);
+    } else {
+        LACP_start_ntt_retry_timer(plpinfo);
     }
 
     if (plpinfo->debug_level & DBG_TX_FSM) {
@@ -16,6 +16,7 @@
 
 #include <stdio.h>
 #include <stdlib.h>
+#include <stddef.h>
 #include <string.h>
 #include <sys/types.h>
 
@@ -30,6 +31,7 @@
 #include "lacp_stubs.h"
 #include "lacp_support.h"
 #include "mvlan_lacp.h"
+#include "mlacp_fproto.h"
 #include "lacp_ops_if.h"
 #include "mvlan_sport.h"
 
@@ -155,12 +157,15 @@ static void lacp_disabled_state_action(lacp_per_port_variables_t *);
 static void port_disabled_state_action(lacp_per_port_variables_t *);
 static void initialize_state_action(lacp_per_port_variables_t *);
 static void update_Selected (lacpdu_payload_t *, lacp_per_port_variables_t *);
-static void update_NTT(lacpdu_payload_t *, lacp_per_port_variables_t *);
+static int update_NTT(lacpdu_payload_t *, lacp_per_port_variables_t *);
 static void recordPDU (lacpdu_payload_t *, lacp_per_port_variables_t *);
 static void choose_Matched(lacpdu_payload_t *, lacp_per_port_variables_t *);
 static void recordDefault(lacp_per_port_variables_t *);
 static void update_Default_Selected(lacp_per_port_variables_t *);
 static void start_current_while_timer(lacp_per_port_variables_t *, int);
+static void rx_fast_copy_pdu(lacpdu_payload_t *, u_char *);
+static void rx_fast_copy_state(lacp_per_port_variables_t *,
+                               lacp_rx_fast_state_t *);
 static void generate_mux_event_from_recordPdu(lacp_per_port_variables_t *);
 static void format_state(state_parameters_t, char *);
 
@@ -184,8 +189,7 @@ LACP_receive_fsm(int event, int current_state,
     char current_state_string[STATE_STRING_SIZE];
     char actor_state_str[STATE_FLAGS_SIZE];
     char partner_state_str[STATE_FLAGS_SIZE];
-    int port;
-    struct iface_data *idp = NULL;
+    const char *if_name;
 
     RENTRY();
     RDEBUG(DL_RX_FSM, "RxFSM: event %d current_state %d\n", event, current_state);
@@ -224,8 +228,8 @@ LACP_receive_fsm(int event, int current_state,
         }
     }
 
-    port = PM_HANDLE2PORT(plpinfo->lport_handle);
-    idp = find_iface_data_by_index(port);
+    // The interface may already be gone if it was deleted with LACP on.
+    if_name = mlacp_port_name(plpinfo->lport_handle);
 
     // Call the appropriate action routine.
     switch (action) {
@@ -240,11 +244,12 @@ LACP_receive_fsm(int event, int current_state,
 
     case ACTION_DEFAULTED:
         defaulted_state_action(plpinfo);
-        if (log_event("LACP_PARTNER_TIMEOUT",
+        if ((if_name != NULL) &&
+            log_event("LACP_PARTNER_TIMEOUT",
                       EV_KV("intf_id", "%s",
-                            idp->name),
+                            if_name),
                       EV_KV("lag_id", "sport: %d",
-                            idp->cfg_lag_id),
+                            mlacp_port_lag_id(plpinfo->lport_handle)),
                       EV_KV("fsm_state", "%s -> %s",
                             previous_state_string,
                             current_state_string)) < 0) {
@@ -262,9 +267,11 @@ LACP_receive_fsm(int event, int current_state,
                      actor_state_str);
         format_state(plpinfo->partner_oper_port_state,
                      partner_state_str);
-        if (log_event("LACP_PARTNER_OUT_OF_SYNC",
-                      EV_KV("intf_id", "%s", idp->name),
-                      EV_KV("lag_id", "sport: %d", idp->cfg_lag_id),
+        if ((if_name != NULL) &&
+            log_event("LACP_PARTNER_OUT_OF_SYNC",
+                      EV_KV("intf_id", "%s", if_name),
+                      EV_KV("lag_id", "sport: %d",
+                            mlacp_port_lag_id(plpinfo->lport_handle)),
                       EV_KV("actor_state", "%s",
                             actor_state_str),
                       EV_KV("partner_state", "%s",
@@ -313,7 +320,7 @@ current_state_action(lacp_per_port_variables_t *plpinfo,
     //        (ANVL LACP Conformance Test 7.3)
     choose_Matched(recvd_lacpdu, plpinfo);
 
-    update_NTT(recvd_lacpdu, plpinfo);
+    plpinfo->rx_fast_ntt = update_NTT(recvd_lacpdu, plpinfo);
 
     recordPDU(recvd_lacpdu, plpinfo);
 
@@ -429,6 +436,7 @@ defaulted_state_action(lacp_per_port_variables_t *plpinfo)
 
         plpinfo->lacp_control.selected = UNSELECTED;
         plpinfo->lacp_control.ready_n = FALSE;
+        LACP_MEMBER_CHANGED(plpinfo);
     }
     if (plpinfo->debug_level & DBG_RX_FSM) {
         RDBG("%s : exit\n", __FUNCTION__);
@@ -450,6 +458,7 @@ lacp_disabled_state_action(lacp_per_port_variables_t *plpinfo)
     }
 
     plpinfo->lacp_control.selected = UNSELECTED;
+    LACP_MEMBER_CHANGED(plpinfo);
     LACP_mux_fsm(E2,
                  plpinfo->mux_fsm_state,
                  plpinfo);
@@ -525,6 +534,7 @@ initialize_state_action(lacp_per_port_variables_t *plpinfo)
     plpinfo->lacp_control.begin = FALSE;
 
     plpinfo->lacp_control.selected = UNSELECTED;
+    LACP_MEMBER_CHANGED(plpinfo);
     LACP_mux_fsm(E2,
                  plpinfo->mux_fsm_state,
                  plpinfo);
@@ -555,11 +565,9 @@ static void
 update_Selected(lacpdu_payload_t *recvd_lacpdu,
                 lacp_per_port_variables_t *plpinfo)
 {
-    lacp_per_port_variables_t   *plpinfo_priority;
     super_port_t                *psport;
     lacp_int_sport_params_t     *placp_sport_params;
     int                         status = R_SUCCESS;
-    int                         max_port_priority = MAX_PORT_PRIORITY;
 
     RENTRY();
 
@@ -580,6 +588,7 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -602,23 +611,13 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         status = mvlan_get_sport(plpinfo->sport_handle , &psport,
                                          MLm_vpm_api__get_sport);
         if (R_SUCCESS == status) {
-            plpinfo_priority = LACP_AVL_FIRST(lacp_per_port_vars_tree);
-
-            while (plpinfo_priority) {
-                if (plpinfo_priority->lport_handle != plpinfo->lport_handle &&
-                    plpinfo_priority->sport_handle == psport->handle &&
-                    plpinfo_priority->partner_oper_port_priority != 0 &&
-                    max_port_priority > plpinfo_priority->partner_oper_port_priority) {
-                    max_port_priority = plpinfo_priority->partner_oper_port_priority;
-                }
-                plpinfo_priority = LACP_AVL_NEXT(plpinfo_priority->avlnode);
-            }
-
             placp_sport_params = psport->placp_params;
-            placp_sport_params->lacp_params.partner_max_port_priority = max_port_priority;
+            placp_sport_params->lacp_params.partner_max_port_priority =
+                LACP_sport_partner_max_port_priority(plpinfo);
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -650,6 +649,7 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -671,6 +671,7 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -690,6 +691,7 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -710,6 +712,7 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
         }
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -730,11 +733,13 @@ update_Selected(lacpdu_payload_t *recvd_lacpdu,
  * Input  :
  *           recvd_lacpdu = received LACPDU
  *           plpinfo = pointer to lport data
- * Returns:  void
+ * Returns:  TRUE if the LACPDU made us transmit
  *----------------------------------------------------------------------*/
-static void
+static int
 update_NTT(lacpdu_payload_t *recvd_lacpdu, lacp_per_port_variables_t *plpinfo)
 {
+    int ntt_set = TRUE;
+
     RENTRY();
 
     if (plpinfo->debug_level & DBG_RX_FSM) {
@@ -928,8 +933,11 @@ update_NTT(lacpdu_payload_t *recvd_lacpdu, lacp_per_port_variables_t *plpinfo)
 
         // Transmit a LACPDU.
         LACP_async_transmit_lacpdu(plpinfo);
+        goto exit;
     }
 
+    ntt_set = FALSE;
+
     REXIT();
 
 exit:
@@ -937,6 +945,8 @@ exit:
     if (plpinfo->debug_level & DBG_RX_FSM) {
         RDBG("%s : exit\n", __FUNCTION__);
     }
+
+    return ntt_set;
 } // update_NTT
 
 /*----------------------------------------------------------------------
@@ -959,11 +969,17 @@ recordPDU(lacpdu_payload_t *recvd_lacpdu, lacp_per_port_variables_t *plpinfo)
     // Record the actor_port in the LACPDU as partner_oper_port_number
     // in the local system
     plpinfo->partner_oper_port_number = recvd_lacpdu->actor_port;
-    plpinfo->partner_oper_port_priority = recvd_lacpdu->actor_port_priority;
+    LACP_set_partner_oper_port_priority(plpinfo,
+                                        recvd_lacpdu->actor_port_priority);
 
-    memcpy((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
-           (char *)recvd_lacpdu->actor_system,
-           MAC_ADDR_LENGTH);
+    if (memcmp((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
+               (char *)recvd_lacpdu->actor_system,
+               MAC_ADDR_LENGTH) != 0) {
+        memcpy((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
+               (char *)recvd_lacpdu->actor_system,
+               MAC_ADDR_LENGTH);
+        LACP_MEMBER_CHANGED(plpinfo);
+    }
 
     plpinfo->partner_oper_system_variables.system_priority =
         recvd_lacpdu->actor_system_priority;
@@ -1085,6 +1101,7 @@ generate_mux_event_from_recordPdu(lacp_per_port_variables_t *plpinfo)
     //       is required to make an individual link not Tx/Rx data traffic.
     if (plpinfo->partner_oper_port_state.aggregation == INDIVIDUAL) {
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
         LACP_mux_fsm(E2,
                      plpinfo->mux_fsm_state,
                      plpinfo);
@@ -1199,12 +1216,17 @@ recordDefault(lacp_per_port_variables_t *plpinfo)
 
     plpinfo->partner_oper_port_number =
         plpinfo->partner_admin_port_number;
-    plpinfo->partner_oper_port_priority =
-        plpinfo->partner_admin_port_priority;
+    LACP_set_partner_oper_port_priority(plpinfo,
+                                        plpinfo->partner_admin_port_priority);
 
-    memcpy((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
-           (char *)plpinfo->partner_admin_system_variables.system_mac_addr,
-           MAC_ADDR_LENGTH);
+    if (memcmp((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
+               (char *)plpinfo->partner_admin_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH) != 0) {
+        memcpy((char *)plpinfo->partner_oper_system_variables.system_mac_addr,
+               (char *)plpinfo->partner_admin_system_variables.system_mac_addr,
+               MAC_ADDR_LENGTH);
+        LACP_MEMBER_CHANGED(plpinfo);
+    }
 
     plpinfo->partner_oper_system_variables.system_priority =
         plpinfo->partner_admin_system_variables.system_priority;
@@ -1268,6 +1290,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
         plpinfo->partner_admin_port_number) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine.
         LACP_mux_fsm(E2,
@@ -1280,6 +1303,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
         plpinfo->partner_admin_port_priority) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine.
         LACP_mux_fsm(E2,
@@ -1293,6 +1317,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
                MAC_ADDR_LENGTH)) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine.
         LACP_mux_fsm(E2,
@@ -1305,6 +1330,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
         plpinfo->partner_admin_system_variables.system_priority) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine
         LACP_mux_fsm(E2,
@@ -1316,6 +1342,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
     if (plpinfo->partner_oper_key != plpinfo->partner_admin_key) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine.
         LACP_mux_fsm(E2,
@@ -1328,6 +1355,7 @@ update_Default_Selected(lacp_per_port_variables_t *plpinfo)
         plpinfo->partner_admin_port_state.aggregation) {
 
         plpinfo->lacp_control.selected = UNSELECTED;
+        LACP_MEMBER_CHANGED(plpinfo);
 
         // Generate an event in the Mux state machine.
         LACP_mux_fsm(E2,
@@ -1354,6 +1382,10 @@ exit:
 void
 LACP_process_lacpdu(lacp_per_port_variables_t *plpinfo, void *data)
 {
+    u_char pdu[LACP_RX_FAST_PDU_SIZE];
+    lacp_rx_fast_state_t before;
+    lacp_rx_fast_state_t after;
+
     RENTRY();
 
     if (plpinfo->debug_level & DBG_RX_FSM) {
@@ -1368,10 +1400,46 @@ LACP_process_lacpdu(lacp_per_port_variables_t *plpinfo, void *data)
     // Increment the stats counter.
     plpinfo->lacp_pdus_received++;
 
+    rx_fast_copy_pdu(data, pdu);
+    rx_fast_copy_state(plpinfo, &before);
+
+    // Fast path: the partner repeated the LACPDU that last left this
+    // port unchanged, and nothing has changed the port since.  Running
+    // the machines again would only restart current_while.
+    if (plpinfo->rx_fast_valid &&
+        memcmp(pdu, plpinfo->rx_fast_pdu, sizeof(pdu)) == 0 &&
+        memcmp(&before, &plpinfo->rx_fast_state, sizeof(before)) == 0) {
+
+        plpinfo->lacp_pdus_fast_path++;
+        start_current_while_timer(plpinfo,
+                                  plpinfo->actor_oper_port_state.lacp_timeout);
+        REXIT();
+        return;
+    }
+
+    plpinfo->rx_fast_valid = FALSE;
+    plpinfo->rx_fast_ntt = TRUE;
+
     LACP_receive_fsm(E1,
                      plpinfo->recv_fsm_state,
                      data,
                      plpinfo);
+
+    // Arm the fast path if this LACPDU was a no-op: the port is current
+    // and attached to an aggregator, nothing had to be sent and none of
+    // the variables the machines act on has changed.
+    rx_fast_copy_state(plpinfo, &after);
+    if (plpinfo->rx_fast_ntt == FALSE &&
+        plpinfo->recv_fsm_state == RECV_FSM_CURRENT_STATE &&
+        plpinfo->lacp_control.selected == SELECTED &&
+        plpinfo->lag != NULL &&
+        memcmp(&before, &after, sizeof(after)) == 0) {
+
+        memcpy(plpinfo->rx_fast_pdu, pdu, sizeof(pdu));
+        plpinfo->rx_fast_state = after;
+        plpinfo->rx_fast_valid = TRUE;
+    }
+
     REXIT();
 
     if (plpinfo->debug_level & DBG_RX_FSM) {
@@ -1398,20 +1466,116 @@ start_current_while_timer(lacp_per_port_variables_t *plpinfo,
     }
 
     if (lacp_timeout == SHORT_TIMEOUT) {
-        timeout = SHORT_TIMEOUT_COUNT;
+        timeout = SHORT_TIMEOUT_TICKS;
 
     } else if (lacp_timeout == LONG_TIMEOUT) {
-        timeout = LONG_TIMEOUT_COUNT;
+        timeout = LACP_TIMER_SEC(LONG_TIMEOUT_COUNT);
     }
 
-    // Initialize the counter with the timeout value.
-    plpinfo->current_while_timer_expiry_counter = timeout;
+    // (Re)start the timer with the timeout value.
+    if (timeout > 0) {
+        lacp_timer_start(&lacp_rx_timer_wheel, &plpinfo->current_while_timer,
+                         timeout);
+    } else {
+        lacp_timer_stop(&lacp_rx_timer_wheel, &plpinfo->current_while_timer);
+    }
 
     if (plpinfo->debug_level & DBG_RX_FSM) {
         RDBG("%s : exit\n", __FUNCTION__);
     }
 } // start_current_while_timer
 
+/*----------------------------------------------------------------------
+ * Function: rx_fast_copy_pdu(recvd_lacpdu, pdu)
+ * Synopsis: Copies the actor, partner and collector TLVs of a LACPDU,
+ *           without the reserved bytes, for the receive fast path.
+ * Input  :
+ *           recvd_lacpdu = received LACPDU
+ *           pdu = LACP_RX_FAST_PDU_SIZE bytes to copy to
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+static void
+rx_fast_copy_pdu(lacpdu_payload_t *recvd_lacpdu, u_char *pdu)
+{
+    const u_char *base = (const u_char *)recvd_lacpdu;
+    size_t actor_len = offsetof(lacpdu_payload_t, reserved1) -
+                       offsetof(lacpdu_payload_t, subtype);
+    size_t partner_len = offsetof(lacpdu_payload_t, reserved2) -
+                         offsetof(lacpdu_payload_t, tlv_type_partner);
+    size_t collector_len = offsetof(lacpdu_payload_t, reserved3) -
+                           offsetof(lacpdu_payload_t, tlv_type_collector);
+
+    memcpy(pdu, base + offsetof(lacpdu_payload_t, subtype), actor_len);
+    pdu += actor_len;
+    memcpy(pdu, base + offsetof(lacpdu_payload_t, tlv_type_partner),
+           partner_len);
+    pdu += partner_len;
+    memcpy(pdu, base + offsetof(lacpdu_payload_t, tlv_type_collector),
+           collector_len);
+} // rx_fast_copy_pdu
+
+/*----------------------------------------------------------------------
+ * Function: rx_fast_copy_state(plpinfo, state)
+ * Synopsis: Takes a snapshot of the port variables a LACPDU is
+ *           processed against, for the receive fast path.
+ * Input  :
+ *           plpinfo = pointer to lport data
+ *           state = snapshot to fill in
+ * Returns:  void
+ *----------------------------------------------------------------------*/
+static void
+rx_fast_copy_state(lacp_per_port_variables_t *plpinfo,
+                   lacp_rx_fast_state_t *state)
+{
+    // Snapshots are compared with memcmp(), so clear the padding.
+    memset(state, 0, sizeof(*state));
+
+    state->actor_oper_port_number = plpinfo->actor_oper_port_number;
+    state->actor_oper_port_priority = plpinfo->actor_oper_port_priority;
+    state->actor_oper_port_key = plpinfo->actor_oper_port_key;
+    state->actor_oper_port_state = plpinfo->actor_oper_port_state;
+    memcpy(state->actor_oper_system_variables.system_mac_addr,
+           plpinfo->actor_oper_system_variables.system_mac_addr,
+           MAC_ADDR_LENGTH);
+    state->actor_oper_system_variables.system_priority =
+        plpinfo->actor_oper_system_variables.system_priority;
+    state->partner_oper_port_number = plpinfo->partner_oper_port_number;
+    state->partner_oper_port_priority = plpinfo->partner_oper_port_priority;
+    state->partner_oper_key = plpinfo->partner_oper_key;
+    state->partner_oper_port_state = plpinfo->partner_oper_port_state;
+    memcpy(state->partner_oper_system_variables.system_mac_addr,
+           plpinfo->partner_oper_system_variables.system_mac_addr,
+           MAC_ADDR_LENGTH);
+    state->partner_oper_system_variables.system_priority =
+        plpinfo->partner_oper_system_variables.system_priority;
+    state->lacp_control = plpinfo->lacp_control;
+    state->recv_fsm_state = plpinfo->recv_fsm_state;
+    state->mux_fsm_state = plpinfo->mux_fsm_state;
+    state->periodic_tx_fsm_state = plpinfo->periodic_tx_fsm_state;
+    state->prev_mux_fsm_state = plpinfo->prev_mux_fsm_state;
+    state->hw_attached_to_mux = plpinfo->hw_attached_to_mux;
+    state->hw_collecting = plpinfo->hw_collecting;
+    state->collector_max_delay = plpinfo->collector_max_delay;
+    state->fallback_enabled = plpinfo->fallback_enabled;
+    state->port_type = plpinfo->port_type;
+    state->lag = plpinfo->lag;
+    state->sport_handle = plpinfo->sport_handle;
+    state->sport_members = plpinfo->sport_members;
+
+    // Selection and the mux machine also depend on the other ports in
+    // the LAG and on the aggregator, which change without going through
+    // this one; their generation counters move when they do.
+    if (plpinfo->lag != NULL) {
+        state->lag_gen = plpinfo->lag->gen;
+        state->lag_loop_back = plpinfo->lag->loop_back;
+    }
+    if (plpinfo->sport_members != NULL) {
+        state->sport_gen = plpinfo->sport_members->gen;
+        state->sport_partner_best_priority =
+            plpinfo->sport_members->partner_best_priority;
+    }
+} // rx_fast_copy_state
+
 /*----------------------------------------------------------------------
  * Function: format_state(state)
  * Synopsis:
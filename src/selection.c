@@ -44,8 +44,6 @@ VLOG_DEFINE_THIS_MODULE(selection);
 //*************************************************************
 struct NList *mlacp_lag_tuple_list;
 
-extern int lacp_lag_port_match(void *, void *);
-
 /*****************************************************************************
  *          Prototypes for static functions
  ****************************************************************************/
@@ -121,16 +119,93 @@ compare_lag_id(LAG_Id_t *first_lag_id, LAG_Id_t *second_lag_id)
     return TRUE;
 } // compare_lag_id
 
-int
-compare_port_handle(void* lag_port_struct1, void* lag_port_struct2)
+//******************************************************************
+// LAG member set
+//
+// Port numbers are small and dense, so they hash well as they are.
+//******************************************************************
+#define LAG_MEMBER_BUCKET(lag, lport_handle) \
+    (&(lag)->member_hash[PM_HANDLE2PORT(lport_handle) & \
+                         (LACP_LAG_MEMBER_BUCKETS - 1)])
+
+lacp_lag_ppstruct_t *
+LAG_member_find(LAG_t *const lag, port_handle_t lport_handle)
 {
-    if (((lacp_lag_ppstruct_t *)lag_port_struct1)->lport_handle >
-        ((lacp_lag_ppstruct_t *)lag_port_struct2)->lport_handle) {
-        return 1;
-    } else {
-        return -1;
+    lacp_lag_ppstruct_t *member;
+
+    for (member = *LAG_MEMBER_BUCKET(lag, lport_handle);
+         member != NULL;
+         member = member->hash_next) {
+        if (member->lport_handle == lport_handle) {
+            return member;
+        }
+    }
+
+    return NULL;
+} // LAG_member_find
+
+lacp_lag_ppstruct_t *
+LAG_member_add(LAG_t *const lag, lacp_per_port_variables_t *lacp_port)
+{
+    lacp_lag_ppstruct_t **bucket;
+    lacp_lag_ppstruct_t *member;
+
+    member = calloc(1, sizeof(lacp_lag_ppstruct_t));
+    if (member == NULL) {
+        VLOG_FATAL("%s : out of memory", __FUNCTION__);
+        exit(-1);
     }
-} // compare_port_handle
+    member->lport_handle = lacp_port->lport_handle;
+    member->plpinfo = lacp_port;
+
+    bucket = LAG_MEMBER_BUCKET(lag, member->lport_handle);
+    member->hash_next = *bucket;
+    *bucket = member;
+
+    member->next = lag->members;
+    if (member->next != NULL) {
+        member->next->pprev = &member->next;
+    }
+    member->pprev = &lag->members;
+    lag->members = member;
+
+    lag->member_count++;
+    lag->gen++;
+    lacp_port->rx_fast_valid = FALSE;
+
+    // wait_while only runs while the port is in its LAG.
+    if (lacp_port->lacp_up == TRUE) {
+        lacp_timer_resume(&lacp_tx_timer_wheel, &lacp_port->wait_while_timer);
+    }
+
+    return member;
+} // LAG_member_add
+
+void
+LAG_member_remove(LAG_t *const lag, lacp_lag_ppstruct_t *member)
+{
+    lacp_lag_ppstruct_t **pmember;
+
+    for (pmember = LAG_MEMBER_BUCKET(lag, member->lport_handle);
+         *pmember != NULL;
+         pmember = &(*pmember)->hash_next) {
+        if (*pmember == member) {
+            *pmember = member->hash_next;
+            break;
+        }
+    }
+
+    *member->pprev = member->next;
+    if (member->next != NULL) {
+        member->next->pprev = member->pprev;
+    }
+
+    lag->member_count--;
+    lag->gen++;
+    member->plpinfo->rx_fast_valid = FALSE;
+    lacp_timer_pause(&lacp_tx_timer_wheel, &member->plpinfo->wait_while_timer);
+    free(member);
+} // LAG_member_remove
 
 //******************************************************************
 // Function : LAG_selection
@@ -141,9 +216,10 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
     int lock;
     LAG_Id_t *lagId;
     LAG_t *lag;
+    LAG_t *candidate;
     lacp_per_port_variables_t *plp;
+    lacp_lag_ppstruct_t *member;
     lacp_lag_ppstruct_t *plag_port_struct = NULL;
-    struct NList *pdummy;
 
     RENTRY();
 
@@ -186,43 +262,40 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
                  lacp_port->lport_handle);
         }
 
-        for (plp = LACP_AVL_FIRST(lacp_per_port_vars_tree);
-             plp;
-             plp = LACP_AVL_NEXT(plp->avlnode))
-        {
-            if (!plp->lag) {
-                continue;
-            }
-
-            if (plp->lag->port_type != lacp_port->port_type) {
-                continue;
-            }
+        // Look for a LAG of the same port type and LAG id, visiting each
+        // LAG once rather than each port.
+        N_LIST_FOREACH(mlacp_lag_tuple_list, candidate) {
+            if (candidate->port_type == lacp_port->port_type) {
 
-            if (lacp_port->debug_level & DBG_SELECT) {
-                print_lag_id(plp->lag->LAG_Id);
-            }
+                if (lacp_port->debug_level & DBG_SELECT) {
+                    print_lag_id(candidate->LAG_Id);
+                }
 
-            // OpenSwitch: if partner info has not been received, treat it
-            //        as no match.  We need this since we're automating
-            //        LACP management.  We'll always try to LAG up if
-            //        possible, but if far end doesn't run LACP, we
-            //        cannot allow the two to LAG up; otherwise, it
-            //        results in a LAG being created on our end, but
-            //        two separate ports on the far end, causing loss
-            //        of traffic.
-            if (0 == memcmp(plp->partner_oper_system_variables.system_mac_addr,
-                            default_partner_system_mac,
-                            MAC_ADDR_LENGTH)) {
-                continue;
+                if (compare_lag_id(candidate->LAG_Id, lagId) == TRUE) {
+                    // OpenSwitch: if partner info has not been received,
+                    //        treat it as no match.  We need this since
+                    //        we're automating LACP management.  We'll
+                    //        always try to LAG up if possible, but if far
+                    //        end doesn't run LACP, we cannot allow the two
+                    //        to LAG up; otherwise, it results in a LAG
+                    //        being created on our end, but two separate
+                    //        ports on the far end, causing loss of traffic.
+                    LAG_MEMBER_FOREACH(candidate, member) {
+                        plp = member->plpinfo;
+                        if (memcmp(plp->partner_oper_system_variables.system_mac_addr,
+                                   default_partner_system_mac,
+                                   MAC_ADDR_LENGTH) != 0) {
+                            lag = candidate;
+                            break;
+                        }
+                    }
+                }
             }
 
-            if (compare_lag_id(plp->lag->LAG_Id, lagId) == FALSE) {
-                continue;
+            if (lag != NULL) {
+                break;
             }
-
-            lag = plp->lag;
-            break;
-        }
+        } N_LIST_FOREACH_END(mlacp_lag_tuple_list, candidate);
 
         /*2*/
         if (lag == NULL) {
@@ -248,15 +321,7 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
             lag->LAG_Id = lagId;
             lag->loop_back = loop_back_check(lacp_port) ? TRUE : FALSE;
 
-            plag_port_struct = calloc(1, sizeof(lacp_lag_ppstruct_t));
-            if (plag_port_struct == NULL) {
-                VLOG_FATAL("%s : out of memory", __FUNCTION__);
-                exit(-1);
-            }
-            plag_port_struct->lport_handle = lacp_port->lport_handle;
-            lag->pplist = n_list_insert_sorted(lag->pplist,
-                                               (void *)plag_port_struct,
-                                               compare_port_handle);
+            LAG_member_add(lag, lacp_port);
             lacp_port->lag = lag;
 
             //*************************************************************
@@ -288,9 +353,7 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
                  lacp_port->lport_handle);
         }
 
-        if (n_list_find_data(lag->pplist,
-                             &lacp_lag_port_match,
-                             &lacp_port->lport_handle) == NULL) {
+        if (LAG_member_find(lag, lacp_port->lport_handle) == NULL) {
 
              // Add the port to the LAG, only if this port is not
              // a loop back and not a partner port to any of the
@@ -301,15 +364,7 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
                 lacp_port->actor_oper_port_state.aggregation == AGGREGATABLE &&
                 lacp_port->partner_oper_port_state.aggregation == AGGREGATABLE) {
 
-                plag_port_struct = calloc(1, sizeof(lacp_lag_ppstruct_t));
-                if (plag_port_struct == NULL) {
-                    VLOG_FATAL("%s : out of memory", __FUNCTION__);
-                    exit(-1);
-                }
-                plag_port_struct->lport_handle = lacp_port->lport_handle;
-                lag->pplist = n_list_insert_sorted(lag->pplist,
-                                                   (void *)plag_port_struct,
-                                                   compare_port_handle);
+                LAG_member_add(lag, lacp_port);
                 lacp_port->lag = lag;
                 if (lacp_port->debug_level & DBG_SELECT) {
                     RDBG("%s : Port (0x%llx) Added to Existing LAG\n",
@@ -349,12 +404,7 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
     // removed and the super port cleaned allowing the interface to attach to a
     // default partner
 
-    pdummy = n_list_find_data(lag->pplist,
-                              &lacp_lag_port_match,
-                              &lacp_port->lport_handle);
-    if (pdummy != NULL) {
-        plag_port_struct = pdummy->data;
-    }
+    plag_port_struct = LAG_member_find(lag, lacp_port->lport_handle);
 
     if (plag_port_struct &&
         (((lag->loop_back = loop_back_check(lacp_port)) == TRUE) ||
@@ -369,14 +419,15 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
                      lacp_port);
 
         lacp_port->lacp_control.ready_n = FALSE;
-        lag->pplist =  n_list_remove_data(lag->pplist, plag_port_struct);
+        LACP_MEMBER_CHANGED(lacp_port);
+        LAG_member_remove(lag, plag_port_struct);
 
         if (lacp_port->debug_level & DBG_SELECT) {
             RDBG("%s : Port (0x%llx) Removed from current LAG\n",
                  __FUNCTION__, lacp_port->lport_handle);
         }
 
-        if (lag->pplist == NULL) {
+        if (lag->member_count == 0) {
             // It was the last port in the LAG, remove the whole LAG.
 
             // OpenSwitch: clear out sport params so it can be reused later.
@@ -396,9 +447,9 @@ LAG_selection(lacp_per_port_variables_t *lacp_port)
             // --- OpenSwitch: DEBUG ONLY ---
             lacp_lag_ppstruct_t *ptmp;
             RDBG("LAG.%d not empty:  ", (int)PM_HANDLE2LAG(lag->sp_handle));
-            N_LIST_FOREACH(lag->pplist, ptmp) {
+            LAG_MEMBER_FOREACH(lag, ptmp) {
                 RDBG("      0x%llx", ptmp->lport_handle);
-            } N_LIST_FOREACH_END(lag->pplist, ptmp);
+            }
         }
 
         lacp_port->lag = NULL;
@@ -454,6 +505,7 @@ LAG_select_aggregator(LAG_t *const lag, lacp_per_port_variables_t *lacp_port)
 
     if (mlacp_blocking_send_select_aggregator(lag,lacp_port) == R_SUCCESS) {
         lacp_port->lacp_control.selected = SELECTED;
+        LACP_MEMBER_CHANGED(lacp_port);
         // OpenSwitch: Save handle for clearing later.
         lag->sp_handle = lacp_port->sport_handle;
         LACP_mux_fsm(E1,
@@ -476,20 +528,17 @@ is_port_partner_port(port_handle_t lport_handle, LAG_t *const lag)
 
     RDEBUG(DL_SELECT, "%s : lport_handle 0x%llx\n", __FUNCTION__, lport_handle);
 
-    if (!lag || lag->pplist == NULL) {
+    // Only a member of the LAG can be a partner port in it.  The check
+    // does not depend on the port being visited, so it is made once,
+    // through the LAG's member hash, rather than for every port.
+    if (!lag || lag->member_count == 0 ||
+        LAG_member_find(lag, lport_handle) == NULL) {
         return 0;
     }
 
     for (plpinfo = LACP_AVL_FIRST(lacp_per_port_vars_tree);
          plpinfo;
          plpinfo = LACP_AVL_NEXT(plpinfo->avlnode)) {
-        if (n_list_find_data(lag->pplist,
-                             &lacp_lag_port_match,
-                             &lport_handle) == NULL)
-        {
-            continue;
-        }
-
         if (plpinfo->partner_oper_port_number == plpinfo->actor_admin_port_number) {
              return 1;
         }
@@ -0,0 +1,149 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * idpool_test.c
+ *
+ *   Unit test for the LAG id and interface index allocator in
+ *   src/lacp_idpool.c.  For the pools lacpd uses (LAG ids 1 to 128,
+ *   interface indexes 0 to PM_MAX_PORTS - 1) and for larger ones,
+ *   checks that the lowest free id is handed out, freed ids are reused
+ *   lowest first, exhaustion is reported and bad frees are rejected.
+ *
+ *   Exits with 0 if every check passes.
+ */
+
+#include <stdio.h>
+#include <errno.h>
+
+#include "lacp_idpool.h"
+#include "pm_cmn.h"
+
+typedef struct idpool_test_case {
+    unsigned int    min;
+    unsigned int    max;
+} idpool_test_case_t;
+
+static const idpool_test_case_t idpool_tests[] = {
+    { 1, 128 },                 /* LAG ids. */
+    { 0, PM_MAX_PORTS - 1 },    /* Interface indexes. */
+    { 1, 64 },                  /* Exactly one word. */
+    { 1, 1024 },
+    { 1, 4096 },
+    { 1, 65535 },
+};
+
+static int idpool_failures;
+
+#define IDPOOL_CHECK(tc, cond)                                           \
+    do {                                                                 \
+        if (!(cond)) {                                                   \
+            fprintf(stderr, "ids %u-%u: %s:%d: check failed: %s\n",      \
+                    (tc)->min, (tc)->max, __FILE__, __LINE__, #cond);    \
+            idpool_failures++;                                           \
+            goto out;                                                    \
+        }                                                                \
+    } while (0)
+
+static void
+idpool_test(const idpool_test_case_t *tc)
+{
+    unsigned int size = tc->max - tc->min + 1;
+    unsigned int mid = tc->min + size / 2;
+    lacp_idpool_t pool;
+    unsigned int id;
+    unsigned int i;
+
+    if (lacp_idpool_init(&pool, tc->min, tc->max)) {
+        fprintf(stderr, "ids %u-%u: lacp_idpool_init failed\n",
+                tc->min, tc->max);
+        idpool_failures++;
+        return;
+    }
+
+    // Lowest free id first, until the pool is exhausted.
+    for (i = tc->min; i <= tc->max; i++) {
+        IDPOOL_CHECK(tc, !lacp_idpool_alloc(&pool, &id) && (id == i));
+    }
+    IDPOOL_CHECK(tc, lacp_idpool_alloc(&pool, &id) == ENOSPC);
+    IDPOOL_CHECK(tc, pool.p_count == size);
+
+    // Freed ids come back lowest first.
+    IDPOOL_CHECK(tc, !lacp_idpool_free(&pool, tc->max));
+    IDPOOL_CHECK(tc, !lacp_idpool_free(&pool, mid));
+    IDPOOL_CHECK(tc, !lacp_idpool_free(&pool, tc->min));
+    IDPOOL_CHECK(tc, !lacp_idpool_alloc(&pool, &id) && (id == tc->min));
+    IDPOOL_CHECK(tc, !lacp_idpool_alloc(&pool, &id) && (id == mid));
+    IDPOOL_CHECK(tc, !lacp_idpool_alloc(&pool, &id) && (id == tc->max));
+    IDPOOL_CHECK(tc, lacp_idpool_alloc(&pool, &id) == ENOSPC);
+
+    // Bad frees leave the pool alone.
+    if (tc->min > 0) {
+        IDPOOL_CHECK(tc, lacp_idpool_free(&pool, tc->min - 1) == EINVAL);
+    }
+    IDPOOL_CHECK(tc, lacp_idpool_free(&pool, tc->max + 1) == EINVAL);
+    IDPOOL_CHECK(tc, !lacp_idpool_free(&pool, tc->min + 1));
+    IDPOOL_CHECK(tc, lacp_idpool_free(&pool, tc->min + 1) == ENOENT);
+    IDPOOL_CHECK(tc, !lacp_idpool_in_use(&pool, tc->min + 1));
+    IDPOOL_CHECK(tc, lacp_idpool_in_use(&pool, tc->min + 2));
+    IDPOOL_CHECK(tc, pool.p_count == size - 1);
+
+    // Everything freed, the pool starts over from the lowest id.
+    for (i = tc->min; i <= tc->max; i++) {
+        if (i != tc->min + 1) {
+            IDPOOL_CHECK(tc, !lacp_idpool_free(&pool, i));
+        }
+    }
+    IDPOOL_CHECK(tc, pool.p_count == 0);
+    IDPOOL_CHECK(tc, !lacp_idpool_alloc(&pool, &id) && (id == tc->min));
+
+out:
+    lacp_idpool_destroy(&pool);
+} /* idpool_test */
+
+static void
+idpool_test_bad_range(void)
+{
+    lacp_idpool_t pool;
+    unsigned int id;
+
+    // An empty range is rejected, and leaves a pool that allocates nothing.
+    if ((lacp_idpool_init(&pool, 2, 1) != EINVAL) ||
+        (lacp_idpool_alloc(&pool, &id) != EINVAL)) {
+        fprintf(stderr, "ids 2-1: not rejected\n");
+        idpool_failures++;
+    }
+} /* idpool_test_bad_range */
+
+int
+main(void)
+{
+    unsigned int i;
+
+    for (i = 0; i < sizeof(idpool_tests) / sizeof(idpool_tests[0]); i++) {
+        idpool_test(&idpool_tests[i]);
+    }
+
+    idpool_test_bad_range();
+
+    if (idpool_failures) {
+        fprintf(stderr, "idpool_test: %d failures\n", idpool_failures);
+        return 1;
+    }
+
+    printf("idpool_test: all checks passed\n");
+    return 0;
+} /* main */
@@ -0,0 +1,255 @@
+/*
+ * (c) Copyright 2016 Hewlett Packard Enterprise Development LP
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License"); you may
+ * not use this file except in compliance with the License. You may obtain
+ * a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+ * WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+ * License for the specific language governing permissions and limitations
+ * under the License.
+ */
+
+/*
+ * timer_test.c
+ *
+ *   Unit test for the LACP timer wheel in src/lacp_timer.c.  Drives the
+ *   wheel the way the protocol thread does, advancing it straight to the
+ *   tick lacp_timer_wheel_next() reports, and checks that every timer,
+ *   whether due within the first lap, on a later lap or beyond the
+ *   second level, fires exactly on its tick, that stopped or restarted
+ *   timers do not fire early and that held timers keep their ticks.
+ *
+ *   Exits with 0 if every check passes.
+ */
+
+#include <stdio.h>
+#include <errno.h>
+
+#include "lacp_timer.h"
+
+#define TIMER_TEST_COUNT    8
+
+typedef struct timer_test_port {
+    lacp_timer_t        timer;
+    unsigned long long  due;        /* Tick the timer should fire on. */
+    unsigned long long  fired;      /* Tick it fired on, 0 if it has not. */
+    unsigned int        period;     /* Restarted with this when non zero. */
+    int                 count;
+} timer_test_port_t;
+
+static lacp_timer_wheel_t timer_test_wheel;
+static timer_test_port_t timer_test_ports[TIMER_TEST_COUNT];
+static int timer_failures;
+
+#define TIMER_CHECK(cond)                                                \
+    do {                                                                 \
+        if (!(cond)) {                                                   \
+            fprintf(stderr, "%s:%d: check failed: %s\n",                 \
+                    __FILE__, __LINE__, #cond);                          \
+            timer_failures++;                                            \
+        }                                                                \
+    } while (0)
+
+static void
+timer_test_expiry(void *arg)
+{
+    timer_test_port_t *port = arg;
+
+    TIMER_CHECK(timer_test_wheel.w_now == port->due);
+    port->fired = timer_test_wheel.w_now;
+    port->count++;
+
+    if (port->period != 0) {
+        port->due = timer_test_wheel.w_now + port->period;
+        lacp_timer_start(&timer_test_wheel, &port->timer, port->period);
+    }
+} /* timer_test_expiry */
+
+static void
+timer_test_start(timer_test_port_t *port, unsigned int ticks)
+{
+    port->due = timer_test_wheel.w_now + (ticks ? ticks : 1);
+    port->fired = 0;
+    lacp_timer_start(&timer_test_wheel, &port->timer, ticks);
+} /* timer_test_start */
+
+/* Advances the wheel from one next timer to the other until 'until'. */
+static void
+timer_test_run(unsigned long long until)
+{
+    unsigned long long next;
+
+    while (timer_test_wheel.w_now < until) {
+        if (lacp_timer_wheel_next(&timer_test_wheel, &next) != 0) {
+            TIMER_CHECK(timer_test_wheel.w_armed == 0);
+            next = until;
+        }
+        TIMER_CHECK(next > timer_test_wheel.w_now);
+        if (next > until) {
+            next = until;
+        }
+        lacp_timer_wheel_advance(&timer_test_wheel,
+                                 (unsigned int)(next - timer_test_wheel.w_now));
+    }
+} /* timer_test_run */
+
+static void
+timer_test_one_shot(void)
+{
+    static const unsigned int ticks[TIMER_TEST_COUNT] = {
+        0,                                              /* Next tick. */
+        LACP_TIMER_MS(900),                             /* Fast periodic. */
+        LACP_TIMER_WHEEL_SIZE - 1,                      /* End of the lap. */
+        LACP_TIMER_WHEEL_SIZE,                          /* Second level. */
+        LACP_TIMER_SEC(30),                             /* Slow periodic. */
+        LACP_TIMER_SEC(90),                             /* Long timeout. */
+        LACP_TIMER_WHEEL_SIZE * LACP_TIMER_WHEEL_LAPS,  /* Beyond it. */
+        LACP_TIMER_WHEEL_SIZE * LACP_TIMER_WHEEL_LAPS * 2 + 7,
+    };
+    unsigned long long next;
+    unsigned long long last = 0;
+    int i;
+
+    lacp_timer_wheel_init(&timer_test_wheel);
+
+    // Start off the first lap, so the laps do not line up with the ticks.
+    lacp_timer_wheel_advance(&timer_test_wheel, 300);
+
+    for (i = 0; i < TIMER_TEST_COUNT; i++) {
+        lacp_timer_init(&timer_test_ports[i].timer, timer_test_expiry,
+                        &timer_test_ports[i]);
+        timer_test_ports[i].period = 0;
+        timer_test_ports[i].count = 0;
+        timer_test_start(&timer_test_ports[i], ticks[i]);
+        if (timer_test_ports[i].due > last) {
+            last = timer_test_ports[i].due;
+        }
+    }
+    TIMER_CHECK(timer_test_wheel.w_armed == TIMER_TEST_COUNT);
+
+    // The next timer due is reported exactly while it is in the lap.
+    TIMER_CHECK(lacp_timer_wheel_next(&timer_test_wheel, &next) == 0);
+    TIMER_CHECK(next == timer_test_ports[0].due);
+
+    // Stopped timers do not fire; restarted ones fire on the new tick.
+    lacp_timer_stop(&timer_test_wheel, &timer_test_ports[1].timer);
+    TIMER_CHECK(!lacp_timer_pending(&timer_test_ports[1].timer));
+    timer_test_start(&timer_test_ports[2], LACP_TIMER_SEC(40));
+    if (timer_test_ports[2].due > last) {
+        last = timer_test_ports[2].due;
+    }
+
+    timer_test_run(last);
+
+    for (i = 0; i < TIMER_TEST_COUNT; i++) {
+        if (i == 1) {
+            TIMER_CHECK(timer_test_ports[i].count == 0);
+        } else {
+            TIMER_CHECK(timer_test_ports[i].count == 1);
+            TIMER_CHECK(timer_test_ports[i].fired == timer_test_ports[i].due);
+        }
+    }
+    TIMER_CHECK(timer_test_wheel.w_armed == 0);
+    TIMER_CHECK(lacp_timer_wheel_next(&timer_test_wheel, &next) == ENOENT);
+} /* timer_test_one_shot */
+
+static void
+timer_test_periodic(void)
+{
+    static const unsigned int periods[TIMER_TEST_COUNT] = {
+        LACP_TIMER_SEC(1), LACP_TIMER_SEC(1), LACP_TIMER_SEC(2),
+        LACP_TIMER_SEC(3), LACP_TIMER_SEC(30), LACP_TIMER_SEC(30),
+        LACP_TIMER_SEC(90), LACP_TIMER_WHEEL_SIZE,
+    };
+    unsigned long long start;
+    unsigned long long end;
+    int i;
+
+    lacp_timer_wheel_init(&timer_test_wheel);
+
+    for (i = 0; i < TIMER_TEST_COUNT; i++) {
+        lacp_timer_init(&timer_test_ports[i].timer, timer_test_expiry,
+                        &timer_test_ports[i]);
+        timer_test_ports[i].period = periods[i];
+        timer_test_ports[i].count = 0;
+        timer_test_start(&timer_test_ports[i], periods[i] - i);
+    }
+
+    // Ten minutes of handlers restarting their own timers.
+    start = timer_test_wheel.w_now;
+    end = start + LACP_TIMER_SEC(600);
+    timer_test_run(end);
+
+    for (i = 0; i < TIMER_TEST_COUNT; i++) {
+        TIMER_CHECK(timer_test_ports[i].count ==
+                    (int)((end - (start + periods[i] - i)) / periods[i] + 1));
+        TIMER_CHECK(lacp_timer_pending(&timer_test_ports[i].timer));
+        lacp_timer_stop(&timer_test_wheel, &timer_test_ports[i].timer);
+    }
+    TIMER_CHECK(timer_test_wheel.w_armed == 0);
+} /* timer_test_periodic */
+
+static void
+timer_test_hold(void)
+{
+    timer_test_port_t *port = &timer_test_ports[0];
+
+    lacp_timer_wheel_init(&timer_test_wheel);
+    lacp_timer_init(&port->timer, timer_test_expiry, port);
+    port->period = 0;
+    port->count = 0;
+
+    // A paused timer keeps the ticks it had left while it is held.
+    timer_test_start(port, 500);
+    timer_test_run(200);
+    lacp_timer_pause(&timer_test_wheel, &port->timer);
+    TIMER_CHECK(!lacp_timer_pending(&port->timer));
+    TIMER_CHECK(timer_test_wheel.w_armed == 0);
+    timer_test_run(5000);
+    TIMER_CHECK(port->count == 0);
+
+    port->due = timer_test_wheel.w_now + 300;
+    lacp_timer_resume(&timer_test_wheel, &port->timer);
+    TIMER_CHECK(lacp_timer_pending(&port->timer));
+    timer_test_run(port->due);
+    TIMER_CHECK(port->count == 1);
+
+    // Resuming a timer that is not held, or was stopped, does nothing.
+    lacp_timer_resume(&timer_test_wheel, &port->timer);
+    TIMER_CHECK(!lacp_timer_pending(&port->timer));
+    lacp_timer_hold(&timer_test_wheel, &port->timer, 100);
+    lacp_timer_stop(&timer_test_wheel, &port->timer);
+    lacp_timer_resume(&timer_test_wheel, &port->timer);
+    TIMER_CHECK(!lacp_timer_pending(&port->timer));
+
+    // A timer held with the ticks it was started for serves them again.
+    timer_test_start(port, LACP_TIMER_SEC(2));
+    timer_test_run(port->due);
+    TIMER_CHECK(port->count == 2);
+    lacp_timer_hold(&timer_test_wheel, &port->timer, port->timer.t_ticks);
+    port->due = timer_test_wheel.w_now + LACP_TIMER_SEC(2);
+    lacp_timer_resume(&timer_test_wheel, &port->timer);
+    timer_test_run(port->due);
+    TIMER_CHECK(port->count == 3);
+} /* timer_test_hold */
+
+int
+main(void)
+{
+    timer_test_one_shot();
+    timer_test_periodic();
+    timer_test_hold();
+
+    if (timer_failures) {
+        fprintf(stderr, "timer_test: %d failures\n", timer_failures);
+        return 1;
+    }
+
+    printf("timer_test: all checks passed\n");
+    return 0;
+} /* main */